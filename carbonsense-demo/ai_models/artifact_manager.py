@@ -0,0 +1,279 @@
+"""
+CarbonSense AI - Model Artifact Manager
+Process-wide, load-once access to model files verified against a checksum manifest
+"""
+
+import os
+import io
+import json
+import hashlib
+import tempfile
+import threading
+import time
+
+from compact_forest import COMPACT_DIR, load_bundle as load_compact_bundle
+
+ARTIFACT_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_NAME = 'artifact_manifest.json'
+
+# Directory holding the compact exports of pickles stored outside ARTIFACT_DIR
+COMPACT_SUBDIR = 'compact'
+
+# Models trained at runtime (e.g. soil models missing from the bundle) are saved here with their own
+# manifest, outside the tracked ai_models/ directory whose bundled artifacts are only read
+RUNTIME_DIR = os.path.abspath(os.environ.get('CARBONSENSE_RUNTIME_MODEL_DIR',
+                                             os.path.join(os.path.dirname(ARTIFACT_DIR), '.model_cache')))
+
+# 'pickle' unpickles private copies; 'mmap' opens the compact export so workers share pages
+MODEL_FORMAT = os.environ.get('CARBONSENSE_MODEL_FORMAT', 'pickle').lower()
+
+# Files that make up the fuel/emission optimizer
+OPTIMIZER_ARTIFACTS = {
+    'fuel_model': '_fuel_model.pkl',
+    'emission_model': '_emission_model.pkl',
+    'scaler': '_scaler.pkl',
+    'features': '_features.json'
+}
+
+def sha256_file(path, block_size=1 << 20):
+    """SHA-256 of a file, read in blocks so large models are never fully resident"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ArtifactManager:
+    """
+    Loads each model artifact at most once per process and shares it read-only
+
+    Artifacts are checked against the SHA-256 recorded in the manifest instead of
+    running a test prediction. Callers must treat the returned objects as immutable:
+    retraining builds new estimators and registers them with register().
+    """
+
+    def __init__(self, base_dir=ARTIFACT_DIR, manifest_name=MANIFEST_NAME, model_format=MODEL_FORMAT,
+                 compact_dir=None):
+        self.base_dir = os.path.abspath(base_dir)
+        self.model_format = model_format
+        # The bundled compact exports live in ai_models/compact, any other directory keeps its own
+        if compact_dir is None:
+            compact_dir = COMPACT_DIR if self.base_dir == ARTIFACT_DIR else os.path.join(self.base_dir, 'compact')
+        self.compact_dir = compact_dir
+        self.manifest_path = os.path.join(self.base_dir, manifest_name)
+        self._cache = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._manifest = self._read_manifest()
+        self.load_counts = {}
+        self.load_seconds = {}
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f).get('artifacts', {})
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _key(self, path):
+        """Absolute path for cache lookups and the manifest name relative to base_dir"""
+        full_path = os.path.abspath(path if os.path.isabs(path) else os.path.join(self.base_dir, path))
+        name = os.path.relpath(full_path, self.base_dir).replace(os.sep, '/')
+        return full_path, name
+
+    def _artifact_lock(self, full_path):
+        with self._lock:
+            return self._locks.setdefault(full_path, threading.Lock())
+
+    def _check_digest(self, name, digest):
+        expected = self._manifest.get(name, {}).get('sha256')
+        if expected and expected != digest:
+            raise ValueError(f"Checksum mismatch for {name}: manifest {expected[:12]}…, file {digest[:12]}…")
+        return expected is not None
+
+    def get(self, path):
+        """
+        Return the loaded artifact, reading and verifying it on first use only
+
+        Args:
+            path (str): File name relative to the artifact directory, or an absolute path
+
+        Returns:
+            object: The unpickled estimator/scaler, or parsed JSON
+        """
+        full_path, name = self._key(path)
+        if full_path in self._cache:
+            return self._cache[full_path]
+
+        with self._artifact_lock(full_path):
+            # Another thread may have finished loading while we waited
+            if full_path in self._cache:
+                return self._cache[full_path]
+
+            started = time.perf_counter()
+            with open(full_path, 'rb') as f:
+                raw = f.read()
+            self._check_digest(name, hashlib.sha256(raw).hexdigest())
+            if full_path.endswith('.json'):
+                artifact = json.loads(raw.decode('utf-8'))
+            else:
+                # joblib (and the scikit-learn classes it unpickles) load on the first pickle read
+                import joblib
+                artifact = joblib.load(io.BytesIO(raw))
+
+            self._cache[full_path] = artifact
+            self.load_counts[name] = self.load_counts.get(name, 0) + 1
+            self.load_seconds[name] = round(time.perf_counter() - started, 4)
+            return artifact
+
+    def load_bundle(self, path_prefix, model_format=None, require_compact=False):
+        """
+        Load the optimizer artifacts sharing a path prefix (e.g. ai_models/carbonsense)
+
+        In 'mmap' format the compact export of that prefix (compact_bundle_path) is used when
+        present, so the tree arrays are shared file mappings rather than per-process unpickled
+        objects. require_compact raises instead of falling back to the pickles.
+        """
+        if (model_format or self.model_format) == 'mmap':
+            bundle_dir = self.compact_bundle_path(path_prefix)
+            if os.path.exists(os.path.join(bundle_dir, 'bundle.json')):
+                return self.get_compact(bundle_dir)
+            if require_compact:
+                raise FileNotFoundError(f"No compact export at {bundle_dir}")
+            print(f"⚠️ No compact export at {bundle_dir}, falling back to pickled models")
+        return {key: self.get(f"{path_prefix}{suffix}") for key, suffix in OPTIMIZER_ARTIFACTS.items()}
+
+    def compact_path(self, name):
+        return os.path.join(self.compact_dir, name)
+
+    def compact_bundle_path(self, path_prefix):
+        """
+        Compact export of the pickles at path_prefix: compact_dir/<name> for prefixes in base_dir,
+        otherwise compact/<name> next to the pickles (e.g. inside a registry version directory)
+        """
+        directory, name = os.path.split(os.path.abspath(path_prefix))
+        if directory == self.base_dir:
+            return self.compact_path(name)
+        return os.path.join(directory, COMPACT_SUBDIR, name)
+
+    def get_compact(self, bundle_dir):
+        """Open a compact (memory-mapped) export once and share it like any other artifact"""
+        key = f"compact:{os.path.abspath(bundle_dir)}"
+        if key in self._cache:
+            return self._cache[key]
+        with self._artifact_lock(key):
+            if key not in self._cache:
+                started = time.perf_counter()
+                self._cache[key] = load_compact_bundle(bundle_dir)
+                name = os.path.relpath(bundle_dir, self.base_dir).replace(os.sep, '/')
+                self.load_counts[name] = self.load_counts.get(name, 0) + 1
+                self.load_seconds[name] = round(time.perf_counter() - started, 4)
+            return self._cache[key]
+
+    def bundle_paths(self, path_prefix):
+        return [f"{path_prefix}{suffix}" for suffix in OPTIMIZER_ARTIFACTS.values()]
+
+    def verify(self, path):
+        """
+        Check that an artifact exists and matches its manifest checksum without unpickling it
+
+        Returns:
+            str: 'verified', or 'unlisted' when the manifest has no entry for the file
+        """
+        full_path, name = self._key(path)
+        if not os.path.exists(full_path):
+            raise FileNotFoundError(f"Missing model artifact: {name}")
+        if full_path in self._cache:
+            return 'verified' if name in self._manifest else 'unlisted'
+        return 'verified' if self._check_digest(name, sha256_file(full_path)) else 'unlisted'
+
+    def verify_all(self, paths):
+        """Verify several artifacts, reporting every missing file at once"""
+        missing = [self._key(path)[1] for path in paths if not os.path.exists(self._key(path)[0])]
+        if missing:
+            raise FileNotFoundError(f"Missing required model files: {', '.join(missing)}")
+        return {self._key(path)[1]: self.verify(path) for path in paths}
+
+    def register(self, path, artifact):
+        """Record a freshly saved artifact: cache the in-memory object and update its checksum"""
+        full_path, name = self._key(path)
+        with self._artifact_lock(full_path):
+            self._cache[full_path] = artifact
+            if name.startswith('..'):
+                # Outside base_dir: shared in memory, but not this manifest's to record
+                return
+            with self._lock:
+                self._manifest[name] = {
+                    'sha256': sha256_file(full_path),
+                    'size_bytes': os.path.getsize(full_path)
+                }
+                self._write_manifest()
+
+    def write_manifest(self, paths=None):
+        """(Re)compute checksums for the given files, or every .pkl/.json artifact in base_dir"""
+        rebuild = paths is None
+        if rebuild:
+            paths = sorted(
+                name for name in os.listdir(self.base_dir)
+                if name.endswith(('.pkl', '.json')) and name != os.path.basename(self.manifest_path)
+            )
+        with self._lock:
+            if rebuild:
+                # A full rebuild drops entries for artifacts that no longer exist
+                self._manifest = {}
+            for path in paths:
+                full_path, name = self._key(path)
+                self._manifest[name] = {
+                    'sha256': sha256_file(full_path),
+                    'size_bytes': os.path.getsize(full_path)
+                }
+            self._write_manifest()
+        return dict(self._manifest)
+
+    def _write_manifest(self):
+        # Only artifacts inside base_dir are recorded; replace atomically so readers never see partial JSON
+        entries = {name: entry for name, entry in sorted(self._manifest.items()) if not name.startswith('..')}
+        # A unique temp file per writer, so workers saving at the same time never share one
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{MANIFEST_NAME}.", suffix='.tmp',
+                                        dir=os.path.dirname(self.manifest_path))
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'algorithm': 'sha256', 'artifacts': entries}, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def invalidate(self, path=None):
+        """Drop one cached artifact (or all) so the next get() reloads from disk"""
+        with self._lock:
+            if path is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(self._key(path)[0], None)
+
+    def stats(self):
+        """Load counts and timings, useful for checking that nothing is loaded twice"""
+        return {
+            'cached': len(self._cache),
+            'load_counts': dict(self.load_counts),
+            'load_seconds': dict(self.load_seconds)
+        }
+
+_artifact_managers = {}
+_artifact_manager_lock = threading.Lock()
+
+def get_artifact_manager(base_dir=ARTIFACT_DIR):
+    """Get the process-wide artifact manager of a directory (the bundled ai_models/ by default)"""
+    base_dir = os.path.abspath(base_dir)
+    manager = _artifact_managers.get(base_dir)
+    if manager is None:
+        with _artifact_manager_lock:
+            manager = _artifact_managers.get(base_dir)
+            if manager is None:
+                manager = _artifact_managers[base_dir] = ArtifactManager(base_dir)
+    return manager
+
+if __name__ == "__main__":
+    manifest = get_artifact_manager().write_manifest()
+    print(f"✅ Wrote checksums for {len(manifest)} artifacts to {MANIFEST_NAME}")
@@ -4,16 +4,25 @@ Real-time fuel efficiency and carbon emission optimization algorithms
 """
 
 import os
-import pandas as pd
+import sys
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-import joblib
-from scipy.optimize import minimize
 import json
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from artifact_manager import RUNTIME_DIR, get_artifact_manager
+from compact_forest import CompactScaler
+from carbonsense_edge import EdgeOptimizer, build_recommendations
+
+# pandas, scikit-learn, scipy and joblib are imported by the methods that use them, so importing
+# this module (and the backend that imports it) does not pay for them before the first request
+
+def _artifact_manager_for(path_prefix):
+    """Runtime-trained models keep their own manifest; bundled and registry models use ai_models/'s"""
+    if os.path.dirname(os.path.abspath(path_prefix)) == os.path.abspath(RUNTIME_DIR):
+        return get_artifact_manager(RUNTIME_DIR)
+    return get_artifact_manager()
+
 class CarbonOptimizer:
     def __init__(self):
         self.fuel_predictor = None
@@ -27,15 +36,16 @@ class CarbonOptimizer:
         try:
             script_dir = os.path.dirname(os.path.abspath(__file__))
             model_path = os.path.join(script_dir, "carbonsense")
-            self.fuel_predictor = joblib.load(f"{model_path}_fuel_model.pkl")
-            self.emission_predictor = joblib.load(f"{model_path}_emission_model.pkl")
-            self.scaler = joblib.load(f"{model_path}_scaler.pkl")
-            
-            with open(f"{model_path}_features.json", 'r') as f:
-                self.feature_columns = json.load(f)
+            # Shared, load-once artifacts: every optimizer instance references the same estimators
+            artifacts = get_artifact_manager().load_bundle(model_path)
+            self.fuel_predictor = artifacts['fuel_model']
+            self.emission_predictor = artifacts['emission_model']
+            self.scaler = artifacts['scaler']
+            self.feature_columns = artifacts['features']
             print("✅ Pre-trained models loaded successfully")
         except Exception as e:
             print(f"⚠️ Using default initialization: {str(e)}")
+            from sklearn.preprocessing import StandardScaler
             self.scaler = StandardScaler()
         
         # Optimization constraints based on equipment capabilities
@@ -49,6 +59,8 @@ class CarbonOptimizer:
 
     def prepare_features(self, data):
         """Prepare features for ML models with enhanced engineering"""
+        import pandas as pd
+        
         # Base features
         features = [
             'speed_mph', 'engine_load_pct', 'implement_width_ft',
@@ -100,6 +112,11 @@ class CarbonOptimizer:
 
     def train_optimization_models(self, training_data):
         """Train ML models with synthetic data augmentation"""
+        import pandas as pd
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
+        
         print("🤖 Training AI optimization models...")
         
         # Create synthetic data to better capture speed-fuel relationships
@@ -166,6 +183,8 @@ class CarbonOptimizer:
         self.feature_columns = X.columns.tolist()
         
         # Scale features
+        # Fit a new scaler rather than refitting the shared, loaded one in place
+        self.scaler = StandardScaler()
         X_scaled = self.scaler.fit_transform(X)
         
         # Split data with stratification based on speed ranges using augmented data
@@ -284,6 +303,8 @@ class CarbonOptimizer:
         if self.fuel_predictor is None or self.emission_predictor is None:
             raise ValueError("Models not trained. Call train_optimization_models first.")
         
+        import pandas as pd
+        
         # Create feature vector
         feature_row = pd.DataFrame([operation_params])
         X = self.prepare_features(feature_row)
@@ -307,6 +328,7 @@ class CarbonOptimizer:
 
     def optimize_speed_for_operation(self, base_params, target_acres_per_hour=None):
         """Find optimal speed for minimum fuel consumption with enhanced optimization"""
+        from scipy.optimize import minimize
         
         def objective_function(speed):
             params = base_params.copy()
@@ -455,54 +477,47 @@ class CarbonOptimizer:
             'pattern_description': 'AI-optimized parallel passes with minimal overlap and reduced turn time'
         }
 
-    def real_time_recommendations(self, current_telemetry):
-        """Generate real-time optimization recommendations"""
-        recommendations = []
-        
-        # Speed optimization
-        speed_opt = self.optimize_speed_for_operation(current_telemetry)
-        if speed_opt and speed_opt['fuel_savings_percent'] > 5:
-            recommendations.append({
-                'type': 'speed_optimization',
-                'priority': 'high',
-                'title': f"Adjust Speed to {speed_opt['optimal_speed']} mph",
-                'description': f"Reduce fuel consumption by {speed_opt['fuel_savings_percent']:.1f}%",
-                'savings': f"${speed_opt['cost_savings_per_hour']:.2f}/hour",
-                'co2_reduction': f"{speed_opt['co2_reduction_percent']:.1f}% less CO2",
-                'action': 'speed_adjustment',
-                'target_value': speed_opt['optimal_speed']
-            })
-        
-        # Engine load optimization
-        current_load = current_telemetry.get('engine_load_pct', 70)
-        if current_load > 85:
-            recommendations.append({
-                'type': 'load_optimization',
-                'priority': 'medium',
-                'title': 'Reduce Engine Load',
-                'description': 'Current load is high, consider reducing depth or speed',
-                'savings': 'Up to 12% fuel savings',
-                'action': 'load_reduction',
-                'target_value': 75
-            })
-        
-        # Weather-based recommendations
-        weather_factor = current_telemetry.get('weather_factor', 1.0)
-        if weather_factor > 1.1:
-            recommendations.append({
-                'type': 'weather_optimization',
-                'priority': 'low',
-                'title': 'Weather Impact Detected',
-                'description': 'Consider adjusting operation timing due to weather conditions',
-                'savings': 'Up to 8% efficiency improvement',
-                'action': 'timing_adjustment'
-            })
-        
-        return recommendations
+    def _grid_optimizer(self):
+        """carbonsense_edge optimizer running on these scikit-learn models"""
+        if self.fuel_predictor is None or self.emission_predictor is None:
+            raise ValueError("Models not trained. Call train_optimization_models first.")
+        
+        # Plain mean/scale arithmetic, identical to StandardScaler.transform without its feature-name checks
+        scaler = CompactScaler(np.asarray(self.scaler.mean_), np.asarray(self.scaler.scale_))
+        return EdgeOptimizer(
+            self.fuel_predictor, self.emission_predictor, scaler, self.feature_columns,
+            speed_min=self.optimization_constraints['speed_min'],
+            speed_max=self.optimization_constraints['speed_max'],
+            diesel_cost_per_gallon=self.diesel_cost_per_gallon
+        )
+    
+    def optimize_speed_grid(self, base_params, target_acres_per_hour=None):
+        """
+        Deterministic grid-search variant of optimize_speed_for_operation
+        
+        Runs the carbonsense_edge optimizer against these models, so in-cab devices using
+        the compact export return the same speed and savings.
+        """
+        return self._grid_optimizer().optimize_speed_for_operation(base_params, target_acres_per_hour)
+    
+    def optimize_speed_batch(self, records, target_acres_per_hour=None):
+        """optimize_speed_grid for a list of records, vectorized across records (same results)"""
+        return self._grid_optimizer().optimize_speed_batch(records, target_acres_per_hour)
+
+    def real_time_recommendations(self, current_telemetry, method='slsqp'):
+        """Generate real-time optimization recommendations ('grid' matches carbonsense_edge)"""
+        if method == 'grid':
+            speed_opt = self.optimize_speed_grid(current_telemetry)
+        else:
+            speed_opt = self.optimize_speed_for_operation(current_telemetry)
+        return build_recommendations(current_telemetry, speed_opt)
 
-    def save_models(self, path_prefix="carbonsense_models"):
+    def save_models(self, path_prefix="carbonsense_models", register_artifacts=True):
         """Save trained models for deployment"""
+        import joblib
+        
         if self.fuel_predictor:
+            os.makedirs(os.path.dirname(os.path.abspath(path_prefix)), exist_ok=True)
             joblib.dump(self.fuel_predictor, f"{path_prefix}_fuel_model.pkl")
             joblib.dump(self.emission_predictor, f"{path_prefix}_emission_model.pkl")
             joblib.dump(self.scaler, f"{path_prefix}_scaler.pkl")
@@ -511,75 +526,48 @@ class CarbonOptimizer:
             with open(f"{path_prefix}_features.json", 'w') as f:
                 json.dump(self.feature_columns, f)
             
+            # Refresh checksums and share the new models with every optimizer in this process
+            if register_artifacts:
+                manager = _artifact_manager_for(path_prefix)
+                artifacts = [self.fuel_predictor, self.emission_predictor, self.scaler, self.feature_columns]
+                for path, artifact in zip(manager.bundle_paths(path_prefix), artifacts):
+                    manager.register(path, artifact)
+            
             print("✅ Models saved successfully")
 
-    def load_models(self, path_prefix="carbonsense_models"):
-        """Load pre-trained models"""
+    def load_models(self, path_prefix="carbonsense_models", require_compact=False):
+        """
+        Load pre-trained models (cached process-wide and verified against the manifest checksums)
+        
+        require_compact: in mmap format, fail instead of falling back to the pickles when the
+        prefix has no compact export
+        """
         try:
-            # Get base directory from path_prefix
-            base_dir = os.path.dirname(path_prefix)
-            base_name = os.path.basename(path_prefix)
-            
-            # Construct full paths
-            fuel_model_path = os.path.join(base_dir, f"{base_name}_fuel_model.pkl")
-            emission_model_path = os.path.join(base_dir, f"{base_name}_emission_model.pkl")
-            scaler_path = os.path.join(base_dir, f"{base_name}_scaler.pkl")
-            features_path = os.path.join(base_dir, f"{base_name}_features.json")
+            manager = _artifact_manager_for(path_prefix)
+            print(f"📂 Loading models from: {os.path.dirname(path_prefix)}")
+            manager.verify_all(manager.bundle_paths(path_prefix))
             
-            print(f"📂 Loading models from: {base_dir}")
-            print(f"   Fuel model: {os.path.exists(fuel_model_path)}")
-            print(f"   Emission model: {os.path.exists(emission_model_path)}")
-            print(f"   Scaler: {os.path.exists(scaler_path)}")
-            print(f"   Features: {os.path.exists(features_path)}")
-            
-            # Load each model with error handling
             try:
-                print("🔄 Loading fuel model...")
-                self.fuel_predictor = joblib.load(fuel_model_path)
+                artifacts = manager.load_bundle(path_prefix, require_compact=require_compact)
+                self.fuel_predictor = artifacts['fuel_model']
                 # Verify the model is a RandomForestRegressor
                 if not hasattr(self.fuel_predictor, 'predict'):
                     raise ValueError("Fuel model lacks predict method")
                 
-                print("🔄 Loading emission model...")
-                self.emission_predictor = joblib.load(emission_model_path)
+                self.emission_predictor = artifacts['emission_model']
                 if not hasattr(self.emission_predictor, 'predict'):
                     raise ValueError("Emission model lacks predict method")
                 
-                print("🔄 Loading scaler...")
-                self.scaler = joblib.load(scaler_path)
+                self.scaler = artifacts['scaler']
                 if not hasattr(self.scaler, 'transform'):
                     raise ValueError("Scaler lacks transform method")
                 
-                print("🔄 Loading features...")
-                with open(features_path, 'r') as f:
-                    self.feature_columns = json.load(f)
+                self.feature_columns = artifacts['features']
                 
                 # Verify feature columns
                 if not isinstance(self.feature_columns, list):
                     raise ValueError("Feature columns must be a list")
                 
-                # Test model with dummy data
-                test_data = pd.DataFrame([[7.5, 75, 24, 160, 1.0]], 
-                                      columns=['speed_mph', 'engine_load_pct', 
-                                              'implement_width_ft', 'field_acres', 
-                                              'weather_factor'])
-                test_data = pd.get_dummies(test_data, columns=[])
-                
-                # Ensure all feature columns exist
-                for col in self.feature_columns:
-                    if col not in test_data.columns:
-                        test_data[col] = 0
-                
-                # Test prediction pipeline
-                X = test_data.reindex(columns=self.feature_columns, fill_value=0)
-                X_scaled = self.scaler.transform(X)
-                fuel_pred = self.fuel_predictor.predict(X_scaled)
-                emission_pred = self.emission_predictor.predict(X_scaled)
-                
-                print(f"✅ Test prediction successful:")
-                print(f"   Fuel rate: {fuel_pred[0]:.2f} gph")
-                print(f"   Emission rate: {emission_pred[0]:.2f} lbs/hr")
-                
                 print("✅ ML models loaded and verified successfully")
                 return True
                 
@@ -594,6 +582,8 @@ class CarbonOptimizer:
 
 # Demo usage
 if __name__ == "__main__":
+    import pandas as pd
+    
     print("🧠 CarbonSense AI Optimization Engine Demo")
     
     # Initialize optimizer
@@ -0,0 +1,371 @@
+"""
+CarbonSense AI - In-Cab Edge Inference
+Numpy-only speed optimization, recommendations and soil predictions for tractor-mounted computers
+
+Runs the compact model export (ai_models/compact/, written by compact_forest.py or
+model_compression.py) without importing pandas, scikit-learn or scipy, so it starts in a
+fraction of a second and keeps working when the cab has no connectivity.
+
+The speed optimizer is a deterministic grid search over the server's objective and
+constraints. The server runs this same code against its scikit-learn models through
+CarbonOptimizer.optimize_speed_grid (POST /api/optimize?method=grid), which is the reference
+the in-cab results match.
+
+Usage: python ai_models/carbonsense_edge.py '{"speed_mph": 8.5, "engine_load_pct": 78, ...}'
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from compact_forest import COMPACT_DIR, load_bundle
+
+EDGE_BUNDLE_DIR = os.environ.get('CARBONSENSE_EDGE_BUNDLE', os.path.join(COMPACT_DIR, 'carbonsense'))
+SOIL_BUNDLE_DIR = os.path.join(COMPACT_DIR, 'soil')
+
+# Raw inputs of CarbonOptimizer.prepare_features, in its column order
+BASE_FEATURES = ['speed_mph', 'engine_load_pct', 'implement_width_ft', 'field_acres', 'weather_factor']
+CATEGORICAL_FEATURES = ['operation_type', 'soil_type', 'terrain_type']
+
+# pd.cut bins of prepare_features: right-closed, values outside every bin get no zone
+SPEED_ZONES = (np.array([0, 5, 7, 9, 11, 15]), ['very_slow', 'slow', 'optimal', 'fast', 'very_fast'])
+LOAD_ZONES = (np.array([0, 60, 75, 85, 95, 100]), ['underload', 'efficient', 'optimal', 'high', 'overload'])
+
+TYPICAL_SPEED_MPH = 7.5
+MAX_SPEED_CHANGE = 0.3  # Allow up to 30% change from the current speed
+GRID_STEP_MPH = 0.1     # Results are reported to 0.1 mph
+
+def _zone_index(values, bins):
+    """Index of the right-closed bin each value falls in, -1 where pd.cut would give NaN"""
+    index = np.searchsorted(bins, values, side='left') - 1
+    return np.where((values > bins[0]) & (values <= bins[-1]), index, -1)
+
+def encode_operations(records, feature_columns):
+    """
+    Feature matrix for operation dicts, identical to prepare_features + reindex on the server
+
+    Args:
+        records (list): Operation parameter dicts (speed_mph, engine_load_pct, ...)
+        feature_columns (list): Column order the models were trained on
+
+    Returns:
+        np.ndarray: (len(records), len(feature_columns)) float64 matrix
+    """
+    columns = {name: i for i, name in enumerate(feature_columns)}
+    X = np.zeros((len(records), len(feature_columns)))
+    base = {name: np.array([float(record[name]) for record in records]) for name in BASE_FEATURES}
+
+    for name in BASE_FEATURES:
+        if name in columns:
+            X[:, columns[name]] = base[name]
+    if 'implement_load' in columns:
+        X[:, columns['implement_load']] = base['implement_width_ft'] * base['engine_load_pct'] / 100
+    _set_zone_columns(X, columns, 'load_efficiency', base['engine_load_pct'], LOAD_ZONES)
+    set_speed_columns(X, columns, base['speed_mph'], base['engine_load_pct'])
+
+    for i, record in enumerate(records):
+        for feature in CATEGORICAL_FEATURES:
+            column = columns.get(f"{feature}_{record.get(feature)}")
+            if record.get(feature) is not None and column is not None:
+                X[i, column] = 1
+    return X
+
+def _set_zone_columns(X, columns, prefix, values, zones):
+    bins, labels = zones
+    zone_columns = np.array([columns.get(f"{prefix}_{label}", -1) for label in labels] + [-1])
+    for column in zone_columns[zone_columns >= 0]:
+        X[:, column] = 0
+    # Index -1 selects the trailing "no column" entry for values outside every bin
+    targets = zone_columns[_zone_index(values, bins)]
+    X[np.arange(len(X))[targets >= 0], targets[targets >= 0]] = 1
+
+def set_speed_columns(X, columns, speeds, engine_load):
+    """
+    Overwrite the speed-dependent features of encoded rows in place
+
+    Lets a batch encode each record once and repeat the row for every candidate speed,
+    with the same values encode_operations gives the per-speed dicts.
+
+    Args:
+        X (np.ndarray): Encoded rows
+        columns (dict): Feature name -> column index
+        speeds (np.ndarray): Speed per row (mph)
+        engine_load (np.ndarray): Engine load per row (%)
+    """
+    if 'speed_mph' in columns:
+        X[:, columns['speed_mph']] = speeds
+    if 'speed_squared' in columns:
+        X[:, columns['speed_squared']] = speeds ** 2
+    if 'speed_load_interaction' in columns:
+        X[:, columns['speed_load_interaction']] = speeds * engine_load / 100
+    _set_zone_columns(X, columns, 'speed_efficiency', speeds, SPEED_ZONES)
+
+def build_recommendations(current_telemetry, speed_opt):
+    """
+    Recommendation cards for one telemetry record, shared by the server and the edge optimizer
+
+    Args:
+        current_telemetry (dict): Latest telemetry record
+        speed_opt (dict): Result of optimize_speed_for_operation for that record
+
+    Returns:
+        list: Recommendation dicts, highest priority first
+    """
+    recommendations = []
+
+    # Speed optimization
+    if speed_opt and speed_opt['fuel_savings_percent'] > 5:
+        recommendations.append({
+            'type': 'speed_optimization',
+            'priority': 'high',
+            'title': f"Adjust Speed to {speed_opt['optimal_speed']} mph",
+            'description': f"Reduce fuel consumption by {speed_opt['fuel_savings_percent']:.1f}%",
+            'savings': f"${speed_opt['cost_savings_per_hour']:.2f}/hour",
+            'co2_reduction': f"{speed_opt['co2_reduction_percent']:.1f}% less CO2",
+            'action': 'speed_adjustment',
+            'target_value': speed_opt['optimal_speed']
+        })
+
+    # Engine load optimization
+    current_load = current_telemetry.get('engine_load_pct', 70)
+    if current_load > 85:
+        recommendations.append({
+            'type': 'load_optimization',
+            'priority': 'medium',
+            'title': 'Reduce Engine Load',
+            'description': 'Current load is high, consider reducing depth or speed',
+            'savings': 'Up to 12% fuel savings',
+            'action': 'load_reduction',
+            'target_value': 75
+        })
+
+    # Weather-based recommendations
+    weather_factor = current_telemetry.get('weather_factor', 1.0)
+    if weather_factor > 1.1:
+        recommendations.append({
+            'type': 'weather_optimization',
+            'priority': 'low',
+            'title': 'Weather Impact Detected',
+            'description': 'Consider adjusting operation timing due to weather conditions',
+            'savings': 'Up to 8% efficiency improvement',
+            'action': 'timing_adjustment'
+        })
+
+    return recommendations
+
+class EdgeOptimizer:
+    """
+    In-cab counterpart of CarbonOptimizer
+
+    Works with any models that offer predict/transform: the compact numpy export on the
+    tractor, or the server's scikit-learn estimators (see CarbonOptimizer.optimize_speed_grid).
+    """
+
+    def __init__(self, fuel_model, emission_model, scaler, feature_columns,
+                 speed_min=3.0, speed_max=15.0, diesel_cost_per_gallon=3.85):
+        self.fuel_model = fuel_model
+        self.emission_model = emission_model
+        self.scaler = scaler
+        self.feature_columns = list(feature_columns)
+        self.speed_min = speed_min
+        self.speed_max = speed_max
+        self.diesel_cost_per_gallon = diesel_cost_per_gallon
+
+    @classmethod
+    def load(cls, bundle_dir=EDGE_BUNDLE_DIR, mmap=True):
+        """Open a compact optimizer bundle (fuel_model, emission_model, scaler, features)"""
+        bundle = load_bundle(bundle_dir, mmap=mmap)
+        return cls(bundle['fuel_model'], bundle['emission_model'], bundle['scaler'], bundle['features'])
+
+    def predict_batch(self, records):
+        """Fuel and CO2 rates for many operation dicts in one model pass"""
+        X_scaled = self.scaler.transform(encode_operations(records, self.feature_columns))
+        return self.fuel_model.predict(X_scaled), self.emission_model.predict(X_scaled)
+
+    def predict_consumption(self, operation_params):
+        fuel_rate, co2_rate = self.predict_batch([operation_params])
+        return float(fuel_rate[0]), float(co2_rate[0])
+
+    def speed_candidates(self, base_params, target_acres_per_hour=None):
+        """Grid speeds within the equipment limits, ±30% of the current speed and the productivity target"""
+        current_speed = float(base_params['speed_mph'])
+        low = max(self.speed_min, current_speed * (1 - MAX_SPEED_CHANGE))
+        high = min(self.speed_max, current_speed * (1 + MAX_SPEED_CHANGE))
+        if high < low:
+            return np.array([])
+
+        speeds = np.round(np.arange(np.ceil(low / GRID_STEP_MPH) * GRID_STEP_MPH, high + 1e-9, GRID_STEP_MPH), 1)
+        speeds = speeds[(speeds >= low - 1e-9) & (speeds <= high + 1e-9)]
+        if target_acres_per_hour:
+            acres_per_hour = speeds * base_params['implement_width_ft'] / 43560 * 8.25
+            speeds = speeds[acres_per_hour >= target_acres_per_hour]
+        return speeds
+
+    def optimize_speed_for_operation(self, base_params, target_acres_per_hour=None):
+        """
+        Find the speed with the lowest penalized fuel rate
+
+        Same objective as the server (fuel rate plus penalties for speeds far from 7.5 mph and
+        engine loads above 85%), evaluated for every candidate speed in one batch.
+
+        Returns:
+            dict: Same keys as CarbonOptimizer.optimize_speed_for_operation
+        """
+        original_fuel, original_co2 = self.predict_consumption(base_params)
+        speeds = self.speed_candidates(base_params, target_acres_per_hour)
+        if len(speeds) == 0:
+            # No feasible speed: keep the current one
+            return self._speed_result(base_params['speed_mph'], original_fuel, original_co2,
+                                      original_fuel, original_co2)
+
+        fuel_rates, co2_rates = self.predict_batch([dict(base_params, speed_mph=float(speed)) for speed in speeds])
+        engine_load = base_params.get('engine_load_pct', 75)
+        load_penalty = (engine_load - 85) * 0.1 if engine_load > 85 else 0
+        objective = fuel_rates * (1 + np.abs(speeds - TYPICAL_SPEED_MPH) * 0.05 + load_penalty)
+
+        best = int(np.argmin(objective))
+        return self._speed_result(speeds[best], original_fuel, original_co2, fuel_rates[best], co2_rates[best])
+
+    def optimize_speed_batch(self, records, target_acres_per_hour=None, batch_size=1024):
+        """
+        optimize_speed_for_operation for many records, with far fewer model calls
+
+        Each record is encoded once and its row repeated for the current speed and every
+        candidate, so a chunk of records costs one predict per model. Results are identical
+        to calling optimize_speed_for_operation record by record.
+
+        Args:
+            records (list): Operation parameter dicts
+            target_acres_per_hour (float): Optional productivity floor applied to every record
+            batch_size (int): Records per model pass (bounds memory)
+
+        Returns:
+            list: One result dict per record, in input order
+        """
+        columns = {name: i for i, name in enumerate(self.feature_columns)}
+        results = []
+        for start in range(0, len(records), batch_size):
+            chunk = records[start:start + batch_size]
+            candidates = [self.speed_candidates(record, target_acres_per_hour) for record in chunk]
+            current = np.array([float(record['speed_mph']) for record in chunk])
+            engine_load = np.array([float(record['engine_load_pct']) for record in chunk])
+
+            # Row layout per record: current speed first, then its candidates
+            counts = np.array([1 + len(speeds) for speeds in candidates])
+            speeds = np.concatenate([[current[i]] + list(candidates[i]) for i in range(len(chunk))])
+            X = np.repeat(encode_operations(chunk, self.feature_columns), counts, axis=0)
+            set_speed_columns(X, columns, speeds, np.repeat(engine_load, counts))
+            X_scaled = self.scaler.transform(X)
+            fuel_rates, co2_rates = self.fuel_model.predict(X_scaled), self.emission_model.predict(X_scaled)
+
+            offsets = np.concatenate([[0], np.cumsum(counts)])
+            for i, record in enumerate(chunk):
+                first, end = offsets[i], offsets[i + 1]
+                original_fuel, original_co2 = float(fuel_rates[first]), float(co2_rates[first])
+                if end - first == 1:
+                    results.append(self._speed_result(record['speed_mph'], original_fuel, original_co2,
+                                                      original_fuel, original_co2))
+                    continue
+                load = record.get('engine_load_pct', 75)
+                load_penalty = (load - 85) * 0.1 if load > 85 else 0
+                options = speeds[first + 1:end]
+                objective = fuel_rates[first + 1:end] * (1 + np.abs(options - TYPICAL_SPEED_MPH) * 0.05 + load_penalty)
+                best = first + 1 + int(np.argmin(objective))
+                results.append(self._speed_result(speeds[best], original_fuel, original_co2,
+                                                  fuel_rates[best], co2_rates[best]))
+        return results
+
+    def _speed_result(self, speed, original_fuel, original_co2, optimal_fuel, optimal_co2):
+        return {
+            'optimal_speed': round(float(speed), 1),
+            'fuel_savings_percent': round(float((original_fuel - optimal_fuel) / original_fuel * 100), 1),
+            'co2_reduction_percent': round(float((original_co2 - optimal_co2) / original_co2 * 100), 1),
+            'optimal_fuel_rate': round(float(optimal_fuel), 2),
+            'optimal_co2_rate': round(float(optimal_co2), 2),
+            'cost_savings_per_hour': round(float((original_fuel - optimal_fuel) * self.diesel_cost_per_gallon), 2)
+        }
+
+    def real_time_recommendations(self, current_telemetry):
+        return build_recommendations(current_telemetry, self.optimize_speed_for_operation(current_telemetry))
+
+class EdgeSoilPredictor:
+    """
+    Numpy-only SoilCarbonPredictor.predict_emissions
+
+    Reads the compact soil bundle that SoilCarbonPredictor.save_models exports, which also
+    carries the feature names, defaults and feature importances.
+    """
+
+    def __init__(self, bundle, n2o_gwp=298):
+        self.co2_model = bundle['co2_model']
+        self.n2o_model = bundle['n2o_model']
+        self.scaler = bundle['scaler']
+        self.feature_names = bundle['feature_names']
+        self.feature_defaults = bundle['feature_defaults']
+        self.co2_importance = bundle['co2_feature_importance']
+        self.n2o_importance = bundle['n2o_feature_importance']
+        self.n2o_gwp = n2o_gwp
+
+    @classmethod
+    def load(cls, bundle_dir=SOIL_BUNDLE_DIR, mmap=True):
+        return cls(load_bundle(bundle_dir, mmap=mmap))
+
+    def predict_emissions(self, soil_data):
+        """Same keys as the server prediction, without the timestamp"""
+        input_data = [soil_data.get(feature, self.feature_defaults[feature]) for feature in self.feature_names]
+        input_scaled = self.scaler.transform([input_data])
+        co2_emission = float(self.co2_model.predict(input_scaled)[0])
+        n2o_emission = float(self.n2o_model.predict(input_scaled)[0])
+        n2o_co2_equiv = n2o_emission * self.n2o_gwp
+        return {
+            'co2_emissions_kg_ha_day': co2_emission,
+            'n2o_emissions_kg_ha_day': n2o_emission,
+            'n2o_co2_equivalent_kg_ha_day': n2o_co2_equiv,
+            'total_co2_equivalent_kg_ha_day': co2_emission + n2o_co2_equiv,
+            'co2_feature_importance': dict(self.co2_importance),
+            'n2o_feature_importance': dict(self.n2o_importance)
+        }
+
+# Models are opened on first use so importing this module stays cheap
+_edge_optimizer = None
+_edge_soil_predictor = None
+
+def get_edge_optimizer():
+    global _edge_optimizer
+    if _edge_optimizer is None:
+        _edge_optimizer = EdgeOptimizer.load()
+    return _edge_optimizer
+
+def get_edge_soil_predictor():
+    global _edge_soil_predictor
+    if _edge_soil_predictor is None:
+        _edge_soil_predictor = EdgeSoilPredictor.load()
+    return _edge_soil_predictor
+
+def optimize(telemetry, target_acres_per_hour=None):
+    """Optimal speed and savings for one telemetry record"""
+    return get_edge_optimizer().optimize_speed_for_operation(telemetry, target_acres_per_hour)
+
+def recommend(telemetry):
+    """Recommendation cards for one telemetry record"""
+    return get_edge_optimizer().real_time_recommendations(telemetry)
+
+def predict_soil(soil_data):
+    """Soil CO2/N2O emissions for one soil sample"""
+    return get_edge_soil_predictor().predict_emissions(soil_data)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Optimize and recommend for one telemetry record without a server")
+    parser.add_argument('telemetry', help="Telemetry record as JSON")
+    parser.add_argument('--bundle', default=EDGE_BUNDLE_DIR)
+    args = parser.parse_args()
+
+    telemetry = json.loads(args.telemetry)
+    optimizer = EdgeOptimizer.load(args.bundle)
+    print(json.dumps({
+        'optimization': optimizer.optimize_speed_for_operation(telemetry),
+        'recommendations': optimizer.real_time_recommendations(telemetry)
+    }, indent=2))
@@ -0,0 +1,289 @@
+"""
+CarbonSense AI - Compact Model Export
+Stores tree ensembles and scalers as flat, uncompressed numpy arrays that can be memory-mapped
+
+Each exported model is a directory of .npy files plus a small meta.json. Opening the
+arrays with mmap lets every gunicorn worker share the same physical pages through the
+OS page cache instead of unpickling a private copy.
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+
+COMPACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'compact')
+
+# Flat node arrays written for every exported ensemble
+TREE_ARRAYS = ('children_left', 'children_right', 'feature', 'threshold', 'value')
+
+def _tree_estimators(estimator):
+    """Individual DecisionTreeRegressors of a random forest or gradient-boosting model"""
+    estimators = np.asarray(estimator.estimators_, dtype=object)
+    return list(estimators.ravel())
+
+def tree_arrays(estimator):
+    """Per-tree node arrays of a fitted ensemble, in the order the ensemble applies them"""
+    trees = []
+    for tree in _tree_estimators(estimator):
+        tree = tree.tree_
+        trees.append({
+            'children_left': np.array(tree.children_left),
+            'children_right': np.array(tree.children_right),
+            'feature': np.array(tree.feature),
+            'threshold': np.array(tree.threshold),
+            'value': np.array(tree.value[:, 0, 0]),
+            'n_node_samples': np.array(tree.n_node_samples)
+        })
+    return trees
+
+def ensemble_meta(estimator):
+    """How an ensemble combines its trees: averaged (forest) or boosted from an initial value"""
+    kind = type(estimator).__name__
+    if kind not in ('RandomForestRegressor', 'GradientBoostingRegressor'):
+        raise ValueError(f"Unsupported estimator for compact export: {kind}")
+    meta = {'kind': kind, 'n_features': int(estimator.n_features_in_)}
+    if kind == 'GradientBoostingRegressor':
+        init = estimator._raw_predict_init(np.zeros((1, meta['n_features'])))
+        meta['init'] = float(np.ravel(init)[0])
+        meta['learning_rate'] = float(estimator.learning_rate)
+    return meta
+
+def _tree_depth(tree):
+    depth = np.zeros(len(tree['children_left']), dtype=np.int64)
+    for node in range(len(depth)):
+        # Children always have larger indices than their parent in scikit-learn trees
+        for child in (tree['children_left'][node], tree['children_right'][node]):
+            if child != -1:
+                depth[child] = depth[node] + 1
+    return int(depth.max()) if len(depth) else 0
+
+def _round_down_float32(threshold):
+    """
+    Largest float32 not above each float64 threshold
+
+    For float32 inputs x, x <= t holds exactly when x <= round_down_float32(t), so float32
+    thresholds stored this way take the same branch as scikit-learn's float64 ones.
+    """
+    rounded = threshold.astype(np.float32)
+    too_high = rounded.astype(np.float64) > threshold
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+def write_forest(trees, meta, out_dir, precision='float64'):
+    """
+    Flatten per-tree node arrays into one set of .npy files
+
+    Args:
+        trees (list): Dicts from tree_arrays (possibly pruned or re-selected)
+        meta (dict): ensemble_meta of the source model
+        out_dir (str): Directory for the .npy files and meta.json
+        precision (str): 'float64', or 'float32' for half-size thresholds/values and the
+            narrowest integer type that fits the node indices
+
+    Returns:
+        dict: The metadata written to meta.json
+    """
+    if precision not in ('float64', 'float32'):
+        raise ValueError(f"Unsupported precision: {precision}")
+    offsets = np.cumsum([0] + [len(tree['children_left']) for tree in trees])
+    n_nodes = int(offsets[-1])
+
+    # Child indices are shifted so every tree lives in one global node array
+    children_left = np.concatenate([
+        np.where(tree['children_left'] == -1, -1, tree['children_left'] + offset)
+        for tree, offset in zip(trees, offsets[:-1])
+    ])
+    children_right = np.concatenate([
+        np.where(tree['children_right'] == -1, -1, tree['children_right'] + offset)
+        for tree, offset in zip(trees, offsets[:-1])
+    ])
+    threshold = np.concatenate([tree['threshold'] for tree in trees]).astype(np.float64)
+
+    if precision == 'float32':
+        index_dtype = np.int16 if n_nodes < np.iinfo(np.int16).max else np.int32
+        feature_dtype = np.int16 if meta['n_features'] < np.iinfo(np.int16).max else np.int32
+        threshold = _round_down_float32(threshold)
+        value_dtype = np.float32
+    else:
+        index_dtype = feature_dtype = np.int32
+        value_dtype = np.float64
+
+    arrays = {
+        'children_left': children_left.astype(index_dtype),
+        'children_right': children_right.astype(index_dtype),
+        'feature': np.concatenate([tree['feature'] for tree in trees]).astype(feature_dtype),
+        'threshold': threshold,
+        'value': np.concatenate([tree['value'] for tree in trees]).astype(value_dtype),
+        'roots': offsets[:-1].astype(np.int32)
+    }
+
+    meta = dict(meta, n_trees=len(trees), n_nodes=n_nodes, precision=precision,
+                max_depth=max(_tree_depth(tree) for tree in trees))
+    os.makedirs(out_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), np.ascontiguousarray(array))
+    with open(os.path.join(out_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+def export_forest(estimator, out_dir, precision='float64'):
+    """
+    Flatten a fitted RandomForestRegressor or GradientBoostingRegressor into numpy arrays
+
+    Args:
+        estimator: Fitted scikit-learn tree ensemble (single-output regression)
+        out_dir (str): Directory for the .npy files and meta.json
+        precision (str): 'float64' (exact) or 'float32' (see write_forest)
+
+    Returns:
+        dict: The metadata written to meta.json
+    """
+    return write_forest(tree_arrays(estimator), ensemble_meta(estimator), out_dir, precision)
+
+class CompactForest:
+    """
+    Numpy-only predictor for an exported tree ensemble
+
+    Matches scikit-learn's predict: inputs are cast to float32 before comparing with the
+    float64 split thresholds, random forests average their trees and gradient boosting adds
+    learning_rate * sum(trees) to the initial prediction.
+    """
+
+    def __init__(self, arrays, meta):
+        self.meta = meta
+        self.kind = meta['kind']
+        self.n_features_in_ = meta['n_features']
+        self.children_left = arrays['children_left']
+        self.children_right = arrays['children_right']
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+
+    @classmethod
+    def load(cls, model_dir, mmap=True):
+        """Open an exported model; with mmap=True the arrays are read-only file mappings"""
+        with open(os.path.join(model_dir, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(model_dir, f"{name}.npy"), mmap_mode='r' if mmap else None)
+            for name in TREE_ARRAYS + ('roots',)
+        }
+        return cls(arrays, meta)
+
+    def apply(self, X):
+        """Leaf node index reached in every tree, shape (n_samples, n_trees)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+
+        for _ in range(self.meta['max_depth']):
+            left = self.children_left[nodes]
+            internal = left != -1
+            if not internal.any():
+                break
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(internal, np.where(go_left, left, self.children_right[nodes]), nodes)
+        return nodes
+
+    def predict(self, X):
+        leaf_values = self.value[self.apply(X)].astype(np.float64)
+        if self.kind == 'GradientBoostingRegressor':
+            return self.meta['init'] + self.meta['learning_rate'] * leaf_values.sum(axis=1)
+        return leaf_values.mean(axis=1)
+
+class CompactScaler:
+    """StandardScaler.transform backed by memory-mappable mean/scale arrays"""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.n_features_in_ = len(mean)
+
+    @classmethod
+    def load(cls, model_dir, mmap=True):
+        mode = 'r' if mmap else None
+        return cls(np.load(os.path.join(model_dir, 'mean.npy'), mmap_mode=mode),
+                   np.load(os.path.join(model_dir, 'scale.npy'), mmap_mode=mode))
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+def export_scaler(scaler, out_dir):
+    """Write a fitted StandardScaler's mean and scale as .npy files"""
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, 'mean.npy'), np.asarray(scaler.mean_, dtype=np.float64))
+    np.save(os.path.join(out_dir, 'scale.npy'), np.asarray(scaler.scale_, dtype=np.float64))
+
+def export_bundle(artifacts, bundle_dir):
+    """
+    Export a dict of fitted artifacts (tree ensembles, scalers, JSON-able values) to one directory
+
+    Args:
+        artifacts (dict): name -> estimator, StandardScaler, or plain list/dict
+        bundle_dir (str): Destination directory
+
+    Returns:
+        dict: The bundle index written to bundle.json
+    """
+    os.makedirs(bundle_dir, exist_ok=True)
+    index = {}
+    for name, artifact in artifacts.items():
+        if hasattr(artifact, 'estimators_'):
+            export_forest(artifact, os.path.join(bundle_dir, name))
+            index[name] = 'forest'
+        elif hasattr(artifact, 'mean_') and hasattr(artifact, 'scale_'):
+            export_scaler(artifact, os.path.join(bundle_dir, name))
+            index[name] = 'scaler'
+        else:
+            with open(os.path.join(bundle_dir, f"{name}.json"), 'w') as f:
+                json.dump(artifact, f)
+            index[name] = 'json'
+    with open(os.path.join(bundle_dir, 'bundle.json'), 'w') as f:
+        json.dump(index, f, indent=2)
+    return index
+
+def load_bundle(bundle_dir, mmap=True):
+    """Open every artifact of an exported bundle, keyed as it was exported"""
+    with open(os.path.join(bundle_dir, 'bundle.json'), 'r') as f:
+        index = json.load(f)
+    bundle = {}
+    for name, kind in index.items():
+        path = os.path.join(bundle_dir, name)
+        if kind == 'forest':
+            bundle[name] = CompactForest.load(path, mmap=mmap)
+        elif kind == 'scaler':
+            bundle[name] = CompactScaler.load(path, mmap=mmap)
+        else:
+            with open(f"{path}.json", 'r') as f:
+                bundle[name] = json.load(f)
+    return bundle
+
+def export_optimizer_bundle(path_prefix, out_dir=COMPACT_DIR):
+    """
+    Export the fuel/emission optimizer artifacts under out_dir/<prefix name>/
+
+    Args:
+        path_prefix (str): Prefix of the pickled artifacts (e.g. ai_models/carbonsense)
+        out_dir (str): Root directory for compact bundles
+
+    Returns:
+        str: Directory the bundle was written to
+    """
+    from artifact_manager import get_artifact_manager
+
+    bundle_dir = os.path.join(out_dir, os.path.basename(path_prefix))
+    export_bundle(get_artifact_manager().load_bundle(path_prefix, model_format='pickle'), bundle_dir)
+    return bundle_dir
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export pickled optimizer models to the compact mmap format")
+    parser.add_argument('--prefix', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'carbonsense'))
+    parser.add_argument('--out-dir', default=COMPACT_DIR)
+    args = parser.parse_args()
+
+    bundle_dir = export_optimizer_bundle(args.prefix, args.out_dir)
+    print(f"✅ Exported compact optimizer bundle to {bundle_dir}")
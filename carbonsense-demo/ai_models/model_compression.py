@@ -0,0 +1,299 @@
+"""
+CarbonSense AI - Model Compression
+Shrinks tree ensembles for in-cab devices: greedy tree selection, leaf merging and float32 storage
+
+The compressed model is written in the compact format (compact_forest.py), so devices only
+need numpy to run it. Every run reports size, load time, latency and accuracy against the
+original scikit-learn model.
+"""
+
+import os
+import io
+import sys
+import glob
+import json
+import time
+import argparse
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from compact_forest import COMPACT_DIR, CompactForest, ensemble_meta, export_scaler, tree_arrays, write_forest
+
+def _rmse(y_true, y_pred):
+    return float(np.sqrt(np.mean((np.asarray(y_true) - np.asarray(y_pred)) ** 2)))
+
+def _tree_predictions(trees, X):
+    """Leaf value of every tree for every row, shape (n_samples, n_trees)"""
+    X = np.asarray(X, dtype=np.float32)
+    columns = []
+    for tree in trees:
+        nodes = np.zeros(len(X), dtype=np.int64)
+        while True:
+            left = tree['children_left'][nodes]
+            internal = left != -1
+            if not internal.any():
+                break
+            go_left = X[np.arange(len(X)), tree['feature'][nodes]] <= tree['threshold'][nodes]
+            nodes = np.where(internal, np.where(go_left, left, tree['children_right'][nodes]), nodes)
+        columns.append(tree['value'][nodes])
+    return np.column_stack(columns)
+
+def select_trees(trees, meta, X, reference, tolerance=0.02, max_trees=None):
+    """
+    Choose a smaller set of trees that reproduces the full ensemble within an error budget
+
+    The budget is tolerance * std(reference), i.e. a fraction of the spread of the original
+    predictions. Random forests use greedy forward selection: repeatedly add the tree that
+    brings the averaged prediction closest to the reference. Boosted trees depend on their
+    predecessors, so for gradient boosting the shortest prefix of stages within budget is kept.
+
+    Args:
+        trees (list): Per-tree arrays from tree_arrays
+        meta (dict): ensemble_meta of the source model
+        X: Selection inputs (scaled as the ensemble sees them)
+        reference: Full-ensemble predictions for X
+        tolerance (float): Allowed RMSE as a fraction of the reference standard deviation
+        max_trees (int): Hard cap on the number of trees kept
+
+    Returns:
+        list: Indices of the selected trees, in application order
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    budget = tolerance * float(np.std(reference))
+    leaf_values = _tree_predictions(trees, X)
+    max_trees = min(max_trees or len(trees), len(trees))
+
+    if meta['kind'] == 'GradientBoostingRegressor':
+        staged = meta['init'] + meta['learning_rate'] * np.cumsum(leaf_values, axis=1)
+        for n_trees in range(1, max_trees + 1):
+            if _rmse(reference, staged[:, n_trees - 1]) <= budget:
+                return list(range(n_trees))
+        return list(range(max_trees))
+
+    selected = []
+    running_sum = np.zeros(len(reference))
+    remaining = list(range(len(trees)))
+    while remaining and len(selected) < max_trees:
+        candidates = (running_sum[:, None] + leaf_values[:, remaining]) / (len(selected) + 1)
+        errors = np.sqrt(np.mean((candidates - reference[:, None]) ** 2, axis=0))
+        best = int(np.argmin(errors))
+        running_sum += leaf_values[:, remaining[best]]
+        selected.append(remaining.pop(best))
+        if errors[best] <= budget:
+            break
+    return sorted(selected)
+
+def merge_leaves(tree, value_tolerance):
+    """
+    Collapse splits whose two leaf children predict almost the same value
+
+    Merging repeats bottom-up, so whole subtrees fold into one leaf when all of their leaves
+    agree within value_tolerance. The merged leaf takes the sample-weighted mean value.
+
+    Returns:
+        dict: A new tree with unreachable nodes removed and indices renumbered
+    """
+    left = tree['children_left'].copy()
+    right = tree['children_right'].copy()
+    value = tree['value'].astype(np.float64).copy()
+    samples = tree['n_node_samples'].astype(np.float64)
+
+    # Children have larger indices than their parent, so a reverse scan is bottom-up
+    for node in range(len(left) - 1, -1, -1):
+        l, r = left[node], right[node]
+        if l == -1 or left[l] != -1 or left[r] != -1:
+            continue
+        if abs(value[l] - value[r]) <= value_tolerance:
+            value[node] = (value[l] * samples[l] + value[r] * samples[r]) / (samples[l] + samples[r])
+            left[node] = right[node] = -1
+
+    # Keep only nodes still reachable from the root, preserving parent-before-child order
+    keep = np.zeros(len(left), dtype=bool)
+    keep[0] = True
+    for node in range(len(left)):
+        if keep[node] and left[node] != -1:
+            keep[left[node]] = keep[right[node]] = True
+    new_index = np.cumsum(keep) - 1
+
+    def remap(children):
+        children = children[keep]
+        return np.where(children == -1, -1, new_index[np.maximum(children, 0)])
+
+    return {
+        'children_left': remap(left),
+        'children_right': remap(right),
+        'feature': tree['feature'][keep],
+        'threshold': tree['threshold'][keep],
+        'value': value[keep],
+        'n_node_samples': tree['n_node_samples'][keep]
+    }
+
+def _directory_size(path):
+    return sum(os.path.getsize(f) for f in glob.glob(os.path.join(path, '*')) if os.path.isfile(f))
+
+def _latency_ms(predict, X, repeats):
+    predict(X)  # warm up caches and lazy imports
+    started = time.perf_counter()
+    for _ in range(repeats):
+        predict(X)
+    return (time.perf_counter() - started) / repeats * 1000
+
+def compress_model(estimator, X, out_dir, y=None, tolerance=0.02, leaf_tolerance=None,
+                   max_trees=None, precision='float32'):
+    """
+    Compress a fitted ensemble and write it in the compact format
+
+    Half of X drives tree selection; the other half is held out for the report.
+
+    Args:
+        estimator: Fitted RandomForestRegressor or GradientBoostingRegressor
+        X: Validation inputs, already scaled as the model expects
+        out_dir (str): Where the compressed compact model is written
+        y: Optional ground-truth targets, used only to report the accuracy change
+        tolerance (float): Allowed deviation from the original model, as a fraction of the
+            standard deviation of its predictions
+        leaf_tolerance (float): Merge sibling leaves closer than this (in leaf-value units);
+            defaults to half the tree-selection budget
+        max_trees (int): Optional cap on the number of trees
+        precision (str): 'float32' (default) or 'float64'
+
+    Returns:
+        dict: Size, load time, latency and accuracy of the original and compressed model
+    """
+    X = np.asarray(X, dtype=np.float64)
+    split = len(X) // 2
+    X_select, X_report = X[:split], X[split:]
+    reference = estimator.predict(X_select)
+
+    meta = ensemble_meta(estimator)
+    trees = tree_arrays(estimator)
+    selected = select_trees(trees, meta, X_select, reference, tolerance, max_trees)
+    if leaf_tolerance is None:
+        leaf_tolerance = 0.5 * tolerance * float(np.std(reference))
+        if meta['kind'] == 'GradientBoostingRegressor':
+            # Boosted stages add up, so each stage gets its share of the budget in leaf units
+            leaf_tolerance /= meta['learning_rate'] * len(selected)
+    compressed = [merge_leaves(trees[i], leaf_tolerance) for i in selected]
+    written = write_forest(compressed, meta, out_dir, precision)
+
+    # Original artifact: the pickle as it is shipped today
+    buffer = io.BytesIO()
+    joblib.dump(estimator, buffer)
+    pickle_bytes = buffer.getvalue()
+    started = time.perf_counter()
+    joblib.load(io.BytesIO(pickle_bytes))
+    pickle_load_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    model = CompactForest.load(out_dir, mmap=False)
+    compact_load_ms = (time.perf_counter() - started) * 1000
+
+    original_pred = estimator.predict(X_report)
+    compressed_pred = model.predict(X_report)
+    single_row = X_report[:1]
+    batch = X_report[:1000]
+
+    accuracy = {
+        'rmse_vs_original': round(_rmse(original_pred, compressed_pred), 4),
+        'max_abs_diff_vs_original': round(float(np.max(np.abs(compressed_pred - original_pred))), 4),
+        'relative_rmse_vs_original': round(_rmse(original_pred, compressed_pred) / max(float(np.std(original_pred)), 1e-12), 4)
+    }
+    if y is not None:
+        y_report = np.asarray(y, dtype=np.float64)[split:]
+        original_rmse, compressed_rmse = _rmse(y_report, original_pred), _rmse(y_report, compressed_pred)
+        accuracy.update({
+            'original_rmse': round(original_rmse, 4),
+            'compressed_rmse': round(compressed_rmse, 4),
+            'rmse_delta_pct': round((compressed_rmse / max(original_rmse, 1e-12) - 1) * 100, 2)
+        })
+
+    return {
+        'kind': meta['kind'],
+        'trees': {'original': len(trees), 'compressed': written['n_trees']},
+        'nodes': {'original': int(sum(len(t['value']) for t in trees)), 'compressed': written['n_nodes']},
+        'size_bytes': {'original_pickle': len(pickle_bytes), 'compressed': _directory_size(out_dir)},
+        'load_ms': {'original_pickle': round(pickle_load_ms, 2), 'compressed': round(compact_load_ms, 2)},
+        'latency_ms': {
+            'original_single': round(_latency_ms(estimator.predict, single_row, 20), 3),
+            'compressed_single': round(_latency_ms(model.predict, single_row, 20), 3),
+            'original_batch_1000': round(_latency_ms(estimator.predict, batch, 5), 3),
+            'compressed_batch_1000': round(_latency_ms(model.predict, batch, 5), 3)
+        },
+        'accuracy': accuracy,
+        'precision': precision,
+        'out_dir': out_dir
+    }
+
+def optimizer_validation_data(data_dir=None, features=None, scaler=None):
+    """Scaled feature matrix and fuel/CO2 targets from the demo telemetry CSVs"""
+    import pandas as pd
+    from carbon_optimizer import CarbonOptimizer
+    from artifact_manager import get_artifact_manager
+
+    data_dir = data_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+    frames = [pd.read_csv(path) for path in sorted(glob.glob(os.path.join(data_dir, '*_telemetry.csv')))]
+    if not frames:
+        raise FileNotFoundError(f"No *_telemetry.csv files in {data_dir}")
+    # Shuffle once so the selection and report halves cover every operation type
+    data = pd.concat(frames, ignore_index=True).sample(frac=1.0, random_state=42).reset_index(drop=True)
+
+    bundle = get_artifact_manager().load_bundle(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'carbonsense'),
+                                                model_format='pickle')
+    features = features or bundle['features']
+    scaler = scaler or bundle['scaler']
+    X = CarbonOptimizer().prepare_features(data).reindex(columns=features, fill_value=0)
+    return scaler.transform(X.astype(float)), data['fuel_rate_gph'].values, data['co2_rate_lbs_per_hour'].values
+
+def print_report(name, report):
+    print(f"\n📦 {name} ({report['kind']}, {report['precision']})")
+    print(f"   Trees: {report['trees']['original']} → {report['trees']['compressed']}   "
+          f"Nodes: {report['nodes']['original']} → {report['nodes']['compressed']}")
+    print(f"   Size: {report['size_bytes']['original_pickle'] / 1024:.1f} KB → "
+          f"{report['size_bytes']['compressed'] / 1024:.1f} KB")
+    print(f"   Load: {report['load_ms']['original_pickle']:.2f} ms → {report['load_ms']['compressed']:.2f} ms")
+    latency = report['latency_ms']
+    print(f"   Latency (1 row): {latency['original_single']:.3f} ms → {latency['compressed_single']:.3f} ms   "
+          f"(1000 rows): {latency['original_batch_1000']:.3f} ms → {latency['compressed_batch_1000']:.3f} ms")
+    accuracy = report['accuracy']
+    print(f"   Deviation from original: RMSE {accuracy['rmse_vs_original']} "
+          f"({accuracy['relative_rmse_vs_original'] * 100:.1f}% of prediction spread), max {accuracy['max_abs_diff_vs_original']}")
+    if 'original_rmse' in accuracy:
+        print(f"   RMSE vs telemetry: {accuracy['original_rmse']} → {accuracy['compressed_rmse']} "
+              f"({accuracy['rmse_delta_pct']:+.2f}%)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compress the optimizer models for in-cab deployment")
+    parser.add_argument('--out-dir', default=os.path.join(COMPACT_DIR, 'compressed'))
+    parser.add_argument('--tolerance', type=float, default=0.02,
+                        help="Allowed deviation from the original, as a fraction of its prediction spread")
+    parser.add_argument('--leaf-tolerance', type=float, default=None)
+    parser.add_argument('--max-trees', type=int, default=None)
+    parser.add_argument('--precision', default='float32', choices=['float32', 'float64'])
+    parser.add_argument('--report', default=None, help="Optional path for a JSON report")
+    args = parser.parse_args()
+
+    from artifact_manager import get_artifact_manager
+    bundle = get_artifact_manager().load_bundle(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'carbonsense'),
+                                                model_format='pickle')
+    X, fuel, co2 = optimizer_validation_data()
+
+    reports = {}
+    for name, model, target in (('fuel_model', bundle['fuel_model'], fuel),
+                                ('emission_model', bundle['emission_model'], co2)):
+        reports[name] = compress_model(model, X, os.path.join(args.out_dir, name), y=target,
+                                       tolerance=args.tolerance, leaf_tolerance=args.leaf_tolerance,
+                                       max_trees=args.max_trees, precision=args.precision)
+        print_report(name, reports[name])
+
+    # Scaler, feature list and index make the directory a loadable compact bundle (compact_forest.load_bundle)
+    export_scaler(bundle['scaler'], os.path.join(args.out_dir, 'scaler'))
+    with open(os.path.join(args.out_dir, 'features.json'), 'w') as f:
+        json.dump(bundle['features'], f)
+    with open(os.path.join(args.out_dir, 'bundle.json'), 'w') as f:
+        json.dump({'fuel_model': 'forest', 'emission_model': 'forest', 'scaler': 'scaler', 'features': 'json'}, f, indent=2)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n✅ Report written to {args.report}")
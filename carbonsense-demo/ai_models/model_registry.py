@@ -0,0 +1,251 @@
+"""
+CarbonSense AI - Model Registry
+Versioned, atomically published optimizer models with activation and rollback
+
+Layout:
+    registry/
+        versions/<version>/carbonsense_fuel_model.pkl, ..._features.json, metadata.json
+        versions/<version>/compact/carbonsense/   compact export (CARBONSENSE_MODEL_FORMAT=mmap)
+        CURRENT            JSON pointer to the active version and the activation history
+
+A version directory is written under a temporary name and renamed into place, so readers
+only ever see complete versions. CURRENT is replaced with os.replace for the same reason.
+"""
+
+import os
+import json
+import shutil
+import threading
+import uuid
+from datetime import datetime
+
+from artifact_manager import ARTIFACT_DIR, COMPACT_SUBDIR, OPTIMIZER_ARTIFACTS, get_artifact_manager, sha256_file
+from compact_forest import export_bundle
+
+REGISTRY_DIR = os.environ.get('CARBONSENSE_MODEL_REGISTRY', os.path.join(ARTIFACT_DIR, 'registry'))
+MODEL_PREFIX = 'carbonsense'
+
+class ModelRegistry:
+    """
+    Directory of immutable optimizer model versions
+
+    Versions are never modified after publish; activating a version only moves the CURRENT
+    pointer, so rolling back is instant and every old version stays loadable.
+    """
+
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = os.path.abspath(root)
+        self.versions_dir = os.path.join(self.root, 'versions')
+        self.current_path = os.path.join(self.root, 'CURRENT')
+        self._lock = threading.Lock()
+
+    def _next_version(self):
+        existing = [v for v in self.list_versions() if v.startswith('v') and v[1:5].isdigit()]
+        number = max([int(v[1:5]) for v in existing], default=0) + 1
+        return f"v{number:04d}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+
+    def version_dir(self, version):
+        return os.path.join(self.versions_dir, version)
+
+    def model_prefix(self, version):
+        """Path prefix accepted by CarbonOptimizer.load_models"""
+        return os.path.join(self.version_dir(version), MODEL_PREFIX)
+
+    def publish(self, save_fn, metadata=None, activate=False):
+        """
+        Publish a new version atomically
+
+        Args:
+            save_fn (callable): Called with a path prefix and must write the model artifacts,
+                e.g. optimizer.save_models
+            metadata (dict): Extra information stored with the version (scores, data source)
+            activate (bool): Point CURRENT at the new version once it is in place
+
+        Returns:
+            str: The new version id
+        """
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging_dir = os.path.join(self.root, f".staging-{uuid.uuid4().hex}")
+        os.makedirs(staging_dir)
+        try:
+            save_fn(os.path.join(staging_dir, MODEL_PREFIX))
+
+            checksums = {}
+            for suffix in OPTIMIZER_ARTIFACTS.values():
+                file_name = f"{MODEL_PREFIX}{suffix}"
+                path = os.path.join(staging_dir, file_name)
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"Model save did not produce {file_name}")
+                checksums[file_name] = sha256_file(path)
+            self._export_compact(staging_dir)
+
+            with self._lock:
+                version = self._next_version()
+                with open(os.path.join(staging_dir, 'metadata.json'), 'w') as f:
+                    json.dump({
+                        'version': version,
+                        'published_at': datetime.now().isoformat(),
+                        'checksums': checksums,
+                        **(metadata or {})
+                    }, f, indent=2)
+                # Rename is atomic within one filesystem: the version appears complete or not at all
+                os.rename(staging_dir, self.version_dir(version))
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        print(f"✅ Published model version {version}")
+        if activate:
+            self.activate(version)
+        return version
+
+    def _export_compact(self, version_dir):
+        """Compact export of a version's pickles, where ArtifactManager.compact_bundle_path looks for it"""
+        import joblib
+        prefix = os.path.join(version_dir, MODEL_PREFIX)
+        artifacts = {}
+        for key, suffix in OPTIMIZER_ARTIFACTS.items():
+            # Read directly: the staging paths must not enter the process-wide artifact cache
+            if suffix.endswith('.json'):
+                with open(f"{prefix}{suffix}", 'r') as f:
+                    artifacts[key] = json.load(f)
+            else:
+                artifacts[key] = joblib.load(f"{prefix}{suffix}")
+        export_bundle(artifacts, os.path.join(version_dir, COMPACT_SUBDIR, MODEL_PREFIX))
+
+    def compact_dir(self, version):
+        return os.path.join(self.version_dir(version), COMPACT_SUBDIR, MODEL_PREFIX)
+
+    def list_versions(self):
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(v for v in os.listdir(self.versions_dir) if not v.startswith('.'))
+
+    def describe(self, version):
+        """Stored metadata of a version"""
+        try:
+            with open(os.path.join(self.version_dir(version), 'metadata.json'), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(f"Unknown model version: {version}")
+
+    def verify(self, version):
+        """Check every artifact of a version against the checksums recorded at publish"""
+        checksums = self.describe(version)['checksums']
+        for file_name, expected in checksums.items():
+            if sha256_file(os.path.join(self.version_dir(version), file_name)) != expected:
+                raise ValueError(f"Checksum mismatch for {file_name} in {version}")
+        return True
+
+    def _read_pointer(self):
+        try:
+            with open(self.current_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {'version': None, 'history': []}
+
+    def current_version(self):
+        """Active version, or None when the bundled (unversioned) models are in use"""
+        return self._read_pointer()['version']
+
+    def current_prefix(self):
+        version = self.current_version()
+        return self.model_prefix(version) if version else None
+
+    def activate(self, version):
+        """Point CURRENT at a published version, remembering the previous one for rollback"""
+        if version not in self.list_versions():
+            raise KeyError(f"Unknown model version: {version}")
+        with self._lock:
+            pointer = self._read_pointer()
+            history = pointer['history']
+            if pointer['version'] and pointer['version'] != version:
+                history = (history + [pointer['version']])[-20:]
+            self._write_pointer({
+                'version': version,
+                'activated_at': datetime.now().isoformat(),
+                'history': history
+            })
+        return version
+
+    def previous_version(self):
+        """Version that rollback() would restore"""
+        history = self._read_pointer()['history']
+        return history[-1] if history else None
+
+    def rollback(self):
+        """Re-activate the previously active version"""
+        with self._lock:
+            pointer = self._read_pointer()
+            if not pointer['history']:
+                raise ValueError("No previous model version to roll back to")
+            version = pointer['history'][-1]
+            self._write_pointer({
+                'version': version,
+                'activated_at': datetime.now().isoformat(),
+                'history': pointer['history'][:-1]
+            })
+        return version
+
+    def _write_pointer(self, pointer):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.current_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(pointer, f, indent=2)
+        os.replace(tmp_path, self.current_path)
+
+    def summary(self):
+        """Versions with metadata and the active pointer, for the admin API"""
+        pointer = self._read_pointer()
+        return {
+            'active_version': pointer['version'],
+            'activated_at': pointer.get('activated_at'),
+            'previous_version': pointer['history'][-1] if pointer['history'] else None,
+            'versions': [
+                {key: value for key, value in self.describe(version).items() if key != 'checksums'}
+                for version in self.list_versions()
+            ]
+        }
+
+def load_version(version, registry=None, optimizer_class=None):
+    """
+    Build a fresh optimizer for a registry version without touching the running one
+
+    Returns:
+        CarbonOptimizer: Optimizer whose models come from the given version
+    """
+    from carbon_optimizer import CarbonOptimizer
+
+    registry = registry or ModelRegistry()
+    registry.verify(version)
+    if get_artifact_manager().model_format == 'mmap':
+        bundle_dir = registry.compact_dir(version)
+        if not os.path.exists(os.path.join(bundle_dir, 'bundle.json')):
+            # Falling back to another export (or the pickles) would serve trees the caller did not ask for
+            raise FileNotFoundError(f"Model version {version} has no compact export at {bundle_dir}")
+    optimizer = (optimizer_class or CarbonOptimizer)()
+    if not optimizer.load_models(registry.model_prefix(version), require_compact=True):
+        raise RuntimeError(f"Model version {version} could not be loaded")
+    return optimizer
+
+def publish_optimizer(optimizer, metadata=None, activate=False, registry=None):
+    """Publish a trained optimizer's models as a new registry version"""
+    registry = registry or ModelRegistry()
+    # Staging paths are temporary, so they are not recorded in the artifact manifest
+    return registry.publish(lambda prefix: optimizer.save_models(prefix, register_artifacts=False),
+                            metadata=metadata, activate=activate)
+
+def bundled_prefix():
+    """Path prefix of the unversioned carbonsense_* artifacts shipped next to this module"""
+    return os.path.join(ARTIFACT_DIR, MODEL_PREFIX)
+
+def publish_bundled_models(registry=None, activate=True):
+    """Copy the bundled carbonsense_* artifacts into the registry as its first version"""
+    registry = registry or ModelRegistry()
+
+    def copy_bundled(prefix):
+        for suffix in OPTIMIZER_ARTIFACTS.values():
+            shutil.copy2(f"{bundled_prefix()}{suffix}", f"{prefix}{suffix}")
+
+    get_artifact_manager().verify_all([f"{bundled_prefix()}{suffix}" for suffix in OPTIMIZER_ARTIFACTS.values()])
+    return registry.publish(copy_bundled, metadata={'source': 'bundled'}, activate=activate)
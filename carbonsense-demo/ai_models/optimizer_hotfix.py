@@ -5,13 +5,13 @@ Patch for the CarbonOptimizer to fix savings calculation issues
 
 import os
 import sys
-import joblib
-import json
 from pathlib import Path
 
 # Make sure we can import the original optimizer
 sys.path.insert(0, os.path.dirname(__file__))
 
+from artifact_manager import get_artifact_manager
+
 # Try to import the optimizer
 try:
     from carbon_optimizer import CarbonOptimizer
@@ -37,26 +37,10 @@ def apply_hotfix():
             'carbonsense_features.json'
         ]
 
-        # Verify all files exist
-        missing_files = []
-        for file_name in required_files:
-            if not (current_dir / file_name).exists():
-                missing_files.append(file_name)
-
-        if missing_files:
-            raise FileNotFoundError(f"Missing required model files: {', '.join(missing_files)}")
-
-        # Test loading each model file
-        models = {}
-        for file_name in required_files:
-            file_path = current_dir / file_name
-            if file_name.endswith('.pkl'):
-                models[file_name] = joblib.load(file_path)
-            elif file_name.endswith('.json'):
-                with open(file_path, 'r') as f:
-                    models[file_name] = json.load(f)
+        # Verify every file exists and matches its manifest checksum, without unpickling it
+        get_artifact_manager().verify_all([str(current_dir / file_name) for file_name in required_files])
 
-        print("✅ Hotfix applied: All model files verified and loadable")
+        print("✅ Hotfix applied: All model files present and checksums verified")
         
         # Return the patched optimizer class
         return PatchedCarbonOptimizer
@@ -4,10 +4,12 @@ Retrains the models with the current scikit-learn version
 """
 
 import os
+import argparse
 import pandas as pd
 from carbon_optimizer import CarbonOptimizer
+from model_registry import publish_optimizer
 
-def retrain_models():
+def retrain_models(activate=False):
     print("🔄 Starting model retraining process...")
     
     # Initialize optimizer
@@ -26,10 +28,14 @@ def retrain_models():
         print(f"   Fuel model R² score: {fuel_score:.3f}")
         print(f"   CO2 model R² score: {co2_score:.3f}")
         
-        # Save the models
-        models_path = os.path.join(os.path.dirname(__file__), 'carbonsense')
-        optimizer.save_models(models_path)
-        print("✅ Models saved successfully")
+        # Publish a new registry version; the running backend picks it up via /api/admin/models/activate
+        version = publish_optimizer(optimizer, metadata={
+            'source': 'retrain_models',
+            'training_rows': len(training_data),
+            'fuel_r2': round(float(fuel_score), 4),
+            'co2_r2': round(float(co2_score), 4)
+        }, activate=activate)
+        print(f"✅ Models published as version {version}" + (" (active)" if activate else ""))
         
         # Test the models with sample data
         test_operation = {
@@ -53,10 +59,16 @@ def retrain_models():
             print(f"   CO2 reduction: {optimization['co2_reduction_percent']}%")
         else:
             print("❌ Test failed: No optimization results")
+        
+        return version
             
     except Exception as e:
         print(f"❌ Error during retraining: {str(e)}")
         raise
 
 if __name__ == "__main__":
-    retrain_models()
+    parser = argparse.ArgumentParser(description="Retrain the optimizer models and publish them to the registry")
+    parser.add_argument('--activate', action='store_true',
+                        help="Make the new version active for the next backend start or swap")
+    args = parser.parse_args()
+    retrain_models(activate=args.activate)
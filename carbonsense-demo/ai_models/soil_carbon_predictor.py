@@ -3,21 +3,29 @@ CarbonSense AI - Soil Carbon Emission Prediction Model
 Predicts CO2 and N2O emissions based on soil nutrients, properties, and environmental factors
 """
 
+import os
+import sys
+import threading
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
-import joblib
 import json
 from datetime import datetime, timedelta
 import logging
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from artifact_manager import ARTIFACT_DIR, RUNTIME_DIR, get_artifact_manager
+from compact_forest import export_bundle
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# pandas, scikit-learn and the data generator are imported by the methods that use them,
+# so importing this module stays cheap until models are trained, loaded or queried
+
+def _is_dataframe(obj):
+    # A DataFrame can only exist once pandas has been imported by someone else
+    return 'pandas' in sys.modules and isinstance(obj, sys.modules['pandas'].DataFrame)
+
 class SoilCarbonPredictor:
     """
     Advanced ML model for predicting soil carbon emissions from agricultural data
@@ -26,7 +34,9 @@ class SoilCarbonPredictor:
     def __init__(self):
         self.co2_model = None
         self.n2o_model = None
-        self.scaler = StandardScaler()
+        self._scaler = None
+        # Importances stored in the compact export, whose forests do not carry feature_importances_
+        self._exported_importance = {}
         self.feature_names = [
             'nitrogen_ppm', 'phosphorus_ppm', 'potassium_ppm',
             'soil_ph', 'organic_carbon_pct', 'moisture_pct',
@@ -38,77 +48,81 @@ class SoilCarbonPredictor:
             'corn': 0, 'soybean': 1, 'wheat': 2, 'cotton': 3, 
             'rice': 4, 'barley': 5, 'oats': 6, 'alfalfa': 7
         }
-        
-    def generate_synthetic_training_data(self, n_samples=10000):
+        # Default values used when a soil sample omits a feature
+        self.feature_defaults = {
+            'nitrogen_ppm': 45, 'phosphorus_ppm': 25, 'potassium_ppm': 180,
+            'soil_ph': 6.2, 'organic_carbon_pct': 2.5, 'moisture_pct': 22,
+            'temperature_c': 18, 'bulk_density': 1.3, 'clay_pct': 25,
+            'sand_pct': 45, 'crop_type_encoded': 0, 'tillage_intensity': 2,
+            'fertilizer_rate_kg_ha': 120, 'days_since_fertilization': 30,
+            'precipitation_mm': 25
+        }
+        self.n2o_gwp = 298  # N2O global warming potential (100-year, CO2 = 1)
+        self.weather_features = ['temperature_c', 'moisture_pct', 'precipitation_mm']
+        
+    @property
+    def scaler(self):
+        # Created on first use, so a predictor served from the compact (mmap) export never imports scikit-learn
+        if self._scaler is None:
+            from sklearn.preprocessing import StandardScaler
+            self._scaler = StandardScaler()
+        return self._scaler
+    
+    @scaler.setter
+    def scaler(self, value):
+        self._scaler = value
+    
+    def generate_synthetic_training_data(self, n_samples=10000, seed=42):
         """
         Generate realistic synthetic soil and emission data for training
         Based on agricultural research and emission factor databases
-        """
-        np.random.seed(42)
-        
-        # Generate soil nutrient data (typical ranges for agricultural soils)
-        data = {
-            'nitrogen_ppm': np.random.normal(45, 15, n_samples).clip(5, 150),
-            'phosphorus_ppm': np.random.normal(25, 8, n_samples).clip(3, 80),
-            'potassium_ppm': np.random.normal(180, 40, n_samples).clip(50, 400),
-            'soil_ph': np.random.normal(6.2, 0.8, n_samples).clip(4.5, 8.5),
-            'organic_carbon_pct': np.random.normal(2.5, 0.7, n_samples).clip(0.5, 6.0),
-            'moisture_pct': np.random.normal(22, 6, n_samples).clip(8, 45),
-            'temperature_c': np.random.normal(18, 8, n_samples).clip(-5, 35),
-            'bulk_density': np.random.normal(1.3, 0.15, n_samples).clip(1.0, 1.7),
-            'clay_pct': np.random.normal(25, 12, n_samples).clip(5, 60),
-            'sand_pct': np.random.normal(45, 15, n_samples).clip(15, 85),
-            'crop_type_encoded': np.random.randint(0, 8, n_samples),
-            'tillage_intensity': np.random.randint(1, 4, n_samples),  # 1=no-till, 2=reduced, 3=conventional
-            'fertilizer_rate_kg_ha': np.random.normal(120, 30, n_samples).clip(0, 250),
-            'days_since_fertilization': np.random.randint(0, 180, n_samples),
-            'precipitation_mm': np.random.normal(25, 15, n_samples).clip(0, 100)
-        }
         
-        df = pd.DataFrame(data)
-        
-        # Calculate realistic CO2 emissions (kg CO2-eq per hectare per day)
-        # Based on soil respiration models and research literature
-        co2_base = (
-            df['organic_carbon_pct'] * 2.5 +  # Higher organic carbon = more respiration
-            (df['temperature_c'] * 0.3).clip(0, None) +  # Temperature effect
-            df['moisture_pct'] * 0.2 +  # Moisture effect
-            (df['nitrogen_ppm'] * 0.05) +  # Nitrogen effect
-            df['tillage_intensity'] * 3  # Tillage disturbance
+        Uses its own seeded Generator, so the global numpy RNG is left untouched.
+        """
+        from soil_data_generator import SyntheticSoilDataGenerator
+        return SyntheticSoilDataGenerator(seed=seed).generate(n_samples)
+    
+    def _new_co2_model(self, n_estimators=200):
+        """CO2 emission model with the production hyperparameters"""
+        from sklearn.ensemble import GradientBoostingRegressor
+        return GradientBoostingRegressor(
+            n_estimators=n_estimators,
+            max_depth=6,
+            learning_rate=0.1,
+            random_state=42
         )
-        
-        # Add realistic variability and environmental factors
-        df['co2_emissions_kg_ha_day'] = (
-            co2_base * np.random.normal(1.0, 0.15, n_samples) + 
-            np.random.normal(0, 2, n_samples)  # Random variation
-        ).clip(2, 45)
-        
-        # Calculate N2O emissions (kg N2O per hectare per day)
-        # Based on IPCC emission factors and agricultural research
-        n2o_base = (
-            (df['nitrogen_ppm'] * 0.008) +  # Direct relationship with N content
-            (df['fertilizer_rate_kg_ha'] * 0.002) +  # Fertilizer contribution
-            (df['moisture_pct'] * 0.003) +  # Wet conditions increase N2O
-            (df['clay_pct'] * 0.001) +  # Soil texture effect
-            np.where(df['days_since_fertilization'] < 30, 0.5, 0.1)  # Post-fertilization spike
+    
+    def _new_n2o_model(self, n_estimators=150):
+        """N2O emission model with the production hyperparameters"""
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(
+            n_estimators=n_estimators,
+            max_depth=8,
+            random_state=42
         )
-        
-        df['n2o_emissions_kg_ha_day'] = (
-            n2o_base * np.random.normal(1.0, 0.2, n_samples) + 
-            np.random.normal(0, 0.05, n_samples)
-        ).clip(0.01, 2.5)
-        
-        return df
     
-    def train_models(self, retrain=False):
+    def train_models(self, retrain=False, n_samples=None, preset=None, shards=None):
         """
         Train CO2 and N2O emission prediction models
+        
+        Args:
+            retrain (bool): Retrain even if models are already loaded
+            n_samples (int): Rows of synthetic data to generate in memory
+            preset (str): Named scale from SCALE_PRESETS, used when n_samples is not given
+            shards (str|list): Shard directory, glob or paths; trains incrementally shard by shard
         """
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
+        from soil_data_generator import SCALE_PRESETS
+        
         if not retrain and self.co2_model is not None and self.n2o_model is not None:
             return
+        
+        if shards is not None:
+            return self._train_from_shards(shards)
             
         logger.info("Generating training data...")
-        df = self.generate_synthetic_training_data()
+        df = self.generate_synthetic_training_data(n_samples or SCALE_PRESETS[preset or 'demo'])
         
         # Prepare features and targets
         X = df[self.feature_names]
@@ -120,30 +134,85 @@ class SoilCarbonPredictor:
             X, y_co2, y_n2o, test_size=0.2, random_state=42
         )
         
-        # Scale features
+        # Scale features (a new scaler, so a shared loaded one is never refit in place)
+        self.scaler = StandardScaler()
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
         
         # Train CO2 model
         logger.info("Training CO2 emission model...")
-        self.co2_model = GradientBoostingRegressor(
-            n_estimators=200,
-            max_depth=6,
-            learning_rate=0.1,
-            random_state=42
-        )
+        self.co2_model = self._new_co2_model()
         self.co2_model.fit(X_train_scaled, y_co2_train)
         
         # Train N2O model
         logger.info("Training N2O emission model...")
-        self.n2o_model = RandomForestRegressor(
-            n_estimators=150,
-            max_depth=8,
-            random_state=42
-        )
+        self.n2o_model = self._new_n2o_model()
         self.n2o_model.fit(X_train_scaled, y_n2o_train)
         
-        # Evaluate models
+        return self._evaluate_and_save(X_test_scaled, y_co2_test, y_n2o_test)
+    
+    def _train_from_shards(self, shards):
+        """
+        Train incrementally with only one shard in memory at a time
+        
+        A first pass fits the scaler with partial_fit. A second pass grows both ensembles
+        with warm_start, adding an equal share of the trees per shard. The boosted CO2
+        trees fit the residuals on each new shard. 20% of the last shard is held out for
+        evaluation.
+        """
+        from sklearn.preprocessing import StandardScaler
+        from soil_data_generator import list_shards, read_shard
+        
+        paths = list_shards(shards)
+        if not paths:
+            raise FileNotFoundError(f"No training shards found in {shards}")
+        logger.info(f"Training from {len(paths)} shards...")
+        
+        # Pass 1: feature scaling statistics
+        self.scaler = StandardScaler()
+        for path in paths:
+            self.scaler.partial_fit(read_shard(path)[self.feature_names])
+        
+        # Pass 2: grow the ensembles shard by shard
+        co2_per_shard = max(1, -(-200 // len(paths)))
+        n2o_per_shard = max(1, -(-150 // len(paths)))
+        self.co2_model = self._new_co2_model(n_estimators=0)
+        self.co2_model.set_params(warm_start=True)
+        self.n2o_model = self._new_n2o_model(n_estimators=0)
+        self.n2o_model.set_params(warm_start=True)
+        
+        training_rows = 0
+        for i, path in enumerate(paths):
+            df = read_shard(path)
+            if i == len(paths) - 1:
+                holdout = np.random.default_rng(42).random(len(df)) < 0.2
+                test_df, df = df[holdout], df[~holdout]
+            
+            X_scaled = self.scaler.transform(df[self.feature_names])
+            self.co2_model.set_params(n_estimators=self.co2_model.n_estimators + co2_per_shard)
+            self.co2_model.fit(X_scaled, df['co2_emissions_kg_ha_day'])
+            self.n2o_model.set_params(n_estimators=self.n2o_model.n_estimators + n2o_per_shard)
+            self.n2o_model.fit(X_scaled, df['n2o_emissions_kg_ha_day'])
+            training_rows += len(df)
+            logger.info(f"Shard {i + 1}/{len(paths)}: {training_rows:,} rows, "
+                        f"{self.co2_model.n_estimators} CO2 / {self.n2o_model.n_estimators} N2O trees")
+        
+        # Freeze the ensembles so later fits start from scratch
+        self.co2_model.set_params(warm_start=False)
+        self.n2o_model.set_params(warm_start=False)
+        
+        results = self._evaluate_and_save(
+            self.scaler.transform(test_df[self.feature_names]),
+            test_df['co2_emissions_kg_ha_day'],
+            test_df['n2o_emissions_kg_ha_day']
+        )
+        results.update({'training_rows': training_rows, 'shards': len(paths)})
+        return results
+    
+    def _evaluate_and_save(self, X_test_scaled, y_co2_test, y_n2o_test):
+        """Score both models on held-out data, then persist them"""
+        from sklearn.metrics import r2_score, mean_squared_error
+        
         co2_pred = self.co2_model.predict(X_test_scaled)
         n2o_pred = self.n2o_model.predict(X_test_scaled)
         
@@ -163,6 +232,12 @@ class SoilCarbonPredictor:
             'n2o_rmse': np.sqrt(mean_squared_error(y_n2o_test, n2o_pred))
         }
     
+    def _ensure_models(self):
+        """Load pre-trained models, training new ones if none are saved"""
+        if self.co2_model is None or self.n2o_model is None:
+            if not self.load_models():
+                self.train_models()
+    
     def predict_emissions(self, soil_data):
         """
         Predict CO2 and N2O emissions for given soil conditions
@@ -173,27 +248,10 @@ class SoilCarbonPredictor:
         Returns:
             dict: Predicted emissions and analysis
         """
-        # Ensure models are trained
-        if self.co2_model is None or self.n2o_model is None:
-            if not self.load_models():
-                self.train_models()
+        self._ensure_models()
         
         # Prepare input data
-        input_data = []
-        for feature in self.feature_names:
-            if feature in soil_data:
-                input_data.append(soil_data[feature])
-            else:
-                # Use default values for missing features
-                defaults = {
-                    'nitrogen_ppm': 45, 'phosphorus_ppm': 25, 'potassium_ppm': 180,
-                    'soil_ph': 6.2, 'organic_carbon_pct': 2.5, 'moisture_pct': 22,
-                    'temperature_c': 18, 'bulk_density': 1.3, 'clay_pct': 25,
-                    'sand_pct': 45, 'crop_type_encoded': 0, 'tillage_intensity': 2,
-                    'fertilizer_rate_kg_ha': 120, 'days_since_fertilization': 30,
-                    'precipitation_mm': 25
-                }
-                input_data.append(defaults[feature])
+        input_data = [soil_data.get(feature, self.feature_defaults[feature]) for feature in self.feature_names]
         
         # Scale input
         input_scaled = self.scaler.transform([input_data])
@@ -204,17 +262,17 @@ class SoilCarbonPredictor:
             n2o_emission = self.n2o_model.predict(input_scaled)[0]
             
             # Convert N2O to CO2 equivalent (N2O has 298x warming potential)
-            n2o_co2_equiv = n2o_emission * 298
+            n2o_co2_equiv = n2o_emission * self.n2o_gwp
             total_co2_equiv = co2_emission + n2o_co2_equiv
             
             # Calculate feature importance for this prediction
-            co2_importance = dict(zip(self.feature_names, self.co2_model.feature_importances_))
-            n2o_importance = dict(zip(self.feature_names, self.n2o_model.feature_importances_))
+            co2_importance = self._feature_importance(self.co2_model, 'co2')
+            n2o_importance = self._feature_importance(self.n2o_model, 'n2o')
         else:
             # Fallback values if models aren't available
             co2_emission = 15.0
             n2o_emission = 0.5
-            n2o_co2_equiv = n2o_emission * 298
+            n2o_co2_equiv = n2o_emission * self.n2o_gwp
             total_co2_equiv = co2_emission + n2o_co2_equiv
             co2_importance = {}
             n2o_importance = {}
@@ -229,9 +287,227 @@ class SoilCarbonPredictor:
             'prediction_timestamp': datetime.now().isoformat()
         }
     
-    def get_recommendations(self, soil_data, current_predictions):
+    def _feature_importance(self, model, name):
+        if hasattr(model, 'feature_importances_'):
+            return dict(zip(self.feature_names, model.feature_importances_))
+        return dict(self._exported_importance.get(name, {}))
+    
+    def _sample_matrix(self, samples):
+        """Build a (samples x features) matrix, filling missing features with defaults"""
+        if isinstance(samples, dict):
+            samples = [samples]
+        elif _is_dataframe(samples):
+            samples = samples.to_dict('records')
+        
+        matrix = np.empty((len(samples), len(self.feature_names)), dtype=float)
+        for j, feature in enumerate(self.feature_names):
+            default = self.feature_defaults[feature]
+            matrix[:, j] = [sample.get(feature, default) for sample in samples]
+        return matrix
+    
+    def _predict_matrix(self, X):
+        """Predict CO2 and N2O for every row of a raw feature matrix in one batch"""
+        self._ensure_models()
+        X_scaled = self.scaler.transform(X)
+        return self.co2_model.predict(X_scaled), self.n2o_model.predict(X_scaled)
+    
+    def simulate_season(self, samples, fertilization_schedule=None, weather=None,
+                        n_days=None, field_area_ha=None):
+        """
+        Simulate daily soil emissions across a season for every sample in a field
+        
+        Builds a days x samples feature tensor and scores it with a single batched
+        prediction per model.
+        
+        Args:
+            samples (list|dict|DataFrame): Soil samples for the field
+            fertilization_schedule (list): Applications as {'day': int, 'rate_kg_ha': float}
+            weather (dict|list|DataFrame): Daily temperature_c, moisture_pct and/or
+                precipitation_mm series; omitted variables keep the sample values
+            n_days (int): Season length, defaults to the length of the weather series (or 180)
+            field_area_ha (float): Optional field area used to report whole-field totals
+            
+        Returns:
+            dict: Daily and cumulative field-average curves plus seasonal totals
+        """
+        base = self._sample_matrix(samples)
+        n_samples = base.shape[0]
+        if n_samples == 0:
+            raise ValueError("At least one soil sample is required")
+        
+        # Normalise the weather series to {feature: np.ndarray}
+        if weather is None:
+            weather = {}
+        elif _is_dataframe(weather):
+            weather = {col: weather[col].to_numpy() for col in weather.columns}
+        elif isinstance(weather, list):
+            features = [feature for feature in self.weather_features if any(feature in day for day in weather)]
+            for i, day in enumerate(weather):
+                missing = [feature for feature in features if feature not in day]
+                if missing:
+                    raise ValueError(f"Weather day {i} is missing {', '.join(missing)}")
+            weather = {feature: np.array([day[feature] for day in weather], dtype=float) for feature in features}
+        weather = {
+            feature: np.asarray(values, dtype=float)
+            for feature, values in weather.items() if feature in self.weather_features
+        }
+        
+        series_lengths = {len(values) for values in weather.values()}
+        if len(series_lengths) > 1:
+            raise ValueError("All weather series must cover the same number of days")
+        if n_days is None:
+            n_days = series_lengths.pop() if series_lengths else 180
+        n_days = int(n_days)
+        if n_days <= 0:
+            raise ValueError(f"n_days must be at least 1, got {n_days}")
+        for feature, values in weather.items():
+            if len(values) < n_days:
+                raise ValueError(f"Weather series '{feature}' covers {len(values)} days, expected {n_days}")
+        
+        days = np.arange(n_days)
+        X = np.broadcast_to(base, (n_days, n_samples, base.shape[1])).copy()
+        
+        for feature, values in weather.items():
+            X[:, :, self.feature_names.index(feature)] = values[:n_days, None]
+        
+        # Days since fertilization and application rate follow the most recent application
+        dsf_idx = self.feature_names.index('days_since_fertilization')
+        rate_idx = self.feature_names.index('fertilizer_rate_kg_ha')
+        X[:, :, dsf_idx] += days[:, None]
+        if fertilization_schedule:
+            schedule = sorted(fertilization_schedule, key=lambda app: app['day'])
+            app_days = np.array([app['day'] for app in schedule], dtype=float)
+            app_rates = np.array([app.get('rate_kg_ha', self.feature_defaults['fertilizer_rate_kg_ha'])
+                                  for app in schedule], dtype=float)
+            last_app = np.searchsorted(app_days, days, side='right') - 1
+            fertilized = last_app >= 0
+            X[fertilized, :, dsf_idx] = (days[fertilized] - app_days[last_app[fertilized]])[:, None]
+            X[fertilized, :, rate_idx] = app_rates[last_app[fertilized]][:, None]
+        
+        co2, n2o = self._predict_matrix(X.reshape(-1, X.shape[2]))
+        co2 = co2.reshape(n_days, n_samples)
+        n2o = n2o.reshape(n_days, n_samples)
+        co2e = co2 + n2o * self.n2o_gwp
+        
+        # Field-average daily curves (kg/ha/day) and their running totals (kg/ha)
+        daily = {
+            'co2_kg_ha': co2.mean(axis=1),
+            'n2o_kg_ha': n2o.mean(axis=1),
+            'co2e_kg_ha': co2e.mean(axis=1)
+        }
+        cumulative = {key: np.cumsum(values) for key, values in daily.items()}
+        seasonal_totals = {key: float(values[-1]) for key, values in cumulative.items()}
+        per_sample_co2e = co2e.sum(axis=0)
+        
+        result = {
+            'n_days': int(n_days),
+            'n_samples': int(n_samples),
+            'daily': {key: np.round(values, 4).tolist() for key, values in daily.items()},
+            'cumulative': {key: np.round(values, 3).tolist() for key, values in cumulative.items()},
+            'seasonal_totals': {key: round(value, 3) for key, value in seasonal_totals.items()},
+            'peak_day': int(np.argmax(daily['co2e_kg_ha'])),
+            'per_sample_co2e_kg_ha': np.round(per_sample_co2e, 3).tolist()
+        }
+        if field_area_ha:
+            result['field_totals_kg'] = {
+                key: round(value * field_area_ha, 1) for key, value in seasonal_totals.items()
+            }
+        
+        return result
+    
+    def evaluate_management_scenarios(self, soil_data, top_k=5, tillage_levels=(1, 2, 3),
+                                      fertilizer_factors=(1.0, 0.9, 0.8, 0.7, 0.6),
+                                      timing_shifts_days=(0, 14, 30)):
+        """
+        Score every combination of management levers for a sample in one batched prediction
+        
+        Args:
+            soil_data (dict): Current soil conditions and management
+            top_k (int): Number of interventions to return
+            tillage_levels (tuple): Tillage intensities to try (1=no-till, 3=conventional)
+            fertilizer_factors (tuple): Multipliers applied to the current fertilizer rate
+            timing_shifts_days (tuple): Days to bring the last fertilization forward
+            
+        Returns:
+            dict: Baseline emissions and the top-k interventions ranked by CO2e reduction
+        """
+        current = self._sample_matrix(soil_data)[0]
+        tillage_idx = self.feature_names.index('tillage_intensity')
+        rate_idx = self.feature_names.index('fertilizer_rate_kg_ha')
+        dsf_idx = self.feature_names.index('days_since_fertilization')
+        
+        # Cross-product of levers; row 0 is the unchanged baseline
+        tillage, factors, shifts = np.meshgrid(
+            np.asarray(tillage_levels, dtype=float),
+            np.asarray(fertilizer_factors, dtype=float),
+            np.asarray(timing_shifts_days, dtype=float),
+            indexing='ij'
+        )
+        X = np.tile(current, (tillage.size + 1, 1))
+        X[1:, tillage_idx] = tillage.ravel()
+        X[1:, rate_idx] = current[rate_idx] * factors.ravel()
+        X[1:, dsf_idx] = current[dsf_idx] + shifts.ravel()
+        
+        co2, n2o = self._predict_matrix(X)
+        co2e = co2 + n2o * self.n2o_gwp
+        reduction = co2e[0] - co2e[1:]
+        reduction_pct = reduction / co2e[0] * 100 if co2e[0] > 0 else np.zeros_like(reduction)
+        
+        lever_names = ['tillage_intensity', 'fertilizer_rate_kg_ha', 'fertilization_timing']
+        lever_idx = [tillage_idx, rate_idx, dsf_idx]
+        changed = X[1:, lever_idx] != current[lever_idx]
+        candidates = np.flatnonzero(changed.any(axis=1) & (reduction > 0))
+        candidates = candidates[np.argsort(-reduction[candidates], kind='stable')]
+        
+        def describe(i):
+            row = X[i + 1]
+            changes = []
+            if changed[i, 0]:
+                changes.append(f"Tillage intensity {current[tillage_idx]:.0f} → {row[tillage_idx]:.0f}")
+            if changed[i, 1]:
+                changes.append(f"Fertilizer {current[rate_idx]:.0f} → {row[rate_idx]:.0f} kg/ha")
+            if changed[i, 2]:
+                changes.append(f"Fertilize {row[dsf_idx] - current[dsf_idx]:.0f} days earlier")
+            return {
+                'tillage_intensity': int(row[tillage_idx]),
+                'fertilizer_rate_kg_ha': round(float(row[rate_idx]), 1),
+                'days_since_fertilization': int(row[dsf_idx]),
+                'levers_changed': [name for name, flag in zip(lever_names, changed[i]) if flag],
+                'changes': changes,
+                'co2_emissions_kg_ha_day': round(float(co2[i + 1]), 3),
+                'n2o_emissions_kg_ha_day': round(float(n2o[i + 1]), 4),
+                'total_co2_equivalent_kg_ha_day': round(float(co2e[i + 1]), 2),
+                'co2e_reduction_kg_ha_day': round(float(reduction[i]), 2),
+                'co2e_reduction_pct': round(float(reduction_pct[i]), 1)
+            }
+        
+        interventions = [dict(rank=rank, **describe(i)) for rank, i in enumerate(candidates[:top_k], start=1)]
+        
+        # Best intervention that moves a single lever, for lever-specific advice
+        best_single_lever = {}
+        single = candidates[changed[candidates].sum(axis=1) == 1]
+        for i in single:
+            name = lever_names[int(np.argmax(changed[i]))]
+            if name not in best_single_lever:
+                best_single_lever[name] = describe(i)
+        
+        return {
+            'baseline': {
+                'co2_emissions_kg_ha_day': round(float(co2[0]), 3),
+                'n2o_emissions_kg_ha_day': round(float(n2o[0]), 4),
+                'total_co2_equivalent_kg_ha_day': round(float(co2e[0]), 2)
+            },
+            'scenarios_evaluated': int(tillage.size),
+            'top_interventions': interventions,
+            'best_single_lever': best_single_lever
+        }
+    
+    def get_recommendations(self, soil_data, current_predictions, scenarios=None):
         """
         Generate actionable recommendations to reduce soil emissions
+        
+        When management scenarios are supplied, the fertilizer and tillage tips
+        quote the model-predicted reduction instead of literature ranges.
         """
         recommendations = []
         
@@ -245,14 +521,19 @@ class SoilCarbonPredictor:
         
         # High nitrogen recommendations
         if nitrogen > 60:
-            recommendations.append({
+            recommendation = {
                 'type': 'fertilizer_management',
                 'priority': 'high',
                 'title': 'Reduce Nitrogen Application',
                 'description': f'Soil nitrogen is high ({nitrogen:.1f} ppm). Consider reducing fertilizer rate by 15-20% to minimize N₂O emissions.',
                 'potential_reduction': '12-18% N₂O reduction',
                 'implementation': 'Precision fertilizer application with soil testing'
-            })
+            }
+            best = (scenarios or {}).get('best_single_lever', {}).get('fertilizer_rate_kg_ha')
+            if best:
+                recommendation['description'] = f'Soil nitrogen is high ({nitrogen:.1f} ppm). Reducing fertilizer to {best["fertilizer_rate_kg_ha"]:.0f} kg/ha minimizes N₂O emissions.'
+                recommendation['potential_reduction'] = f'{best["co2e_reduction_pct"]:.1f}% CO₂e reduction ({best["co2e_reduction_kg_ha_day"]:.1f} kg/ha/day)'
+            recommendations.append(recommendation)
         
         # pH optimization
         if ph < 5.5 or ph > 7.5:
@@ -267,14 +548,18 @@ class SoilCarbonPredictor:
         
         # Tillage recommendations
         if tillage >= 3:
-            recommendations.append({
+            recommendation = {
                 'type': 'tillage_management',
                 'priority': 'high',
                 'title': 'Reduce Tillage Intensity',
                 'description': 'Conventional tillage increases soil CO₂ emissions. Consider no-till or reduced tillage practices.',
                 'potential_reduction': '15-25% CO₂ reduction',
                 'implementation': 'Transition to no-till with cover crops'
-            })
+            }
+            best = (scenarios or {}).get('best_single_lever', {}).get('tillage_intensity')
+            if best:
+                recommendation['potential_reduction'] = f'{best["co2e_reduction_pct"]:.1f}% CO₂e reduction ({best["co2e_reduction_kg_ha_day"]:.1f} kg/ha/day)'
+            recommendations.append(recommendation)
         
         # Moisture management
         if moisture > 35:
@@ -287,16 +572,41 @@ class SoilCarbonPredictor:
                 'implementation': 'Install tile drainage or raised beds'
             })
         
+        # Best combined management change found by the scenario sweep
+        if scenarios and scenarios.get('top_interventions'):
+            best = scenarios['top_interventions'][0]
+            recommendations.append({
+                'type': 'management_scenario',
+                'priority': 'high' if best['co2e_reduction_pct'] >= 10 else 'medium',
+                'title': 'Best Management Combination',
+                'description': '; '.join(best['changes']),
+                'potential_reduction': f'{best["co2e_reduction_pct"]:.1f}% CO₂e reduction ({best["co2e_reduction_kg_ha_day"]:.1f} kg/ha/day)',
+                'implementation': f'Model-ranked best of {scenarios["scenarios_evaluated"]} management scenarios'
+            })
+        
         return recommendations
     
-    def save_models(self):
-        """Save trained models and scaler"""
-        import os
-        os.makedirs('ai_models', exist_ok=True)
+    def save_models(self, directory=None):
+        """
+        Save trained models and scaler
+        
+        Args:
+            directory (str): Defaults to the untracked runtime model directory; pass ARTIFACT_DIR
+                to publish them as the bundled models
+        """
+        import joblib
         
-        joblib.dump(self.co2_model, 'ai_models/soil_co2_model.pkl')
-        joblib.dump(self.n2o_model, 'ai_models/soil_n2o_model.pkl')
-        joblib.dump(self.scaler, 'ai_models/soil_scaler.pkl')
+        directory = directory or RUNTIME_DIR
+        os.makedirs(directory, exist_ok=True)
+        manager = get_artifact_manager(directory)
+        
+        artifacts = {
+            'soil_co2_model.pkl': self.co2_model,
+            'soil_n2o_model.pkl': self.n2o_model,
+            'soil_scaler.pkl': self.scaler
+        }
+        for name, artifact in artifacts.items():
+            joblib.dump(artifact, os.path.join(directory, name))
         
         # Save feature names and metadata
         metadata = {
@@ -306,34 +616,81 @@ class SoilCarbonPredictor:
             'training_date': datetime.now().isoformat()
         }
         
-        with open('ai_models/soil_model_metadata.json', 'w') as f:
+        with open(os.path.join(directory, 'soil_model_metadata.json'), 'w') as f:
             json.dump(metadata, f, indent=2)
         
+        # Record checksums and share the fresh models with the rest of the process
+        for name, artifact in dict(artifacts, **{'soil_model_metadata.json': metadata}).items():
+            manager.register(name, artifact)
+        
+        # Memory-mappable copy so gunicorn workers can share the trees (CARBONSENSE_MODEL_FORMAT=mmap)
+        self.export_compact(manager.compact_path('soil'))
+        
         logger.info("Soil carbon models saved successfully")
     
+    def export_compact(self, bundle_dir):
+        """
+        Write the models in the compact numpy format
+        
+        The bundle also carries the feature names, defaults and importances, so
+        carbonsense_edge.EdgeSoilPredictor can serve predictions without this module.
+        """
+        return export_bundle({
+            'co2_model': self.co2_model,
+            'n2o_model': self.n2o_model,
+            'scaler': self.scaler,
+            'feature_names': self.feature_names,
+            'feature_defaults': self.feature_defaults,
+            'co2_feature_importance': dict(zip(self.feature_names, self.co2_model.feature_importances_.tolist())),
+            'n2o_feature_importance': dict(zip(self.feature_names, self.n2o_model.feature_importances_.tolist()))
+        }, bundle_dir)
+    
+    def _load_from(self, manager):
+        compact_dir = manager.compact_path('soil')
+        if manager.model_format == 'mmap' and os.path.exists(os.path.join(compact_dir, 'bundle.json')):
+            compact = manager.get_compact(compact_dir)
+            co2_model, n2o_model, scaler = compact['co2_model'], compact['n2o_model'], compact['scaler']
+            importance = {'co2': compact['co2_feature_importance'], 'n2o': compact['n2o_feature_importance']}
+        else:
+            co2_model = manager.get('soil_co2_model.pkl')
+            n2o_model = manager.get('soil_n2o_model.pkl')
+            scaler = manager.get('soil_scaler.pkl')
+            importance = {}
+        metadata = manager.get('soil_model_metadata.json')
+        
+        # Assigned together, so a directory with an incomplete set never leaves a mix of models behind
+        self.co2_model, self.n2o_model, self.scaler = co2_model, n2o_model, scaler
+        self._exported_importance = importance
+        self.feature_names = metadata['feature_names']
+        self.crop_types = metadata['crop_types']
+    
     def load_models(self):
-        """Load pre-trained models"""
-        try:
-            self.co2_model = joblib.load('ai_models/soil_co2_model.pkl')
-            self.n2o_model = joblib.load('ai_models/soil_n2o_model.pkl')
-            self.scaler = joblib.load('ai_models/soil_scaler.pkl')
-            
-            with open('ai_models/soil_model_metadata.json', 'r') as f:
-                metadata = json.load(f)
-                self.feature_names = metadata['feature_names']
-                self.crop_types = metadata['crop_types']
-            
-            logger.info("Soil carbon models loaded successfully")
-            return True
-        except FileNotFoundError:
-            logger.warning("Pre-trained models not found. Will train new models.")
-            return False
+        """Load pre-trained models, bundled ones first, then ones trained at runtime (shared process-wide)"""
+        errors = []
+        for directory in (ARTIFACT_DIR, RUNTIME_DIR):
+            try:
+                self._load_from(get_artifact_manager(directory))
+                logger.info(f"Soil carbon models loaded successfully from {directory}")
+                return True
+            except FileNotFoundError as e:
+                errors.append(str(e))
+            except Exception as e:
+                # e.g. pickles written by a different scikit-learn version
+                errors.append(f"{directory}: {e}")
+        logger.warning(f"Pre-trained models could not be loaded ({'; '.join(errors)}). Will train new models.")
+        return False
 
-# Initialize global predictor
-soil_predictor = SoilCarbonPredictor()
+# Global predictor, created on first use rather than at import
+soil_predictor = None
+_soil_predictor_lock = threading.Lock()
 
 def get_soil_predictor():
     """Get the global soil carbon predictor instance"""
+    global soil_predictor
+    if soil_predictor is None:
+        with _soil_predictor_lock:
+            if soil_predictor is None:
+                soil_predictor = SoilCarbonPredictor()
     return soil_predictor
 
 if __name__ == "__main__":
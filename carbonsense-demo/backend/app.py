@@ -3,26 +3,64 @@ CarbonSense AI - Backend API
 Flask application providing real-time carbon tracking and optimization services
 """
 
+import os
+import sys
+
+# Add the ai_models directory to the path for standard imports
+ai_models_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai_models'))
+sys.path.insert(0, ai_models_dir)  # Insert at beginning of path to ensure it's found first
+
+# Backend helper modules must import the same way under gunicorn (backend.app) and python app.py
+backend_dir = os.path.abspath(os.path.dirname(__file__))
+if backend_dir not in sys.path:
+    sys.path.insert(1, backend_dir)
+
+# Installed before the remaining imports so their cost shows up in the profile (CARBONSENSE_STARTUP_PROFILE)
+from startup_profiler import start_profiler
+startup_profiler = start_profiler()
+
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
-import pandas as pd
 import numpy as np
 import json
 from datetime import datetime, timedelta
 import threading
 import time
-import os
-import sys
+from functools import wraps
 
-# Add the ai_models directory to the path for standard imports
-ai_models_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai_models'))
-sys.path.insert(0, ai_models_dir)  # Insert at beginning of path to ensure it's found first
+from warmup import WarmupManager
+from aggregates import RunningAggregates, BackgroundRefresher
+from optimization_potential import OptimizationPotential
+from telemetry_store import TelemetryStore
+from telemetry_loader import load_telemetry_store
+from telemetry_codec import decode_payload, TelemetryPayloadError
+from streaming import StreamManager
+from replay_source import LIVE_NOISE
+from micro_batcher import MicroBatcher, DEFAULT_BATCH_MS
+from singleflight import SingleFlight, optimization_key, MODEL_INPUTS
+from artifact_manager import ARTIFACT_DIR, RUNTIME_DIR
+
+# pandas, scikit-learn and scipy load lazily, on the first code path that needs them (usually a
+# warm-up stage), so importing this module stays fast and gunicorn workers bind sooner
+
+# 'eager' initializes everything before the server binds; 'fast' binds at once and warms up in the background
+STARTUP_MODE = os.environ.get('CARBONSENSE_STARTUP_MODE', 'eager').lower()
+
+# Bundled optimizer models, and where a server that cannot load them saves the ones it trains
+# (outside the tracked ai_models/, like the soil models)
+BUNDLED_MODELS_PREFIX = os.path.join(ARTIFACT_DIR, 'carbonsense')
+RUNTIME_MODELS_PREFIX = os.path.join(RUNTIME_DIR, 'carbonsense')
+
+# How often each worker checks the registry's CURRENT pointer for a version activated elsewhere (0 disables)
+MODEL_WATCH_SECONDS = float(os.environ.get('CARBONSENSE_MODEL_WATCH_SECONDS', 5))
+warmup = WarmupManager(mode=STARTUP_MODE, profiler=startup_profiler)
 
 # Try to directly import the CarbonOptimizer
 try:
     from carbon_optimizer import CarbonOptimizer as RealCarbonOptimizer
     from optimizer_hotfix import apply_hotfix  # Import hotfix module
+    from model_registry import ModelRegistry, load_version
     print("✅ Successfully imported CarbonOptimizer module")
     use_fallback = False
 except ImportError as e:
@@ -34,13 +72,22 @@ try:
     from soil_carbon_predictor import SoilCarbonPredictor, get_soil_predictor
     print("✅ Successfully imported SoilCarbonPredictor module")
     soil_prediction_available = True
-    
-    # Initialize and train soil carbon models
+        
+except ImportError as e:
+    print(f"⚠️ Could not import SoilCarbonPredictor: {str(e)}")
+    soil_prediction_available = False
+
+def initialize_soil_predictor():
+    """Initialize and train soil carbon models"""
+    if not soil_prediction_available:
+        return
     try:
         print("🔄 Initializing soil carbon predictor...")
         soil_predictor = get_soil_predictor()
         
-        # Check if models are already trained, if not, train them
+        # Check if models are already trained, if not, load saved ones (shared across workers) or train them
+        if soil_predictor.co2_model is None or soil_predictor.n2o_model is None:
+            soil_predictor.load_models()
         if soil_predictor.co2_model is None or soil_predictor.n2o_model is None:
             print("🧠 Training soil carbon emission models...")
             training_results = soil_predictor.train_models(retrain=True)
@@ -51,13 +98,11 @@ try:
     except Exception as e:
         print(f"⚠️ Error initializing soil carbon predictor: {str(e)}")
         print("   Will use fallback data for soil carbon predictions")
-        
-except ImportError as e:
-    print(f"⚠️ Could not import SoilCarbonPredictor: {str(e)}")
-    soil_prediction_available = False
 
-# Try to apply hotfix if needed
-if not use_fallback:
+def apply_optimizer_hotfix():
+    """Try to apply hotfix if needed"""
+    if use_fallback:
+        return
     try:
         apply_hotfix()
         print("✅ Hotfix applied successfully")
@@ -243,33 +288,61 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 current_telemetry = {}
 optimization_models = None
 demo_data = None
-real_time_thread = None
-is_streaming = False
 
 class CarbonSenseAPI:
-    def __init__(self):
+    def __init__(self, defer_init=False):
         self.co2_per_gallon = 22.4
         self.diesel_cost = 3.85
         self.demo_mode = True
         self.models_loaded = False
-        self.demo_data = None  # Initialize demo_data attribute
+        self.demo_data = None  # TelemetryStore once data is loaded or ingested
         self.model_diagnostics = {
             "data_quality": {},
             "model_performance": {},
             "feature_importance": {}
         }
-        
-        # Initialize the AI optimizer
+        self.optimizer = None
+        self.using_real_optimizer = False
+        
+        # Summary totals are folded in as records arrive; the savings estimate refreshes off the request path
+        self.aggregates = RunningAggregates()
+        self.optimization_potential = OptimizationPotential()
+        self.potential_refresher = BackgroundRefresher(self.refresh_optimization_potential,
+                                                       name='optimization-potential')
+        
+        # Identical concurrent optimizations share one computation; concurrent grid ones share a vectorized pass
+        self.optimize_flight = SingleFlight()
+        self.optimize_batcher = MicroBatcher(lambda records: self.optimizer.optimize_speed_batch(records),
+                                             name='optimize-batch')
+        
+        # Versioned models: swaps load in the background and replace self.optimizer in one assignment
+        self.model_registry = None if use_fallback else ModelRegistry()
+        self.model_version = None
+        self.model_swap = {'state': 'idle'}
+        self._model_swap_lock = threading.Lock()
+        self._model_swap_listeners = []
+        self._registry_watcher = None
+        self._unloadable_version = None
+        
+        # Heavy initialization can be deferred to a background warm-up stage
+        if not defer_init:
+            self.initialize_optimizer()
+            
+            # Load demo data on initialization
+            self.load_demo_data()
+    
+    def initialize_optimizer(self):
+        """Initialize the AI optimizer and load its models"""
         try:
             print("🔄 Initializing CarbonOptimizer...")
             self.optimizer = RealCarbonOptimizer()
             self.using_real_optimizer = True
             
             # Try to load models directly
-            models_path = os.path.join(os.path.dirname(__file__), '..', 'ai_models', 'carbonsense')
-            if self.optimizer.load_models(models_path):
+            if self.load_active_models():
                 print("✅ Successfully loaded ML models")
                 self.models_loaded = True
+                self.watch_model_registry()
             else:
                 raise Exception("Failed to load models")
                 
@@ -279,34 +352,161 @@ class CarbonSenseAPI:
             self.optimizer = CarbonOptimizer()
             self.using_real_optimizer = False
         
-        # Load demo data on initialization
-        self.load_demo_data()
+    def active_models_paths(self):
+        """Model path prefixes to load: the active registry version, else the bundled then runtime-trained models"""
+        prefix = self.model_registry.current_prefix() if self.model_registry else None
+        if prefix:
+            self.model_version = self.model_registry.current_version()
+            return [prefix]
+        return [BUNDLED_MODELS_PREFIX, RUNTIME_MODELS_PREFIX]
+    
+    def load_active_models(self):
+        """Load the first of active_models_paths() that loads; returns whether any did"""
+        return any(self.optimizer.load_models(models_path) for models_path in self.active_models_paths())
+    
+    def add_model_swap_listener(self, listener):
+        """Register a callback(version) run after every model swap, e.g. to drop cached results"""
+        self._model_swap_listeners.append(listener)
+    
+    def swap_model_version(self, version=None, rollback=False):
+        """
+        Load a registry version in the background and swap it in once it is ready
+        
+        Args:
+            version (str): Version to activate (ignored when rollback is True)
+            rollback (bool): Re-activate the previously active version
+        
+        Returns:
+            dict: Swap status; state is 'loading' when a swap was started
+        """
+        with self._model_swap_lock:
+            if self.model_swap['state'] == 'loading':
+                raise RuntimeError(f"Model version {self.model_swap['version']} is still loading")
+            if rollback:
+                version = self.model_registry.previous_version()
+                if version is None:
+                    raise ValueError("No previous model version to roll back to")
+            if version not in self.model_registry.list_versions():
+                raise KeyError(f"Unknown model version: {version}")
+            self.model_swap = {
+                'state': 'loading',
+                'version': version,
+                'previous_version': self.model_version,
+                'rollback': rollback,
+                'started_at': datetime.now().isoformat()
+            }
+        threading.Thread(target=self._load_and_swap, args=(version, rollback), daemon=True).start()
+        return dict(self.model_swap)
+    
+    def follow_registry(self):
+        """
+        Swap in the registry's active version when this worker serves another one
+        
+        CURRENT is shared by every gunicorn worker, but an admin request swaps only the worker
+        that received it; the others catch up here.
+        
+        Returns:
+            str: The version swapped in, or None when nothing changed
+        """
+        version = self.model_registry.current_version()
+        if version is None or version == self.model_version or version == self._unloadable_version:
+            return None
+        with self._model_swap_lock:
+            if self.model_swap['state'] == 'loading':
+                return None
+            self.model_swap = {
+                'state': 'loading',
+                'version': version,
+                'previous_version': self.model_version,
+                'rollback': False,
+                'source': 'registry',
+                'started_at': datetime.now().isoformat()
+            }
+        self._load_and_swap(version, rollback=False, move_pointer=False)
+        if self.model_swap['state'] == 'failed':
+            # Not retried every interval; a newer activation is picked up again
+            self._unloadable_version = version
+            return None
+        return version
+    
+    def watch_model_registry(self, interval=None):
+        """Follow the registry's CURRENT pointer on a daemon thread (every MODEL_WATCH_SECONDS)"""
+        interval = MODEL_WATCH_SECONDS if interval is None else interval
+        if self.model_registry is None or interval <= 0 or self._registry_watcher is not None:
+            return
+        
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.follow_registry()
+                except Exception as e:
+                    print(f"⚠️ Model registry watch failed: {e}")
         
-    def load_demo_data(self):
-        """Load demo telemetry data"""
+        self._registry_watcher = threading.Thread(target=watch, name='model-registry-watch', daemon=True)
+        self._registry_watcher.start()
+    
+    def _load_and_swap(self, version, rollback, move_pointer=True):
         try:
-            data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'demo_all_operations.csv')
-            self.demo_data = pd.read_csv(data_path)
+            # Requests keep using the old optimizer until the new one is fully loaded and verified
+            optimizer = load_version(version, self.model_registry, RealCarbonOptimizer)
+            if move_pointer and rollback:
+                self.model_registry.rollback()
+            elif move_pointer:
+                self.model_registry.activate(version)
+            
+            self.optimizer = optimizer
+            self.using_real_optimizer = True
+            self.models_loaded = True
+            self.model_version = version
+            print(f"✅ Swapped to model version {version}")
+            
+            for listener in self._model_swap_listeners:
+                try:
+                    listener(version)
+                except Exception as e:
+                    print(f"⚠️ Model swap listener failed: {e}")
+            
+            self.model_swap = dict(self.model_swap, state='active', finished_at=datetime.now().isoformat())
+        except Exception as e:
+            print(f"❌ Could not swap to model version {version}: {e}")
+            self.model_swap = dict(self.model_swap, state='failed', error=str(e),
+                                   finished_at=datetime.now().isoformat())
+    
+    def reset_model_diagnostics(self, version=None):
+        """Drop diagnostics computed with the previous model and recompute them"""
+        self.model_diagnostics = {
+            "data_quality": self.model_diagnostics.get("data_quality", {}),
+            "model_performance": {},
+            "feature_importance": {}
+        }
+        threading.Thread(target=self.diagnose_model_performance, daemon=True).start()
+    
+    def load_demo_data(self, run_diagnostics=True):
+        """Load the demo telemetry files under data/ (parsed once, then served from the columnar cache)"""
+        try:
+            self.demo_data = load_telemetry_store()
             print(f"✅ Loaded {len(self.demo_data)} demo records")
+            self.aggregates.reset()
+            self.aggregates.add_records(self.demo_data.slice(decode=True))
+            self.optimization_potential.reset()
             
             # Analyze data quality before model loading
             self.analyze_data_quality()
             
             # Load the AI models
-            models_path = os.path.join(os.path.dirname(__file__), '..', 'ai_models', 'carbonsense')
-            self.models_loaded = self.optimizer.load_models(models_path)
+            self.models_loaded = self.load_active_models()
             if self.models_loaded:
                 print("✅ AI optimization models loaded successfully")
-                if self.using_real_optimizer:
-                    self.diagnose_model_performance()
             else:
                 print("⚠️  AI models not found, attempting to train with demo data")
-                # Train the models if they don't exist
-                self.optimizer.train_optimization_models(self.demo_data)
-                self.optimizer.save_models(os.path.join(os.path.dirname(__file__), '..', 'ai_models', 'carbonsense'))
+                # Train the models if they don't exist; saved outside the tracked ai_models/
+                self.optimizer.train_optimization_models(self.demo_data.to_frame())
+                self.optimizer.save_models(RUNTIME_MODELS_PREFIX)
                 self.models_loaded = True
-                if self.using_real_optimizer:
-                    self.diagnose_model_performance()
+            self.potential_refresher.request()
+            if run_diagnostics and self.using_real_optimizer:
+                self.diagnose_model_performance()
                 
             return True
         except Exception as e:
@@ -319,7 +519,7 @@ class CarbonSenseAPI:
             return {'error': 'No data available'}
         
         # Get latest record for current status
-        latest = self.demo_data.iloc[-1].to_dict()
+        latest = self.demo_data.latest()
         
         status = {
             'equipment_id': latest.get('equipment_id', 'JD8370R_001'),
@@ -342,49 +542,67 @@ class CarbonSenseAPI:
         
         return status
     
+    def ingest_telemetry(self, records):
+        """
+        Append new telemetry records and fold them into the running aggregates
+        
+        Args:
+            records: DataFrame, dict of column arrays (see telemetry_codec) or list of record dicts
+        
+        Returns:
+            int: Number of records ingested
+        """
+        if not isinstance(records, dict) and not hasattr(records, 'columns'):
+            records = list(records)
+        if self.demo_data is None:
+            self.demo_data = TelemetryStore()
+        # Readers see the store before or after the batch, never part of it
+        count = self.demo_data.append(records)
+        if count:
+            self.aggregates.add_records(records)
+            if self.models_loaded:
+                self.potential_refresher.request()
+        return count
+    
+    def refresh_optimization_potential(self):
+        """Optimize every telemetry record not yet covered by the potential cache (runs in the background)"""
+        data, optimizer = self.demo_data, self.optimizer
+        # The fallback optimizer has no batch mode and random savings, so it keeps the default estimate
+        if not self.models_loaded or data is None or not hasattr(optimizer, 'optimize_speed_batch'):
+            return
+        
+        processed = self.optimization_potential.refresh(data, optimizer, self.model_version)
+        if processed:
+            print(f"✅ Optimization potential updated ({processed} records optimized)")
+    
     def calculate_daily_summary(self):
-        """Calculate daily operation summary"""
+        """Calculate daily operation summary from the running aggregates"""
         if self.demo_data is None:
             return {'error': 'No data available'}
         
         try:
-            # Aggregate daily metrics
-            total_fuel = self.demo_data['fuel_rate_gph'].sum()
-            total_co2 = self.demo_data['co2_rate_lbs_per_hour'].sum()
-            total_cost = self.demo_data['fuel_cost_per_hour'].sum()
-            total_acres = self.demo_data['acres_per_hour'].sum()
-            avg_speed = self.demo_data['speed_mph'].mean()
+            # Totals are maintained as records are ingested, so this is a constant-time read
+            overall = self.aggregates.overall()
+            total_fuel = overall['totals']['fuel_rate_gph']
+            total_co2 = overall['totals']['co2_rate_lbs_per_hour']
+            total_cost = overall['totals']['fuel_cost_per_hour']
+            total_acres = overall['totals']['acres_per_hour']
+            avg_speed = overall['means']['speed_mph']
             
-            # Calculate potential savings using the AI model
-            avg_savings_pct = 0.18  # Default fallback value
-            if self.models_loaded:
-                try:
-                    # Sample only 3 records to reduce computation time
-                    sample_size = min(3, len(self.demo_data))
-                    sample_indices = np.random.choice(len(self.demo_data), sample_size, replace=False)
-                    
-                    total_savings_pct = 0
-                    valid_samples = 0
-                    
-                    for idx in sample_indices:
-                        record = self.demo_data.iloc[idx].to_dict()
-                        speed_opt = self.optimizer.optimize_speed_for_operation(record)
-                        
-                        if speed_opt and 'fuel_savings_percent' in speed_opt:
-                            total_savings_pct += speed_opt['fuel_savings_percent']
-                            valid_samples += 1
-                    
-                    if valid_samples > 0:
-                        avg_savings_pct = total_savings_pct / valid_samples / 100  # Convert percentage to decimal
-                        avg_savings_pct = max(0.05, min(0.30, avg_savings_pct))  # Constrain between 5% and 30%
-                except Exception as e:
-                    print(f"Error calculating optimization potential: {e}")
-                    # Use fallback value
-            
-            # Calculate potential savings based on model-derived percentage
-            potential_fuel_savings = total_fuel * avg_savings_pct
-            potential_co2_reduction = total_co2 * avg_savings_pct
-            potential_cost_savings = total_cost * avg_savings_pct
+            # Per-record optimizer results, materialized by the background job
+            potential = self.optimization_potential.summary()
+            if potential['records'] and potential['records'] == overall['records']:
+                # Every record optimized: exact totals
+                avg_savings_pct = potential['efficiency_improvement_pct'] / 100
+                potential_fuel_savings = potential['fuel_savings_gph']
+                potential_co2_reduction = potential['co2_reduction_lbs_per_hour']
+                potential_cost_savings = potential['cost_savings_per_hour']
+            else:
+                # Job still catching up with new records: apply the savings rate seen so far (default 18%)
+                avg_savings_pct = potential['efficiency_improvement_pct'] / 100 if potential['records'] else 0.18
+                potential_fuel_savings = total_fuel * avg_savings_pct
+                potential_co2_reduction = total_co2 * avg_savings_pct
+                potential_cost_savings = total_cost * avg_savings_pct
             
             summary = {
                 'current_performance': {
@@ -399,8 +617,14 @@ class CarbonSenseAPI:
                     'fuel_savings_gallons': round(potential_fuel_savings, 1),
                     'co2_reduction_lbs': round(potential_co2_reduction, 1),
                     'cost_savings_usd': round(potential_cost_savings, 2),
-                    'efficiency_improvement_pct': round(avg_savings_pct * 100, 1)
+                    'efficiency_improvement_pct': round(avg_savings_pct * 100, 1),
+                    'records_optimized': potential['records'],
+                    'records_improved': potential['improved_records'],
+                    'records_failed': potential['failed_records'],
+                    'estimated_at': potential['updated_at']
                 },
+                'by_equipment': self._round_breakdown(self.aggregates.by_equipment()),
+                'by_day': self._round_breakdown(self.aggregates.by_day()),
                 'recommendations_available': True  # Removed the direct call to get_recommendations()
             }
             
@@ -410,6 +634,41 @@ class CarbonSenseAPI:
             print(f"Error in calculate_daily_summary: {e}")
             return {'error': 'Failed to calculate summary', 'details': str(e)}
     
+    @staticmethod
+    def _round_breakdown(groups):
+        return {
+            key: {
+                'records': group['records'],
+                'totals': {metric: round(value, 2) for metric, value in group['totals'].items()},
+                'means': {metric: round(value, 2) for metric, value in group['means'].items()}
+            }
+            for key, group in groups.items()
+        }
+    
+    def _optimization_key(self, params, *scope):
+        # The fallback optimizer also reads fuel rate and cost, so every field counts
+        return optimization_key(params, *scope, id(self.optimizer),
+                                inputs=MODEL_INPUTS if self.using_real_optimizer else None)
+    
+    def optimize_speed(self, params, method='slsqp'):
+        """Speed optimization of one record ('grid' matches carbonsense_edge), shared by identical concurrent calls"""
+        optimizer = self.optimizer
+        if method == 'grid' and not hasattr(optimizer, 'optimize_speed_grid'):
+            # The fallback optimizer has no grid search; its rule-based result stands in
+            method = 'slsqp'
+        if method != 'grid':
+            optimize = optimizer.optimize_speed_for_operation
+        elif DEFAULT_BATCH_MS > 0 and hasattr(optimizer, 'optimize_speed_batch'):
+            optimize = self.optimize_batcher
+        else:
+            optimize = optimizer.optimize_speed_grid
+        return self.optimize_flight.do(self._optimization_key(params, 'speed', method), optimize, params)
+    
+    def real_time_recommendations(self, params):
+        """Optimizer recommendation cards for one record, shared by identical concurrent calls"""
+        return self.optimize_flight.do(self._optimization_key(params, 'recommendations'),
+                                       self.optimizer.real_time_recommendations, params)
+    
     def get_recommendations(self):
         """Get AI optimization recommendations"""
         try:
@@ -417,10 +676,10 @@ class CarbonSenseAPI:
             if self.models_loaded and self.demo_data is not None and len(self.demo_data) > 0:
                 try:
                     # Use the last record as current operation data
-                    current_data = self.demo_data.iloc[-1].to_dict()
+                    current_data = self.demo_data.latest()
                     
                     # Get model-generated recommendations with timeout protection
-                    model_recs = self.optimizer.real_time_recommendations(current_data)
+                    model_recs = self.real_time_recommendations(current_data)
                     
                     if model_recs and len(model_recs) > 0:
                         # Convert model recommendations to the expected format
@@ -581,7 +840,7 @@ class CarbonSenseAPI:
         
     def diagnose_model_performance(self):
         """Diagnose why the model might not be performing well"""
-        if not self.models_loaded or not hasattr(self.optimizer, 'feature_columns'):
+        if not self.models_loaded or not self.using_real_optimizer or not hasattr(self.optimizer, 'feature_columns'):
             print("❌ No model available for diagnosis")
             return
             
@@ -759,8 +1018,62 @@ class CarbonSenseAPI:
         
         return trends
 
-# Initialize API
-api = CarbonSenseAPI()
+# Initialize API; in fast startup mode the heavy stages below run after the server binds
+api = CarbonSenseAPI(defer_init=True)
+api.add_model_swap_listener(api.reset_model_diagnostics)
+api.add_model_swap_listener(lambda version: api.potential_refresher.request())
+
+warmup.add_stage('optimizer_hotfix', apply_optimizer_hotfix)
+warmup.add_stage('optimizer_models', api.initialize_optimizer)
+warmup.add_stage('telemetry_data', lambda: api.load_demo_data(run_diagnostics=False))
+warmup.add_stage('soil_models', initialize_soil_predictor)
+warmup.add_stage('model_diagnostics', api.diagnose_model_performance, required=False)
+if STARTUP_MODE == 'fast':
+    warmup.add_stage('optimizer_verification', lambda: verify_optimizer(), required=False)
+
+def requires_warmup(view):
+    """Answer 503 with Retry-After until the models and data are warmed up"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not warmup.is_ready:
+            response = jsonify({
+                'error': 'Service is warming up',
+                'warmup': warmup.progress()
+            })
+            response.status_code = 503
+            response.headers['Retry-After'] = str(warmup.retry_after_seconds)
+            return response
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.after_request
+def record_first_byte(response):
+    """Measure time-to-first-byte from process start"""
+    warmup.record_first_byte()
+    return response
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the process is up and serving requests"""
+    progress = warmup.progress()
+    return jsonify({
+        'status': 'ok',
+        'ready': progress['ready'],
+        'mode': progress['mode'],
+        'uptime_s': progress['uptime_s'],
+        'time_to_ready_s': progress['time_to_ready_s'],
+        'time_to_first_byte_s': progress['time_to_first_byte_s']
+    })
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: models and telemetry are loaded; reports warm-up progress"""
+    progress = warmup.progress()
+    response = jsonify(progress)
+    if not progress['ready']:
+        response.status_code = 503
+        response.headers['Retry-After'] = str(warmup.retry_after_seconds)
+    return response
 
 # Static file serving for frontend
 @app.route('/frontend/<path:filename>')
@@ -792,16 +1105,19 @@ def model_performance_dashboard():
 
 # Routes
 @app.route('/api/status', methods=['GET'])
+@requires_warmup
 def get_status():
     """Get current equipment status"""
     return jsonify(api.get_current_status())
 
 @app.route('/api/summary', methods=['GET'])
+@requires_warmup
 def get_summary():
     """Get daily operation summary"""
     return jsonify(api.calculate_daily_summary())
 
 @app.route('/api/recommendations', methods=['GET'])
+@requires_warmup
 def get_recommendations():
     """Get AI optimization recommendations"""
     return jsonify(api.get_recommendations())
@@ -812,7 +1128,25 @@ def get_trends():
     days = request.args.get('days', 7, type=int)
     return jsonify(api.get_historical_trends(days))
 
+@app.route('/api/telemetry', methods=['POST'])
+@requires_warmup
+def post_telemetry():
+    """Ingest a batch of telemetry records sent as NDJSON or binary columnar payload"""
+    started = time.perf_counter()
+    try:
+        columns, _ = decode_payload(request.get_data(cache=False), request.content_type)
+    except TelemetryPayloadError as e:
+        return jsonify({'error': str(e), 'details': e.errors}), 400
+    
+    ingested = api.ingest_telemetry(columns)
+    return jsonify({
+        'ingested': ingested,
+        'total_records': len(api.demo_data),
+        'processing_ms': round((time.perf_counter() - started) * 1000, 2)
+    })
+
 @app.route('/api/optimize', methods=['POST'])
+@requires_warmup
 def optimize_operation():
     """Get optimization suggestions for current operation"""
     data = request.get_json()
@@ -824,8 +1158,9 @@ def optimize_operation():
         return jsonify({'error': 'AI models not loaded'}), 500
     
     try:
-        # Use the AI model to optimize the operation
-        speed_optimization = api.optimizer.optimize_speed_for_operation(data)
+        # Use the AI model to optimize the operation; ?method=grid gives the in-cab (carbonsense_edge) result
+        method = 'grid' if request.args.get('method') == 'grid' else 'slsqp'
+        speed_optimization = api.optimize_speed(data, method)
         
         if not speed_optimization:
             # Fallback to demo values if optimization fails
@@ -879,11 +1214,75 @@ def optimize_operation():
         print(f"Error in optimization: {e}")
         return jsonify({'error': 'Optimization failed', 'details': str(e)}), 500
 
+@app.route('/api/optimize/stats', methods=['GET'])
+def get_optimize_stats():
+    """Micro-batching and coalescing of concurrent optimize requests"""
+    return jsonify({'batching': api.optimize_batcher.stats(), 'singleflight': api.optimize_flight.stats()})
+
 @app.route('/api/model-diagnostics', methods=['GET'])
 def get_model_diagnostics():
     """Get diagnostics about model performance and data quality"""
     return jsonify(api.model_diagnostics)
 
+ADMIN_TOKEN = os.environ.get('CARBONSENSE_ADMIN_TOKEN')
+
+def swap_response(swap):
+    """Swap status for the admin API, saying how the other workers follow"""
+    if MODEL_WATCH_SECONDS > 0:
+        swap['workers'] = (f"Swapping in this worker; other workers follow the registry's CURRENT "
+                           f"within {MODEL_WATCH_SECONDS:g}s")
+    else:
+        swap['workers'] = "Swapping in this worker only; other workers keep their models until restarted"
+    return jsonify(swap), 202
+
+def requires_admin(view):
+    """Admin endpoints need X-Admin-Token when CARBONSENSE_ADMIN_TOKEN is set, otherwise a local caller"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if ADMIN_TOKEN:
+            if request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+                return jsonify({'error': 'Invalid or missing admin token'}), 401
+        elif request.remote_addr not in ('127.0.0.1', '::1'):
+            return jsonify({'error': 'Admin endpoints are local-only unless CARBONSENSE_ADMIN_TOKEN is set'}), 403
+        if api.model_registry is None:
+            return jsonify({'error': 'Model registry unavailable (fallback optimizer in use)'}), 503
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/api/admin/models', methods=['GET'])
+@requires_admin
+def list_model_versions():
+    """List registry versions, the active one and the state of any running swap"""
+    summary = api.model_registry.summary()
+    summary['serving_version'] = api.model_version
+    summary['swap'] = api.model_swap
+    return jsonify(summary)
+
+@app.route('/api/admin/models/activate', methods=['POST'])
+@requires_admin
+def activate_model_version():
+    """Load a registry version in the background and swap it in without a restart"""
+    data = request.get_json(silent=True) or {}
+    if not data.get('version'):
+        return jsonify({'error': 'version is required'}), 400
+    try:
+        return swap_response(api.swap_model_version(data['version']))
+    except KeyError as e:
+        return jsonify({'error': str(e.args[0])}), 404
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+
+@app.route('/api/admin/models/rollback', methods=['POST'])
+@requires_admin
+def rollback_model_version():
+    """Swap back to the previously active registry version"""
+    try:
+        return swap_response(api.swap_model_version(rollback=True))
+    except (KeyError, ValueError) as e:
+        return jsonify({'error': str(e.args[0])}), 404
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+
 @app.route('/api/model-performance', methods=['GET'])
 def get_model_performance():
     """Get comprehensive model performance metrics for dashboard"""
@@ -977,7 +1376,7 @@ def get_training_data():
         if api.demo_data is not None and len(api.demo_data) > 0:
             # Return a sample of the training data
             sample_size = min(50, len(api.demo_data))
-            sample_data = api.demo_data.sample(n=sample_size).to_dict('records')
+            sample_data = api.demo_data.sample_records(sample_size)
             
             # Add timestamp for each record
             for record in sample_data:
@@ -1082,6 +1481,7 @@ def get_real_time_logs():
         return jsonify({'error': 'Failed to generate logs', 'details': str(e)}), 500
 
 @app.route('/api/field-analysis', methods=['POST'])
+@requires_warmup
 def analyze_field():
     """Analyze field conditions and provide optimization"""
     data = request.get_json()
@@ -1183,66 +1583,55 @@ def analyze_field():
     return jsonify(field_analysis)
 
 # Real-time data streaming
-def generate_real_time_data():
-    """Generate real-time telemetry data for demo"""
-    global is_streaming
-    
-    if api.demo_data is None:
-        return
-    
-    data_index = 0
-    max_index = len(api.demo_data)
-    
-    while is_streaming:
-        if data_index >= max_index:
-            data_index = 0  # Loop the data
-        
-        current_record = api.demo_data.iloc[data_index].to_dict()
-        
-        # Add some real-time variation
-        current_record['speed_mph'] += np.random.normal(0, 0.2)
-        current_record['engine_load_pct'] += np.random.normal(0, 2)
-        current_record['fuel_rate_gph'] += np.random.normal(0, 0.3)
-        current_record['timestamp'] = datetime.now().isoformat()
-        
-        # Generate real-time optimizations if models are loaded
-        if api.models_loaded:
-            try:
-                # Get optimization recommendations for the current telemetry
-                optimizations = {}
-                
-                # Speed optimization
-                speed_opt = api.optimizer.optimize_speed_for_operation(current_record)
-                if speed_opt:
-                    # Calculate additional metrics
-                    optimizations['optimal_speed_mph'] = speed_opt['optimal_speed']
-                    optimizations['fuel_reduction_pct'] = speed_opt['fuel_savings_percent']
-                    optimizations['co2_reduction_lbs_per_hr'] = round((current_record['co2_rate_lbs_per_hour'] * speed_opt['co2_reduction_percent'] / 100), 1)
-                    optimizations['cost_savings_per_hr'] = speed_opt['cost_savings_per_hour']
-                    optimizations['daily_savings_usd'] = round(speed_opt['cost_savings_per_hour'] * 8, 2)  # Assuming 8-hour workday
-                    
-                # Add recommendations
-                recommendations = api.optimizer.real_time_recommendations(current_record)
-                if recommendations:
-                    optimizations['recommendations'] = recommendations
-                
-                # Add optimizations to the telemetry data
-                current_record['optimizations'] = optimizations
+def build_telemetry_frame(current_record):
+    """Turn a replayed telemetry record (live variation and timestamp already applied) into a 'telemetry_update' frame"""
+    # Generate real-time optimizations if models are loaded
+    if api.models_loaded:
+        try:
+            # Get optimization recommendations for the current telemetry
+            optimizations = {}
+            
+            # Speed optimization
+            speed_opt = api.optimize_speed(current_record)
+            if speed_opt:
+                # Calculate additional metrics
+                optimizations['optimal_speed_mph'] = speed_opt['optimal_speed']
+                optimizations['fuel_reduction_pct'] = speed_opt['fuel_savings_percent']
+                optimizations['co2_reduction_lbs_per_hr'] = round((current_record['co2_rate_lbs_per_hour'] * speed_opt['co2_reduction_percent'] / 100), 1)
+                optimizations['cost_savings_per_hr'] = speed_opt['cost_savings_per_hour']
+                optimizations['daily_savings_usd'] = round(speed_opt['cost_savings_per_hour'] * 8, 2)  # Assuming 8-hour workday
                 
-            except Exception as e:
-                print(f"Error generating optimizations: {e}")
-        
-        # Emit to connected clients
-        socketio.emit('telemetry_update', current_record)
-        
-        data_index += 1
-        time.sleep(2)  # Update every 2 seconds
+            # Add recommendations
+            recommendations = api.real_time_recommendations(current_record)
+            if recommendations:
+                optimizations['recommendations'] = recommendations
+            
+            # Add optimizations to the telemetry data
+            current_record['optimizations'] = optimizations
+            
+        except Exception as e:
+            print(f"Error generating optimizations: {e}")
+    
+    return current_record
+
+# One stream per equipment_id; each frame is computed once and emitted to the equipment's room
+stream_manager = StreamManager(socketio, lambda: api.demo_data, build_telemetry_frame,
+                               noise=LIVE_NOISE, live_timestamps=True)
+
+@app.route('/api/streaming/status', methods=['GET'])
+def get_streaming_status():
+    """Active and suspended equipment streams, subscriber counts, frame cost and tick lag"""
+    return jsonify(stream_manager.status())
 
 # =============================================================================
 # SOIL CARBON PREDICTION API ENDPOINTS
 # =============================================================================
 
+# Largest number of ranked management interventions a prediction request may ask for
+MAX_SCENARIO_TOP_K = 20
+
 @app.route('/api/soil-carbon/predict', methods=['POST'])
+@requires_warmup
 def predict_soil_carbon():
     """Predict soil carbon emissions based on soil conditions"""
     try:
@@ -1261,19 +1650,29 @@ def predict_soil_carbon():
         if not data:
             return jsonify({'error': 'No soil data provided'}), 400
         
+        top_k = data.get('top_k', 5)
+        # JSON integers only: int() would also take True, 5.7 and "3"
+        if not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 1:
+            return jsonify({'error': f"top_k must be a positive integer (at most {MAX_SCENARIO_TOP_K} are returned)"}), 400
+        top_k = min(top_k, MAX_SCENARIO_TOP_K)
+        
         # Get soil predictor instance
         predictor = get_soil_predictor()
         
         # Make prediction
         prediction = predictor.predict_emissions(data)
         
+        # Rank management interventions by model-predicted CO2e reduction
+        scenarios = predictor.evaluate_management_scenarios(data, top_k=top_k)
+        
         # Get recommendations
-        recommendations = predictor.get_recommendations(data, prediction)
+        recommendations = predictor.get_recommendations(data, prediction, scenarios)
         
         # Combine results
         result = {
             'predictions': prediction,
             'recommendations': recommendations,
+            'management_scenarios': scenarios,
             'input_data': data,
             'status': 'success'
         }
@@ -1291,7 +1690,46 @@ def predict_soil_carbon():
             }
         }), 500
 
+@app.route('/api/soil-carbon/simulate-season', methods=['POST'])
+@requires_warmup
+def simulate_soil_season():
+    """Simulate daily and cumulative soil emissions over a season"""
+    try:
+        if not soil_prediction_available:
+            return jsonify({'error': 'Soil carbon prediction not available'}), 503
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No simulation data provided'}), 400
+
+        samples = data.get('samples') or data.get('soil_samples')
+        if not samples:
+            return jsonify({'error': 'At least one soil sample is required'}), 400
+
+        predictor = get_soil_predictor()
+        simulation = predictor.simulate_season(
+            samples,
+            fertilization_schedule=data.get('fertilization_schedule'),
+            weather=data.get('weather'),
+            n_days=data.get('n_days'),
+            field_area_ha=data.get('field_area_ha')
+        )
+
+        return jsonify({
+            'simulation': simulation,
+            'status': 'success'
+        })
+
+    except ValueError as e:
+        return jsonify({'error': 'Invalid simulation input', 'details': str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            'error': 'Season simulation failed',
+            'details': str(e)
+        }), 500
+
 @app.route('/api/soil-carbon/field-analysis', methods=['GET'])
+@requires_warmup
 def get_soil_field_analysis():
     """Get current field soil carbon analysis"""
     try:
@@ -1358,6 +1796,7 @@ def get_soil_field_analysis():
         }), 500
 
 @app.route('/api/total-carbon-footprint', methods=['GET'])
+@requires_warmup
 def get_total_carbon_footprint():
     """Get combined equipment + soil carbon footprint"""
     try:
@@ -1437,25 +1876,68 @@ def handle_connect():
     print('Client connected')
     emit('status', {'msg': 'Connected to CarbonSense AI'})
 
+def _requested_equipment(data):
+    """Equipment IDs from a streaming event payload; None means every machine"""
+    if not isinstance(data, dict):
+        return None
+    if data.get('equipment_ids') is not None:
+        return list(data['equipment_ids'])
+    if data.get('equipment_id') is not None:
+        return [data['equipment_id']]
+    return None
+
+# start_streaming requests that arrived during warm-up (fast mode), by client; applied once ready
+pending_streams = {}
+pending_streams_lock = threading.Lock()
+
+def _start_streaming(sid, data):
+    """Subscribe a client as requested; returns its streaming_status message"""
+    options = data if isinstance(data, dict) else {}
+    try:
+        subscribed = stream_manager.subscribe(sid, _requested_equipment(data),
+                                              protocol=options.get('protocol', 'full'),
+                                              max_rate_hz=options.get('max_rate_hz'),
+                                              coalesce=options.get('coalesce', True),
+                                              resume=options.get('resume'))
+    except (ValueError, TypeError) as e:
+        return {'status': 'error', 'error': str(e)}
+    if not subscribed:
+        return {'status': 'no_equipment', 'available': stream_manager.equipment_ids()}
+    return {'status': 'started', 'equipment_ids': stream_manager.subscriptions(sid), 'epoch': stream_manager.epoch}
+
+def start_pending_streams():
+    """Subscribe the clients that asked to stream during warm-up"""
+    with pending_streams_lock:
+        pending = list(pending_streams.items())
+        pending_streams.clear()
+    for sid, data in pending:
+        socketio.emit('streaming_status', _start_streaming(sid, data), to=sid)
+    if pending:
+        print(f"📡 Started {len(pending)} stream(s) requested during warm-up")
+
+warmup.on_ready(start_pending_streams)
+
 @socketio.on('start_streaming')
-def handle_start_streaming():
-    global is_streaming, real_time_thread
-    
-    if not is_streaming:
-        is_streaming = True
-        real_time_thread = threading.Thread(target=generate_real_time_data)
-        real_time_thread.daemon = True
-        real_time_thread.start()
-        emit('streaming_status', {'status': 'started'})
+def handle_start_streaming(data=None):
+    with pending_streams_lock:
+        if not warmup.is_ready:
+            # Dashboards may connect early in fast mode: they get 'started' once warm-up is done
+            pending_streams[request.sid] = data
+            emit('streaming_status', {'status': 'warming_up', 'queued': True, 'warmup': warmup.progress()})
+            return
+    emit('streaming_status', _start_streaming(request.sid, data))
 
 @socketio.on('stop_streaming')
-def handle_stop_streaming():
-    global is_streaming
-    is_streaming = False
-    emit('streaming_status', {'status': 'stopped'})
+def handle_stop_streaming(data=None):
+    stream_manager.unsubscribe(request.sid, _requested_equipment(data))
+    remaining = stream_manager.subscriptions(request.sid)
+    emit('streaming_status', {'status': 'stopped', 'equipment_ids': remaining})
 
 @socketio.on('disconnect')
 def handle_disconnect():
+    with pending_streams_lock:
+        pending_streams.pop(request.sid, None)
+    stream_manager.unsubscribe(request.sid, disconnected=True)
     print('Client disconnected')
 
 def test_optimization_variations():
@@ -1504,87 +1986,94 @@ def test_optimization_variations():
         print("⚠️ All optimization tests failed, continuing with limited functionality\n")
         # Don't raise exception here to allow the app to continue running
     
-if __name__ == '__main__':
-    print("🚀 Starting CarbonSense AI Backend...")
+def verify_optimizer():
+    """Verify models are working by running a test prediction, falling back if they are not"""
+    if api.demo_data is None:
+        print("⚠️  Running without demo data - generate data first")
+        return
+    
+    test_data = {
+        'speed_mph': 7.5,
+        'engine_load_pct': 75,
+        'implement_width_ft': 24,
+        'field_acres': 160,
+        'weather_factor': 1.0,
+        'operation_type': 'tillage',
+        'soil_type': 'loam',
+        'terrain_type': 'rolling'
+    }
     
-    # Initialize API
     try:
-        # Load demo data
-        if api.load_demo_data():
-            print("✅ Demo data loaded successfully")
-            
-            # Verify models are working by running a test prediction
-            test_data = {
-                'speed_mph': 7.5,
-                'engine_load_pct': 75,
-                'implement_width_ft': 24,
-                'field_acres': 160,
-                'weather_factor': 1.0,
-                'operation_type': 'tillage',
-                'soil_type': 'loam',
-                'terrain_type': 'rolling'
-            }
-            
-            try:
-                test_result = api.optimizer.optimize_speed_for_operation(test_data)
-                if test_result:
-                    if test_result['fuel_savings_percent'] <= 0.0:
-                        print("⚠️ AI models verified but not producing meaningful savings")
-                        print(f"   Sample optimization: {test_result['optimal_speed']} mph, {test_result['fuel_savings_percent']}% fuel savings")
-                        
-                        print("\n🔬 Model diagnosis:")
-                        if api.using_real_optimizer:
-                            print("   The real AI model is not producing meaningful optimization results.")
-                            print("   This could be due to several factors:")
-                            print("   1. Insufficient or low-quality training data")
-                            print("   2. Model architecture not capturing the underlying patterns")
-                            print("   3. Feature engineering issues or missing important features")
-                            print("   4. Hyperparameter tuning needed")
-                            print("\n   Check the /api/model-diagnostics endpoint for detailed analysis.")
-                            print("   For now, using fallback optimization to demonstrate functionality.")
-
-                        # Force regeneration with fallback method
-                        api.optimizer = CarbonOptimizer()
-                        api.using_real_optimizer = False
-                        test_result = api.optimizer.optimize_speed_for_operation(test_data)
-                        print(f"   Updated optimization: {test_result['optimal_speed']} mph, {test_result['fuel_savings_percent']}% fuel savings")
-                    else:
-                        print("✅ AI models verified and working")
-                        print(f"   Sample optimization: {test_result['optimal_speed']} mph, {test_result['fuel_savings_percent']}% fuel savings")
-                    
-                    # Try to run variation tests
-                    try:
-                        # Run variation tests to ensure optimization produces different results
-                        test_optimization_variations()
-                    except Exception as variation_error:
-                        print(f"⚠️ Optimization variation tests failed: {variation_error}")
-                        print("   This doesn't affect core functionality")
-                else:
-                    print("⚠️  AI models loaded but test optimization returned no results")
-                    print("\n🔬 Model diagnosis:")
-                    print("   The model is not returning any results for the test data.")
-                    print("   This suggests implementation errors in the model's predict function.")
-                    print("   Check model implementation for errors in handling input formats.")
-                    print("   Using fallback optimization for demo purposes.")
-                    
-                    api.optimizer = CarbonOptimizer()
-                    api.using_real_optimizer = False
-            except Exception as e:
-                print(f"⚠️  AI models loaded but test failed: {e}")
-                print("   Continuing with limited functionality")
-                print("\n🔬 Model diagnosis:")
-                print(f"   Exception occurred: {str(e)}")
-                print("   This indicates a runtime error in the model's implementation.")
-                print("   Common causes: incorrect input format, missing features, or implementation bugs.")
-                print("   Using enhanced fallback optimization for demo purposes")
+        test_result = api.optimizer.optimize_speed_for_operation(test_data)
+        if test_result:
+            if test_result['fuel_savings_percent'] <= 0.0:
+                print("⚠️ AI models verified but not producing meaningful savings")
+                print(f"   Sample optimization: {test_result['optimal_speed']} mph, {test_result['fuel_savings_percent']}% fuel savings")
                 
+                print("\n🔬 Model diagnosis:")
+                if api.using_real_optimizer:
+                    print("   The real AI model is not producing meaningful optimization results.")
+                    print("   This could be due to several factors:")
+                    print("   1. Insufficient or low-quality training data")
+                    print("   2. Model architecture not capturing the underlying patterns")
+                    print("   3. Feature engineering issues or missing important features")
+                    print("   4. Hyperparameter tuning needed")
+                    print("\n   Check the /api/model-diagnostics endpoint for detailed analysis.")
+                    print("   For now, using fallback optimization to demonstrate functionality.")
+
+                # Force regeneration with fallback method
                 api.optimizer = CarbonOptimizer()
                 api.using_real_optimizer = False
+                test_result = api.optimizer.optimize_speed_for_operation(test_data)
+                print(f"   Updated optimization: {test_result['optimal_speed']} mph, {test_result['fuel_savings_percent']}% fuel savings")
+            else:
+                print("✅ AI models verified and working")
+                print(f"   Sample optimization: {test_result['optimal_speed']} mph, {test_result['fuel_savings_percent']}% fuel savings")
+            
+            # Try to run variation tests
+            try:
+                # Run variation tests to ensure optimization produces different results
+                test_optimization_variations()
+            except Exception as variation_error:
+                print(f"⚠️ Optimization variation tests failed: {variation_error}")
+                print("   This doesn't affect core functionality")
         else:
-            print("⚠️  Running without demo data - generate data first")
+            print("⚠️  AI models loaded but test optimization returned no results")
+            print("\n🔬 Model diagnosis:")
+            print("   The model is not returning any results for the test data.")
+            print("   This suggests implementation errors in the model's predict function.")
+            print("   Check model implementation for errors in handling input formats.")
+            print("   Using fallback optimization for demo purposes.")
+            
+            api.optimizer = CarbonOptimizer()
+            api.using_real_optimizer = False
     except Exception as e:
-        print(f"⚠️  Error during initialization: {e}")
+        print(f"⚠️  AI models loaded but test failed: {e}")
         print("   Continuing with limited functionality")
+        print("\n🔬 Model diagnosis:")
+        print(f"   Exception occurred: {str(e)}")
+        print("   This indicates a runtime error in the model's implementation.")
+        print("   Common causes: incorrect input format, missing features, or implementation bugs.")
+        print("   Using enhanced fallback optimization for demo purposes")
+        
+        api.optimizer = CarbonOptimizer()
+        api.using_real_optimizer = False
+
+# Eager mode finishes warm-up before serving; fast mode serves /healthz and /readyz immediately
+startup_profiler.mark('app_imported')
+warmup.start(background=(STARTUP_MODE == 'fast'))
+
+if __name__ == '__main__':
+    print("🚀 Starting CarbonSense AI Backend...")
+    
+    if STARTUP_MODE == 'fast':
+        print("⚡ Fast startup: models load in the background, poll /readyz for progress")
+    else:
+        try:
+            verify_optimizer()
+        except Exception as e:
+            print(f"⚠️  Error during initialization: {e}")
+            print("   Continuing with limited functionality")
     
     print("\n🌐 API endpoints available at:")
     print("   GET  /api/status - Current equipment status")
@@ -1593,13 +2082,24 @@ if __name__ == '__main__':
     print("   GET  /api/trends - Historical performance trends")
     print("   GET  /api/model-diagnostics - Model performance analysis")
     print("   POST /api/optimize - Optimize current operation")
+    print("   GET  /api/optimize/stats - Optimize request batching and coalescing")
     print("   POST /api/field-analysis - Analyze field conditions")
+    print("   GET  /healthz - Liveness check")
+    print("   GET  /readyz - Readiness and warm-up progress")
+    print("   GET  /api/admin/models - Model registry versions")
+    print("   POST /api/admin/models/activate - Hot-swap to a model version")
+    print("   POST /api/admin/models/rollback - Roll back to the previous model version")
+    print("   GET  /api/streaming/status - Equipment streams and tick cost")
     
     print("\n🔌 WebSocket events:")
     print("   connect - Client connection")
-    print("   start_streaming - Begin real-time data stream")
-    print("   stop_streaming - Stop real-time data stream")
-    print("   telemetry_update - Real-time telemetry data")
+    print("   start_streaming - Subscribe to equipment streams ({equipment_id} or {equipment_ids}, default all;")
+    print("                     {protocol: 'delta', max_rate_hz, coalesce} for snapshot + delta payloads;")
+    print("                     {resume: {epoch, seq: {equipment_id: seq}}} to get what was missed)")
+    print("   stop_streaming - Unsubscribe from equipment streams (default all)")
+    print("   telemetry_update - Real-time telemetry data, per equipment room")
+    print("   telemetry_delta - Snapshot, then changed fields only (protocol 'delta')")
+    print("   telemetry_replay - Frames missed while disconnected (protocol 'full', on resume)")
     
     # Run the application
     try:
@@ -0,0 +1,108 @@
+"""
+CarbonSense AI - Micro-Batcher
+Concurrent optimize requests collected for a few milliseconds and run as one vectorized pass
+
+Each /api/optimize request used to run its own optimization on its own request thread, so
+concurrent requests contended for the GIL and each paid the fixed cost of an encode and two
+model predicts. Here callers submit their record and wait on a future; a single worker
+thread takes the first pending record, keeps collecting for up to max_wait_ms (or until
+max_items are waiting) and hands the whole batch to one batch function call, e.g.
+CarbonOptimizer.optimize_speed_batch. Each future then resolves with its own result. A lone
+caller waits at most max_wait_ms longer than it used to.
+"""
+
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+DEFAULT_BATCH_MS = float(os.environ.get('CARBONSENSE_OPTIMIZE_BATCH_MS', 2))
+DEFAULT_BATCH_MAX = int(os.environ.get('CARBONSENSE_OPTIMIZE_BATCH_MAX', 64))
+
+class MicroBatcher:
+    """
+    Collects submitted items into batches for a batch function
+
+    Args:
+        func (callable): list of items -> list of results, one per item and in order
+        max_wait_ms (float): How long the first item of a batch waits for company
+        max_items (int): Batch size that is run without waiting any longer
+        name (str): Worker thread name
+    """
+
+    def __init__(self, func, max_wait_ms=DEFAULT_BATCH_MS, max_items=DEFAULT_BATCH_MAX, name='carbonsense-batch'):
+        self.func = func
+        self.max_wait = max_wait_ms / 1000
+        self.max_items = max(1, max_items)
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+        self.batches = 0
+        self.items = 0
+        self.max_batch = 0
+
+    def submit(self, item):
+        """Queue one item; returns a Future resolving to its result"""
+        future = Future()
+        self._queue.put((item, future))
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+        return future
+
+    def __call__(self, item, timeout=None):
+        """Submit an item and wait for its result (re-raises the batch function's error)"""
+        return self.submit(item).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_items:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self.func([item for item, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                else:
+                    # One bad record must not fail its neighbours: rerun them one by one
+                    for item, future in batch:
+                        try:
+                            future.set_result(self.func([item])[0])
+                        except Exception as item_error:
+                            future.set_exception(item_error)
+            else:
+                results = list(results)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+                # A batch function returning too few results must not leave callers waiting forever
+                for _, future in batch[len(results):]:
+                    future.set_exception(RuntimeError(
+                        f"{self.name}: batch function returned {len(results)} results for {len(batch)} items"))
+            self.batches += 1
+            self.items += len(batch)
+            self.max_batch = max(self.max_batch, len(batch))
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch': round(self.items / self.batches, 2) if self.batches else 0,
+            'max_batch': self.max_batch,
+            'pending': self._queue.qsize(),
+            'max_wait_ms': self.max_wait * 1000,
+            'max_items': self.max_items
+        }
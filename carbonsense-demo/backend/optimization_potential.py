@@ -0,0 +1,199 @@
+"""
+CarbonSense AI - Optimization Potential
+Per-record optimal speed and savings for the whole telemetry set, maintained by a background job
+
+The optimizer runs over every record in vectorized batches (optimize_speed_batch) and the
+results are kept as columns aligned with the telemetry rows. New rows are processed
+incrementally; a model swap recomputes everything while the previous results keep serving.
+/api/summary reads the running totals, so its savings figures are exact and deterministic.
+A batch the optimizer rejects is retried record by record; records that still fail count as
+not improved (no savings) and as failed_records, so one bad row never stalls the job.
+
+Result columns live in growable buffers (capacity doubling, as in TelemetryStore), so a refresh
+costs time proportional to the rows it adds, not to the rows already materialized.
+"""
+
+from datetime import datetime
+import numpy as np
+
+# Materialized per-record columns, in the order of the telemetry rows
+RESULT_COLUMNS = ('optimal_speed', 'fuel_savings_percent', 'co2_reduction_percent',
+                  'fuel_savings_gph', 'co2_reduction_lbs_per_hour', 'cost_savings_per_hour')
+
+# Result standing in for a record the optimizer fails on: keep the current speed, save nothing
+FAILED_RESULT = {'optimal_speed': np.nan, 'fuel_savings_percent': 0.0, 'co2_reduction_percent': 0.0}
+
+# Telemetry rates the savings percentages apply to, and the totals they feed
+SAVINGS_TOTALS = (('fuel_rate_gph', 'fuel_savings_percent', 'fuel_savings_gph'),
+                  ('co2_rate_lbs_per_hour', 'co2_reduction_percent', 'co2_reduction_lbs_per_hour'),
+                  ('fuel_cost_per_hour', 'fuel_savings_percent', 'cost_savings_per_hour'))
+
+def _empty_state(model_version):
+    return {
+        'model_version': model_version,
+        'records': 0,
+        # Buffers whose first `records` rows are valid; later states may fill the rows after them
+        'columns': {name: np.empty(0) for name in RESULT_COLUMNS},
+        'totals': {name: 0.0 for name in ('fuel_rate_gph', 'co2_rate_lbs_per_hour', 'fuel_cost_per_hour',
+                                          'fuel_savings_gph', 'co2_reduction_lbs_per_hour', 'cost_savings_per_hour')},
+        'improved_records': 0,
+        'failed_records': 0,
+        'updated_at': None
+    }
+
+class OptimizationPotential:
+    """
+    Materialized optimizer results for every telemetry record
+
+    Savings count only where the recommended speed lowers fuel use, since the operator keeps
+    the current speed otherwise. Reads never block on a refresh: each processed batch
+    publishes a new immutable state in one assignment.
+    """
+
+    def __init__(self, batch_size=4096):
+        self.batch_size = batch_size
+        self._state = _empty_state(None)
+        self._generation = 0
+
+    def reset(self):
+        """Forget all results, e.g. after the telemetry set was reloaded"""
+        self._generation += 1
+        self._state = _empty_state(None)
+
+    def refresh(self, data, optimizer, model_version=None):
+        """
+        Bring the results up to date with the telemetry frame
+
+        Only rows added since the last refresh are optimized, unless the model version
+        changed. Meant to run on a single background thread (see BackgroundRefresher).
+
+        Args:
+            data: TelemetryStore; rows are only ever appended
+            optimizer: Object with optimize_speed_batch(records)
+            model_version: Version of the optimizer's models
+
+        Returns:
+            int: Number of records optimized
+        """
+        generation, current = self._generation, self._state
+        if current['model_version'] != model_version or current['records'] > len(data):
+            state = _empty_state(model_version)
+            # Keep serving the previous model's results until the full recomputation is done
+            publish_partial = current['records'] == 0
+        else:
+            state, publish_partial = current, True
+
+        processed = 0
+        for start in range(state['records'], len(data), self.batch_size):
+            if generation != self._generation:
+                # Reset mid-refresh: these rows belong to a dataset that is gone
+                return processed
+            stop = min(start + self.batch_size, len(data))
+            results, failed = self._optimize(optimizer, data.records(start, stop), start)
+            state = self._fold(state, self._rates(data, start, stop), results, failed)
+            processed += stop - start
+            if publish_partial:
+                self._state = state
+        if generation == self._generation:
+            self._state = state
+        return processed
+
+    @staticmethod
+    def _rates(data, start, stop):
+        # Rates a sender left out (e.g. co2_rate_lbs_per_hour) contribute nothing
+        return {rate: data.column(rate, start, stop) if rate in data.columns else np.zeros(stop - start)
+                for rate, _, _ in SAVINGS_TOTALS}
+
+    @staticmethod
+    def _optimize(optimizer, records, start):
+        """Results for one chunk and how many of its records failed"""
+        try:
+            return optimizer.optimize_speed_batch(records), 0
+        except Exception as e:
+            print(f"⚠️ Batch optimization failed for rows {start}-{start + len(records)} ({e}), retrying per record")
+
+        results, failed = [], 0
+        for record in records:
+            try:
+                results.append(optimizer.optimize_speed_batch([record])[0])
+            except Exception:
+                results.append(FAILED_RESULT)
+                failed += 1
+        if failed:
+            print(f"⚠️ {failed} of {len(records)} records could not be optimized and count as not improved")
+        return results, failed
+
+    def _fold(self, state, rates, results, failed=0):
+        columns = {name: np.array([result[name] for result in results], dtype=float)
+                   for name in ('optimal_speed', 'fuel_savings_percent', 'co2_reduction_percent')}
+        improved = columns['fuel_savings_percent'] > 0
+        totals = dict(state['totals'])
+        for rate, percent, saving in SAVINGS_TOTALS:
+            values = np.nan_to_num(np.asarray(rates[rate], dtype=float))
+            columns[saving] = np.where(improved, values * columns[percent] / 100, 0.0)
+            totals[rate] += float(values.sum())
+            totals[saving] += float(columns[saving].sum())
+
+        start, stop = state['records'], state['records'] + len(results)
+        buffers = self._reserve(state['columns'], start, stop)
+        for name in RESULT_COLUMNS:
+            # Rows past `records` are invisible to readers of the states published so far
+            buffers[name][start:stop] = columns[name]
+
+        return {
+            'model_version': state['model_version'],
+            'records': stop,
+            'columns': buffers,
+            'totals': totals,
+            'improved_records': state['improved_records'] + int(improved.sum()),
+            'failed_records': state['failed_records'] + failed,
+            'updated_at': datetime.now().isoformat()
+        }
+
+    def _reserve(self, buffers, size, needed):
+        """Buffers with room for `needed` rows, copying the first `size` rows when they have to grow"""
+        capacity = len(buffers[RESULT_COLUMNS[0]])
+        if needed <= capacity:
+            return buffers
+        capacity = max(capacity, self.batch_size, 1)
+        while capacity < needed:
+            capacity *= 2
+        grown = {}
+        for name, data in buffers.items():
+            # Readers holding the old buffer keep a valid view of the rows they know about
+            grown[name] = np.empty(capacity)
+            grown[name][:size] = data[:size]
+        return grown
+
+    @property
+    def records(self):
+        return self._state['records']
+
+    def column(self, name):
+        """Per-record results for one of RESULT_COLUMNS, aligned with the telemetry rows"""
+        state = self._state
+        return state['columns'][name][:state['records']].copy()
+
+    def summary(self):
+        """
+        Savings totals over every optimized record
+
+        Returns:
+            dict: records, improved_records, failed_records, fuel/CO2/cost savings, efficiency_improvement_pct,
+                  model_version and updated_at (None before the first refresh)
+        """
+        state = self._state
+        totals = state['totals']
+        return {
+            'records': state['records'],
+            'improved_records': state['improved_records'],
+            'failed_records': state['failed_records'],
+            'fuel_savings_gph': totals['fuel_savings_gph'],
+            'co2_reduction_lbs_per_hour': totals['co2_reduction_lbs_per_hour'],
+            'cost_savings_per_hour': totals['cost_savings_per_hour'],
+            'fuel_rate_gph': totals['fuel_rate_gph'],
+            'efficiency_improvement_pct': (totals['fuel_savings_gph'] / totals['fuel_rate_gph'] * 100
+                                           if totals['fuel_rate_gph'] else 0.0),
+            'model_version': state['model_version'],
+            'updated_at': state['updated_at']
+        }
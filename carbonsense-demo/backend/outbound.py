@@ -0,0 +1,116 @@
+"""
+CarbonSense AI - Outbound Backpressure
+Bounded, latest-value-wins delivery of streamed frames to slow Socket.IO clients
+
+Socket.IO queues every emitted packet per client until the client reads it, without limit.
+A dashboard on a slow cellular link that cannot keep up with the stream would therefore hold
+an ever-growing backlog of stale frames in server memory. Before each frame the streaming
+manager asks which subscribers still have more than max_queued packets waiting; those are
+skipped by the room emit and their frame goes to a hold slot instead, one per (event,
+equipment). A newer frame replaces the held one (deltas are merged into it), so a slow
+client costs at most one pending frame per stream. Held frames are sent with the stream's
+next frame once the client has drained its queue.
+"""
+
+import os
+import threading
+
+DEFAULT_MAX_QUEUED = int(os.environ.get('CARBONSENSE_STREAM_MAX_QUEUED', 3))
+
+def replace(held, payload):
+    """Full frames: the newest frame supersedes the held one"""
+    return payload
+
+class OutboundQueues:
+    """
+    Per-client hold slots and queue depth checks
+
+    Args:
+        socketio: flask_socketio.SocketIO instance the frames are emitted on
+        namespace (str): Socket.IO namespace of the clients
+        max_queued (int): Packets a client may have waiting before it counts as slow
+        depth (callable): sid -> packets waiting; defaults to the engine.io send queue
+    """
+
+    def __init__(self, socketio, namespace='/', max_queued=DEFAULT_MAX_QUEUED, depth=None):
+        self.socketio = socketio
+        self.namespace = namespace
+        self.max_queued = max_queued
+        self.depth = depth or self._engineio_depth
+        self._held = {}
+        self._lock = threading.Lock()
+
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def _engineio_depth(self, sid):
+        server = self.socketio.server
+        try:
+            eio_sid = server.manager.eio_sid_from_sid(sid, self.namespace)
+            return server.eio.sockets[eio_sid].queue.qsize()
+        except (AttributeError, KeyError):
+            # Not an engine.io socket (e.g. a test client) or already gone: nothing queued
+            return 0
+
+    def is_slow(self, sid):
+        depth = self.depth(sid)
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return depth >= self.max_queued
+
+    def split(self, sids, key):
+        """
+        (shared, individual) recipients for one frame of stream `key`
+
+        Individual recipients are slow clients and clients with a frame held for this stream:
+        they must not get the room emit, which would skip or duplicate what is held.
+        """
+        with self._lock:
+            individual = {sid for sid in sids if (sid, key) in self._held or self.is_slow(sid)}
+        return [sid for sid in sids if sid not in individual], list(individual)
+
+    def offer(self, sid, event, key, payload, merge=replace):
+        """
+        Send payload to one client now, or hold it (latest value wins) while the client is slow
+
+        Returns:
+            bool: True when sent
+        """
+        with self._lock:
+            held = self._held.pop((sid, key), None)
+            if held is not None:
+                payload = merge(held[1], payload)
+            if self.is_slow(sid):
+                if held is not None:
+                    self.dropped += 1
+                self._held[(sid, key)] = (event, payload)
+                return False
+        self.socketio.emit(event, payload, to=sid, namespace=self.namespace)
+        self.sent += 1
+        return True
+
+    def discard(self, sid, key=None):
+        """Drop what is held for a client (one stream, or all when key is None)"""
+        with self._lock:
+            for held_sid, held_key in list(self._held):
+                if held_sid == sid and key in (None, held_key):
+                    del self._held[(held_sid, held_key)]
+
+    def stats(self, sids=()):
+        """Held frames, drops and the current queue depth of the given clients"""
+        depths = sorted(self.depth(sid) for sid in sids)
+        with self._lock:
+            held = len(self._held)
+            slow_clients = len({sid for sid, _ in self._held})
+        return {
+            'max_queued': self.max_queued,
+            'held_frames': held,
+            'clients_with_held_frames': slow_clients,
+            'sent_individually': self.sent,
+            'dropped_frames': self.dropped,
+            'queue_depth': {'max': depths[-1] if depths else 0,
+                            'p99': depths[int(len(depths) * 0.99)] if depths else 0,
+                            'slow_clients': sum(1 for depth in depths if depth >= self.max_queued),
+                            'max_seen': self.max_depth}
+        }
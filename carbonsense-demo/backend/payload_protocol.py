@@ -0,0 +1,188 @@
+"""
+CarbonSense AI - Telemetry Payload Protocol
+Snapshot + delta encoding of streamed telemetry frames, with per-client rate control
+
+A full 'telemetry_update' frame repeats all 23 telemetry fields, the optimizations and the
+recommendations list on every tick, although most fields (operator, implement, soil, field)
+never change during a pass. Clients that subscribe with protocol 'delta' instead receive
+'telemetry_delta' messages: one snapshot, then only the fields that changed, numbered with
+the stream's sequence:
+
+    {'type': 'snapshot', 'equipment_id': 'JD8370R_001', 'seq': 12, 'data': {...frame...},
+     'fields': ['timestamp', 'equipment_id', ..., 'optimizations.optimal_speed_mph']}
+    {'type': 'delta', 'equipment_id': 'JD8370R_001', 'seq': 13, 'base_seq': 12,
+     'changes': {'5': 7.42, '24': 6.9}, 'removed': []}
+
+Nested dicts are flattened to dotted keys and lists are compared whole, so recommendations
+are only sent when they change. Deltas name fields by their position in the stream's field
+list instead of repeating the keys; a delta that introduces a field lists it in 'fields',
+appended to the list. Floats are rounded (FLOAT_DECIMALS, GPS to FIELD_DECIMALS) before
+comparing. A client applies a delta only on top of base_seq; otherwise it asks for a new
+snapshot by subscribing again.
+"""
+
+import time
+
+FULL_EVENT = 'telemetry_update'
+DELTA_EVENT = 'telemetry_delta'
+REPLAY_EVENT = 'telemetry_replay'
+PROTOCOLS = ('full', 'delta')
+
+FLOAT_DECIMALS = 3
+FIELD_DECIMALS = {'latitude': 6, 'longitude': 6}
+
+# A rate-limited client accepts a frame this much early, so tick jitter does not halve its rate
+RATE_TOLERANCE = 0.1
+
+def flatten(frame, prefix=''):
+    """Nested frame -> {dotted key: value} with floats rounded for comparison"""
+    flat = {}
+    for name, value in frame.items():
+        key = f"{prefix}{name}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{key}."))
+        elif isinstance(value, float):
+            flat[key] = round(value, FIELD_DECIMALS.get(key, FLOAT_DECIMALS))
+        else:
+            flat[key] = value
+    return flat
+
+def unflatten(flat):
+    """{dotted key: value} -> nested frame"""
+    frame = {}
+    for key, value in flat.items():
+        *parents, name = key.split('.')
+        node = frame
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[name] = value
+    return frame
+
+def apply_message(state, message):
+    """
+    Apply a snapshot or delta to a client's state (what a delta client does)
+
+    Args:
+        state (dict): {'seq': int, 'fields': list, 'flat': dict} or None before the first snapshot
+
+    Returns:
+        dict: New state, or None when the delta does not follow state['seq'] (resubscribe)
+    """
+    if message['type'] == 'snapshot':
+        return {'seq': message['seq'], 'fields': list(message['fields']), 'flat': flatten(message['data'])}
+    if state is None or message['base_seq'] != state['seq']:
+        return None
+    fields = state['fields'] + message.get('fields', [])
+    flat = dict(state['flat'])
+    flat.update((fields[int(index)], value) for index, value in message['changes'].items())
+    for index in message['removed']:
+        flat.pop(fields[index], None)
+    return {'seq': message['seq'], 'fields': fields, 'flat': flat}
+
+class StreamEncoder:
+    """Sequence number, field list and last sent state of one equipment stream"""
+
+    def __init__(self, equipment_id):
+        self.equipment_id = equipment_id
+        self.seq = 0
+        self.state = None
+        self.fields = []
+        self._positions = {}
+
+    def _position(self, key, added):
+        position = self._positions.get(key)
+        if position is None:
+            position = self._positions[key] = len(self.fields)
+            self.fields.append(key)
+            added.append(key)
+        return position
+
+    def encode(self, frame):
+        """Next message for delta subscribers: the changes since the previous frame"""
+        flat = flatten(frame)
+        previous, self.state = self.state, flat
+        self.seq += 1
+        added = []
+        changes = {str(self._position(key, added)): value for key, value in flat.items()
+                   if previous is None or key not in previous or previous[key] != value}
+        if previous is None:
+            return self.snapshot()
+        message = {
+            'type': 'delta',
+            'equipment_id': self.equipment_id,
+            'seq': self.seq,
+            'base_seq': self.seq - 1,
+            'changes': changes,
+            'removed': [self._positions[key] for key in previous if key not in flat]
+        }
+        if added:
+            message['fields'] = added
+        return message
+
+    def snapshot(self):
+        """Full current state, or None before the first frame"""
+        if self.state is None:
+            return None
+        return {'type': 'snapshot', 'equipment_id': self.equipment_id, 'seq': self.seq,
+                'data': unflatten(self.state), 'fields': list(self.fields)}
+
+def merge_messages(pending, message):
+    """Coalesce two consecutive messages of one stream into one"""
+    if message['type'] == 'snapshot':
+        return message
+    if pending['type'] == 'snapshot':
+        state = apply_message(apply_message(None, pending), message)
+        return dict(pending, seq=state['seq'], data=unflatten(state['flat']), fields=state['fields'])
+    changes = dict(pending['changes'])
+    changes.update(message['changes'])
+    removed = [index for index in pending['removed'] if str(index) not in message['changes']]
+    for index in message['removed']:
+        changes.pop(str(index), None)
+        if index not in removed:
+            removed.append(index)
+    merged = dict(message, base_seq=pending['base_seq'], changes=changes, removed=removed)
+    fields = pending.get('fields', []) + message.get('fields', [])
+    if fields:
+        merged['fields'] = fields
+    return merged
+
+class ClientChannel:
+    """
+    Rate limit of one delta client, per equipment stream
+
+    Args:
+        max_rate_hz (float): Most messages per second per stream
+        coalesce (bool): Merge the deltas of skipped frames into the next message; when False
+            skipped frames are dropped and the next message is a fresh snapshot
+    """
+
+    def __init__(self, max_rate_hz, coalesce=True, clock=time.monotonic):
+        self.period = 1.0 / max_rate_hz
+        self.coalesce = coalesce
+        self.clock = clock
+        self._pending = {}
+        self._last_sent = {}
+
+    def sent(self, equipment_id):
+        """Record a message sent outside offer() (the snapshot on subscribe)"""
+        self._pending.pop(equipment_id, None)
+        self._last_sent[equipment_id] = self.clock()
+
+    def offer(self, message, encoder):
+        """
+        Message to send now for this frame, or None while the client's rate is exhausted
+        """
+        equipment_id = message['equipment_id']
+        now = self.clock()
+        if self.coalesce and equipment_id in self._pending:
+            message = merge_messages(self._pending[equipment_id], message)
+        last = self._last_sent.get(equipment_id)
+        if last is not None and now - last < self.period * (1 - RATE_TOLERANCE):
+            self._pending[equipment_id] = message
+            return None
+        skipped = equipment_id in self._pending
+        self._pending.pop(equipment_id, None)
+        self._last_sent[equipment_id] = now
+        if skipped and not self.coalesce:
+            return encoder.snapshot()
+        return message
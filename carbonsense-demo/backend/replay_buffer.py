@@ -0,0 +1,60 @@
+"""
+CarbonSense AI - Replay Buffer
+Recent frames of one equipment stream, indexed by sequence number, for resuming clients
+
+A dashboard or in-cab browser that drops its connection remembers the last sequence number
+it saw. When it reconnects it sends that number back and gets only the frames it missed, as
+one batch, instead of reloading every REST endpoint. The buffer keeps the last `size` frames
+of a stream (with the delta message each frame produced), so a client that was away for
+longer than that gets a snapshot instead.
+"""
+
+import os
+from collections import deque
+from itertools import islice
+
+DEFAULT_REPLAY_FRAMES = int(os.environ.get('CARBONSENSE_STREAM_REPLAY_FRAMES', 150))
+
+class ReplayBuffer:
+    """
+    Ring buffer of (seq, frame, message) with consecutive sequence numbers
+
+    Args:
+        size (int): Frames kept (150 frames is 5 minutes of a stream at one frame every 2 seconds)
+    """
+
+    def __init__(self, size=DEFAULT_REPLAY_FRAMES):
+        self._entries = deque(maxlen=size)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def first_seq(self):
+        return self._entries[0][0] if self._entries else None
+
+    @property
+    def last_seq(self):
+        return self._entries[-1][0] if self._entries else None
+
+    def append(self, seq, frame, message):
+        if self._entries and seq != self._entries[-1][0] + 1:
+            # A gap would break the seq -> position arithmetic below
+            self._entries.clear()
+        self._entries.append((seq, frame, message))
+
+    def latest(self):
+        """Most recent (seq, frame, message), or None when empty"""
+        return self._entries[-1] if self._entries else None
+
+    def since(self, seq):
+        """
+        Entries after seq, oldest first
+
+        Returns:
+            list: Missing (seq, frame, message) entries, empty when seq is current, or None when
+            the buffer no longer (or never) covers seq and the client needs a snapshot
+        """
+        if not self._entries or not self.first_seq - 1 <= seq <= self.last_seq:
+            return None
+        return list(islice(self._entries, seq - self.first_seq + 1, None))
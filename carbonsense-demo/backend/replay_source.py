@@ -0,0 +1,123 @@
+"""
+CarbonSense AI - Replay Source
+Telemetry records for a replayed equipment stream, produced from precomputed blocks
+
+Building a frame used to start with store.record(row) (one small numpy slice and Python
+conversion per column), three np.random.normal scalar draws for the live variation and a
+fresh timestamp. Here an equipment's rows are converted once into a RecordTable, a compact
+structured array with Python-ready values, which a tick turns into a record with a single
+.tolist(). The live variation comes from a preallocated buffer of normal draws, refilled in
+place a block (DEFAULT_BLOCK_SIZE ticks) at a time. Each stream owns a ReplaySource whose
+records() generator hands out one record per tick; streams replaying the same equipment can
+share its RecordTable.
+"""
+
+import os
+from datetime import datetime
+import numpy as np
+
+DEFAULT_BLOCK_SIZE = int(os.environ.get('CARBONSENSE_REPLAY_BLOCK', 1024))
+
+# Standard deviation of the random variation added to replayed records to look live
+LIVE_NOISE = {'speed_mph': 0.2, 'engine_load_pct': 2, 'fuel_rate_gph': 0.3}
+
+class RecordTable:
+    """Rows of one equipment as a structured array of Python-ready values, extended as rows are appended"""
+
+    def __init__(self):
+        self.store = None
+        self.names = []
+        self.data = np.empty(0)
+
+    def __len__(self):
+        return len(self.data)
+
+    def _convert(self, store, rows):
+        columns = []
+        for name in self.names:
+            values = store.take(name, rows)
+            array = np.asarray(values)
+            if array.dtype.kind not in 'iufb':
+                # Strings, timestamps and mixed values stay Python objects (labels are shared, not copied)
+                array = np.empty(len(values), dtype=object)
+                array[:] = values
+            columns.append(array)
+        table = np.empty(len(rows), dtype=[(name, array.dtype) for name, array in zip(self.names, columns)])
+        for name, array in zip(self.names, columns):
+            table[name] = array
+        return table
+
+    def update(self, store, rows):
+        """Convert the rows not converted yet; a new store or new columns start over"""
+        if store is not self.store or store.columns != self.names:
+            self.store, self.names = store, list(store.columns)
+            self.data = self._convert(store, rows)
+        elif len(rows) > len(self.data):
+            added = self._convert(store, rows[len(self.data):])
+            if added.dtype == self.data.dtype:
+                self.data = np.concatenate([self.data, added])
+            else:
+                # A column changed kind (e.g. ints that now have missing values): convert everything again
+                self.data = self._convert(store, rows)
+        return self
+
+class ReplaySource:
+    """
+    Endless replay of one equipment's telemetry, one record per tick
+
+    Args:
+        locate (callable): Returns (store, row indexes of the equipment), or (None, None) without data;
+            called when the replay wraps around and once per block, so appended rows join the replay
+        table (RecordTable): Converted rows, shared by sources replaying the same equipment
+        noise (dict): Column -> standard deviation of the random variation added to each record
+        timestamps (bool): Stamp each record with the current time, like a live machine
+        block_size (int): Ticks per noise block
+        start (int): First row position (to spread machines replaying the same rows)
+    """
+
+    def __init__(self, locate, table=None, noise=None, timestamps=False, block_size=DEFAULT_BLOCK_SIZE, start=0,
+                 seed=None):
+        self.locate = locate
+        self.table = table if table is not None else RecordTable()
+        self.noise = dict(noise or {})
+        self.timestamps = timestamps
+        self.block_size = block_size
+        self.position = start
+        self.blocks = 0
+        self._rng = np.random.default_rng(seed)
+        self._scales = np.array(list(self.noise.values()), dtype=np.float64)
+        self._draws = np.empty((block_size, len(self.noise)))
+
+    def _refresh(self):
+        store, rows = self.locate()
+        if store is None or rows is None or not len(rows):
+            return None
+        return self.table.update(store, rows)
+
+    def records(self):
+        """Generator of replayed records; ends when the equipment has no rows"""
+        names, size, used = None, 0, self.block_size
+        while True:
+            if used == self.block_size or self.position >= size:
+                table = self._refresh()
+                if table is None:
+                    return
+                names, size = table.names, len(table)
+                self.position %= size
+                noisy = [(name, j) for j, name in enumerate(self.noise) if name in names]
+                if used == self.block_size:
+                    self._rng.standard_normal(out=self._draws)
+                    self._draws *= self._scales
+                    used = 0
+                    self.blocks += 1
+            values = table.data[self.position].tolist()
+            self.position += 1
+            record = dict(zip(names, values))
+            if noisy:
+                draws = self._draws[used].tolist()
+                for name, j in noisy:
+                    record[name] += draws[j]
+            used += 1
+            if self.timestamps:
+                record['timestamp'] = datetime.now().isoformat()
+            yield record
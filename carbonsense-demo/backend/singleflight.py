@@ -0,0 +1,95 @@
+"""
+CarbonSense AI - Singleflight
+Identical concurrent optimizations share one in-flight computation
+
+Several dashboards polling the same machine ask for the same optimization at the same time,
+and /api/recommendations and the equipment streams optimize the same latest records. Each
+call used to run the whole optimization again. Here the first caller for a key runs it and
+callers arriving with the same key while it is in flight wait for that result instead of
+computing their own. Nothing is cached: once the computation finishes the key is forgotten,
+so the next call computes afresh (e.g. with a newly swapped model).
+
+Keys are the model inputs of a record (optimization_key), so records that differ only in
+fields the models ignore (timestamp, fuel rate, equipment id) share a computation too.
+Waiters get the leader's result object itself, not a copy, so callers must not modify it.
+"""
+
+import threading
+import numpy as np
+from concurrent.futures import Future
+
+# Record fields the optimizer models and their recommendations read
+MODEL_INPUTS = ('speed_mph', 'engine_load_pct', 'implement_width_ft', 'field_acres', 'weather_factor',
+                'operation_type', 'soil_type', 'terrain_type')
+
+def _normalize(value):
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (list, dict)):
+        return repr(value)
+    return value
+
+def optimization_key(params, *scope, inputs=MODEL_INPUTS):
+    """
+    Hashable key of a record's inputs, prefixed with scope (e.g. kind, method, optimizer)
+
+    Numbers are compared as floats, so 75 from one JSON client and 75.0 from another match.
+    inputs=None keys on every field, for optimizers that read more than the model inputs.
+    """
+    if inputs is None:
+        return scope + tuple(sorted((name, _normalize(value)) for name, value in params.items()))
+    return scope + tuple(_normalize(params.get(name)) for name in inputs)
+
+class SingleFlight:
+    """Runs func once per key among concurrent callers of do()"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        func(*args, **kwargs), or the result of the identical call already in flight
+
+        Returns:
+            The result; a failed computation raises its error in every caller that shared it
+        """
+        with self._lock:
+            self.calls += 1
+            waiting = self._in_flight.get(key)
+            if waiting is None:
+                future = self._in_flight[key] = Future()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+        if waiting is not None:
+            return waiting.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            future.set_exception(e)
+            with self._lock:
+                self.errors += 1
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'errors': self.errors,
+                'in_flight': len(self._in_flight)
+            }
@@ -0,0 +1,186 @@
+"""
+CarbonSense AI - Startup Profiler
+Records per-module import time and initialization phase durations to a JSON report
+
+Enabled with CARBONSENSE_STARTUP_PROFILE=<report path>. The import hook has to be installed
+before the heavy imports, so backend/app.py starts the profiler ahead of everything else.
+Self time excludes nested imports, like `python -X importtime`; each module also records the
+phase (warm-up stage) that triggered it, which shows who pays for pandas/scikit-learn.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+from warmup import process_start_time
+
+PROFILE_ENV = 'CARBONSENSE_STARTUP_PROFILE'
+
+class _ImportTimer:
+    """
+    Meta path finder that times module execution
+
+    It resolves specs through the remaining finders and wraps the exec_module of per-module
+    loader instances; shared loaders (builtins, frozen modules) are left untouched.
+    """
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        loader = spec.loader
+        if loader is not None and not isinstance(loader, type) and hasattr(loader, 'exec_module'):
+            exec_module = loader.exec_module
+
+            def timed_exec_module(module):
+                with self.profiler.timing_import(fullname):
+                    exec_module(module)
+            try:
+                loader.exec_module = timed_exec_module
+            except AttributeError:
+                pass
+        return spec
+
+class StartupProfiler:
+    """
+    Collects import timings, named phases and marks for one process
+
+    A disabled profiler keeps the same interface but records nothing, so callers never
+    need to check whether profiling is on.
+    """
+
+    def __init__(self, report_path=None):
+        self.report_path = report_path
+        self.enabled = bool(report_path)
+        self.process_started_at = process_start_time()
+        self.started_at = time.time()
+        self.imports = []
+        self.phases = []
+        self.marks = {}
+        self._finder = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def install(self):
+        """Start timing imports (no-op when disabled)"""
+        if self.enabled and self._finder is None:
+            self._finder = _ImportTimer(self)
+            sys.meta_path.insert(0, self._finder)
+        return self
+
+    def uninstall(self):
+        if self._finder is not None and self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        self._finder = None
+
+    def _since_start(self, timestamp):
+        return round(timestamp - self.process_started_at, 4)
+
+    @contextmanager
+    def timing_import(self, module_name):
+        stack = self._local.__dict__.setdefault('stack', [])
+        entry = {'module': module_name, 'children_s': 0.0}
+        stack.append(entry)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            cumulative = time.perf_counter() - started
+            stack.pop()
+            if stack:
+                stack[-1]['children_s'] += cumulative
+            with self._lock:
+                self.imports.append({
+                    'module': module_name,
+                    'cumulative_s': round(cumulative, 5),
+                    'self_s': round(cumulative - entry['children_s'], 5),
+                    'phase': getattr(self._local, 'phase', None),
+                    'top_level': not stack
+                })
+
+    @contextmanager
+    def phase(self, name):
+        """Time an initialization phase; imports inside it are attributed to it"""
+        if not self.enabled:
+            yield
+            return
+        previous = getattr(self._local, 'phase', None)
+        self._local.phase = name
+        started_wall, started = time.time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.phase = previous
+            with self._lock:
+                self.phases.append({
+                    'name': name,
+                    'started_s': self._since_start(started_wall),
+                    'duration_s': round(time.perf_counter() - started, 4),
+                    'thread': threading.current_thread().name
+                })
+
+    def mark(self, name):
+        """Record a point in startup, in seconds since the process started"""
+        if self.enabled:
+            self.marks[name] = self._since_start(time.time())
+
+    def report(self, top=30, extra=None):
+        """
+        Startup profile as a JSON-able dict
+
+        Args:
+            top (int): Number of slowest modules to list
+            extra (dict): Additional sections (e.g. warm-up progress)
+        """
+        with self._lock:
+            imports = list(self.imports)
+            phases = list(self.phases)
+
+        by_package = {}
+        for entry in imports:
+            package = entry['module'].split('.')[0]
+            by_package[package] = by_package.get(package, 0.0) + entry['self_s']
+
+        report = {
+            'pid': os.getpid(),
+            'generated_at_s': self._since_start(time.time()),
+            'interpreter_startup_s': self._since_start(self.started_at),
+            'marks': dict(self.marks),
+            'phases': phases,
+            'imports': {
+                'modules': len(imports),
+                'total_s': round(sum(e['cumulative_s'] for e in imports if e['top_level']), 4),
+                'slowest': sorted(imports, key=lambda e: e['cumulative_s'], reverse=True)[:top],
+                'by_package_self_s': {
+                    name: round(seconds, 4)
+                    for name, seconds in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+                }
+            }
+        }
+        report.update(extra or {})
+        return report
+
+    def write(self, extra=None):
+        """Write the report to the configured path; returns the path, or None when disabled"""
+        if not self.enabled:
+            return None
+        with open(self.report_path, 'w') as f:
+            json.dump(self.report(extra=extra), f, indent=2)
+        print(f"⏱️ Startup profile written to {self.report_path}")
+        return self.report_path
+
+def start_profiler(report_path=None):
+    """Create and install the process profiler, enabled when CARBONSENSE_STARTUP_PROFILE is set"""
+    return StartupProfiler(report_path or os.environ.get(PROFILE_ENV)).install()
@@ -0,0 +1,355 @@
+"""
+CarbonSense AI - Telemetry Streaming
+Per-equipment telemetry streams fanned out to Socket.IO rooms
+
+Every equipment_id is one logical stream that replays that machine's telemetry, record by
+record from a ReplaySource (replay_source.py). A tick builds
+each stream's frame (record + optimizations) once and emits it to the stream's room, so the
+optimization cost of a tick grows with the number of watched machines, not with the number
+of connected clients. Each active stream is one entry on a TickScheduler, which runs the
+frames on its worker pool; streams without subscribers are unscheduled and cost nothing.
+
+Clients choose a payload protocol when they subscribe (see payload_protocol.py): 'full'
+frames as 'telemetry_update', or 'delta' snapshot + changes as 'telemetry_delta', optionally
+rate-limited per client. Full and unlimited delta subscribers share one emit per room.
+Subscribers that fall behind are taken out of the room emit and get latest-value-wins
+delivery from OutboundQueues (outbound.py) until they catch up.
+
+Frames are numbered by the stream's sequence ('seq' in full frames and delta messages) and
+the recent ones are kept in a ReplayBuffer (replay_buffer.py). A reconnecting client passes
+resume={'epoch': ..., 'seq': {equipment_id: last seq}} when it subscribes: full clients get
+the missed frames as one 'telemetry_replay' batch, delta clients one merged delta. Clients
+too far behind, or from before a server restart (another epoch), get a snapshot.
+"""
+
+import time
+import uuid
+import threading
+from functools import partial, reduce
+import numpy as np
+
+from tick_scheduler import TickScheduler
+from payload_protocol import (StreamEncoder, ClientChannel, merge_messages, FULL_EVENT, DELTA_EVENT, REPLAY_EVENT,
+                              PROTOCOLS)
+from outbound import OutboundQueues, replace
+from replay_buffer import ReplayBuffer, DEFAULT_REPLAY_FRAMES
+from replay_source import ReplaySource
+
+ROOM_PREFIX = 'equipment:'
+DEFAULT_INTERVAL = 2.0  # seconds between frames of one stream
+
+def room_name(equipment_id, mode='full'):
+    """Socket.IO room of one equipment stream ('full' or 'delta' subscribers)"""
+    return f"{ROOM_PREFIX}{equipment_id}" if mode == 'full' else f"{ROOM_PREFIX}{equipment_id}:{mode}"
+
+class EquipmentStream:
+    """Replay position, delta encoder, recent frames and subscribers of one machine's stream"""
+
+    def __init__(self, equipment_id, replay_frames=DEFAULT_REPLAY_FRAMES):
+        self.equipment_id = equipment_id
+        # sid -> 'full', 'delta' or 'limited' (rate-limited delta, sent per client)
+        self.subscribers = {}
+        self.encoder = StreamEncoder(equipment_id)
+        self.replay = ReplayBuffer(replay_frames)
+        self.source = None
+        self.records = iter(())
+        self.frames = 0
+
+    @property
+    def active(self):
+        return bool(self.subscribers)
+
+class StreamManager:
+    """
+    Streams telemetry per equipment to the clients subscribed to it
+
+    Args:
+        socketio: flask_socketio.SocketIO instance used for rooms and emits
+        source (callable): Returns the current TelemetryStore (or None before data is loaded)
+        build_frame (callable): record dict -> frame dict sent as 'telemetry_update'
+        interval (float): Seconds between ticks
+        namespace (str): Socket.IO namespace of the subscribers
+        autostart (bool): Tick active streams on a scheduler; False leaves tick() to the caller
+        scheduler (TickScheduler): Scheduler to use instead of a new one
+        outbound (OutboundQueues): Backpressure for slow clients instead of the default one
+        replay_frames (int): Recent frames per stream kept for resuming clients
+        noise (dict): Column -> standard deviation of the live variation added to replayed records
+        live_timestamps (bool): Stamp replayed records with the current time
+    """
+
+    def __init__(self, socketio, source, build_frame, interval=DEFAULT_INTERVAL, namespace='/', autostart=True,
+                 scheduler=None, outbound=None, replay_frames=DEFAULT_REPLAY_FRAMES, noise=None, live_timestamps=False):
+        self.socketio = socketio
+        self.source = source
+        self.build_frame = build_frame
+        self.interval = interval
+        self.namespace = namespace
+        self.scheduler = scheduler or (TickScheduler(interval, name='telemetry-streams') if autostart else None)
+        self.outbound = outbound or OutboundQueues(socketio, namespace)
+        self.replay_frames = replay_frames
+        self.noise = noise
+        self.live_timestamps = live_timestamps
+        # Sequence numbers restart with the process; a resume from another epoch gets a snapshot
+        self.epoch = uuid.uuid4().hex[:12]
+        self._streams = {}
+        self._channels = {}
+        self._lock = threading.RLock()
+
+        # Row indexes of each equipment in the store, extended as records are appended
+        self._indexed_store = None
+        self._indexed_rows = 0
+        self._rows = {}
+
+        self.frames_computed = 0
+        self.frames_delivered = 0
+        self.compute_seconds = 0.0
+        self.emit_seconds = 0.0
+        self.last_tick = {}
+
+    def _index_rows(self):
+        store = self.source()
+        if store is None or 'equipment_id' not in store.columns:
+            return None
+        if store is not self._indexed_store:
+            self._indexed_store, self._indexed_rows, self._rows = store, 0, {}
+        size = len(store)
+        if size > self._indexed_rows:
+            codes = store.column('equipment_id', self._indexed_rows, size)
+            labels = store.dictionary('equipment_id')
+            for code in np.unique(codes[codes >= 0]):
+                rows = np.flatnonzero(codes == code) + self._indexed_rows
+                previous = self._rows.get(labels[code])
+                self._rows[labels[code]] = rows if previous is None else np.concatenate([previous, rows])
+            self._indexed_rows = size
+        return store
+
+    def _locate(self, equipment_id):
+        """(store, row indexes) of one machine for its ReplaySource"""
+        with self._lock:
+            store = self._index_rows()
+            return (store, self._rows.get(equipment_id)) if store is not None else (None, None)
+
+    def equipment_ids(self):
+        """Machines with telemetry that can be streamed"""
+        with self._lock:
+            self._index_rows()
+            return sorted(self._rows)
+
+    def subscribe(self, sid, equipment_ids=None, protocol='full', max_rate_hz=None, coalesce=True, resume=None):
+        """
+        Add a client to equipment streams (all known equipment when equipment_ids is None)
+
+        Subscribing again changes the client's protocol and, for delta clients, resends the
+        snapshot of each stream.
+
+        Args:
+            protocol (str): 'full' or 'delta'
+            max_rate_hz (float): Delta messages per second per stream at most (default: every frame)
+            coalesce (bool): Merge skipped deltas into the next message instead of sending a snapshot
+            resume (dict): {'epoch': str, 'seq': {equipment_id: last seq received}} of a reconnecting client
+
+        Returns:
+            list: Equipment IDs the client is now subscribed to; unknown IDs are skipped
+        """
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown streaming protocol '{protocol}', use one of {PROTOCOLS}")
+        if max_rate_hz is not None and not max_rate_hz > 0:
+            raise ValueError("max_rate_hz must be positive")
+        mode = 'full' if protocol == 'full' else ('limited' if max_rate_hz else 'delta')
+        last_seqs = {}
+        if resume is not None:
+            if not isinstance(resume, dict) or not isinstance(resume.get('seq', {}), dict):
+                raise ValueError("resume must be {'epoch': ..., 'seq': {equipment_id: seq}}")
+            if resume.get('epoch') == self.epoch:
+                last_seqs = {eid: int(seq) for eid, seq in resume.get('seq', {}).items()}
+
+        with self._lock:
+            known = set(self.equipment_ids())
+            wanted = sorted(known) if equipment_ids is None else [eid for eid in equipment_ids if eid in known]
+            if mode == 'limited':
+                self._channels[sid] = ClientChannel(max_rate_hz, coalesce)
+            for equipment_id in wanted:
+                stream = self._streams.get(equipment_id)
+                if stream is None:
+                    stream = self._streams[equipment_id] = EquipmentStream(equipment_id, self.replay_frames)
+                previous = stream.subscribers.get(sid)
+                if previous not in (None, 'limited'):
+                    self.socketio.server.leave_room(sid, room_name(equipment_id, previous), namespace=self.namespace)
+                stream.subscribers[sid] = mode
+                self.outbound.discard(sid, equipment_id)
+                if mode != 'limited':
+                    self.socketio.server.enter_room(sid, room_name(equipment_id, mode), namespace=self.namespace)
+                self._catch_up(sid, stream, mode, last_seqs.get(equipment_id))
+                if self.scheduler is not None and equipment_id not in self.scheduler:
+                    # First subscriber: resume the stream right away, then every interval
+                    self.scheduler.schedule(equipment_id, partial(self._stream_frame, stream), first_delay=0)
+            return wanted
+
+    def _catch_up(self, sid, stream, mode, last_seq):
+        """
+        Send a (re)subscribing client what it is missing of a stream
+
+        Full clients only get something when resuming: the missed frames, or the latest frame
+        as a snapshot. Delta clients get the missed deltas merged into one, or a snapshot.
+        """
+        missing = stream.replay.since(last_seq) if last_seq is not None else None
+        if missing == []:
+            return  # Already up to date
+        equipment_id = stream.equipment_id
+        if mode == 'full':
+            latest = stream.replay.latest()
+            if last_seq is None or latest is None:
+                return
+            if missing is None:
+                batch = {'type': 'snapshot', 'equipment_id': equipment_id, 'seq': latest[0], 'frames': [latest[1]]}
+            else:
+                batch = {'type': 'replay', 'equipment_id': equipment_id, 'base_seq': last_seq,
+                         'seq': missing[-1][0], 'frames': [frame for _, frame, _ in missing]}
+            self.socketio.emit(REPLAY_EVENT, batch, to=sid, namespace=self.namespace)
+            return
+        if missing is None:
+            message = stream.encoder.snapshot()
+        else:
+            message = reduce(merge_messages, [message for _, _, message in missing])
+        if message is not None:
+            self.socketio.emit(DELTA_EVENT, message, to=sid, namespace=self.namespace)
+            if mode == 'limited':
+                self._channels[sid].sent(equipment_id)
+
+    def unsubscribe(self, sid, equipment_ids=None, disconnected=False):
+        """
+        Remove a client from equipment streams (all of them when equipment_ids is None)
+
+        Streams left without subscribers are unscheduled (suspended). On disconnect Socket.IO already
+        dropped the client's rooms, so only the bookkeeping is updated.
+        """
+        with self._lock:
+            removed = []
+            for equipment_id, stream in self._streams.items():
+                if sid not in stream.subscribers or (equipment_ids is not None and equipment_id not in equipment_ids):
+                    continue
+                mode = stream.subscribers.pop(sid)
+                self.outbound.discard(sid, equipment_id)
+                if not disconnected and mode != 'limited':
+                    self.socketio.server.leave_room(sid, room_name(equipment_id, mode), namespace=self.namespace)
+                if not stream.active and self.scheduler is not None:
+                    self.scheduler.cancel(equipment_id)
+                removed.append(equipment_id)
+            if not any(sid in stream.subscribers for stream in self._streams.values()):
+                self._channels.pop(sid, None)
+            return removed
+
+    def subscriptions(self, sid):
+        """Equipment IDs a client is subscribed to"""
+        with self._lock:
+            return sorted(eid for eid, stream in self._streams.items() if sid in stream.subscribers)
+
+    def _stream_frame(self, stream):
+        """
+        Build one frame of a stream and emit it to the stream's room
+
+        Returns:
+            tuple: (subscribers reached, compute seconds, emit seconds), or None when idle
+        """
+        with self._lock:
+            if not stream.active:
+                return None
+            if stream.source is None:
+                stream.source = ReplaySource(partial(self._locate, stream.equipment_id), noise=self.noise,
+                                             timestamps=self.live_timestamps)
+
+        started = time.perf_counter()
+        record = next(stream.records, None)
+        if record is None:
+            # No telemetry for this machine (yet): try again on the next tick
+            stream.records = stream.source.records()
+            record = next(stream.records, None)
+            if record is None:
+                return None
+        frame = self.build_frame(record)
+        computed = time.perf_counter()
+
+        # Encoding and emitting under the lock keeps a snapshot sent by subscribe() in sequence
+        with self._lock:
+            equipment_id, modes = stream.equipment_id, list(stream.subscribers.items())
+            # The encoder follows every frame so a new delta subscriber's snapshot is current
+            message = stream.encoder.encode(frame)
+            frame = dict(frame, seq=message['seq'])
+            stream.replay.append(message['seq'], frame, message)
+            delivered = self._deliver(equipment_id, 'full', FULL_EVENT, frame, modes)
+            delivered += self._deliver(equipment_id, 'delta', DELTA_EVENT, message, modes, merge_messages)
+            for sid, mode in modes:
+                if mode != 'limited':
+                    continue
+                outgoing = self._channels[sid].offer(message, stream.encoder)
+                if outgoing is not None:
+                    delivered += self.outbound.offer(sid, DELTA_EVENT, equipment_id, outgoing, merge_messages)
+            emitted = time.perf_counter()
+
+            stream.frames += 1
+            self.frames_computed += 1
+            self.frames_delivered += delivered
+            self.compute_seconds += computed - started
+            self.emit_seconds += emitted - computed
+        return delivered, computed - started, emitted - computed
+
+    def _deliver(self, equipment_id, mode, event, payload, modes, merge=replace):
+        """Emit one payload to a room, except to clients that are behind; returns clients reached"""
+        members = [sid for sid, member_mode in modes if member_mode == mode]
+        if not members:
+            return 0
+        shared, individual = self.outbound.split(members, equipment_id)
+        if shared:
+            # One emit for the whole room; python-socketio encodes the packet per recipient
+            self.socketio.emit(event, payload, to=room_name(equipment_id, mode), skip_sid=individual or None,
+                               namespace=self.namespace)
+        delivered = len(shared)
+        for sid in individual:
+            delivered += self.outbound.offer(sid, event, equipment_id, payload, merge)
+        return delivered
+
+    def tick(self):
+        """
+        Build and emit one frame for every active stream, on the calling thread
+
+        Returns:
+            int: Number of frames computed
+        """
+        started = time.perf_counter()
+        with self._lock:
+            active = [stream for stream in self._streams.values() if stream.active]
+        results = [result for result in map(self._stream_frame, active) if result is not None]
+        if results:
+            self.last_tick = {'streams': len(results), 'subscribers': sum(r[0] for r in results),
+                              'compute_ms': round(sum(r[1] for r in results) * 1000, 3),
+                              'emit_ms': round(sum(r[2] for r in results) * 1000, 3),
+                              'tick_ms': round((time.perf_counter() - started) * 1000, 3)}
+        return len(results)
+
+    def status(self):
+        """Stream states, frame cost and scheduler lag for /api/streaming/status"""
+        with self._lock:
+            streams = {eid: {'subscribers': len(stream.subscribers),
+                             'protocols': {mode: sum(1 for m in stream.subscribers.values() if m == mode)
+                                           for mode in set(stream.subscribers.values())},
+                             'state': 'active' if stream.active else 'suspended',
+                             'seq': stream.encoder.seq,
+                             'replay': {'frames': len(stream.replay), 'first_seq': stream.replay.first_seq},
+                             'frames': stream.frames}
+                       for eid, stream in self._streams.items()}
+            frames = self.frames_computed
+            subscribers = set().union(*(stream.subscribers for stream in self._streams.values()))
+            return {
+                'interval_seconds': self.interval,
+                'epoch': self.epoch,
+                'streams': streams,
+                'active_streams': sum(1 for stream in self._streams.values() if stream.active),
+                'subscribers': len(subscribers),
+                'frames_computed': frames,
+                'frames_delivered': self.frames_delivered,
+                'avg_compute_ms': round(self.compute_seconds / frames * 1000, 3) if frames else 0.0,
+                'avg_emit_ms': round(self.emit_seconds / frames * 1000, 3) if frames else 0.0,
+                'last_tick': self.last_tick,
+                'scheduler': self.scheduler.stats() if self.scheduler is not None else None,
+                'backpressure': self.outbound.stats(subscribers)
+            }
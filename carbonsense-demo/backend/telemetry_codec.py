@@ -0,0 +1,312 @@
+"""
+CarbonSense AI - Telemetry Payload Codec
+Bulk decoding and validation of telemetry batches posted to /api/telemetry
+
+Two payload formats are accepted:
+- NDJSON (application/x-ndjson): one JSON record per line
+- Binary columnar (application/vnd.carbonsense.telemetry): one typed block per column
+
+Both decode to a dict of column arrays, which TelemetryStore and RunningAggregates append
+without going through per-record dicts. Validation also runs per column, vectorized.
+
+Throughput (benchmarks/bench_ingest.py, one core): the binary payload decodes about 280k
+records/s and meets the 100k records/s ingestion target; NDJSON reaches only about 56k
+records/s (the stdlib json parser is the limit) and does not. Bulk senders should use binary.
+
+Binary layout (little-endian):
+    b'CSTB' | version u8 | n_rows u32 | n_columns u16
+    per column: name_len u8 | name utf-8 | type u8 | data
+        float64 / int64 / float32 / int32: n_rows raw values
+        category: n_labels u16 | per label (len u16 | utf-8) | int32 codes, -1 = missing
+        text:     int32 byte lengths, -1 = missing | concatenated utf-8
+"""
+
+import json
+import struct
+from datetime import datetime
+import numpy as np
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+BINARY_CONTENT_TYPE = 'application/vnd.carbonsense.telemetry'
+
+MAGIC = b'CSTB'
+VERSION = 1
+MAX_BATCH_ROWS = 500000
+
+COLUMN_TYPES = {0: '<f8', 1: '<i8', 2: '<f4', 3: '<i4'}
+TYPE_CODES = {dtype: code for code, dtype in COLUMN_TYPES.items()}
+CATEGORY_TYPE = 4
+TEXT_TYPE = 5
+
+# Every record needs these: its identity, fuel use and the optimizer's model inputs
+REQUIRED_FIELDS = ('equipment_id', 'speed_mph', 'engine_load_pct', 'fuel_rate_gph', 'implement_width_ft',
+                   'field_acres', 'weather_factor', 'operation_type', 'soil_type', 'terrain_type')
+
+# Numeric telemetry fields and the range a working machine can report
+FIELD_RANGES = {
+    'latitude': (-90, 90),
+    'longitude': (-180, 180),
+    'speed_mph': (0, 40),
+    'engine_load_pct': (0, 120),
+    'engine_rpm': (0, 4000),
+    'fuel_rate_gph': (0, 200),
+    'co2_rate_lbs_per_hour': (0, 5000),
+    'fuel_cost_per_hour': (0, 1000),
+    'implement_width_ft': (0, 200),
+    'hydraulic_pressure_psi': (0, 6000),
+    'coolant_temp_f': (-40, 300),
+    'field_acres': (0, 100000),
+    'pass_number': (0, 1000),
+    'acres_per_hour': (0, 1000),
+    'fuel_per_acre': (0, 100000),
+    'weather_factor': (0, 5)
+}
+
+MAX_REPORTED_ERRORS = 20
+
+class TelemetryPayloadError(ValueError):
+    """Payload that cannot be decoded or fails validation; `errors` lists the problems found"""
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or []
+
+def decode_ndjson(body):
+    """
+    Decode newline-delimited JSON records into column arrays
+
+    Args:
+        body (bytes): NDJSON payload
+
+    Returns:
+        tuple: (columns dict, n_rows)
+    """
+    lines = [line for line in body.split(b'\n') if line.strip()]
+    if len(lines) > MAX_BATCH_ROWS:
+        raise TelemetryPayloadError(f"Batch too large ({len(lines)} records, max {MAX_BATCH_ROWS})")
+    try:
+        # One parser call for the whole batch instead of one per line
+        records = json.loads(b'[' + b','.join(lines) + b']')
+    except ValueError:
+        for number, line in enumerate(lines):
+            try:
+                json.loads(line)
+            except ValueError as e:
+                raise TelemetryPayloadError(f"Invalid JSON on line {number + 1}: {e}")
+        raise TelemetryPayloadError("Invalid NDJSON payload")
+    if not all(isinstance(record, dict) for record in records):
+        raise TelemetryPayloadError("Each NDJSON line must be a JSON object")
+
+    names = list(records[0]) if records else []
+    if all(list(record) == names for record in records):
+        # Same fields in the same order on every line (the usual case): transpose in one pass
+        by_column = dict(zip(names, zip(*map(dict.values, records))))
+    else:
+        names = list(dict.fromkeys(name for record in records for name in record))
+        by_column = {name: [record.get(name) for record in records] for name in names}
+
+    columns = {}
+    for name, values in by_column.items():
+        if name in FIELD_RANGES:
+            columns[name] = _numeric_column(name, values)
+        else:
+            columns[name] = np.array(values, dtype=object)
+    return columns, len(records)
+
+def _numeric_column(name, values):
+    values = list(values)
+    array = np.asarray(values)
+    if array.dtype.kind in 'iuf':
+        return array
+    try:
+        # Missing values (None) become NaN and fail the required/range checks where they matter
+        return np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        bad = [i for i, value in enumerate(values) if value is not None and not isinstance(value, (int, float))]
+        raise TelemetryPayloadError(f"Non-numeric values in '{name}'",
+                                    [f"row {i}: {name}={values[i]!r}" for i in bad[:MAX_REPORTED_ERRORS]])
+
+def encode_binary(columns):
+    """
+    Encode column arrays as a binary columnar payload
+
+    Numeric arrays keep their dtype (float64, int64, float32 or int32); string columns are
+    sent as a label dictionary with int32 codes, except 'timestamp', which is sent as text.
+
+    Args:
+        columns (dict): Column name -> array or list (e.g. {name: df[name].to_numpy()})
+
+    Returns:
+        bytes: Payload for POST /api/telemetry
+    """
+    arrays = {name: np.asarray(values) for name, values in columns.items()}
+    n_rows = len(next(iter(arrays.values()))) if arrays else 0
+    parts = [MAGIC, struct.pack('<BIH', VERSION, n_rows, len(arrays))]
+    for name, array in arrays.items():
+        encoded_name = name.encode('utf-8')
+        parts.append(struct.pack('<B', len(encoded_name)) + encoded_name)
+        if array.dtype.kind in 'fiub':
+            if array.dtype.kind == 'f':
+                dtype = '<f4' if array.dtype.itemsize == 4 else '<f8'
+            else:
+                dtype = '<i4' if array.dtype.itemsize <= 4 else '<i8'
+            parts.append(struct.pack('<B', TYPE_CODES[dtype]) + array.astype(dtype, copy=False).tobytes())
+        elif name == 'timestamp':
+            texts = [None if value is None or value != value else str(value).encode('utf-8') for value in array]
+            lengths = np.array([-1 if text is None else len(text) for text in texts], dtype='<i4')
+            parts.append(struct.pack('<B', TEXT_TYPE) + lengths.tobytes() + b''.join(text or b'' for text in texts))
+        else:
+            labels, codes = {}, np.empty(n_rows, dtype='<i4')
+            for i, value in enumerate(array):
+                codes[i] = -1 if value is None or value != value else labels.setdefault(str(value), len(labels))
+            block = [struct.pack('<BH', CATEGORY_TYPE, len(labels))]
+            for label in labels:
+                encoded = label.encode('utf-8')
+                block.append(struct.pack('<H', len(encoded)) + encoded)
+            parts.append(b''.join(block) + codes.tobytes())
+    return b''.join(parts)
+
+def decode_binary(body):
+    """
+    Decode a binary columnar payload; numeric columns are zero-copy views of the body
+
+    Returns:
+        tuple: (columns dict, n_rows)
+    """
+    view = memoryview(body)
+    if bytes(view[:4]) != MAGIC:
+        raise TelemetryPayloadError("Not a CarbonSense telemetry payload (bad magic)")
+    try:
+        version, n_rows, n_columns = struct.unpack_from('<BIH', view, 4)
+        if version != VERSION:
+            raise TelemetryPayloadError(f"Unsupported payload version {version}")
+        if n_rows > MAX_BATCH_ROWS:
+            raise TelemetryPayloadError(f"Batch too large ({n_rows} records, max {MAX_BATCH_ROWS})")
+        offset = 4 + struct.calcsize('<BIH')
+        columns = {}
+        for _ in range(n_columns):
+            name_length = view[offset]
+            name = bytes(view[offset + 1:offset + 1 + name_length]).decode('utf-8')
+            offset += 1 + name_length
+            type_code = view[offset]
+            offset += 1
+            if type_code in COLUMN_TYPES:
+                dtype = np.dtype(COLUMN_TYPES[type_code])
+                columns[name] = np.frombuffer(body, dtype=dtype, count=n_rows, offset=offset)
+                offset += n_rows * dtype.itemsize
+            elif type_code == CATEGORY_TYPE:
+                (n_labels,) = struct.unpack_from('<H', view, offset)
+                offset += 2
+                labels = []
+                for _ in range(n_labels):
+                    (length,) = struct.unpack_from('<H', view, offset)
+                    labels.append(bytes(view[offset + 2:offset + 2 + length]).decode('utf-8'))
+                    offset += 2 + length
+                codes = np.frombuffer(body, dtype='<i4', count=n_rows, offset=offset)
+                offset += 4 * n_rows
+                if len(codes) and (codes.min() < -1 or codes.max() >= n_labels):
+                    raise TelemetryPayloadError(f"Category codes out of range in '{name}'")
+                # Code -1 picks the trailing None
+                columns[name] = np.array(labels + [None], dtype=object)[codes]
+            elif type_code == TEXT_TYPE:
+                lengths = np.frombuffer(body, dtype='<i4', count=n_rows, offset=offset).tolist()
+                offset += 4 * n_rows
+                end = offset + sum(length for length in lengths if length > 0)
+                if end > len(body):
+                    raise TelemetryPayloadError(f"Truncated text column '{name}'")
+                text, position, values = bytes(view[offset:end]), 0, []
+                for length in lengths:
+                    if length < 0:
+                        values.append(None)
+                        continue
+                    values.append(text[position:position + length].decode('utf-8'))
+                    position += length
+                columns[name] = np.array(values, dtype=object)
+                offset = end
+            else:
+                raise TelemetryPayloadError(f"Unknown column type {type_code} for '{name}'")
+    except (struct.error, IndexError, ValueError) as e:
+        if isinstance(e, TelemetryPayloadError):
+            raise
+        raise TelemetryPayloadError(f"Truncated or malformed payload: {e}")
+    return columns, n_rows
+
+def _unparseable_timestamps(values):
+    """Rows whose timestamp numpy cannot parse (TelemetryStore stores them as datetime64[ns])"""
+    try:
+        np.asarray(values, dtype='datetime64[ns]')
+        return []
+    except (TypeError, ValueError):
+        pass
+    bad = []
+    for i, value in enumerate(values):
+        try:
+            np.datetime64(value, 'ns')
+        except (TypeError, ValueError):
+            bad.append(i)
+    return bad
+
+def validate_columns(columns, n_rows):
+    """
+    Check a decoded batch in bulk: required fields present, numbers finite and in range,
+    timestamps parseable (ISO 8601)
+
+    Raises:
+        TelemetryPayloadError: listing up to MAX_REPORTED_ERRORS offending rows
+    """
+    errors = []
+    for name in REQUIRED_FIELDS:
+        if name not in columns:
+            errors.append(f"missing field '{name}'")
+            continue
+        values = columns[name]
+        if values.dtype == object:
+            missing = np.flatnonzero(np.array([value is None or value != value for value in values], dtype=bool))
+        else:
+            missing = np.flatnonzero(np.isnan(values)) if values.dtype.kind == 'f' else np.array([], dtype=int)
+        errors += [f"row {i}: '{name}' is required" for i in missing[:MAX_REPORTED_ERRORS]]
+
+    for name, (low, high) in FIELD_RANGES.items():
+        values = columns.get(name)
+        if values is None:
+            continue
+        if values.dtype.kind not in 'iuf':
+            errors.append(f"'{name}' must be numeric")
+            continue
+        values = values.astype(float, copy=False)
+        # NaN (missing) passes here; required fields were checked above
+        bad = np.flatnonzero(np.isinf(values) | (values < low) | (values > high))
+        errors += [f"row {i}: {name}={values[i]} outside [{low}, {high}]" for i in bad[:MAX_REPORTED_ERRORS]]
+
+    if 'timestamp' in columns:
+        timestamps = columns['timestamp']
+        errors += [f"row {i}: timestamp={timestamps[i]!r} is not an ISO 8601 date/time"
+                   for i in _unparseable_timestamps(timestamps)[:MAX_REPORTED_ERRORS]]
+
+    if errors:
+        raise TelemetryPayloadError(f"{len(errors)} validation error(s)", errors[:MAX_REPORTED_ERRORS])
+
+def decode_payload(body, content_type):
+    """
+    Decode and validate a /api/telemetry request body
+
+    Records without a timestamp are stamped with the time of ingestion.
+
+    Returns:
+        tuple: (columns dict, n_rows)
+    """
+    media_type = (content_type or '').split(';')[0].strip().lower()
+    if media_type == BINARY_CONTENT_TYPE:
+        columns, n_rows = decode_binary(body)
+    elif media_type in (NDJSON_CONTENT_TYPE, 'application/jsonl', 'application/json'):
+        columns, n_rows = decode_ndjson(body)
+    else:
+        raise TelemetryPayloadError(f"Unsupported content type '{media_type}', "
+                                    f"use {NDJSON_CONTENT_TYPE} or {BINARY_CONTENT_TYPE}")
+    if n_rows == 0:
+        raise TelemetryPayloadError("Empty telemetry batch")
+
+    validate_columns(columns, n_rows)
+    if 'timestamp' not in columns:
+        columns['timestamp'] = np.full(n_rows, datetime.now().isoformat(), dtype=object)
+    return columns, n_rows
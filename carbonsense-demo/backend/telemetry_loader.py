@@ -0,0 +1,262 @@
+"""
+CarbonSense AI - Telemetry Loader
+Discovers the telemetry CSVs under data/, applies an explicit dtype schema and caches the result
+
+The first load parses every *_telemetry.csv with the schema below and writes a columnar
+cache next to the data: Parquet when pyarrow is installed, otherwise one .npy file per
+column. Later loads read only the requested columns from the cache; the .npy cache is
+memory-mapped, so TelemetryStore serves it without copying it into the process.
+The cache is rebuilt whenever a source file changes.
+
+Cache layout (cache_dir):
+    CURRENT          Name of the complete cache version in use
+    <version>/       manifest.json plus telemetry.parquet or one <column>.npy per column
+
+A rebuild writes a new version directory and then replaces CURRENT with os.replace, so a
+reader (another worker, or a concurrent rebuild) never sees a half-written or deleted cache.
+The previous version is kept for readers that resolved it just before the switch.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import tempfile
+import importlib.util
+import numpy as np
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+CACHE_DIR = os.environ.get('CARBONSENSE_TELEMETRY_CACHE', os.path.join(DATA_DIR, '.telemetry_cache'))
+
+# Concatenation of the per-operation files written by demo_data_generator.py
+COMBINED_FILE = 'demo_all_operations.csv'
+
+SCHEMA_VERSION = 1
+
+# Cache versions kept on disk: the current one and the one before it
+KEEP_CACHE_VERSIONS = 2
+
+# Explicit dtypes: categories for repeated strings, float32 for values recorded with at most
+# two decimals, float64 for GPS coordinates (six decimals), small ints where ranges allow
+TELEMETRY_SCHEMA = {
+    'timestamp': 'datetime64[ns]',
+    'equipment_id': 'category',
+    'operator_id': 'category',
+    'latitude': 'float64',
+    'longitude': 'float64',
+    'speed_mph': 'float32',
+    'engine_load_pct': 'float32',
+    'engine_rpm': 'int16',
+    'fuel_rate_gph': 'float32',
+    'co2_rate_lbs_per_hour': 'float32',
+    'fuel_cost_per_hour': 'float32',
+    'operation_type': 'category',
+    'operation_name': 'category',
+    'implement_width_ft': 'int16',
+    'hydraulic_pressure_psi': 'int16',
+    'coolant_temp_f': 'int16',
+    'soil_type': 'category',
+    'terrain_type': 'category',
+    'field_acres': 'int32',
+    'pass_number': 'int16',
+    'acres_per_hour': 'float32',
+    'fuel_per_acre': 'float32',
+    'weather_factor': 'float32'
+}
+
+def discover_telemetry_files(data_dir=DATA_DIR):
+    """
+    Telemetry CSVs under data_dir, in a stable order
+
+    The combined demo_all_operations.csv is only used when there are no per-operation
+    files, since it repeats their rows.
+    """
+    files = sorted(glob.glob(os.path.join(data_dir, '*_telemetry.csv')))
+    combined = os.path.join(data_dir, COMBINED_FILE)
+    if not files and os.path.exists(combined):
+        files = [combined]
+    return files
+
+def _source_signature(files):
+    return [{'name': os.path.basename(path), 'size': os.path.getsize(path), 'mtime_ns': os.stat(path).st_mtime_ns}
+            for path in files]
+
+def cache_format():
+    """'parquet' when pyarrow is available, else 'npy'"""
+    return 'parquet' if importlib.util.find_spec('pyarrow') is not None else 'npy'
+
+def read_csv_files(files, schema=TELEMETRY_SCHEMA):
+    """Parse and merge telemetry CSVs with the schema applied"""
+    import pandas as pd
+
+    read_dtypes = {name: dtype for name, dtype in schema.items()
+                   if dtype in ('category', 'float32', 'float64')}
+    dates = [name for name, dtype in schema.items() if dtype.startswith('datetime')]
+    frames = []
+    for path in files:
+        header = pd.read_csv(path, nrows=0).columns
+        frames.append(pd.read_csv(path, dtype={k: v for k, v in read_dtypes.items() if k in header},
+                                  parse_dates=[name for name in dates if name in header]))
+    # Categories are unioned so the merged columns stay categorical
+    frame = pd.concat(frames, ignore_index=True)
+    for name, dtype in schema.items():
+        if name not in frame.columns:
+            continue
+        if dtype == 'category' and frame[name].dtype != 'category':
+            frame[name] = frame[name].astype('category')
+        elif dtype.startswith('int'):
+            values = frame[name]
+            info = np.iinfo(dtype)
+            # Columns with gaps or out-of-range values keep pandas' inferred dtype
+            if not values.isna().any() and values.between(info.min, info.max).all():
+                frame[name] = values.astype(dtype)
+    return frame
+
+def current_cache_path(cache_dir=CACHE_DIR):
+    """Directory of the cache version CURRENT points to, or None before the first write"""
+    try:
+        with open(os.path.join(cache_dir, 'CURRENT')) as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    return os.path.join(cache_dir, version) if version else None
+
+def _cache_valid(cache_path, files, fmt):
+    try:
+        with open(os.path.join(cache_path, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (OSError, TypeError, ValueError):
+        return None
+    if (manifest.get('schema_version') != SCHEMA_VERSION or manifest.get('format') != fmt
+            or manifest.get('sources') != _source_signature(files)):
+        return None
+    return manifest
+
+def _remove_old_versions(cache_dir, keep=KEEP_CACHE_VERSIONS):
+    versions = sorted(name for name in os.listdir(cache_dir)
+                      if name.startswith('v') and os.path.isdir(os.path.join(cache_dir, name)))
+    for name in versions[:-keep]:
+        # Files still memory-mapped elsewhere cannot be deleted on Windows; they go next time
+        shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+def write_cache(frame, files, cache_dir=CACHE_DIR, fmt=None):
+    """
+    Write the merged frame as a new cache version and point CURRENT at it
+
+    Returns:
+        str: Directory of the new version
+    """
+    fmt = fmt or cache_format()
+    os.makedirs(cache_dir, exist_ok=True)
+    version = f"v{time.time_ns():020d}-{os.getpid()}"
+    staging = os.path.join(cache_dir, version)
+    os.makedirs(staging)
+
+    columns = {}
+    if fmt == 'parquet':
+        frame.to_parquet(os.path.join(staging, 'telemetry.parquet'), index=False)
+    else:
+        for name in frame.columns:
+            series = frame[name]
+            if series.dtype == 'category':
+                np.save(os.path.join(staging, f"{name}.npy"), series.cat.codes.to_numpy())
+                columns[name] = {'kind': 'category', 'categories': series.cat.categories.tolist()}
+            else:
+                np.save(os.path.join(staging, f"{name}.npy"), series.to_numpy())
+                columns[name] = {'kind': 'datetime' if series.dtype.kind == 'M' else 'numeric'}
+
+    with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+        json.dump({'schema_version': SCHEMA_VERSION, 'format': fmt, 'rows': len(frame),
+                   'columns': columns, 'sources': _source_signature(files)}, f, indent=2)
+
+    fd, tmp_path = tempfile.mkstemp(prefix='.CURRENT.', suffix='.tmp', dir=cache_dir)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(cache_dir, 'CURRENT'))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _remove_old_versions(cache_dir)
+    return staging
+
+def _load_npy_columns(cache_path, manifest, columns):
+    names = columns or list(manifest['columns'])
+    arrays = {name: np.load(os.path.join(cache_path, f"{name}.npy"), mmap_mode='r') for name in names}
+    dictionaries = {name: manifest['columns'][name]['categories'] for name in names
+                    if manifest['columns'][name]['kind'] == 'category'}
+    return arrays, dictionaries
+
+def _cached_or_parsed(data_dir, cache_dir, use_cache):
+    """(cache version path, manifest, None) when a valid cache exists, else (None, None, freshly parsed frame)"""
+    files = discover_telemetry_files(data_dir)
+    if not files:
+        raise FileNotFoundError(f"No *_telemetry.csv files in {data_dir}")
+    fmt = cache_format()
+    if use_cache:
+        # Resolve CURRENT once: a rebuild in the meantime leaves this version in place
+        cache_path = current_cache_path(cache_dir)
+        manifest = _cache_valid(cache_path, files, fmt)
+        if manifest is not None:
+            return cache_path, manifest, None
+
+    frame = read_csv_files(files)
+    print(f"✅ Parsed {len(frame)} telemetry records from {len(files)} file(s)")
+    if use_cache:
+        try:
+            write_cache(frame, files, cache_dir, fmt)
+            print(f"💾 Telemetry cache written to {cache_dir} ({fmt})")
+        except (OSError, ImportError, ValueError) as e:
+            print(f"⚠️ Could not write telemetry cache: {e}")
+    return None, None, frame
+
+def load_telemetry_frame(data_dir=DATA_DIR, columns=None, cache_dir=CACHE_DIR, use_cache=True):
+    """
+    Merged telemetry as a pandas DataFrame with the schema dtypes
+
+    Args:
+        data_dir (str): Directory holding the telemetry CSVs
+        columns (list): Only load these columns (read from the cache without the others)
+        cache_dir (str): Columnar cache location
+        use_cache (bool): Read/write the cache; False always parses the CSVs
+
+    Returns:
+        pd.DataFrame: Telemetry records
+    """
+    import pandas as pd
+
+    cache_path, manifest, frame = _cached_or_parsed(data_dir, cache_dir, use_cache)
+    if frame is not None:
+        return frame[columns] if columns else frame
+    if manifest['format'] == 'parquet':
+        return pd.read_parquet(os.path.join(cache_path, 'telemetry.parquet'), columns=columns, memory_map=True)
+
+    arrays, dictionaries = _load_npy_columns(cache_path, manifest, columns)
+    return pd.DataFrame({
+        name: pd.Categorical.from_codes(data, dictionaries[name]) if name in dictionaries else data
+        for name, data in arrays.items()
+    })
+
+def load_telemetry_store(data_dir=DATA_DIR, columns=None, cache_dir=CACHE_DIR, use_cache=True):
+    """
+    Merged telemetry as a TelemetryStore
+
+    With the .npy cache the store adopts the memory-mapped columns, so loading costs neither
+    parsing nor a copy; pages are read on first access and shared between processes.
+    """
+    from telemetry_store import TelemetryStore
+
+    cache_path, manifest, frame = _cached_or_parsed(data_dir, cache_dir, use_cache)
+    if manifest is not None and manifest['format'] == 'npy':
+        arrays, dictionaries = _load_npy_columns(cache_path, manifest, columns)
+        return TelemetryStore.from_arrays(arrays, dictionaries)
+    if frame is None:
+        frame = load_telemetry_frame(data_dir, columns, cache_dir)
+    return TelemetryStore.from_frame(frame[columns] if columns else frame)
+
+if __name__ == "__main__":
+    store = load_telemetry_store(use_cache='--no-cache' not in sys.argv)
+    print(f"✅ {len(store)} records, {len(store.columns)} columns, {store.memory_usage() / 1e6:.1f} MB")
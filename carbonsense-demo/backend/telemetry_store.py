@@ -0,0 +1,320 @@
+"""
+CarbonSense AI - Columnar Telemetry Store
+Append-only in-memory telemetry, one growable numpy array per column
+
+Numeric columns keep their dtype (float32/int16 from the telemetry schema, float64/int64
+otherwise), repeated strings (equipment, operation, soil type, ...) are int32 codes into a
+per-column dictionary, and timestamps are datetime64[ns]. Appending a batch, reading the
+latest record and slicing a row range are O(batch), O(1) and zero-copy, where the pandas
+frame needed a full concat to append and a Series per iloc[i].to_dict().
+
+The .iloc / column / isnull adapters keep the DataFrame call sites working.
+"""
+
+import sys
+import threading
+import numpy as np
+
+# Columns stored as datetime64[ns]; ISO strings are parsed on append
+DATETIME_COLUMNS = ('timestamp',)
+
+INITIAL_CAPACITY = 1024
+
+def _batch_columns(records):
+    """Column name -> sequence of values for a DataFrame, dict of columns, list of dicts or one dict"""
+    if hasattr(records, 'columns'):
+        return {name: records[name].to_numpy() for name in records.columns}, len(records)
+    if isinstance(records, dict):
+        if not records:
+            return {}, 0
+        values = list(records.values())
+        if values and isinstance(values[0], (list, tuple, np.ndarray)):
+            return dict(records), len(values[0])
+        records = [records]
+    records = list(records)
+    names = {}
+    for record in records:
+        names.update(dict.fromkeys(record))
+    return {name: [record.get(name) for record in records] for name in names}, len(records)
+
+def _kind_of(name, values):
+    """Storage kind and dtype for a new column: ('numeric', dtype), ('datetime', M8[ns]) or ('category', int32)"""
+    if name in DATETIME_COLUMNS:
+        return 'datetime', np.dtype('datetime64[ns]')
+    array = np.asarray(values)
+    if array.dtype.kind in 'iuf':
+        return 'numeric', array.dtype
+    if array.dtype.kind == 'b':
+        return 'numeric', np.dtype(np.int64)
+    if array.dtype.kind == 'M':
+        return 'datetime', np.dtype('datetime64[ns]')
+    present = [value for value in array if value is not None and value == value]
+    if present and all(isinstance(value, (int, float, np.number)) for value in present):
+        return 'numeric', np.dtype(np.float64)
+    return 'category', np.dtype(np.int32)
+
+class _Column:
+    """One growable column; rows [0, size) of `data` are valid"""
+
+    def __init__(self, kind, dtype, capacity, size=0, data=None, dictionary=None):
+        if kind == 'numeric' and dtype.kind in 'iu' and size and data is None:
+            # Integers cannot mark the missing values of earlier rows
+            dtype = np.dtype(np.float64)
+        self.kind = kind
+        self.dtype = dtype
+        if data is None:
+            data = np.empty(capacity, dtype=dtype)
+            data[:size] = self.missing
+        self.data = data
+        self.dictionary = list(dictionary or [])
+        self.codes = {label: code for code, label in enumerate(self.dictionary)}
+
+    @property
+    def missing(self):
+        if self.kind == 'category':
+            return -1
+        if self.kind == 'datetime':
+            return np.datetime64('NaT')
+        return np.nan if self.dtype.kind == 'f' else 0
+
+    def encode(self, values, n_rows):
+        """Values for this column's storage; returns None when an integer column has to widen to float"""
+        if values is None:
+            if self.kind == 'numeric' and self.dtype.kind in 'iu':
+                return None
+            return np.full(n_rows, self.missing, dtype=self.dtype)
+        if self.kind == 'category':
+            codes = np.empty(n_rows, dtype=np.int32)
+            for i, value in enumerate(values):
+                if value is None or value != value:
+                    codes[i] = -1
+                    continue
+                code = self.codes.get(value)
+                if code is None:
+                    code = self.codes[value] = len(self.dictionary)
+                    self.dictionary.append(value)
+                codes[i] = code
+            return codes
+        if self.kind == 'datetime':
+            return np.asarray(values, dtype='datetime64[ns]')
+        array = np.asarray(values)
+        if array.dtype.kind not in 'iufb':
+            array = np.asarray(values, dtype=np.float64)
+        if self.dtype.kind in 'iu' and array.dtype.kind == 'f':
+            return None
+        return array.astype(self.dtype, copy=False)
+
+    def decode(self, data):
+        if self.kind != 'category':
+            return data
+        labels = np.array(self.dictionary + [None], dtype=object)
+        return labels[data]  # code -1 picks the trailing None
+
+    def to_python(self, data):
+        """Row range as a list of JSON-friendly Python values"""
+        if self.kind == 'datetime':
+            return [None if text == 'NaT' else text for text in np.datetime_as_string(data, unit='us').tolist()]
+        if self.dtype == np.float32:
+            # Shortest repr, so a stored 3.6 reads back as 3.6 rather than 3.5999999046325684
+            return [float(text) for text in data.astype(str).tolist()]
+        return self.decode(data).tolist()
+
+    def value(self, i):
+        return self.to_python(self.data[i:i + 1])[0]
+
+class TelemetryStore:
+    """
+    Columnar, append-only telemetry with O(1) latest-record access
+
+    One writer appends while any number of readers work on snapshots: a reader sees either
+    the rows before or after an append, never half a batch, without taking a lock.
+    """
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self._columns = {}
+        self._capacity = capacity
+        self._size = 0
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, frame):
+        store = cls(capacity=max(INITIAL_CAPACITY, len(frame)))
+        store.append(frame)
+        return store
+
+    @classmethod
+    def from_arrays(cls, arrays, dictionaries=None):
+        """
+        Store that adopts existing column arrays without copying them
+
+        Used to serve memory-mapped cache files directly; the first append copies the
+        columns into growable buffers.
+
+        Args:
+            arrays (dict): Column name -> array (category columns as int codes)
+            dictionaries (dict): Category column name -> labels indexed by code
+        """
+        dictionaries = dictionaries or {}
+        store = cls(capacity=0)
+        for name, data in arrays.items():
+            if name in dictionaries:
+                # Codes widen to int32 when the first append copies the column
+                kind, dtype = 'category', np.dtype(np.int32)
+            else:
+                kind, dtype = _kind_of(name, data[:0])
+            store._columns[name] = _Column(kind, dtype, len(data), data=data, dictionary=dictionaries.get(name))
+        store._capacity = store._size = len(next(iter(arrays.values()))) if arrays else 0
+        return store
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def append(self, records):
+        """
+        Append a batch of telemetry records
+
+        Args:
+            records: DataFrame, dict of column arrays, list of record dicts or one record dict
+
+        Returns:
+            int: Number of rows appended
+        """
+        batch, n_rows = _batch_columns(records)
+        if n_rows == 0:
+            return 0
+
+        with self._write_lock:
+            size = self._size
+            if size + n_rows > self._capacity:
+                self._grow(size + n_rows)
+            for name, values in batch.items():
+                if name not in self._columns:
+                    self._columns[name] = _Column(*_kind_of(name, values), self._capacity, size)
+            for name, column in self._columns.items():
+                encoded = column.encode(batch.get(name), n_rows)
+                if encoded is None:
+                    # Missing or non-integer values in an integer column: widen it to float
+                    self._widen(name, size)
+                    column = self._columns[name]
+                    encoded = column.encode(batch.get(name), n_rows)
+                column.data[size:size + n_rows] = encoded
+            # Publishing the new size makes the rows visible to readers
+            self._size = size + n_rows
+        return n_rows
+
+    def _grow(self, needed):
+        capacity = max(self._capacity, INITIAL_CAPACITY)
+        while capacity < needed:
+            capacity *= 2
+        for column in self._columns.values():
+            # Readers holding the old array keep a valid view of the rows they know about
+            data = np.empty(capacity, dtype=column.dtype)
+            data[:self._size] = column.data[:self._size]
+            column.data = data
+        self._capacity = capacity
+
+    def _widen(self, name, size):
+        old = self._columns[name]
+        column = _Column('numeric', np.dtype(np.float64), self._capacity)
+        column.data[:size] = old.data[:size]
+        self._columns[name] = column
+
+    def record(self, index):
+        """One row as a dict of Python values (negative indexes count from the end)"""
+        size = self._size
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError(f"record {index} out of range for {size} rows")
+        return {name: column.value(index) for name, column in list(self._columns.items())}
+
+    def take(self, name, rows):
+        """Python values of one column at the given row indexes"""
+        column = self._columns[name]
+        return column.to_python(column.data[:self._size][rows])
+
+    def latest(self):
+        """Most recent record, or None when the store is empty"""
+        return self.record(-1) if self._size else None
+
+    def column(self, name, start=0, stop=None, decode=False):
+        """
+        Zero-copy view of one column over a row range
+
+        Args:
+            name (str): Column name
+            start, stop (int): Row range (stop defaults to the current size)
+            decode (bool): Return category labels instead of integer codes (copies)
+        """
+        size = self._size
+        column = self._columns[name]
+        data = column.data[slice(start, size if stop is None else min(stop, size))]
+        return column.decode(data) if decode else data
+
+    def slice(self, start=0, stop=None, decode=False):
+        """Zero-copy views of every column over a row range (categories as codes unless decoded)"""
+        return {name: self.column(name, start, stop, decode) for name in self.columns}
+
+    def dictionary(self, name):
+        """Labels of a category column, indexed by code"""
+        return list(self._columns[name].dictionary)
+
+    def records(self, start=0, stop=None):
+        """Row range as a list of record dicts with Python values (timestamps as ISO strings)"""
+        columns = {name: self._columns[name].to_python(self.column(name, start, stop)) for name in self.columns}
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        return [{name: values[i] for name, values in columns.items()} for i in range(n_rows)]
+
+    def to_frame(self, start=0, stop=None):
+        """Row range as a pandas DataFrame with decoded categories (copies)"""
+        import pandas as pd
+        return pd.DataFrame({name: self.column(name, start, stop, decode=True) for name in self.columns})
+
+    def memory_usage(self):
+        """Bytes held by the valid rows, like DataFrame.memory_usage(deep=True).sum()"""
+        size = self._size
+        total = 0
+        for column in self._columns.values():
+            total += column.data[:size].nbytes
+            if column.kind == 'category':
+                total += sum(sys.getsizeof(label) for label in column.dictionary)
+        return total
+
+    # DataFrame adapters for existing call sites
+
+    @property
+    def iloc(self):
+        return _ILocAdapter(self)
+
+    def __getitem__(self, name):
+        import pandas as pd
+        return pd.Series(self.column(name, decode=True), name=name)
+
+    def sample_records(self, n):
+        """n random records as dicts of Python values"""
+        return [self.record(int(i)) for i in np.sort(np.random.choice(self._size, n, replace=False))]
+
+    def isnull(self):
+        return self.to_frame().isnull()
+
+class _ILocAdapter:
+    """store.iloc[i] -> row with .to_dict(); store.iloc[a:b] -> DataFrame"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                raise ValueError("TelemetryStore.iloc only supports contiguous slices")
+            start, stop, _ = key.indices(len(self.store))
+            return self.store.to_frame(start, stop)
+        return _Row(self.store.record(int(key)))
+
+class _Row(dict):
+    def to_dict(self):
+        return dict(self)
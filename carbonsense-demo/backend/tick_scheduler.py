@@ -0,0 +1,175 @@
+"""
+CarbonSense AI - Tick Scheduler
+One loop that drives the periodic ticks of every telemetry stream
+
+Ticks are kept in a heap ordered by due time, so the loop sleeps until the next due tick no
+matter how many streams exist: scheduling, cancelling and dispatching cost O(log n). Each
+stream's first tick is placed at a random phase within its interval and every later tick
+gets a little jitter, so a fleet does not fire in bursts. The tick work (building frames,
+running the optimizer) runs on a worker pool; the loop only measures how late each tick was
+dispatched (lag) and never waits for the work itself.
+"""
+
+import os
+import time
+import heapq
+import random
+import threading
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+DEFAULT_WORKERS = int(os.environ.get('CARBONSENSE_STREAM_WORKERS', min(4, os.cpu_count() or 1)))
+
+class _Entry:
+    def __init__(self, key, callback, interval, due):
+        self.key = key
+        self.callback = callback
+        self.interval = interval
+        self.nominal = due
+        self.running = False
+
+class TickScheduler:
+    """
+    Periodic ticks for many keys on a single timer loop
+
+    Args:
+        interval (float): Default seconds between ticks of one key
+        jitter (float): Random offset of each tick, as a fraction of the interval
+        workers (int): Worker threads running the callbacks; 0 runs them on the loop thread
+        late_after (float): Lag (seconds) above which a tick counts as late
+        resolution (float): Ticks due within this many seconds are dispatched together, so a
+            busy loop wakes up once per slot instead of once per tick
+        lag_window (int): Number of recent ticks the lag percentiles cover
+    """
+
+    def __init__(self, interval=2.0, jitter=0.05, workers=DEFAULT_WORKERS, late_after=None, resolution=0.005,
+                 lag_window=10000, name='tick-scheduler'):
+        self.interval = interval
+        self.jitter = jitter
+        self.resolution = resolution
+        self.late_after = interval * 0.1 if late_after is None else late_after
+        self.name = name
+        self._entries = {}
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name) if workers else None
+
+        self._lags = deque(maxlen=lag_window)
+        self.dispatched = 0
+        self.late = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.max_lag = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def schedule(self, key, callback, interval=None, first_delay=None):
+        """
+        Call callback() every interval seconds until cancel(key); replaces an existing key
+
+        Args:
+            first_delay (float): Seconds until the first tick (default: random phase in the interval)
+        """
+        interval = interval or self.interval
+        delay = random.uniform(0, interval) if first_delay is None else first_delay
+        with self._condition:
+            entry = _Entry(key, callback, interval, time.monotonic() + delay)
+            self._entries[key] = entry
+            heapq.heappush(self._heap, (entry.nominal, next(self._sequence), entry))
+            if self._thread is None:
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def cancel(self, key):
+        """Stop ticking key; a tick already running finishes"""
+        with self._condition:
+            # The heap entry is dropped lazily when it comes due
+            return self._entries.pop(key, None) is not None
+
+    def stop(self):
+        """Stop the loop and the workers (for tests and shutdown)"""
+        with self._condition:
+            self._stopped = True
+            self._entries.clear()
+            self._heap.clear()
+            self._condition.notify()
+        if self._pool:
+            self._pool.shutdown(wait=False)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped and not self._heap:
+                    self._condition.wait()
+                if self._stopped:
+                    self._thread = None
+                    return
+                due, _, entry = self._heap[0]
+                now = time.monotonic()
+                if due > now + self.resolution:
+                    self._condition.wait(due - now)
+                    continue
+                heapq.heappop(self._heap)
+                if self._entries.get(entry.key) is not entry:
+                    continue  # cancelled or replaced
+                self._dispatch(entry, due, now)
+
+    def _dispatch(self, entry, due, now):
+        lag = max(0.0, now - due)
+        self._lags.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        self.late += lag > self.late_after
+
+        if entry.running:
+            # The previous tick of this key is still being worked on: drop this one
+            self.overruns += 1
+        else:
+            entry.running = True
+            self.dispatched += 1
+            if self._pool:
+                self._pool.submit(self._execute, entry)
+            else:
+                self._execute(entry)
+
+        entry.nominal += entry.interval
+        if entry.nominal < now:
+            # Fell more than a whole interval behind: skip the missed ticks instead of bursting
+            missed = int((now - entry.nominal) // entry.interval) + 1
+            self.skipped += missed
+            entry.nominal += missed * entry.interval
+        next_due = entry.nominal + random.uniform(-self.jitter, self.jitter) * entry.interval
+        heapq.heappush(self._heap, (next_due, next(self._sequence), entry))
+
+    def _execute(self, entry):
+        try:
+            entry.callback()
+        except Exception as e:
+            print(f"⚠️ Tick for {entry.key} failed: {e}")
+        finally:
+            entry.running = False
+
+    def stats(self):
+        """Tick counts and dispatch lag (ms) over the recent window"""
+        lags = np.array(self._lags) * 1000 if self._lags else np.zeros(1)
+        return {
+            'scheduled': len(self._entries),
+            'dispatched': self.dispatched,
+            'late': self.late,
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+            'lag_ms': {'mean': round(float(lags.mean()), 3),
+                       'p50': round(float(np.percentile(lags, 50)), 3),
+                       'p99': round(float(np.percentile(lags, 99)), 3),
+                       'max': round(self.max_lag * 1000, 3)}
+        }
@@ -0,0 +1,159 @@
+"""
+CarbonSense AI - Startup Warm-up
+Runs heavy backend initialization in stages, optionally in the background, and tracks readiness
+"""
+
+import os
+import threading
+import time
+import traceback
+from contextlib import nullcontext
+
+def process_start_time():
+    """Wall-clock time the current process was started (falls back to now off Linux)"""
+    try:
+        with open('/proc/self/stat') as f:
+            # Field 22 is the start time in clock ticks since boot; the command name may contain spaces
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+class WarmupManager:
+    """
+    Runs named initialization stages in order and reports their progress
+
+    Required stages gate readiness. Optional stages (diagnostics, verification)
+    run afterwards and never hold back traffic. With a StartupProfiler attached, every
+    stage is recorded as a phase and the profile is written once all stages finish.
+    """
+
+    def __init__(self, mode='eager', retry_after_seconds=5, profiler=None):
+        self.mode = mode
+        self.retry_after_seconds = retry_after_seconds
+        self.profiler = profiler
+        self.process_started_at = process_start_time()
+        self.warmup_started_at = None
+        self.ready_at = None
+        self.first_byte_at = None
+        self._stages = []
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._ready_callbacks = []
+        self._thread = None
+
+    def add_stage(self, name, func, required=True):
+        """Register a stage; stages run in registration order"""
+        self._stages.append({
+            'name': name,
+            'func': func,
+            'required': required,
+            'state': 'pending',
+            'duration_s': None,
+            'error': None
+        })
+
+    def start(self, background=False):
+        """Run all stages, on a daemon thread when background is True"""
+        if background:
+            self._thread = threading.Thread(target=self.run, name='carbonsense-warmup', daemon=True)
+            self._thread.start()
+        else:
+            self.run()
+
+    def run(self):
+        """Execute every stage, marking the service ready once the required ones finish"""
+        self.warmup_started_at = time.time()
+        stages = sorted(self._stages, key=lambda stage: not stage['required'])
+
+        for stage in stages:
+            if not stage['required'] and not self._ready.is_set():
+                self._mark_ready()
+
+            with self._lock:
+                stage['state'] = 'running'
+            started = time.perf_counter()
+            try:
+                with self.profiler.phase(stage['name']) if self.profiler else nullcontext():
+                    stage['func']()
+                state, error = 'done', None
+            except Exception as e:
+                # A failed stage leaves the service in degraded (fallback) mode, as eager startup does
+                print(f"⚠️ Warm-up stage '{stage['name']}' failed: {e}")
+                traceback.print_exc()
+                state, error = 'failed', str(e)
+            with self._lock:
+                stage['state'] = state
+                stage['error'] = error
+                stage['duration_s'] = round(time.perf_counter() - started, 3)
+            print(f"{'✅' if state == 'done' else '⚠️'} Warm-up stage '{stage['name']}' {state} "
+                  f"in {stage['duration_s']:.2f}s")
+
+        if not self._ready.is_set():
+            self._mark_ready()
+        if self.profiler:
+            self.profiler.write(extra={'warmup': self.progress()})
+
+    def on_ready(self, callback):
+        """Call callback once the required stages have finished (right away when they already have)"""
+        with self._lock:
+            if not self._ready.is_set():
+                self._ready_callbacks.append(callback)
+                return
+        callback()
+
+    def _mark_ready(self):
+        self.ready_at = time.time()
+        self._ready.set()
+        if self.profiler:
+            self.profiler.mark('ready')
+        print(f"✅ CarbonSense AI ready {self.ready_at - self.process_started_at:.2f}s after process start")
+        with self._lock:
+            callbacks, self._ready_callbacks = self._ready_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️ Ready callback failed: {e}")
+
+    @property
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def wait_until_ready(self, timeout=None):
+        """Block until the required stages have finished"""
+        return self._ready.wait(timeout)
+
+    def record_first_byte(self):
+        """Remember when the first response left the server (time-to-first-byte)"""
+        if self.first_byte_at is None:
+            with self._lock:
+                if self.first_byte_at is None:
+                    self.first_byte_at = time.time()
+                    print(f"⏱️ First response served {self.first_byte_at - self.process_started_at:.2f}s "
+                          f"after process start")
+
+    def _since_start(self, timestamp):
+        return round(timestamp - self.process_started_at, 3) if timestamp else None
+
+    def progress(self):
+        """Snapshot of stage states for the readiness endpoints"""
+        with self._lock:
+            stages = [
+                {key: stage[key] for key in ('name', 'state', 'required', 'duration_s', 'error')}
+                for stage in self._stages
+            ]
+        finished = sum(stage['state'] in ('done', 'failed') for stage in stages)
+        return {
+            'ready': self.is_ready,
+            'mode': self.mode,
+            'stages_completed': finished,
+            'stages_total': len(stages),
+            'current_stage': next((s['name'] for s in stages if s['state'] == 'running'), None),
+            'stages': stages,
+            'uptime_s': round(time.time() - self.process_started_at, 3),
+            'time_to_ready_s': self._since_start(self.ready_at),
+            'time_to_first_byte_s': self._since_start(self.first_byte_at)
+        }
@@ -0,0 +1,84 @@
+"""
+CarbonSense AI - Backpressure Benchmark
+Server memory and queue depth with slow Socket.IO clients: bounded latest-value delivery vs unbounded queues
+
+Every client subscribes to the same streams. Fast clients read their queue after every tick;
+slow clients (a dashboard on a bad cellular link) only every --slow-every ticks, or never
+with --slow-every 0. Queue depth is the number of packets waiting for a client; memory is
+what tracemalloc sees allocated by the run (queued packets and held frames).
+
+Usage: python benchmarks/bench_backpressure.py [--clients 1000] [--slow 0.1] [--ticks 60]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+from datetime import datetime
+from flask import Flask
+from flask_socketio import SocketIO
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.insert(0, backend_dir)
+
+from streaming import StreamManager
+from outbound import OutboundQueues
+from telemetry_loader import load_telemetry_store
+
+def build_frame(record):
+    record['timestamp'] = datetime.now().isoformat()
+    return record
+
+def run(store, args, max_queued):
+    app = Flask(__name__)
+    socketio = SocketIO(app)
+    manager = StreamManager(socketio, lambda: store, build_frame, autostart=False)
+    clients = [socketio.test_client(app) for _ in range(args.clients)]
+    by_sid = {socketio.server.manager.sid_from_eio_sid(client.eio_sid, '/'): client for client in clients}
+    manager.outbound = OutboundQueues(socketio, max_queued=max_queued, depth=lambda sid: len(by_sid[sid].queue))
+    equipment_ids = manager.equipment_ids()[:args.streams]
+    slow = set(clients[:int(args.clients * args.slow)])
+    for sid in by_sid:
+        manager.subscribe(sid, equipment_ids)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started, memory, received = time.perf_counter(), [], 0
+    for tick in range(1, args.ticks + 1):
+        manager.tick()
+        for client in clients:
+            if client not in slow or (args.slow_every and tick % args.slow_every == 0):
+                received += len(client.get_received())
+        memory.append(tracemalloc.get_traced_memory()[0] - baseline)
+    elapsed = time.perf_counter() - started
+    tracemalloc.stop()
+
+    backpressure = manager.outbound.stats(by_sid)
+    return {'ms_per_tick': elapsed / args.ticks * 1000,
+            'max_depth': backpressure['queue_depth']['max_seen'],
+            'memory_mb': max(memory) / 1024 / 1024,
+            'memory_end_mb': memory[-1] / 1024 / 1024,
+            'dropped': backpressure['dropped_frames'],
+            'received': received}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure memory and queue depth with slow streaming clients")
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--slow', type=float, default=0.1, help="Fraction of slow clients")
+    parser.add_argument('--slow-every', type=int, default=20, help="Ticks between reads of a slow client (0: never)")
+    parser.add_argument('--streams', type=int, default=2)
+    parser.add_argument('--ticks', type=int, default=60)
+    parser.add_argument('--max-queued', type=int, default=3)
+    args = parser.parse_args()
+
+    store = load_telemetry_store()
+    variants = [('backpressure', args.max_queued), ('unbounded', float('inf'))]
+    reads = f"every {args.slow_every} ticks" if args.slow_every else "never"
+    print(f"🧪 {args.clients} clients ({args.slow:.0%} slow, reading {reads}), "
+          f"{min(args.streams, len(store.dictionary('equipment_id')))} stream(s), {args.ticks} ticks")
+    print(f"{'variant':<14}{'ms/tick':>9}{'max depth':>11}{'peak MB':>9}{'end MB':>8}{'dropped':>9}{'received':>10}")
+    for name, max_queued in variants:
+        result = run(store, args, max_queued)
+        print(f"{name:<14}{result['ms_per_tick']:>9.1f}{result['max_depth']:>11}{result['memory_mb']:>9.2f}"
+              f"{result['memory_end_mb']:>8.2f}{result['dropped']:>9}{result['received']:>10}")
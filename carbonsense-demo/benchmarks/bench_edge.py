@@ -0,0 +1,123 @@
+"""
+CarbonSense AI - In-Cab Edge Benchmark
+Import time, memory footprint and per-call latency of carbonsense_edge vs the server optimizer
+
+Each variant is measured in a fresh interpreter so import time and memory are not hidden by
+modules another variant already loaded.
+
+Usage: python benchmarks/bench_edge.py [--calls 200] [--bundle ai_models/compact/compressed]
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ai_models_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai_models'))
+data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+SAMPLE = {
+    'speed_mph': 8.5, 'engine_load_pct': 78, 'implement_width_ft': 30, 'field_acres': 160,
+    'weather_factor': 1.05, 'operation_type': 'cultivator', 'soil_type': 'loam', 'terrain_type': 'flat'
+}
+
+# Runs inside the child interpreter; {variant}, {bundle}, {calls} and {sample} are filled in below
+CHILD = r'''
+import sys, time, json, warnings
+warnings.filterwarnings('ignore')
+sys.path.insert(0, {ai_models_dir!r})
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        values = dict(line.split(':', 1) for line in f)
+    return int(values['VmRSS'].split()[0]) / 1024, int(values['VmHWM'].split()[0]) / 1024
+
+sample = json.loads({sample!r})
+start = time.perf_counter()
+if {variant!r} == 'edge':
+    from carbonsense_edge import EdgeOptimizer
+    imported = time.perf_counter()
+    optimizer = EdgeOptimizer.load({bundle!r})
+    optimize, recommend = optimizer.optimize_speed_for_operation, optimizer.real_time_recommendations
+else:
+    from carbon_optimizer import CarbonOptimizer
+    imported = time.perf_counter()
+    optimizer = CarbonOptimizer()
+    method = 'grid' if {variant!r} == 'server-grid' else 'slsqp'
+    optimize = optimizer.optimize_speed_grid if method == 'grid' else optimizer.optimize_speed_for_operation
+    recommend = lambda params: optimizer.real_time_recommendations(params, method=method)
+loaded = time.perf_counter()
+optimize(sample)
+first_call = time.perf_counter()
+
+calls = {calls} if {variant!r} != 'server-slsqp' else max(1, {calls} // 100)
+timings = []
+for i in range(calls):
+    params = dict(sample, speed_mph=5 + (i % 60) / 10)
+    t = time.perf_counter()
+    optimize(params)
+    recommend(params)
+    timings.append(time.perf_counter() - t)
+timings.sort()
+
+rss, peak = rss_mb()
+print(json.dumps({{
+    'import_s': imported - start,
+    'load_s': loaded - imported,
+    'first_call_s': first_call - loaded,
+    'median_ms': timings[len(timings) // 2] * 1e3,
+    'p95_ms': timings[int(len(timings) * 0.95)] * 1e3,
+    'rss_mb': rss,
+    'peak_mb': peak,
+    'heavy_modules': sorted(m for m in ('pandas', 'sklearn', 'scipy') if m in sys.modules)
+}}))
+'''
+
+def run_variant(variant, bundle, calls):
+    code = CHILD.format(ai_models_dir=ai_models_dir, variant=variant, bundle=bundle,
+                        calls=calls, sample=json.dumps(SAMPLE))
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def parity(bundle, n_rows=30):
+    """Demo telemetry rows where edge and server grid results are identical / pick the same speed"""
+    import warnings
+    warnings.filterwarnings('ignore')
+    import pandas as pd
+    sys.path.insert(0, ai_models_dir)
+    from carbon_optimizer import CarbonOptimizer
+    from carbonsense_edge import EdgeOptimizer
+
+    server, edge = CarbonOptimizer(), EdgeOptimizer.load(bundle)
+    rows = []
+    for operation in ('cultivator', 'planter', 'sprayer'):
+        path = os.path.join(data_dir, f"demo_{operation}_telemetry.csv")
+        if os.path.exists(path):
+            rows += pd.read_csv(path).sample(n_rows, random_state=0).to_dict('records')
+    pairs = [(server.optimize_speed_grid(row), edge.optimize_speed_for_operation(row)) for row in rows]
+    same = sum(expected == result for expected, result in pairs)
+    same_speed = sum(expected['optimal_speed'] == result['optimal_speed'] for expected, result in pairs)
+    return same, same_speed, len(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the numpy-only in-cab optimizer against the server")
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--bundle', default=os.path.join(ai_models_dir, 'compact', 'carbonsense'))
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.bundle, 'bundle.json')):
+        sys.exit("❌ No compact export found, run: python ai_models/compact_forest.py")
+
+    print(f"🧪 In-cab optimizer benchmark ({os.path.relpath(args.bundle)})")
+    print(f"{'variant':<14}{'import s':>10}{'load s':>9}{'1st call s':>12}{'median ms':>11}{'p95 ms':>9}"
+          f"{'RSS MB':>9}{'peak MB':>9}  heavy imports")
+    for variant in ('edge', 'server-grid', 'server-slsqp'):
+        r = run_variant(variant, args.bundle, args.calls)
+        print(f"{variant:<14}{r['import_s']:>10.3f}{r['load_s']:>9.3f}{r['first_call_s']:>12.3f}"
+              f"{r['median_ms']:>11.2f}{r['p95_ms']:>9.2f}{r['rss_mb']:>9.1f}{r['peak_mb']:>9.1f}  "
+              f"{', '.join(r['heavy_modules']) or 'none'}")
+
+    same, same_speed, total = parity(args.bundle)
+    print(f"✅ Edge matches server grid optimizer on {same}/{total} demo telemetry rows "
+          f"(same optimal speed on {same_speed}/{total})")
@@ -0,0 +1,72 @@
+"""
+CarbonSense AI - Telemetry Ingestion Benchmark
+Records/s through the /api/telemetry pipeline: decode + validate, store append, aggregates
+
+Runs the same steps as POST /api/telemetry (without the HTTP layer) on demo telemetry
+repeated up to --rows records, for NDJSON and the binary columnar payload.
+
+Usage: python benchmarks/bench_ingest.py [--rows 100000] [--batch 10000]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import pandas as pd
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+sys.path.insert(0, backend_dir)
+
+from telemetry_codec import decode_payload, encode_binary, NDJSON_CONTENT_TYPE, BINARY_CONTENT_TYPE
+from telemetry_store import TelemetryStore
+from aggregates import RunningAggregates
+
+def load_rows(n_rows):
+    frame = pd.concat([pd.read_csv(os.path.join(data_dir, f"demo_{operation}_telemetry.csv"))
+                       for operation in ('cultivator', 'planter', 'sprayer')], ignore_index=True)
+    repeats = -(-n_rows // len(frame))
+    return pd.concat([frame] * repeats, ignore_index=True).iloc[:n_rows]
+
+def encode_batches(frame, batch_size, payload):
+    batches = []
+    for start in range(0, len(frame), batch_size):
+        chunk = frame.iloc[start:start + batch_size]
+        if payload == 'ndjson':
+            batches.append('\n'.join(json.dumps(record) for record in chunk.to_dict('records')).encode())
+        else:
+            batches.append(encode_binary({name: chunk[name].to_numpy() for name in chunk.columns}))
+    return batches
+
+def ingest(batches, content_type):
+    store, aggregates = TelemetryStore(), RunningAggregates()
+    timings = {'decode': 0.0, 'store': 0.0, 'aggregates': 0.0}
+    for body in batches:
+        started = time.perf_counter()
+        columns, _ = decode_payload(body, content_type)
+        decoded = time.perf_counter()
+        store.append(columns)
+        appended = time.perf_counter()
+        aggregates.add_records(columns)
+        timings['decode'] += decoded - started
+        timings['store'] += appended - decoded
+        timings['aggregates'] += time.perf_counter() - appended
+    return store, timings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure telemetry ingestion throughput")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--batch', type=int, default=10000)
+    args = parser.parse_args()
+
+    frame = load_rows(args.rows)
+    print(f"🧪 Telemetry ingestion ({args.rows} records, batches of {args.batch}, one core)")
+    print(f"{'payload':<9}{'MB':>8}{'decode s':>10}{'store s':>9}{'aggr s':>8}{'records/s':>12}")
+    for payload, content_type in (('ndjson', NDJSON_CONTENT_TYPE), ('binary', BINARY_CONTENT_TYPE)):
+        batches = encode_batches(frame, args.batch, payload)
+        store, timings = ingest(batches, content_type)
+        total = sum(timings.values())
+        assert len(store) == args.rows
+        print(f"{payload:<9}{sum(map(len, batches)) / 1e6:>8.1f}{timings['decode']:>10.3f}{timings['store']:>9.3f}"
+              f"{timings['aggregates']:>8.3f}{args.rows / total:>12,.0f}")
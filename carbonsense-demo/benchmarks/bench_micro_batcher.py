@@ -0,0 +1,80 @@
+"""
+CarbonSense AI - Optimize Micro-Batching Benchmark
+Throughput and tail latency of per-request grid optimization vs the micro-batcher
+
+Each of --concurrency closed-loop callers sends --requests optimize calls back to back, like
+request threads serving /api/optimize?method=grid. The per-request path calls
+optimize_speed_grid on the caller's thread; the batched path submits to a MicroBatcher over
+optimize_speed_batch, so callers that arrive together share one vectorized pass.
+
+Usage: python benchmarks/bench_micro_batcher.py [--requests 40] [--concurrency 1,4,16,64] [--wait-ms 2]
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+import warnings
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+ai_models_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai_models'))
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, ai_models_dir)
+warnings.filterwarnings('ignore')
+
+from micro_batcher import MicroBatcher
+from carbon_optimizer import CarbonOptimizer
+
+SAMPLE = {
+    'speed_mph': 8.5, 'engine_load_pct': 78, 'implement_width_ft': 30, 'field_acres': 160,
+    'weather_factor': 1.05, 'operation_type': 'cultivator', 'soil_type': 'loam', 'terrain_type': 'flat'
+}
+
+def run_callers(optimize, concurrency, requests):
+    """Closed loop: every caller sends its next request when the previous one returns"""
+    latencies = [[] for _ in range(concurrency)]
+
+    def caller(index):
+        for i in range(requests):
+            params = dict(SAMPLE, speed_mph=5 + (index * requests + i) % 60 / 10)
+            started = time.perf_counter()
+            optimize(params)
+            latencies[index].append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    timings = np.concatenate(latencies) * 1000
+    return len(timings) / elapsed, np.percentile(timings, 50), np.percentile(timings, 99)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-request and micro-batched optimization")
+    parser.add_argument('--requests', type=int, default=40, help="Requests per caller")
+    parser.add_argument('--concurrency', default='1,4,16,64')
+    parser.add_argument('--wait-ms', type=float, default=2, help="Micro-batcher collection window")
+    parser.add_argument('--max-items', type=int, default=64)
+    args = parser.parse_args()
+
+    optimizer = CarbonOptimizer()
+    optimizer.optimize_speed_grid(SAMPLE)
+    batcher = MicroBatcher(optimizer.optimize_speed_batch, max_wait_ms=args.wait_ms, max_items=args.max_items)
+    batcher(SAMPLE)
+
+    print(f"🧪 Optimize micro-batching ({args.requests} requests per caller, "
+          f"{args.wait_ms} ms window, up to {args.max_items} per batch)")
+    print(f"{'callers':>8}{'path':>10}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'mean batch':>12}")
+    for concurrency in map(int, args.concurrency.split(',')):
+        rate, p50, p99 = run_callers(optimizer.optimize_speed_grid, concurrency, args.requests)
+        print(f"{concurrency:>8}{'single':>10}{rate:>9.0f}{p50:>9.1f}{p99:>9.1f}{'':>12}")
+        before = batcher.stats()
+        rate_b, p50_b, p99_b = run_callers(batcher, concurrency, args.requests)
+        after = batcher.stats()
+        mean_batch = (after['items'] - before['items']) / max(1, after['batches'] - before['batches'])
+        print(f"{concurrency:>8}{'batched':>10}{rate_b:>9.0f}{p50_b:>9.1f}{p99_b:>9.1f}{mean_batch:>12.1f}"
+              f"   {rate_b / rate:.1f}x throughput")
@@ -0,0 +1,97 @@
+"""
+CarbonSense AI - Payload Protocol Benchmark
+Bytes per client per minute and server serialization CPU: full frames vs snapshot + deltas
+
+Frames are built like build_telemetry_frame in app.py (replayed record, live variation,
+optimizations and recommendations from the server optimizer's grid search) at the streaming
+rate of one frame every 2 seconds. Serialization is timed as the server does it: encode the
+message, then json.dumps it once per emit.
+
+Usage: python benchmarks/bench_payload_protocol.py [--frames 300]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import warnings
+from datetime import datetime
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+ai_models_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai_models'))
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, ai_models_dir)
+warnings.filterwarnings('ignore')
+
+from payload_protocol import StreamEncoder, ClientChannel, apply_message, flatten
+from telemetry_loader import load_telemetry_store
+
+FRAME_INTERVAL = 2.0
+
+def build_frames(store, optimizer, n_frames):
+    frames = []
+    for i in range(n_frames):
+        record = store.record(i)
+        record['speed_mph'] += np.random.normal(0, 0.2)
+        record['engine_load_pct'] += np.random.normal(0, 2)
+        record['fuel_rate_gph'] += np.random.normal(0, 0.3)
+        record['timestamp'] = datetime.now().isoformat()
+        speed_opt = optimizer.optimize_speed_grid(record)
+        record['optimizations'] = {
+            'optimal_speed_mph': speed_opt['optimal_speed'],
+            'fuel_reduction_pct': speed_opt['fuel_savings_percent'],
+            'co2_reduction_lbs_per_hr': round(record['co2_rate_lbs_per_hour'] * speed_opt['co2_reduction_percent'] / 100, 1),
+            'cost_savings_per_hr': speed_opt['cost_savings_per_hour'],
+            'daily_savings_usd': round(speed_opt['cost_savings_per_hour'] * 8, 2),
+            'recommendations': optimizer.real_time_recommendations(record, method='grid')
+        }
+        frames.append(record)
+    return frames
+
+def run_full(frames):
+    return [json.dumps(frame) for frame in frames]
+
+def run_delta(frames, max_rate_hz=None, coalesce=True):
+    encoder, now = StreamEncoder('bench'), [0.0]
+    channel = ClientChannel(max_rate_hz, coalesce, clock=lambda: now[0]) if max_rate_hz else None
+    payloads, state = [], None
+    for i, frame in enumerate(frames):
+        now[0] = i * FRAME_INTERVAL
+        message = encoder.encode(frame)
+        if channel is not None:
+            message = channel.offer(message, encoder)
+        if message is not None:
+            payloads.append(json.dumps(message))
+            state = apply_message(state, message)
+    # The client's state equals the frame its last message brought it to
+    assert state['flat'] == flatten(frames[state['seq'] - 1])
+    return payloads
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare full and delta telemetry payloads")
+    parser.add_argument('--frames', type=int, default=300)
+    args = parser.parse_args()
+
+    from carbon_optimizer import CarbonOptimizer
+    frames = build_frames(load_telemetry_store(), CarbonOptimizer(), args.frames)
+    minutes = args.frames * FRAME_INTERVAL / 60
+
+    variants = [
+        ('full', lambda: run_full(frames)),
+        ('delta', lambda: run_delta(frames)),
+        ('delta 0.1 Hz', lambda: run_delta(frames, max_rate_hz=0.1)),
+        ('snapshot 0.1 Hz', lambda: run_delta(frames, max_rate_hz=0.1, coalesce=False))
+    ]
+    print(f"🧪 Telemetry payloads ({args.frames} frames, one every {FRAME_INTERVAL:.0f}s)")
+    print(f"{'protocol':<17}{'msgs/min':>9}{'bytes/msg':>11}{'KB/client/min':>15}{'CPU us/frame':>14}")
+    baseline = None
+    for name, run in variants:
+        started = time.process_time()
+        payloads = run()
+        cpu_us = (time.process_time() - started) / args.frames * 1e6
+        kb_per_minute = sum(map(len, payloads)) / minutes / 1024
+        baseline = baseline or kb_per_minute
+        print(f"{name:<17}{len(payloads) / minutes:>9.1f}{np.mean(list(map(len, payloads))):>11.0f}"
+              f"{kb_per_minute:>15.2f}{cpu_us:>14.1f}   ({kb_per_minute / baseline:.0%} of full)")
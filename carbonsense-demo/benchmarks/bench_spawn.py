@@ -0,0 +1,56 @@
+"""
+CarbonSense AI - Worker Spawn Benchmark
+Time from process start until the backend is importable (server can bind) and until it is ready
+
+Every run starts a fresh interpreter, as a new gunicorn worker would, and reports where the
+time went: interpreter start, `import app` and the warm-up stages.
+
+Usage: python benchmarks/bench_spawn.py [--runs 3] [--mode fast]
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+CHILD = r'''
+import os, sys, time, json
+sys.path.insert(0, {backend_dir!r})
+from warmup import process_start_time
+started = process_start_time()
+import app
+imported = time.time()
+heavy = sorted(m for m in ('pandas', 'sklearn', 'scipy', 'joblib') if m in sys.modules)
+app.warmup.wait_until_ready()
+print(json.dumps({{
+    'import_app_s': imported - started,
+    'ready_s': app.warmup.ready_at - started,
+    'heavy_at_import': heavy
+}}))
+sys.stdout.flush()
+os._exit(0)
+'''
+
+def spawn(mode):
+    env = dict(os.environ, CARBONSENSE_STARTUP_MODE=mode)
+    output = subprocess.run([sys.executable, '-c', CHILD.format(backend_dir=backend_dir)],
+                            capture_output=True, text=True, check=True, env=env, cwd=backend_dir).stdout
+    # Warm-up threads keep logging on the same stream, so decode the result object wherever it starts
+    result, _ = json.JSONDecoder().raw_decode(output[output.index('{"import_app_s"'):])
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure backend spawn-to-import and spawn-to-ready time")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--mode', default='fast', choices=['fast', 'eager'])
+    args = parser.parse_args()
+
+    results = [spawn(args.mode) for _ in range(args.runs)]
+    print(f"🧪 Worker spawn ({args.mode} startup, median of {args.runs} runs)")
+    print(f"   process start -> app imported: {np.median([r['import_app_s'] for r in results]):.2f}s")
+    print(f"   process start -> ready:        {np.median([r['ready_s'] for r in results]):.2f}s")
+    print(f"   heavy modules loaded by import: {', '.join(results[0]['heavy_at_import']) or 'none'}")
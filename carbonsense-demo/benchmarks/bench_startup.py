@@ -0,0 +1,111 @@
+"""
+CarbonSense AI - Startup Benchmark
+Compares model-loading time and memory of the legacy startup path with the shared artifact manager
+
+Usage: python benchmarks/bench_startup.py
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+import subprocess
+
+ai_models_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai_models'))
+
+OPTIMIZER_FILES = [
+    'carbonsense_fuel_model.pkl',
+    'carbonsense_emission_model.pkl',
+    'carbonsense_scaler.pkl',
+    'carbonsense_features.json'
+]
+
+def current_rss_mb():
+    """Resident set size of this process in MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_legacy():
+    """Replay the pre-manager sequence: hotfix check, optimizer __init__, then load_models twice"""
+    import joblib
+    import numpy as np
+
+    bundle = None
+    loads = 0
+    # apply_hotfix, CarbonOptimizer.__init__, CarbonSenseAPI.__init__ and load_demo_data each loaded every file
+    for _ in range(4):
+        bundle = []
+        for name in OPTIMIZER_FILES:
+            path = os.path.join(ai_models_dir, name)
+            if name.endswith('.json'):
+                with open(path) as f:
+                    bundle.append(json.load(f))
+            else:
+                bundle.append(joblib.load(path))
+            loads += 1
+    # load_models ran a test prediction after each of its two loads
+    fuel, emission, scaler, features = bundle
+    X = scaler.transform(np.zeros((1, len(features))))
+    for _ in range(2):
+        fuel.predict(X)
+        emission.predict(X)
+    return loads, bundle
+
+def run_managed():
+    """Current sequence through the shared artifact manager"""
+    sys.path.insert(0, ai_models_dir)
+    from artifact_manager import get_artifact_manager
+    from optimizer_hotfix import apply_hotfix
+
+    optimizer_class = apply_hotfix()
+    optimizer = optimizer_class()
+    model_prefix = os.path.join(ai_models_dir, 'carbonsense')
+    optimizer.load_models(model_prefix)
+    optimizer.load_models(model_prefix)
+    stats = get_artifact_manager().stats()
+    return sum(stats['load_counts'].values()), optimizer
+
+def measure(mode):
+    """Time and memory of one startup sequence, run in this (fresh) process"""
+    # Library import cost is identical for both paths and excluded from the measurement
+    import joblib  # noqa: F401
+    import pandas  # noqa: F401
+    import scipy.optimize  # noqa: F401
+    import sklearn.ensemble  # noqa: F401
+    rss_before = current_rss_mb()
+    started = time.perf_counter()
+    loads, _ = run_legacy() if mode == 'legacy' else run_managed()
+    return {
+        'mode': mode,
+        'seconds': round(time.perf_counter() - started, 3),
+        'artifact_loads': loads,
+        'rss_delta_mb': round(current_rss_mb() - rss_before, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ('legacy', 'managed'):
+        # Child process: keep stdout clean apart from the JSON result
+        real_stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+        result = measure(sys.argv[1])
+        sys.stdout = real_stdout
+        print(json.dumps(result))
+        sys.exit(0)
+
+    print("⏱️ CarbonSense startup benchmark (each mode in a fresh process)")
+    results = []
+    for mode in ('legacy', 'managed'):
+        output = subprocess.run([sys.executable, __file__, mode], capture_output=True, text=True, check=True)
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    print(f"{'mode':<10}{'seconds':>10}{'loads':>8}{'RSS Δ MB':>11}{'peak MB':>10}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['seconds']:>10.3f}{r['artifact_loads']:>8}{r['rss_delta_mb']:>11.1f}{r['peak_rss_mb']:>10.1f}")
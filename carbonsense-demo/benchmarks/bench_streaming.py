@@ -0,0 +1,90 @@
+"""
+CarbonSense AI - Streaming Fan-out Benchmark
+Tick cost vs subscriber count: one shared frame per equipment room vs one frame per client
+
+Subscribers are Socket.IO test clients watching the same machine. Frames are built like the
+app's build_telemetry_frame, with the server optimizer's grid search so a frame costs what an
+optimized live frame costs without waiting on SLSQP.
+
+Usage: python benchmarks/bench_streaming.py [--subscribers 1 10 100 500] [--ticks 5]
+"""
+
+import os
+import sys
+import time
+import argparse
+import warnings
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+ai_models_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai_models'))
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, ai_models_dir)
+warnings.filterwarnings('ignore')
+
+from flask import Flask
+from flask_socketio import SocketIO
+from streaming import StreamManager
+from telemetry_loader import load_telemetry_store
+
+def make_frame_builder(optimizer):
+    def build_frame(record):
+        speed_opt = optimizer.optimize_speed_grid(record)
+        record['optimizations'] = {
+            'optimal_speed_mph': speed_opt['optimal_speed'],
+            'fuel_reduction_pct': speed_opt['fuel_savings_percent'],
+            'recommendations': optimizer.real_time_recommendations(record, method='grid')
+        }
+        return record
+    return build_frame
+
+def per_client_tick(socketio, store, build_frame, sids, row):
+    """Baseline: every subscriber gets its own computed frame"""
+    for sid in sids:
+        socketio.emit('telemetry_update', build_frame(store.record(row)), to=sid)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure streaming tick cost against subscriber count")
+    parser.add_argument('--subscribers', type=int, nargs='+', default=[1, 10, 100, 500])
+    parser.add_argument('--ticks', type=int, default=5)
+    parser.add_argument('--max-per-client', type=int, default=100,
+                        help="Largest subscriber count the per-client baseline is run for")
+    args = parser.parse_args()
+
+    from carbon_optimizer import CarbonOptimizer
+    build_frame = make_frame_builder(CarbonOptimizer())
+    store = load_telemetry_store()
+    equipment_id = store.record(0)['equipment_id']
+
+    print(f"🧪 Streaming tick cost (1 equipment, median of {args.ticks} ticks)")
+    print(f"{'subscribers':>11}{'shared ms':>11}{'compute ms':>12}{'emit ms':>9}{'per-client ms':>15}")
+    for n_subscribers in args.subscribers:
+        app = Flask(__name__)
+        socketio = SocketIO(app)
+        manager = StreamManager(socketio, lambda: store, build_frame, autostart=False)
+        clients = [socketio.test_client(app) for _ in range(n_subscribers)]
+        sids = [socketio.server.manager.sid_from_eio_sid(client.eio_sid, '/') for client in clients]
+        for sid in sids:
+            manager.subscribe(sid, [equipment_id])
+
+        shared = []
+        for _ in range(args.ticks):
+            manager.tick()
+            shared.append(manager.last_tick)
+            for client in clients:
+                client.get_received()
+
+        per_client = '-'
+        if n_subscribers <= args.max_per_client:
+            timings = []
+            for row in range(args.ticks):
+                started = time.perf_counter()
+                per_client_tick(socketio, store, build_frame, sids, row)
+                timings.append(time.perf_counter() - started)
+                for client in clients:
+                    client.get_received()
+            per_client = f"{np.median(timings) * 1000:.1f}"
+
+        print(f"{n_subscribers:>11}{np.median([t['tick_ms'] for t in shared]):>11.1f}"
+              f"{np.median([t['compute_ms'] for t in shared]):>12.1f}"
+              f"{np.median([t['emit_ms'] for t in shared]):>9.1f}{per_client:>15}")
@@ -0,0 +1,78 @@
+"""
+CarbonSense AI - Telemetry Loader Benchmark
+Load time and resident memory of plain pd.read_csv vs the schema loader and its columnar cache
+
+Each variant runs in a fresh interpreter with pandas already imported, so the numbers are the
+cost of the load itself. Memory-mapped columns are read once before RSS is measured.
+
+Usage: python benchmarks/bench_telemetry_loader.py [--runs 3]
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+CHILD = r'''
+import sys, time, json
+sys.path.insert(0, {backend_dir!r})
+import numpy as np
+import pandas as pd
+import telemetry_loader
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        values = dict(line.split(':', 1) for line in f)
+    return int(values['VmRSS'].split()[0]) / 1024
+
+variant, cache_dir = {variant!r}, {cache_dir!r}
+before = rss_mb()
+start = time.perf_counter()
+if variant == 'plain csv':
+    data = pd.concat([pd.read_csv(path) for path in telemetry_loader.discover_telemetry_files()], ignore_index=True)
+elif variant == 'schema csv':
+    data = telemetry_loader.load_telemetry_frame(use_cache=False)
+elif variant == 'cache frame':
+    data = telemetry_loader.load_telemetry_frame(cache_dir=cache_dir)
+elif variant == 'cache store':
+    data = telemetry_loader.load_telemetry_store(cache_dir=cache_dir)
+else:
+    data = telemetry_loader.load_telemetry_frame(columns=['speed_mph', 'fuel_rate_gph', 'operation_type'],
+                                                 cache_dir=cache_dir)
+loaded = time.perf_counter() - start
+if hasattr(data, 'slice'):
+    # Touch every value so memory-mapped pages count as resident
+    for values in data.slice().values():
+        (values.view('i8') if values.dtype.kind == 'M' else values).sum()
+print(json.dumps({{'load_s': loaded, 'rss_mb': rss_mb() - before, 'rows': len(data), 'columns': len(data.columns)}}))
+'''
+
+def run(variant, cache_dir):
+    code = CHILD.format(backend_dir=backend_dir, variant=variant, cache_dir=cache_dir)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare telemetry load time and memory")
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    sys.path.insert(0, backend_dir)
+    import telemetry_loader
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, 'cache')
+        telemetry_loader.load_telemetry_frame(cache_dir=cache_dir)
+
+        print(f"🧪 Telemetry load ({telemetry_loader.cache_format()} cache, median of {args.runs} runs)")
+        print(f"{'variant':<18}{'rows':>8}{'cols':>6}{'load ms':>10}{'RSS MB':>9}")
+        for variant in ('plain csv', 'schema csv', 'cache frame', 'cache store', 'cache projection'):
+            results = [run(variant, cache_dir) for _ in range(args.runs)]
+            print(f"{variant:<18}{results[0]['rows']:>8}{results[0]['columns']:>6}"
+                  f"{np.median([r['load_s'] for r in results]) * 1000:>10.1f}"
+                  f"{np.median([r['rss_mb'] for r in results]):>9.1f}")
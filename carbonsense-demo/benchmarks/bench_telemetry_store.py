@@ -0,0 +1,65 @@
+"""
+CarbonSense AI - Telemetry Store Benchmark
+Memory and access latency of the columnar TelemetryStore vs the pandas demo_data frame
+
+Covers the operations the backend performs: reading the latest record (status), reading
+record i (streamer tick), appending a small ingested batch and slicing a row range.
+
+Usage: python benchmarks/bench_telemetry_store.py [--repeat 2000]
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+sys.path.insert(0, backend_dir)
+
+from telemetry_store import TelemetryStore
+
+def per_call_us(func, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def load_frame():
+    return pd.concat([pd.read_csv(os.path.join(data_dir, f"demo_{operation}_telemetry.csv"))
+                      for operation in ('cultivator', 'planter', 'sprayer')], ignore_index=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare TelemetryStore with a pandas DataFrame")
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    frame = load_frame()
+    store = TelemetryStore.from_frame(frame)
+    batch = frame.iloc[:10].to_dict('records')
+    n_rows = len(frame)
+
+    def frame_append(i):
+        global frame
+        frame = pd.concat([frame, pd.DataFrame(batch)], ignore_index=True)
+
+    results = [
+        ('memory MB', frame.memory_usage(deep=True).sum() / 1e6, store.memory_usage() / 1e6),
+        ('latest record us', per_call_us(lambda i: frame.iloc[-1].to_dict(), args.repeat),
+         per_call_us(lambda i: store.latest(), args.repeat)),
+        ('record i us', per_call_us(lambda i: frame.iloc[i % n_rows].to_dict(), args.repeat),
+         per_call_us(lambda i: store.record(i % n_rows), args.repeat)),
+        ('slice 1k rows us', per_call_us(lambda i: frame['fuel_rate_gph'].to_numpy()[i % n_rows:i % n_rows + 1000], args.repeat),
+         per_call_us(lambda i: store.column('fuel_rate_gph', i % n_rows, i % n_rows + 1000), args.repeat)),
+        ('append 10 rows us', per_call_us(frame_append, min(args.repeat, 500)),
+         per_call_us(lambda i: store.append(batch), min(args.repeat, 500)))
+    ]
+
+    print(f"🧪 Telemetry store vs DataFrame ({n_rows} rows, {len(store.columns)} columns)")
+    print(f"{'operation':<20}{'DataFrame':>12}{'store':>12}{'speed-up':>10}")
+    for name, frame_value, store_value in results:
+        print(f"{name:<20}{frame_value:>12.2f}{store_value:>12.2f}{frame_value / store_value:>9.1f}x")
+    assert store.latest() == {k: (v.item() if isinstance(v, np.generic) else v) for k, v in frame.iloc[-1].to_dict().items()}
+    print("✅ Latest record identical after both appended the same batches")
@@ -0,0 +1,98 @@
+"""
+CarbonSense AI - Tick Scheduler Benchmark
+Dispatch lag and CPU of a simulated fleet: one TickScheduler loop vs one sleeping thread per machine
+
+Every machine ticks at --hz. A tick reads the machine's next record from the telemetry store
+and serializes it as a frame would be, which is the per-tick work left once optimization
+results are shared. Lag is how late a tick started compared to when it was due.
+
+Usage: python benchmarks/bench_tick_scheduler.py [--machines 5000] [--hz 0.5] [--duration 20]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.insert(0, backend_dir)
+
+from tick_scheduler import TickScheduler
+from telemetry_loader import load_telemetry_store
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        values = dict(line.split(':', 1) for line in f)
+    return int(values['VmRSS'].split()[0]) / 1024
+
+def make_tick(store, machine, counter):
+    position = [machine * 7919 % len(store)]
+
+    def tick():
+        json.dumps(store.record(position[0] % len(store)))
+        position[0] += 1
+        counter[0] += 1
+    return tick
+
+def run_scheduler(store, machines, interval, duration, workers):
+    counter = [0]
+    scheduler = TickScheduler(interval, workers=workers)
+    for machine in range(machines):
+        scheduler.schedule(machine, make_tick(store, machine, counter))
+    time.sleep(duration)
+    stats = scheduler.stats()
+    scheduler.stop()
+    lag = stats['lag_ms']
+    return counter[0], lag['p50'], lag['p99'], lag['max'], stats['late'] / max(stats['dispatched'], 1)
+
+def run_threads(store, machines, interval, duration):
+    """The previous approach: a dedicated thread per stream sleeping between ticks"""
+    counter, lags, stop = [0], [], threading.Event()
+
+    def loop(machine):
+        tick = make_tick(store, machine, counter)
+        due = time.monotonic() + np.random.uniform(0, interval)
+        while not stop.is_set():
+            time.sleep(max(0.0, due - time.monotonic()))
+            lags.append(time.monotonic() - due)
+            tick()
+            due += interval
+
+    threads = [threading.Thread(target=loop, args=(machine,), daemon=True) for machine in range(machines)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    lag = np.array(lags) * 1000
+    return counter[0], np.percentile(lag, 50), np.percentile(lag, 99), lag.max(), float(np.mean(lag > interval * 0.1 * 1000))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure tick dispatch lag for a simulated fleet")
+    parser.add_argument('--machines', type=int, default=5000)
+    parser.add_argument('--hz', type=float, default=0.5)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--skip-threads', action='store_true', help="Only run the scheduler")
+    args = parser.parse_args()
+
+    store = load_telemetry_store()
+    interval = 1 / args.hz
+    expected = args.machines * args.hz * args.duration
+    variants = [('scheduler', lambda: run_scheduler(store, args.machines, interval, args.duration, args.workers))]
+    if not args.skip_threads:
+        variants.append(('threads', lambda: run_threads(store, args.machines, interval, args.duration)))
+
+    print(f"🧪 {args.machines} machines at {args.hz} Hz for {args.duration:.0f}s "
+          f"({args.machines * args.hz:,.0f} ticks/s expected, {os.cpu_count()} CPU)")
+    print(f"{'variant':<11}{'ticks/s':>9}{'of due':>8}{'lag p50':>9}{'p99':>8}{'max ms':>9}{'late':>7}"
+          f"{'CPU %':>7}{'RSS MB':>8}")
+    for name, run in variants:
+        rss_before, cpu_before, started = rss_mb(), time.process_time(), time.perf_counter()
+        ticks, p50, p99, worst, late = run()
+        elapsed = time.perf_counter() - started
+        cpu = (time.process_time() - cpu_before) / elapsed * 100
+        print(f"{name:<11}{ticks / args.duration:>9,.0f}{ticks / expected:>8.0%}{p50:>9.1f}{p99:>8.1f}"
+              f"{worst:>9.1f}{late:>7.1%}{cpu:>7.0f}{rss_mb() - rss_before:>8.1f}")
@@ -0,0 +1,102 @@
+"""
+CarbonSense AI - Worker Memory Benchmark
+Per-worker memory for pickled, memory-mapped and preloaded models with 1, 4 and 16 workers
+
+Workers are forked the way gunicorn forks them and all stay alive while memory is sampled,
+so PSS (proportional set size) shows how much of each worker's RSS is really shared.
+
+Usage: python benchmarks/bench_worker_memory.py [--workers 1 4 16]
+"""
+
+import os
+import sys
+import argparse
+import multiprocessing as mp
+import numpy as np
+
+ai_models_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai_models'))
+sys.path.insert(0, ai_models_dir)
+
+MODEL_PREFIX = os.path.join(ai_models_dir, 'carbonsense')
+
+def memory_mb():
+    """RSS, PSS and private (unshared) memory of this process from /proc/self/smaps_rollup"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                values[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss': values.get('Rss', 0.0),
+        'pss': values.get('Pss', 0.0),
+        'private': values.get('Private_Clean', 0.0) + values.get('Private_Dirty', 0.0)
+    }
+
+def load_models(model_format):
+    """Load the optimizer bundle the way the app does, bypassing the process-wide cache"""
+    from artifact_manager import ArtifactManager
+    return ArtifactManager(model_format=model_format).load_bundle(MODEL_PREFIX)
+
+def serve(bundle):
+    """Touch every model the way request handling does"""
+    X = np.random.default_rng(os.getpid()).normal(size=(200, len(bundle['features'])))
+    X_scaled = bundle['scaler'].transform(X)
+    bundle['fuel_model'].predict(X_scaled)
+    bundle['emission_model'].predict(X_scaled)
+
+def worker(model_format, preloaded, barrier, results):
+    before = memory_mb()
+    bundle = preloaded if preloaded is not None else load_models(model_format)
+    serve(bundle)
+    after = memory_mb()
+    # Sample only once every worker has loaded, so shared pages are split between them
+    barrier.wait()
+    shared_view = memory_mb()
+    results.put({
+        'rss': shared_view['rss'],
+        'pss': shared_view['pss'],
+        'private': shared_view['private'],
+        'model_private': after['private'] - before['private']
+    })
+    barrier.wait()
+
+def run(mode, n_workers):
+    """Fork n_workers for one loading mode and average their memory"""
+    ctx = mp.get_context('fork')
+    barrier = ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    model_format = 'mmap' if mode == 'mmap' else 'pickle'
+    preloaded = load_models('pickle') if mode == 'preload' else None
+
+    processes = [ctx.Process(target=worker, args=(model_format, preloaded, barrier, results))
+                 for _ in range(n_workers)]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return {key: float(np.mean([s[key] for s in samples])) for key in samples[0]}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-worker memory for each model loading mode")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(ai_models_dir, 'compact', 'carbonsense', 'bundle.json')):
+        sys.exit("❌ No compact export found, run: python ai_models/compact_forest.py")
+
+    # Import the heavy libraries in the parent, as gunicorn workers inherit them from the app import
+    import warnings
+    warnings.filterwarnings('ignore')
+    import pandas  # noqa: F401
+    import sklearn.ensemble  # noqa: F401
+    import artifact_manager  # noqa: F401
+
+    print("🧪 Per-worker memory (MB, mean over workers)")
+    print(f"{'workers':>8} {'mode':<9}{'RSS':>8}{'PSS':>8}{'private':>9}{'model private':>15}{'total PSS':>11}")
+    for n_workers in args.workers:
+        for mode in ('pickle', 'mmap', 'preload'):
+            r = run(mode, n_workers)
+            print(f"{n_workers:>8} {mode:<9}{r['rss']:>8.1f}{r['pss']:>8.1f}{r['private']:>9.1f}"
+                  f"{r['model_private']:>15.2f}{r['pss'] * n_workers:>11.1f}")
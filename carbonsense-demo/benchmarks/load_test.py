@@ -0,0 +1,429 @@
+"""
+CarbonSense AI - Load Test
+Concurrent REST clients and Socket.IO subscribers against a running server, ramped in stages
+
+Each stage runs --rest closed-loop REST clients, which pick endpoints from a weighted --mix,
+and --sockets Socket.IO clients subscribed to the telemetry stream, for --stage-seconds.
+It reports per stage and per endpoint the p50/p95/p99 latency, throughput and error rate.
+For subscribers it reports frames received and frame age (receive time minus the frame's
+timestamp). The server's CPU and RSS are sampled from /proc over the whole run. The server
+processes are found by its listening port: every process holding the listening socket, which
+under gunicorn is the master and all of its workers. --server-pid samples one process and its
+children instead. CPU, RSS (and PSS, which counts pages shared between workers once) are summed
+over the processes, and the JSON report also lists them per process.
+
+The JSON report (--json) is meant to be kept: --baseline compares a run with an earlier
+report and exits with status 1 when a stage's p99 latency or error rate regressed.
+
+Start the server first (e.g. `gunicorn backend.app:app` or `python backend/app.py`), then:
+
+Usage: python benchmarks/load_test.py [--url http://localhost:5000] [--rest 1,4,16] [--sockets 0,10,50]
+                                      [--stage-seconds 20] [--json report.json] [--baseline old.json]
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+import numpy as np
+import pandas as pd
+
+data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+# Soil sample sent by the in-cab view
+SOIL_SAMPLE = {'nitrogen': 45, 'phosphorus': 18, 'potassium': 165, 'soil_ph': 6.2, 'moisture_pct': 28,
+               'temperature_c': 22, 'organic_matter': 3.8, 'clay_content': 32}
+
+# name -> (HTTP method, path); payloads are built per request
+ENDPOINTS = {
+    'status': ('GET', '/api/status'),
+    'summary': ('GET', '/api/summary'),
+    'optimize': ('POST', '/api/optimize'),
+    'optimize_grid': ('POST', '/api/optimize?method=grid'),
+    'soil': ('POST', '/api/soil-carbon/predict')
+}
+DEFAULT_MIX = 'status=4,summary=3,optimize=2,soil=1'
+
+def percentiles(values):
+    if not len(values):
+        return {'p50': None, 'p95': None, 'p99': None, 'max': None}
+    values = np.asarray(values)
+    return {'p50': round(float(np.percentile(values, 50)), 2), 'p95': round(float(np.percentile(values, 95)), 2),
+            'p99': round(float(np.percentile(values, 99)), 2), 'max': round(float(values.max()), 2)}
+
+def load_operations(n=200):
+    """Telemetry records to post to /api/optimize, from the demo data"""
+    files = sorted(glob.glob(os.path.join(data_dir, '*_telemetry.csv')))
+    frame = pd.concat([pd.read_csv(path, nrows=n) for path in files], ignore_index=True)
+    return frame.to_dict('records')
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ENDPOINTS:
+            raise SystemExit(f"❌ Unknown endpoint '{name}' in --mix, use {sorted(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+def find_server_pids(port):
+    """
+    PIDs of the processes holding the socket listening on a local TCP port, from /proc (Linux)
+
+    Under gunicorn the workers inherit the master's listening socket, so all of them are found.
+    """
+    inodes = set()
+    for table in ('/proc/net/tcp', '/proc/net/tcp6'):
+        try:
+            with open(table) as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    # State 0A is LISTEN
+                    if fields[3] == '0A' and int(fields[1].rsplit(':', 1)[1], 16) == port:
+                        inodes.add(fields[9])
+        except OSError:
+            continue
+    if not inodes:
+        return []
+    pids = []
+    for pid in filter(str.isdigit, os.listdir('/proc')):
+        try:
+            for fd in os.listdir(f'/proc/{pid}/fd'):
+                link = os.readlink(f'/proc/{pid}/fd/{fd}')
+                if link.startswith('socket:[') and link[8:-1] in inodes:
+                    pids.append(int(pid))
+                    break
+        except OSError:
+            continue
+    return sorted(pids)
+
+def process_tree(pid):
+    """A process and its descendants (e.g. a gunicorn master and its workers), from /proc"""
+    parents = {}
+    for child in filter(str.isdigit, os.listdir('/proc')):
+        try:
+            with open(f'/proc/{child}/stat') as f:
+                parents[int(child)] = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+    tree, frontier = [pid], [pid]
+    while frontier:
+        frontier = [child for child, parent in parents.items() if parent in frontier]
+        tree += frontier
+    return sorted(tree)
+
+class ServerSampler:
+    """
+    Samples the CPU %, RSS and PSS of the server processes from /proc every interval seconds
+
+    Args:
+        find_pids (callable): Returns the PIDs to sample; called each interval, so restarted
+                              gunicorn workers are picked up
+        interval (float): Seconds between samples
+    """
+
+    def __init__(self, find_pids, interval=1.0):
+        self.find_pids = find_pids
+        self.interval = interval
+        self.samples = []
+        self.stage = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._ticks = os.sysconf('SC_CLK_TCK')
+
+    def _read(self, pid):
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open(f'/proc/{pid}/status') as f:
+            status = dict(line.split(':', 1) for line in f)
+        try:
+            # Proportional set size: pages shared by the workers count once across them
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                pss = next(int(line.split()[1]) / 1024 for line in f if line.startswith('Pss:'))
+        except (OSError, StopIteration):
+            pss = None
+        # utime and stime are fields 14 and 15 of stat (11 and 12 after the command name)
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / self._ticks
+        return cpu_seconds, int(status['VmRSS'].split()[0]) / 1024, pss, int(status['Threads'])
+
+    def _read_all(self):
+        readings = {}
+        for pid in self.find_pids():
+            try:
+                readings[pid] = self._read(pid)
+            except OSError:
+                continue  # Exited between discovery and reading
+        return readings
+
+    def _run(self):
+        started = last_time = time.perf_counter()
+        last_cpu = {pid: reading[0] for pid, reading in self._read_all().items()}
+        while not self._stop.wait(self.interval):
+            readings = self._read_all()
+            if not readings:
+                return  # Server exited
+            now = time.perf_counter()
+            processes = {}
+            for pid, (cpu, rss, pss, threads) in readings.items():
+                # A process first seen in this sample (e.g. a restarted worker) has no CPU delta yet
+                cpu_pct = (cpu - last_cpu[pid]) / (now - last_time) * 100 if pid in last_cpu else 0.0
+                processes[str(pid)] = {'cpu_pct': round(cpu_pct, 1), 'rss_mb': round(rss, 1),
+                                       'pss_mb': None if pss is None else round(pss, 1), 'threads': threads}
+            pss_values = [p['pss_mb'] for p in processes.values()]
+            self.samples.append({'elapsed_s': round(now - started, 2), 'stage': self.stage,
+                                 'cpu_pct': round(sum(p['cpu_pct'] for p in processes.values()), 1),
+                                 'rss_mb': round(sum(p['rss_mb'] for p in processes.values()), 1),
+                                 'pss_mb': None if None in pss_values else round(sum(pss_values), 1),
+                                 'threads': sum(p['threads'] for p in processes.values()),
+                                 'processes': processes})
+            last_cpu = {pid: reading[0] for pid, reading in readings.items()}
+            last_time = now
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self, stage):
+        samples = [s for s in self.samples if s['stage'] == stage]
+        if not samples:
+            return None
+        cpu = [s['cpu_pct'] for s in samples]
+        pss = [s['pss_mb'] for s in samples if s['pss_mb'] is not None]
+        per_process = {}
+        for sample in samples:
+            for pid, process in sample['processes'].items():
+                per_process.setdefault(pid, []).append(process)
+        return {'cpu_pct_mean': round(float(np.mean(cpu)), 1), 'cpu_pct_max': max(cpu),
+                'rss_mb_max': max(s['rss_mb'] for s in samples), 'rss_mb_end': samples[-1]['rss_mb'],
+                'pss_mb_max': max(pss) if pss else None,
+                'threads_max': max(s['threads'] for s in samples),
+                'processes': {pid: {'cpu_pct_mean': round(float(np.mean([p['cpu_pct'] for p in values])), 1),
+                                    'rss_mb_max': max(p['rss_mb'] for p in values)}
+                              for pid, values in per_process.items()}}
+
+class RestClient(threading.Thread):
+    """Closed-loop client: request, record, repeat until stopped"""
+
+    def __init__(self, url, mix, operations, results, stop, seed):
+        super().__init__(daemon=True)
+        import requests
+        self.session = requests.Session()
+        self.url = url
+        self.names, self.weights = list(mix), list(mix.values())
+        self.operations = operations
+        self.results = results
+        self.stop = stop
+        self.random = random.Random(seed)
+
+    def _payload(self, name):
+        if name.startswith('optimize'):
+            return self.random.choice(self.operations)
+        if name == 'soil':
+            return {key: round(value * self.random.uniform(0.8, 1.2), 2) for key, value in SOIL_SAMPLE.items()}
+        return None
+
+    def run(self):
+        while not self.stop.is_set():
+            name = self.random.choices(self.names, self.weights)[0]
+            method, path = ENDPOINTS[name]
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, self.url + path, json=self._payload(name), timeout=60)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            self.results.append((name, (time.perf_counter() - started) * 1000, ok))
+
+class SocketSubscriber:
+    """Socket.IO client subscribed to the telemetry stream, recording frame age"""
+
+    def __init__(self, url, protocol):
+        import socketio
+        # The polling client logs an error on every normal disconnect
+        logging.getLogger('engineio.client').setLevel(logging.CRITICAL)
+        self.client = socketio.Client(reconnection=False)
+        self.url = url
+        self.protocol = protocol
+        self.frames = 0
+        self.ages = []
+        self.error = None
+        self.connect_ms = None
+        self.client.on('telemetry_update', self._on_frame)
+        self.client.on('telemetry_delta', self._on_frame)
+
+    def _on_frame(self, message):
+        self.frames += 1
+        # Deltas name fields by position, so only full frames and snapshots carry a readable timestamp
+        data = message.get('data', {}) if message.get('type') == 'snapshot' else message
+        timestamp = data.get('timestamp') if 'changes' not in data else None
+        if timestamp:
+            try:
+                self.ages.append((datetime.now() - datetime.fromisoformat(timestamp)).total_seconds() * 1000)
+            except ValueError:
+                pass
+
+    def start(self):
+        started = time.perf_counter()
+        try:
+            self.client.connect(self.url, transports=['polling'], wait_timeout=30)
+            self.connect_ms = (time.perf_counter() - started) * 1000
+            self.client.emit('start_streaming', {'protocol': self.protocol})
+        except Exception as e:
+            self.error = str(e)
+        return self
+
+    def stop(self):
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+
+def run_stage(args, mix, operations, rest_clients, socket_clients, sampler, stage):
+    results, stop = [], threading.Event()
+    subscribers = [SocketSubscriber(args.url, args.protocol).start() for _ in range(socket_clients)]
+    clients = [RestClient(args.url, mix, operations, results, stop, seed=stage * 1000 + i) for i in range(rest_clients)]
+    if sampler:
+        sampler.stage = stage
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    time.sleep(args.stage_seconds)
+    stop.set()
+    for client in clients:
+        client.join(timeout=60)
+    elapsed = time.perf_counter() - started
+    for subscriber in subscribers:
+        subscriber.stop()
+
+    latencies = [latency for _, latency, _ in results]
+    errors = sum(1 for _, _, ok in results if not ok)
+    endpoints = {}
+    for name in mix:
+        mine = [(latency, ok) for endpoint, latency, ok in results if endpoint == name]
+        endpoints[name] = {'requests': len(mine),
+                           'error_rate': round(sum(1 for _, ok in mine if not ok) / len(mine), 4) if mine else 0.0,
+                           'latency_ms': percentiles([latency for latency, _ in mine])}
+    connected = [s for s in subscribers if s.error is None]
+    return {
+        'stage': stage,
+        'rest_clients': rest_clients,
+        'socket_clients': socket_clients,
+        'duration_s': round(elapsed, 2),
+        'requests': len(results),
+        'throughput_rps': round(len(results) / elapsed, 2),
+        'error_rate': round(errors / len(results), 4) if results else 0.0,
+        'latency_ms': percentiles(latencies),
+        'endpoints': endpoints,
+        'sockets': {'connected': len(connected), 'connect_errors': socket_clients - len(connected),
+                    'connect_ms': percentiles([s.connect_ms for s in connected]),
+                    'frames': sum(s.frames for s in subscribers),
+                    'frames_per_client_per_s': round(sum(s.frames for s in connected) / max(len(connected), 1) / elapsed, 3),
+                    'frame_age_ms': percentiles([age for s in connected for age in s.ages])},
+        'server': sampler.summary(stage) if sampler else None
+    }
+
+def compare(report, baseline, tolerance):
+    """Stages whose p99 latency or error rate regressed against a baseline report"""
+    regressions = []
+    previous = {(s['rest_clients'], s['socket_clients']): s for s in baseline['stages']}
+    for stage in report['stages']:
+        before = previous.get((stage['rest_clients'], stage['socket_clients']))
+        if before is None:
+            continue
+        p99, old_p99 = stage['latency_ms']['p99'], before['latency_ms']['p99']
+        if p99 is not None and old_p99 and p99 > old_p99 * (1 + tolerance):
+            regressions.append(f"{stage['rest_clients']} REST / {stage['socket_clients']} sockets: "
+                               f"p99 {old_p99:.0f} -> {p99:.0f} ms")
+        if stage['error_rate'] > before['error_rate'] + 0.01:
+            regressions.append(f"{stage['rest_clients']} REST / {stage['socket_clients']} sockets: "
+                               f"errors {before['error_rate']:.1%} -> {stage['error_rate']:.1%}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the CarbonSense backend with REST and Socket.IO clients")
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--rest', default='1,4,16', help="REST clients per stage")
+    parser.add_argument('--sockets', default='0,10,50', help="Socket.IO subscribers per stage (one value: every stage)")
+    parser.add_argument('--stage-seconds', type=float, default=20)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Endpoint weights, from {sorted(ENDPOINTS)}")
+    parser.add_argument('--protocol', choices=('full', 'delta'), default='full', help="Subscribers' payload protocol")
+    parser.add_argument('--server-pid', type=int,
+                        help="Server process to sample with its children (default: every process on the port)")
+    parser.add_argument('--sample-interval', type=float, default=1.0)
+    parser.add_argument('--json', help="Write the report to this file")
+    parser.add_argument('--baseline', help="Earlier --json report to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed p99 increase vs baseline")
+    args = parser.parse_args()
+    args.url = args.url.rstrip('/')
+
+    mix = parse_mix(args.mix)
+    rest_stages = [int(n) for n in args.rest.split(',')]
+    socket_stages = [int(n) for n in args.sockets.split(',')]
+    if len(socket_stages) == 1:
+        socket_stages *= len(rest_stages)
+    if len(socket_stages) != len(rest_stages):
+        parser.error("--rest and --sockets need the same number of stages")
+
+    import requests
+    try:
+        ready = requests.get(args.url + '/readyz', timeout=10).json()
+    except Exception as e:
+        raise SystemExit(f"❌ No server at {args.url}: {e}")
+    if not ready.get('ready'):
+        print(f"⚠️ Server is still warming up ({ready.get('current_stage')}), early requests may get 503")
+
+    port = urlparse(args.url).port or 80
+    if args.server_pid:
+        find_pids = lambda: process_tree(args.server_pid) if os.path.exists(f'/proc/{args.server_pid}') else []
+    else:
+        find_pids = lambda: find_server_pids(port)
+    pids = find_pids()
+    sampler = ServerSampler(find_pids, args.sample_interval).start() if pids else None
+    if sampler:
+        print(f"📊 Sampling {len(pids)} server process(es): {', '.join(map(str, pids))}")
+    else:
+        print("⚠️ Server process not found, CPU/RSS are not sampled (pass --server-pid)")
+
+    operations = load_operations()
+    print(f"🧪 Load test of {args.url}: {len(rest_stages)} stage(s) of {args.stage_seconds:.0f}s, mix {args.mix}")
+    print(f"{'REST':>5}{'sockets':>8}{'req/s':>8}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'frames/s':>10}{'age p99':>9}{'CPU %':>7}{'RSS MB':>8}")
+    stages = []
+    for stage, (rest_clients, socket_clients) in enumerate(zip(rest_stages, socket_stages)):
+        result = run_stage(args, mix, operations, rest_clients, socket_clients, sampler, stage)
+        stages.append(result)
+        latency, sockets, server = result['latency_ms'], result['sockets'], result['server'] or {}
+        print(f"{rest_clients:>5}{socket_clients:>8}{result['throughput_rps']:>8.1f}{result['error_rate']:>8.1%}"
+              f"{latency['p50'] or 0:>9.0f}{latency['p95'] or 0:>9.0f}{latency['p99'] or 0:>9.0f}"
+              f"{sockets['frames_per_client_per_s']:>10.2f}{sockets['frame_age_ms']['p99'] or 0:>9.0f}"
+              f"{server.get('cpu_pct_mean', 0):>7.0f}{server.get('rss_mb_max', 0):>8.0f}")
+    if sampler:
+        sampler.stop()
+
+    report = {'url': args.url, 'started': datetime.now().isoformat(), 'mix': mix, 'protocol': args.protocol,
+              'stage_seconds': args.stage_seconds, 'server_pids': pids, 'stages': stages,
+              'timeline': sampler.samples if sampler else []}
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.json}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"❌ Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions against {args.baseline}")
@@ -0,0 +1,386 @@
+"""
+CarbonSense AI - Telemetry Replay
+Load and soak testing by replaying recorded telemetry at its original pace, N× faster or flat out
+
+Any set of telemetry CSV or Parquet files (the demo_*_telemetry.csv files or recorded fleet
+logs) is replayed in timestamp order. Each file can be multiplexed into --machines virtual
+machines (equipment_id suffixed _v0001, ...), each with its timestamps offset by
+--machine-offset seconds, so a one-tractor recording becomes a fleet. Records due within
+--batch-ms of replay time are sent as one batch, to one of two targets:
+
+- --url: POST /api/telemetry of a running server (binary columnar or NDJSON payload)
+- --in-process: the same decode + append as the endpoint, into a TelemetryStore and running
+  aggregates, without HTTP. After each batch a StreamManager with one delta subscriber on
+  every machine builds, encodes and emits a frame per machine (tick()); emits go to a counting
+  stand-in for Socket.IO that JSON-encodes each payload but sends nothing. Frames carry no
+  model optimizations (a server without loaded models; load_test.py measures the optimizer),
+  so this is the ceiling for ingestion plus streaming in one server process
+
+A batch that the senders cannot pick up in time (the queue of --queue batches is full) is
+dropped and counted, as are records the server rejects or a failed request. Latency is from
+when a batch was due by the recording's clock until the target acknowledged it.
+
+Usage: python benchmarks/telemetry_replay.py data/demo_planter_telemetry.csv --in-process --speed 100
+       python benchmarks/telemetry_replay.py 'logs/*.parquet' --url http://localhost:5000 --machines 500 --speed 0
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import queue
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.insert(0, backend_dir)
+
+from telemetry_codec import encode_binary, decode_payload, NDJSON_CONTENT_TYPE, BINARY_CONTENT_TYPE
+from telemetry_loader import read_csv_files, DATA_DIR
+
+def load_recording(patterns):
+    """Telemetry files (CSV or Parquet, globs allowed) as one DataFrame in timestamp order"""
+    files = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+    if not files:
+        raise SystemExit(f"❌ No telemetry files match {patterns}")
+    csv_files = [path for path in files if not path.endswith('.parquet')]
+    frames = [read_csv_files(csv_files)] if csv_files else []
+    for path in files:
+        if path.endswith('.parquet'):
+            try:
+                frames.append(pd.read_parquet(path))
+            except ImportError:
+                raise SystemExit("❌ Reading Parquet needs pyarrow (pip install pyarrow)")
+    frame = pd.concat(frames, ignore_index=True)
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'])
+    return frame.sort_values('timestamp', kind='stable').reset_index(drop=True), files
+
+class ReplayPlan:
+    """
+    Batches of the recording, multiplexed into virtual machines, in replay-time order
+
+    Args:
+        frame (DataFrame): Recording sorted by timestamp
+        machines (int): Virtual machines per recorded machine
+        machine_offset (float): Seconds between the timestamps of consecutive virtual machines
+        loops (int): Times the recording is played (0: until stopped)
+    """
+
+    def __init__(self, frame, machines=1, machine_offset=None, loops=1):
+        timestamps = frame['timestamp'].to_numpy()
+        self.start = timestamps[0]
+        self.offsets = (timestamps - self.start) / np.timedelta64(1, 's')
+        step = float(np.median(np.diff(self.offsets))) if len(frame) > 1 else 1.0
+        self.span = self.offsets[-1] + step
+        self.machines = machines
+        # Default: machines evenly phased within one sample interval
+        self.machine_offset = step / machines if machine_offset is None else machine_offset
+        self.loops = loops
+        self.columns = {name: frame[name].to_numpy() for name in frame.columns if name != 'timestamp'}
+        labels, self.codes = np.unique(frame['equipment_id'].astype(str).to_numpy(), return_inverse=True)
+        self.labels = np.array([[label] if machines == 1 else [f"{label}_v{k:04d}" for k in range(machines)]
+                                for label in labels], dtype=object)
+
+    @property
+    def duration(self):
+        """Recording seconds covered by all virtual machines in one loop"""
+        return self.span + (self.machines - 1) * self.machine_offset
+
+    def window(self, begin, end):
+        """Column batch of the records with replay time in [begin, end)"""
+        loop_start = int(begin // self.duration) if self.duration else 0
+        parts = []
+        for loop in range(loop_start, int(end // self.duration) + 1 if self.duration else 1):
+            if self.loops and loop >= self.loops:
+                break
+            shifts = loop * self.duration + np.arange(self.machines) * self.machine_offset
+            lo = np.searchsorted(self.offsets, begin - shifts)
+            hi = np.searchsorted(self.offsets, end - shifts)
+            counts = hi - lo
+            total = int(counts.sum())
+            if not total:
+                continue
+            machine = np.repeat(np.arange(self.machines), counts)
+            rows = np.repeat(lo, counts) + np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            parts.append((rows, machine, self.offsets[rows] + shifts[machine]))
+        if not parts:
+            return None
+        rows, machine, when = (np.concatenate(part) for part in zip(*parts))
+        order = np.argsort(when, kind='stable')
+        rows, machine, when = rows[order], machine[order], when[order]
+        batch = {name: values[rows] for name, values in self.columns.items()}
+        batch['equipment_id'] = self.labels[self.codes[rows], machine]
+        stamps = self.start + (when * 1e6).astype('timedelta64[us]')
+        batch['timestamp'] = np.datetime_as_string(stamps, unit='us').astype(object)
+        return batch
+
+    def finished(self, replay_time):
+        return bool(self.loops) and replay_time >= self.loops * self.duration
+
+def encode(batch, payload):
+    if payload == 'binary':
+        return encode_binary(batch), BINARY_CONTENT_TYPE
+    body = pd.DataFrame(batch).to_json(orient='records', lines=True)
+    return body.encode('utf-8'), NDJSON_CONTENT_TYPE
+
+class HttpTarget:
+    """POST /api/telemetry of a running server; one session per sender thread"""
+
+    def __init__(self, url, timeout=10.0):
+        import requests
+        self.requests = requests
+        self.url = url.rstrip('/') + '/api/telemetry'
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def send(self, body, content_type, n_records):
+        """Returns the number of records the target accepted (raises on transport errors)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self.requests.Session()
+        response = session.post(self.url, data=body, headers={'Content-Type': content_type}, timeout=self.timeout)
+        if response.status_code != 200:
+            return 0
+        return int(response.json().get('ingested', 0))
+
+class CountingSocketIO:
+    """Socket.IO stand-in for StreamManager: rooms are no-ops, emits are JSON-encoded and counted"""
+
+    def __init__(self):
+        self.server = self
+        self.emits = 0
+        self.bytes = 0
+
+    def enter_room(self, sid, room, namespace=None):
+        pass
+
+    def leave_room(self, sid, room, namespace=None):
+        pass
+
+    def emit(self, event, payload, to=None, skip_sid=None, namespace=None):
+        # The encoding is the part of an emit the server pays for once per room
+        self.emits += 1
+        self.bytes += len(json.dumps(payload, default=str))
+
+class InProcessTarget:
+    """The ingestion endpoint's work without HTTP, then one streaming tick to a subscriber of every machine"""
+
+    SUBSCRIBER = 'replay-dashboard'
+
+    def __init__(self):
+        from telemetry_store import TelemetryStore
+        from aggregates import RunningAggregates
+        from streaming import StreamManager
+        from outbound import OutboundQueues
+
+        self.store = TelemetryStore()
+        self.aggregates = RunningAggregates()
+        self.socketio = CountingSocketIO()
+        self.stream_manager = StreamManager(self.socketio, lambda: self.store, lambda record: record, autostart=False,
+                                            outbound=OutboundQueues(self.socketio, depth=lambda sid: 0))
+        self.subscribed = set()
+        self.ticks = 0
+        # TelemetryStore takes one writer at a time
+        self._lock = threading.Lock()
+
+    def send(self, body, content_type, n_records):
+        columns, n_rows = decode_payload(body, content_type)
+        with self._lock:
+            self.store.append(columns)
+            self.aggregates.add_records(columns)
+            new_machines = [eid for eid in self.stream_manager.equipment_ids() if eid not in self.subscribed]
+            if new_machines:
+                self.stream_manager.subscribe(self.SUBSCRIBER, new_machines, protocol='delta')
+                self.subscribed.update(new_machines)
+            self.stream_manager.tick()
+            self.ticks += 1
+        return n_rows
+
+    def stats(self):
+        return {'streams': len(self.subscribed), 'ticks': self.ticks,
+                'frames': self.stream_manager.frames_computed, 'emits': self.socketio.emits,
+                'emitted_mb': round(self.socketio.bytes / 1e6, 2),
+                'frame_compute_s': round(self.stream_manager.compute_seconds, 3),
+                'frame_emit_s': round(self.stream_manager.emit_seconds, 3)}
+
+def percentiles(values):
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None, 'max': None}
+    values = np.asarray(values)
+    return {'p50': round(float(np.percentile(values, 50)), 2), 'p95': round(float(np.percentile(values, 95)), 2),
+            'p99': round(float(np.percentile(values, 99)), 2), 'max': round(float(values.max()), 2)}
+
+class Replayer:
+    """
+    Paces batches of a ReplayPlan onto a bounded queue drained by sender threads
+
+    Args:
+        speed (float): Replay-time seconds per wall second (1: original pace); 0 sends as fast as possible
+        batch_ms (float): Wall milliseconds of records per batch when paced
+        max_batch (int): Most records per batch
+        senders (int): Sender threads
+        queue_size (int): Batches waiting for a sender before new ones are dropped (paced replay only)
+    """
+
+    def __init__(self, plan, target, speed=1.0, batch_ms=200, max_batch=5000, senders=4, queue_size=64,
+                 payload='binary'):
+        self.plan = plan
+        self.target = target
+        self.speed = speed
+        self.max_batch = max_batch
+        self.payload = payload
+        self.senders = senders
+        rate = len(plan.offsets) * plan.machines / max(plan.duration, 1e-9)
+        # Paced: the records due in batch_ms of wall time; flat out: about max_batch records
+        self.window = batch_ms / 1000 * speed if speed else max_batch / rate
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self.counts = {'scheduled': 0, 'sent': 0, 'acknowledged': 0, 'dropped_backlog': 0,
+                       'rejected': 0, 'errors': 0, 'batches': 0}
+        self.latencies, self.round_trips, self.timeline = [], [], []
+
+    def _send_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            body, content_type, n_records, due = item
+            started = time.perf_counter()
+            try:
+                accepted = self.target.send(body, content_type, n_records)
+                error = False
+            except Exception as e:
+                accepted, error = 0, True
+                if not self.counts['errors']:
+                    print(f"⚠️ Batch of {n_records} records failed (further failures are only counted): {e}")
+            done = time.perf_counter()
+            with self._lock:
+                self.counts['sent'] += n_records
+                self.counts['acknowledged'] += accepted
+                self.counts['errors' if error else 'rejected'] += n_records - accepted
+                self.counts['batches'] += 1
+                self.latencies.append((done - due) * 1000)
+                self.round_trips.append((done - started) * 1000)
+
+    def _batches(self, batch):
+        n_rows = len(batch['timestamp'])
+        for start in range(0, n_rows, self.max_batch):
+            yield {name: values[start:start + self.max_batch] for name, values in batch.items()}
+
+    def run(self, duration=None, report_every=10.0):
+        threads = [threading.Thread(target=self._send_loop, daemon=True) for _ in range(self.senders)]
+        for thread in threads:
+            thread.start()
+        started = time.perf_counter()
+        next_report = started + report_every
+        replay_time = 0.0
+        while not self.plan.finished(replay_time):
+            now = time.perf_counter()
+            if duration and now - started >= duration:
+                break
+            end = replay_time + self.window
+            if self.speed:
+                # The window's records are all due once its end is reached
+                time.sleep(max(0.0, started + end / self.speed - now))
+            window = self.plan.window(replay_time, end)
+            replay_time = end
+            if window is None:
+                continue
+            for batch in self._batches(window):
+                n_records = len(batch['timestamp'])
+                body, content_type = encode(batch, self.payload)
+                self.counts['scheduled'] += n_records
+                due = started + end / self.speed if self.speed else time.perf_counter()
+                try:
+                    self.queue.put((body, content_type, n_records, due), block=not self.speed)
+                except queue.Full:
+                    with self._lock:
+                        self.counts['dropped_backlog'] += n_records
+            if time.perf_counter() >= next_report:
+                next_report += report_every
+                self._report_progress(started)
+        for _ in threads:
+            self.queue.put(None)
+        for thread in threads:
+            thread.join()
+        return self.report(time.perf_counter() - started)
+
+    def _report_progress(self, started):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            counts, latency = dict(self.counts), percentiles(self.latencies[-1000:])
+        self.timeline.append({'elapsed_s': round(elapsed, 1), 'acknowledged': counts['acknowledged'],
+                              'dropped': counts['dropped_backlog'] + counts['rejected'] + counts['errors'],
+                              'latency_p99_ms': latency['p99']})
+        print(f"⏱️ {elapsed:7.1f}s  acknowledged {counts['acknowledged']:>10,}  "
+              f"{counts['acknowledged'] / elapsed:>10,.0f} rec/s  p99 {latency['p99']} ms")
+
+    def report(self, elapsed):
+        counts = dict(self.counts)
+        dropped = counts['dropped_backlog'] + counts['rejected'] + counts['errors']
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'records': dict(counts, dropped=dropped),
+            'target_rate_rps': round(len(self.plan.offsets) * self.plan.machines / self.plan.duration * self.speed, 1)
+                               if self.speed else None,
+            'throughput_rps': round(counts['acknowledged'] / elapsed, 1) if elapsed else 0.0,
+            'drop_rate': round(dropped / counts['scheduled'], 6) if counts['scheduled'] else 0.0,
+            'latency_ms': percentiles(self.latencies),
+            'round_trip_ms': percentiles(self.round_trips),
+            'timeline': self.timeline
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay telemetry recordings for load and soak testing")
+    parser.add_argument('files', nargs='*', default=[os.path.join(DATA_DIR, '*_telemetry.csv')],
+                        help="CSV or Parquet files or globs (default: the demo telemetry)")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', help="Server to POST /api/telemetry to, e.g. http://localhost:5000")
+    target.add_argument('--in-process', action='store_true', help="Ingest in this process (default without --url)")
+    parser.add_argument('--speed', type=float, default=1.0, help="Replay speed-up; 0 = as fast as possible")
+    parser.add_argument('--machines', type=int, default=1, help="Virtual machines per recorded machine")
+    parser.add_argument('--machine-offset', type=float, help="Seconds between virtual machines' timestamps")
+    parser.add_argument('--loops', type=int, default=1, help="Times to play the recording (0: until --duration)")
+    parser.add_argument('--duration', type=float, help="Stop after this many wall seconds")
+    parser.add_argument('--batch-ms', type=float, default=200)
+    parser.add_argument('--max-batch', type=int, default=5000)
+    parser.add_argument('--senders', type=int, default=4)
+    parser.add_argument('--queue', type=int, default=64, help="Batches waiting for a sender before dropping")
+    parser.add_argument('--payload', choices=('binary', 'ndjson'), default='binary')
+    parser.add_argument('--json', help="Write the report to this file")
+    args = parser.parse_args()
+    if args.loops == 0 and not args.duration:
+        parser.error("--loops 0 needs --duration")
+
+    frame, files = load_recording(args.files)
+    plan = ReplayPlan(frame, args.machines, args.machine_offset, args.loops)
+    replay_target = HttpTarget(args.url) if args.url else InProcessTarget()
+    pace = f"{args.speed:g}x" if args.speed else "as fast as possible"
+    print(f"🔄 Replaying {len(frame):,} records from {len(files)} file(s) as {args.machines} machine(s) per recorded one, "
+          f"{pace}, to {args.url or 'in-process ingestion'}")
+
+    report = Replayer(plan, replay_target, args.speed, args.batch_ms, args.max_batch, args.senders, args.queue,
+                      args.payload).run(args.duration)
+    report.update({'files': files, 'target': args.url or 'in-process', 'speed': args.speed,
+                   'machines': args.machines, 'payload': args.payload})
+    if not args.url:
+        report['streaming'] = replay_target.stats()
+
+    records, latency = report['records'], report['latency_ms']
+    print(f"🧪 {records['acknowledged']:,} of {records['scheduled']:,} records acknowledged in {report['elapsed_s']:.1f}s")
+    print(f"   Throughput: {report['throughput_rps']:,.0f} records/s"
+          + (f" (schedule: {report['target_rate_rps']:,.0f})" if report['target_rate_rps'] else ""))
+    print(f"   Latency ms: p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}")
+    print(f"   Dropped: {records['dropped']:,} ({report['drop_rate']:.2%}) - backlog {records['dropped_backlog']:,}, "
+          f"rejected {records['rejected']:,}, errors {records['errors']:,}")
+    if not args.url:
+        streaming = report['streaming']
+        print(f"   Streaming: {streaming['frames']:,} frames for {streaming['streams']} machine(s) over "
+              f"{streaming['ticks']:,} ticks, {streaming['emitted_mb']} MB encoded")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.json}")
@@ -0,0 +1,23 @@
+"""
+CarbonSense AI - Gunicorn Configuration
+Picked up automatically by `gunicorn backend.app:app` when run from this directory
+
+Memory sharing between workers:
+  CARBONSENSE_MODEL_FORMAT=mmap  workers open the compact export in ai_models/compact/ as
+                                 read-only file mappings, so the tree arrays live once in the
+                                 page cache (python ai_models/compact_forest.py re-exports them)
+  CARBONSENSE_PRELOAD=1          the master imports the app and loads every model before
+                                 forking, so workers share those pages copy-on-write
+
+Models trained at startup (soil models missing from the bundle) are saved to
+CARBONSENSE_RUNTIME_MODEL_DIR (default .model_cache/), never into the tracked ai_models/.
+"""
+
+import os
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+preload_app = os.environ.get('CARBONSENSE_PRELOAD', '0') == '1'
+
+if preload_app:
+    # Background warm-up threads do not survive fork(): load everything in the master first
+    os.environ['CARBONSENSE_STARTUP_MODE'] = 'eager'
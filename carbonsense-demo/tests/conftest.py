@@ -0,0 +1,22 @@
+"""
+CarbonSense AI - Test Configuration
+Models trained while the tests run (e.g. the soil models at app start) go to a temporary directory,
+and the app does not watch the model registry in the background (tests call follow_registry)
+"""
+
+import os
+import shutil
+import tempfile
+
+def pytest_configure(config):
+    os.environ.setdefault('CARBONSENSE_MODEL_WATCH_SECONDS', '0')
+    # Set before any test module imports artifact_manager, which reads it once
+    if 'CARBONSENSE_RUNTIME_MODEL_DIR' not in os.environ:
+        config._carbonsense_model_dir = tempfile.mkdtemp(prefix='carbonsense-models-')
+        os.environ['CARBONSENSE_RUNTIME_MODEL_DIR'] = config._carbonsense_model_dir
+
+def pytest_unconfigure(config):
+    model_dir = getattr(config, '_carbonsense_model_dir', None)
+    if model_dir:
+        shutil.rmtree(model_dir, ignore_errors=True)
+        del os.environ['CARBONSENSE_RUNTIME_MODEL_DIR']
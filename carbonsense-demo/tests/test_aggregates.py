@@ -0,0 +1,154 @@
+"""
+CarbonSense AI - Running Aggregates Tests
+Tests for incrementally maintained summary totals and background refreshes
+"""
+
+import os
+import sys
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+sys.path.insert(0, backend_dir)
+
+from aggregates import RunningAggregates, BackgroundRefresher, SUMMARY_METRICS
+from optimization_potential import OptimizationPotential
+from telemetry_store import TelemetryStore
+
+class SpeedRuleOptimizer:
+    """Deterministic stand-in for CarbonOptimizer.optimize_speed_batch"""
+
+    def __init__(self, savings_pct=10.0):
+        self.savings_pct = savings_pct
+        self.calls = []
+
+    def optimize_speed_batch(self, records):
+        self.calls.append(len(records))
+        return [{'optimal_speed': 7.5,
+                 'fuel_savings_percent': self.savings_pct if record['speed_mph'] > 7.5 else -2.0,
+                 'co2_reduction_percent': self.savings_pct / 2}
+                for record in records]
+
+def load_telemetry(rows_per_operation=700):
+    return pd.concat([pd.read_csv(os.path.join(data_dir, f"demo_{operation}_telemetry.csv")).head(rows_per_operation)
+                      for operation in ('cultivator', 'planter', 'sprayer')], ignore_index=True)
+
+def test_incremental_batches_match_full_recomputation():
+    """Frames, dict lists and single records folded in batches equal pandas sums and means"""
+    df = load_telemetry()
+    df.loc[5, 'speed_mph'] = np.nan
+
+    aggregates = RunningAggregates()
+    aggregates.add_records(df.iloc[:1000])
+    aggregates.add_records(df.iloc[1000:2099].to_dict('records'))
+    aggregates.add_records(df.iloc[2099].to_dict())
+
+    overall = aggregates.overall()
+    assert overall['records'] == len(df)
+    for metric in SUMMARY_METRICS:
+        assert overall['totals'][metric] == pytest.approx(df[metric].sum())
+        assert overall['means'][metric] == pytest.approx(df[metric].mean())
+
+    for groups, key in ((aggregates.by_equipment(), df['equipment_id']), (aggregates.by_day(), df['timestamp'].str[:10])):
+        expected = df.groupby(key)
+        assert list(groups) == sorted(expected.groups)
+        for name, group in expected:
+            assert groups[name]['records'] == len(group)
+            assert groups[name]['totals']['fuel_rate_gph'] == pytest.approx(group['fuel_rate_gph'].sum())
+            assert groups[name]['means']['speed_mph'] == pytest.approx(group['speed_mph'].mean())
+
+def test_background_refresher_coalesces_requests():
+    """Requests made during a refresh collapse into one rerun"""
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def refresh():
+        calls.append(len(calls))
+        started.set()
+        release.wait(5)
+
+    refresher = BackgroundRefresher(refresh)
+    refresher.request()
+    assert started.wait(5)
+    for _ in range(5):
+        refresher.request()
+    release.set()
+    assert refresher.wait(5)
+    assert calls == [0, 1]
+
+def test_optimization_potential_covers_every_record_incrementally():
+    """Appended rows are optimized once, totals are exact and a new model version recomputes"""
+    df = load_telemetry()
+    store = TelemetryStore.from_frame(df.iloc[:1200])
+    optimizer = SpeedRuleOptimizer()
+    potential = OptimizationPotential(batch_size=500)
+
+    assert potential.refresh(store, optimizer, model_version='v1') == 1200
+    store.append(df.iloc[1200:])
+    assert potential.refresh(store, optimizer, model_version='v1') == 900
+    assert potential.refresh(store, optimizer, model_version='v1') == 0
+    assert optimizer.calls == [500, 500, 200, 500, 400]
+
+    improved = df['speed_mph'] > 7.5
+    summary = potential.summary()
+    assert summary['records'] == len(df)
+    assert summary['improved_records'] == improved.sum()
+    assert summary['fuel_savings_gph'] == pytest.approx((df['fuel_rate_gph'] * 0.10)[improved].sum())
+    assert summary['co2_reduction_lbs_per_hour'] == pytest.approx((df['co2_rate_lbs_per_hour'] * 0.05)[improved].sum())
+    assert summary['cost_savings_per_hour'] == pytest.approx((df['fuel_cost_per_hour'] * 0.10)[improved].sum())
+    np.testing.assert_array_equal(potential.column('optimal_speed'), np.full(len(df), 7.5))
+
+    assert potential.refresh(store, SpeedRuleOptimizer(savings_pct=20.0), model_version='v2') == len(df)
+    assert potential.summary()['fuel_savings_gph'] == pytest.approx(2 * summary['fuel_savings_gph'])
+    assert potential.summary()['model_version'] == 'v2'
+
+def test_optimization_potential_survives_failing_records():
+    """A failing chunk is retried per record; records that still fail count as not improved"""
+    df = load_telemetry()
+    bad_rows = {3, 1500}
+
+    class FlakyOptimizer(SpeedRuleOptimizer):
+        def optimize_speed_batch(self, records):
+            if any(record['speed_mph'] == -1 for record in records):
+                raise ValueError("Input contains NaN")
+            return super().optimize_speed_batch(records)
+
+    store = TelemetryStore.from_frame(df.assign(speed_mph=[-1 if i in bad_rows else speed
+                                                          for i, speed in enumerate(df['speed_mph'])]))
+    potential = OptimizationPotential(batch_size=500)
+    assert potential.refresh(store, FlakyOptimizer(), model_version='v1') == len(df)
+    assert potential.refresh(store, FlakyOptimizer(), model_version='v1') == 0
+
+    good = ~df.index.isin(bad_rows) & (df['speed_mph'] > 7.5)
+    summary = potential.summary()
+    assert summary['records'] == len(df)
+    assert summary['failed_records'] == len(bad_rows)
+    assert summary['improved_records'] == good.sum()
+    assert summary['fuel_savings_gph'] == pytest.approx((df['fuel_rate_gph'] * 0.10)[good].sum())
+    assert np.isnan(potential.column('optimal_speed')[sorted(bad_rows)]).all()
+
+def test_optimization_potential_appends_without_copying_history():
+    """Small refreshes fill the existing result buffers; earlier states keep their own rows"""
+    df = load_telemetry()
+    store = TelemetryStore.from_frame(df.iloc[:1200])
+    potential = OptimizationPotential(batch_size=500)
+    potential.refresh(store, SpeedRuleOptimizer(), model_version='v1')
+    buffer = potential._state['columns']['optimal_speed']
+    before = potential._state
+
+    for start in range(1200, 1300, 10):
+        store.append(df.iloc[start:start + 10])
+        assert potential.refresh(store, SpeedRuleOptimizer(), model_version='v1') == 10
+    assert potential._state['columns']['optimal_speed'] is buffer
+    assert len(potential.column('optimal_speed')) == potential.records == 1300
+    assert before['records'] == 1200
+
+    # A model swap recomputes into new buffers while the old ones keep serving until it is done
+    potential.refresh(store, SpeedRuleOptimizer(savings_pct=20.0), model_version='v2')
+    assert potential._state['columns']['optimal_speed'] is not buffer
+    np.testing.assert_array_equal(potential.column('fuel_savings_percent'),
+                                  np.where(df['speed_mph'].iloc[:1300] > 7.5, 20.0, -2.0))
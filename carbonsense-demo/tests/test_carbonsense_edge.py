@@ -0,0 +1,99 @@
+"""
+CarbonSense AI - In-Cab Edge Inference Tests
+Tests for the numpy-only carbonsense_edge module against the server optimizer
+"""
+
+import os
+import sys
+import subprocess
+import warnings
+import pytest
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+
+# Add the ai_models directory to the path
+ai_models_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai_models'))
+data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+sys.path.insert(0, ai_models_dir)
+
+from carbonsense_edge import EdgeOptimizer, EdgeSoilPredictor, encode_operations
+
+@pytest.fixture(scope='module')
+def server_optimizer():
+    from carbon_optimizer import CarbonOptimizer
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        optimizer = CarbonOptimizer()
+    if optimizer.fuel_predictor is None:
+        pytest.skip("Bundled optimizer models could not be loaded")
+    return optimizer
+
+@pytest.fixture(scope='module')
+def telemetry_rows():
+    rows = []
+    for operation in ('cultivator', 'planter', 'sprayer'):
+        df = pd.read_csv(os.path.join(data_dir, f"demo_{operation}_telemetry.csv"))
+        rows += df.sample(10, random_state=1).to_dict('records')
+    # Speeds on bin edges, outside every bin and a low speed that clips to the 3 mph minimum
+    rows += [dict(rows[0], speed_mph=speed) for speed in (5.0, 15.0, 16.2, 2.5)]
+    return rows
+
+def test_edge_import_avoids_heavy_libraries():
+    """Importing, loading and optimizing never pulls in pandas, scikit-learn or scipy"""
+    code = (
+        "import sys; sys.path.insert(0, %r)\n"
+        "import carbonsense_edge\n"
+        "carbonsense_edge.recommend({'speed_mph': 9, 'engine_load_pct': 88, 'implement_width_ft': 30,"
+        " 'field_acres': 160, 'weather_factor': 1.2, 'operation_type': 'planter'})\n"
+        "print(sorted(m for m in ('pandas', 'sklearn', 'scipy') if m in sys.modules))"
+    ) % ai_models_dir
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == '[]'
+
+def test_feature_encoding_matches_prepare_features(server_optimizer, telemetry_rows):
+    """The numpy encoding reproduces pandas prepare_features + reindex exactly"""
+    columns = server_optimizer.feature_columns
+    expected = server_optimizer.prepare_features(pd.DataFrame(telemetry_rows))
+    expected = expected.reindex(columns=columns, fill_value=0).to_numpy(dtype=float)
+
+    np.testing.assert_array_equal(encode_operations(telemetry_rows, columns), expected)
+
+def test_edge_optimize_and_recommend_match_server(server_optimizer, telemetry_rows):
+    """Compact-bundle results equal the server's grid optimizer on its scikit-learn models"""
+    edge = EdgeOptimizer.load()
+
+    for row in telemetry_rows:
+        assert edge.optimize_speed_for_operation(row) == server_optimizer.optimize_speed_grid(row)
+        assert edge.real_time_recommendations(row) == server_optimizer.real_time_recommendations(row, method='grid')
+    assert server_optimizer.optimize_speed_batch(telemetry_rows) == [
+        server_optimizer.optimize_speed_grid(row) for row in telemetry_rows]
+    assert edge.optimize_speed_batch(telemetry_rows, batch_size=7) == [
+        edge.optimize_speed_for_operation(row) for row in telemetry_rows]
+
+    target = dict(telemetry_rows[0], speed_mph=8.0)
+    result = edge.optimize_speed_for_operation(target, target_acres_per_hour=0.05)
+    assert result == server_optimizer.optimize_speed_grid(target, target_acres_per_hour=0.05)
+    assert result['optimal_speed'] * target['implement_width_ft'] / 43560 * 8.25 >= 0.05
+
+def test_edge_soil_prediction_matches_server(tmp_path):
+    """The exported soil bundle predicts like SoilCarbonPredictor.predict_emissions"""
+    from soil_carbon_predictor import SoilCarbonPredictor
+
+    predictor = SoilCarbonPredictor()
+    df = predictor.generate_synthetic_training_data(n_samples=1000)
+    X = predictor.scaler.fit_transform(df[predictor.feature_names].values)
+    predictor.co2_model = GradientBoostingRegressor(n_estimators=20, max_depth=3, random_state=42)
+    predictor.co2_model.fit(X, df['co2_emissions_kg_ha_day'])
+    predictor.n2o_model = RandomForestRegressor(n_estimators=10, max_depth=5, random_state=42)
+    predictor.n2o_model.fit(X, df['n2o_emissions_kg_ha_day'])
+    predictor.export_compact(str(tmp_path / 'soil'))
+
+    edge = EdgeSoilPredictor.load(str(tmp_path / 'soil'))
+    for sample in ({}, {'nitrogen_ppm': 70, 'moisture_pct': 38, 'tillage_intensity': 3}):
+        expected = predictor.predict_emissions(sample)
+        expected.pop('prediction_timestamp')
+        result = edge.predict_emissions(sample)
+        for key in ('co2_feature_importance', 'n2o_feature_importance'):
+            assert result.pop(key) == pytest.approx(expected.pop(key))
+        assert result == pytest.approx(expected)
@@ -0,0 +1,61 @@
+"""
+CarbonSense AI - Micro-Batcher Tests
+Tests for batching concurrent requests into one call of a batch function
+"""
+
+import os
+import sys
+import threading
+import pytest
+
+# Add the backend directory to the path
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.insert(0, backend_dir)
+
+from micro_batcher import MicroBatcher
+
+def test_concurrent_callers_share_batches_and_get_their_own_results():
+    """Items submitted together run as one batch; each future resolves with its own result"""
+    release = threading.Event()
+    batches = []
+
+    def square_all(items):
+        release.wait(5)
+        batches.append(list(items))
+        return [item * item for item in items]
+
+    batcher = MicroBatcher(square_all, max_wait_ms=50, max_items=4)
+    futures = [batcher.submit(i) for i in range(10)]
+    release.set()
+    assert [future.result(5) for future in futures] == [i * i for i in range(10)]
+    assert sorted(sum(batches, [])) == list(range(10))
+    assert len(batches) < 10 and max(len(batch) for batch in batches) == 4
+    assert batcher.stats()['items'] == 10
+
+def test_failing_item_does_not_fail_its_batch():
+    """A batch that raises is rerun item by item, so only the bad item's caller sees the error"""
+    def invert_all(items):
+        return [1 / item for item in items]
+
+    batcher = MicroBatcher(invert_all, max_wait_ms=50)
+    futures = [batcher.submit(item) for item in (1, 0, 4)]
+    assert futures[0].result(5) == 1 and futures[2].result(5) == 0.25
+    with pytest.raises(ZeroDivisionError):
+        futures[1].result(5)
+    with pytest.raises(ZeroDivisionError):
+        batcher(0, timeout=5)
+
+def test_missing_results_fail_their_callers():
+    """Callers left without a result by a short batch get an error instead of waiting forever"""
+    release = threading.Event()
+
+    def drop_last(items):
+        release.wait(5)
+        return list(items)[:-1]
+
+    batcher = MicroBatcher(drop_last, max_wait_ms=50, max_items=3)
+    futures = [batcher.submit(i) for i in range(3)]
+    release.set()
+    assert [future.result(5) for future in futures[:2]] == [0, 1]
+    with pytest.raises(RuntimeError, match="2 results for 3 items"):
+        futures[2].result(5)
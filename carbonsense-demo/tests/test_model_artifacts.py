@@ -0,0 +1,255 @@
+"""
+CarbonSense AI - Model Artifact Tests
+Tests for load-once, checksum-verified model artifacts
+"""
+
+import os
+import sys
+import json
+import threading
+import joblib
+import pytest
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+# Add the ai_models directory to the path
+ai_models_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai_models'))
+sys.path.insert(0, ai_models_dir)
+
+from artifact_manager import ArtifactManager
+from compact_forest import export_bundle, load_bundle
+from model_registry import ModelRegistry, publish_bundled_models
+from model_compression import compress_model, merge_leaves
+from compact_forest import CompactForest, tree_arrays
+
+@pytest.fixture
+def artifact_dir(tmp_path):
+    """Artifact directory with one pickle, one JSON file and a manifest"""
+    joblib.dump(StandardScaler().fit([[0.0], [2.0]]), tmp_path / 'demo_scaler.pkl')
+    (tmp_path / 'demo_features.json').write_text(json.dumps(['speed_mph']))
+    ArtifactManager(base_dir=str(tmp_path)).write_manifest()
+    return tmp_path
+
+def test_artifacts_load_once_and_are_shared(artifact_dir):
+    """Concurrent and repeated gets return the same object from a single load"""
+    manager = ArtifactManager(base_dir=str(artifact_dir))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.get('demo_scaler.pkl'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(result is results[0] for result in results)
+    assert manager.get(str(artifact_dir / 'demo_scaler.pkl')) is results[0]
+    assert manager.get('demo_features.json') == ['speed_mph']
+    assert manager.stats()['load_counts'] == {'demo_scaler.pkl': 1, 'demo_features.json': 1}
+
+def test_checksum_mismatch_is_rejected(artifact_dir):
+    """A file changed behind the manifest's back fails verification and loading"""
+    (artifact_dir / 'demo_features.json').write_text(json.dumps(['engine_load_pct']))
+    manager = ArtifactManager(base_dir=str(artifact_dir))
+
+    assert manager.verify('demo_scaler.pkl') == 'verified'
+    with pytest.raises(ValueError):
+        manager.verify('demo_features.json')
+    with pytest.raises(ValueError):
+        manager.get('demo_features.json')
+    with pytest.raises(FileNotFoundError):
+        manager.verify_all(['demo_scaler.pkl', 'missing_model.pkl'])
+
+def test_register_updates_manifest_and_cache(artifact_dir):
+    """Saving a new artifact refreshes its checksum and shares the in-memory object"""
+    manager = ArtifactManager(base_dir=str(artifact_dir))
+    scaler = StandardScaler().fit([[1.0], [5.0]])
+    joblib.dump(scaler, artifact_dir / 'demo_scaler.pkl')
+
+    manager.register('demo_scaler.pkl', scaler)
+
+    assert manager.get('demo_scaler.pkl') is scaler
+    assert ArtifactManager(base_dir=str(artifact_dir)).verify('demo_scaler.pkl') == 'verified'
+
+def test_runtime_training_stays_out_of_the_bundled_directory(tmp_path, monkeypatch):
+    """Soil models trained at runtime are saved, checksummed and reloaded outside ai_models/"""
+    import soil_carbon_predictor
+    from artifact_manager import ARTIFACT_DIR
+    from soil_carbon_predictor import SoilCarbonPredictor
+
+    runtime_dir, bundled_dir = tmp_path / 'runtime', tmp_path / 'bundled'
+    bundled_dir.mkdir()
+    monkeypatch.setattr(soil_carbon_predictor, 'RUNTIME_DIR', str(runtime_dir))
+    monkeypatch.setattr(soil_carbon_predictor, 'ARTIFACT_DIR', str(bundled_dir))
+    def tracked_artifacts():
+        return {name: os.path.getmtime(os.path.join(ARTIFACT_DIR, name))
+                for name in os.listdir(ARTIFACT_DIR) if name.endswith(('.pkl', '.json'))}
+
+    tracked = tracked_artifacts()
+
+    predictor = SoilCarbonPredictor()
+    df = predictor.generate_synthetic_training_data(n_samples=500)
+    X = predictor.scaler.fit_transform(df[predictor.feature_names].values)
+    predictor.co2_model = GradientBoostingRegressor(n_estimators=5, max_depth=2, random_state=42)
+    predictor.co2_model.fit(X, df['co2_emissions_kg_ha_day'])
+    predictor.n2o_model = RandomForestRegressor(n_estimators=3, max_depth=3, random_state=42)
+    predictor.n2o_model.fit(X, df['n2o_emissions_kg_ha_day'])
+    predictor.save_models()
+
+    assert tracked_artifacts() == tracked
+    assert ArtifactManager(base_dir=str(runtime_dir)).verify('soil_n2o_model.pkl') == 'verified'
+    assert (runtime_dir / 'compact' / 'soil' / 'bundle.json').exists()
+    assert not [name for name in os.listdir(runtime_dir) if name.endswith('.tmp')]
+
+    reloaded = SoilCarbonPredictor()
+    assert reloaded.load_models()
+    assert reloaded.n2o_model is predictor.n2o_model
+
+def test_compact_export_matches_sklearn(tmp_path):
+    """Memory-mapped forests and scaler reproduce scikit-learn predictions"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 6))
+    y = X[:, 0] ** 2 + np.sin(X[:, 1]) + rng.normal(0, 0.1, 400)
+    scaler = StandardScaler().fit(X)
+    artifacts = {
+        'forest': RandomForestRegressor(n_estimators=15, max_depth=6, random_state=0).fit(X, y),
+        'boosting': GradientBoostingRegressor(n_estimators=25, max_depth=3, random_state=0).fit(X, y),
+        'scaler': scaler,
+        'features': [f"f{i}" for i in range(6)]
+    }
+
+    export_bundle(artifacts, str(tmp_path))
+    compact = load_bundle(str(tmp_path))
+
+    X_new = rng.normal(size=(300, 6))
+    assert isinstance(compact['forest'].value, np.memmap)
+    np.testing.assert_allclose(compact['forest'].predict(X_new), artifacts['forest'].predict(X_new), atol=1e-9)
+    np.testing.assert_allclose(compact['boosting'].predict(X_new), artifacts['boosting'].predict(X_new), atol=1e-9)
+    np.testing.assert_allclose(compact['scaler'].transform(X_new), scaler.transform(X_new))
+    assert compact['features'] == artifacts['features']
+
+def test_mmap_format_serves_compact_bundle(tmp_path):
+    """In mmap format the manager returns the shared compact export instead of pickles"""
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(200, 3))
+    bundle = {
+        'fuel_model': RandomForestRegressor(n_estimators=5, random_state=0).fit(X, X[:, 0]),
+        'emission_model': RandomForestRegressor(n_estimators=5, random_state=0).fit(X, X[:, 1]),
+        'scaler': StandardScaler().fit(X),
+        'features': ['a', 'b', 'c']
+    }
+    export_bundle(bundle, str(tmp_path / 'compact' / 'demo'))
+    manager = ArtifactManager(base_dir=str(tmp_path), model_format='mmap', compact_dir=str(tmp_path / 'compact'))
+
+    loaded = manager.load_bundle(str(tmp_path / 'demo'))
+
+    assert manager.load_bundle(str(tmp_path / 'demo')) is loaded
+    assert loaded['features'] == ['a', 'b', 'c']
+    np.testing.assert_allclose(loaded['fuel_model'].predict(X), bundle['fuel_model'].predict(X), atol=1e-9)
+
+def test_registry_publish_activate_and_rollback(tmp_path):
+    """Versions are published whole, activation moves CURRENT and rollback restores the previous one"""
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    assert registry.current_version() is None
+
+    first = publish_bundled_models(registry, activate=True)
+    second = publish_bundled_models(registry, activate=False)
+
+    assert registry.list_versions() == [first, second]
+    assert registry.current_version() == first
+    assert registry.verify(second)
+    assert os.path.exists(f"{registry.model_prefix(second)}_fuel_model.pkl")
+    assert not [name for name in os.listdir(registry.root) if name.startswith('.staging')]
+
+    registry.activate(second)
+    assert registry.current_prefix() == registry.model_prefix(second)
+    assert registry.rollback() == first
+    assert registry.current_version() == first
+    with pytest.raises(ValueError):
+        registry.rollback()
+    with pytest.raises(KeyError):
+        registry.activate('v9999')
+
+def test_registry_versions_serve_their_own_compact_export(tmp_path, monkeypatch):
+    """In mmap format each version loads the compact export published with it, or fails without one"""
+    import shutil
+    from artifact_manager import get_artifact_manager
+    from model_registry import load_version
+
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    with open(os.path.join(ai_models_dir, 'carbonsense_features.json'), 'r') as f:
+        features = json.load(f)
+    X = np.random.default_rng(2).normal(size=(200, len(features)))
+
+    def save_models(scale):
+        def save(prefix):
+            joblib.dump(RandomForestRegressor(n_estimators=3, random_state=0).fit(X, X[:, 0] * scale),
+                        f"{prefix}_fuel_model.pkl")
+            joblib.dump(RandomForestRegressor(n_estimators=3, random_state=0).fit(X, X[:, 1] * scale),
+                        f"{prefix}_emission_model.pkl")
+            joblib.dump(StandardScaler().fit(X), f"{prefix}_scaler.pkl")
+            with open(f"{prefix}_features.json", 'w') as f:
+                json.dump(features, f)
+        return save
+
+    versions = [registry.publish(save_models(1)), registry.publish(save_models(10))]
+    monkeypatch.setattr(get_artifact_manager(), 'model_format', 'mmap')
+
+    for version in versions:
+        optimizer = load_version(version, registry)
+        assert isinstance(optimizer.fuel_predictor, CompactForest)
+        expected = joblib.load(f"{registry.model_prefix(version)}_fuel_model.pkl").predict(X)
+        np.testing.assert_allclose(optimizer.fuel_predictor.predict(X), expected, atol=1e-9)
+
+    shutil.rmtree(registry.compact_dir(versions[1]))
+    with pytest.raises(FileNotFoundError):
+        load_version(versions[1], registry)
+
+def test_failed_publish_leaves_no_version(tmp_path):
+    """A save that fails midway never becomes a visible version"""
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+
+    def partial_save(prefix):
+        with open(f"{prefix}_fuel_model.pkl", 'wb') as f:
+            f.write(b'partial')
+        raise IOError("disk full")
+
+    with pytest.raises(IOError):
+        registry.publish(partial_save)
+    assert registry.list_versions() == []
+    assert os.listdir(registry.root) == ['versions']
+
+@pytest.mark.parametrize('model_class', [RandomForestRegressor, GradientBoostingRegressor])
+def test_compressed_model_is_smaller_and_close_to_original(tmp_path, model_class):
+    """Tree selection, leaf merging and float32 keep predictions within the tolerance budget"""
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(2000, 5))
+    y = 3 * X[:, 0] + np.sin(2 * X[:, 1]) + rng.normal(0, 0.3, 2000)
+    model = model_class(n_estimators=40, max_depth=5, random_state=0).fit(X[:1000], y[:1000])
+
+    report = compress_model(model, X[1000:], str(tmp_path), y=y[1000:], tolerance=0.05)
+
+    assert report['trees']['compressed'] < report['trees']['original']
+    assert report['size_bytes']['compressed'] < report['size_bytes']['original_pickle']
+    assert report['accuracy']['relative_rmse_vs_original'] <= 0.1
+    assert abs(report['accuracy']['rmse_delta_pct']) < 15
+    compact = CompactForest.load(str(tmp_path))
+    assert compact.threshold.dtype == np.float32 and compact.value.dtype == np.float32
+
+def test_merge_leaves_collapses_only_matching_siblings():
+    """Identical sibling leaves fold into their parent and the remaining nodes are renumbered"""
+    # root -> leaf(1.0) | node -> leaf(2.0), leaf(2.0)
+    tree = {
+        'children_left': np.array([1, -1, 3, -1, -1]),
+        'children_right': np.array([2, -1, 4, -1, -1]),
+        'feature': np.array([0, -2, 1, -2, -2]),
+        'threshold': np.array([0.5, -2.0, 0.0, -2.0, -2.0]),
+        'value': np.array([1.6, 1.0, 2.0, 2.0, 2.0]),
+        'n_node_samples': np.array([10, 4, 6, 3, 3])
+    }
+
+    assert len(merge_leaves(tree, 0.0)['value']) == 3
+    merged = merge_leaves(dict(tree, value=np.array([1.6, 1.0, 2.0, 1.9, 2.1])), 0.05)
+    assert len(merged['value']) == 5
+    merged = merge_leaves(dict(tree, value=np.array([1.6, 1.0, 2.0, 1.9, 2.1])), 0.5)
+    np.testing.assert_array_equal(merged['children_left'], [1, -1, -1])
+    assert merged['value'][2] == pytest.approx(2.0)
@@ -17,7 +17,8 @@ sys.path.insert(0, backend_dir)
 ai_models_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai_models'))
 sys.path.insert(0, ai_models_dir)
 
-from app import app
+from app import app, api
+from model_registry import ModelRegistry, publish_bundled_models
 
 @pytest.fixture
 def client():
@@ -138,6 +139,306 @@ def test_recommendations_consistency(client):
     assert abs(data1['optimized_parameters']['speed_mph'] - data2['optimized_parameters']['speed_mph']) < 1.0
     assert abs(data1['savings']['fuel_reduction_pct'] - data2['savings']['fuel_reduction_pct']) < 5.0
 
+def test_admin_model_swap_and_rollback(client, tmp_path, monkeypatch):
+    """A registry version is loaded in the background, swapped in, then rolled back"""
+    if api.model_registry is None:
+        pytest.skip("Real optimizer not available")
+    import time
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    monkeypatch.setattr(api, 'model_registry', registry)
+    monkeypatch.setattr(api, 'optimizer', api.optimizer)
+    monkeypatch.setattr(api, 'model_version', api.model_version)
+    monkeypatch.setattr(api, '_model_swap_listeners', [])
+    first = publish_bundled_models(registry, activate=True)
+    second = publish_bundled_models(registry, activate=False)
+
+    def wait_for_swap():
+        for _ in range(100):
+            status = client.get('/api/admin/models').get_json()
+            if status['swap']['state'] != 'loading':
+                return status
+            time.sleep(0.1)
+        raise AssertionError("model swap did not finish")
+
+    old_optimizer = api.optimizer
+    response = client.post('/api/admin/models/activate', json={'version': second})
+    assert response.status_code == 202
+    status = wait_for_swap()
+    assert status['swap']['state'] == 'active'
+    assert status['active_version'] == status['serving_version'] == second
+    assert api.optimizer is not old_optimizer
+
+    assert client.post('/api/admin/models/activate', json={'version': 'v9999'}).status_code == 404
+    response = client.post('/api/admin/models/rollback')
+    assert response.status_code == 202 and 'other workers' in response.get_json()['workers']
+    status = wait_for_swap()
+    assert status['active_version'] == status['serving_version'] == first
+
+    # Another worker activates a version: this one follows CURRENT
+    registry.activate(second)
+    assert api.follow_registry() == second
+    assert api.model_version == second and api.model_swap['source'] == 'registry'
+    assert api.follow_registry() is None
+
+def test_fallback_training_stays_out_of_the_bundled_directory(tmp_path, monkeypatch):
+    """Models trained because the bundled ones cannot load are saved to and reloaded from the runtime dir"""
+    import app as app_module
+    if app_module.use_fallback:
+        pytest.skip("Real optimizer not available")
+    import numpy as np
+    import carbon_optimizer
+    from artifact_manager import ARTIFACT_DIR, ArtifactManager
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.preprocessing import StandardScaler
+
+    runtime_dir = tmp_path / 'runtime'
+    monkeypatch.setattr(carbon_optimizer, 'RUNTIME_DIR', str(runtime_dir))
+    monkeypatch.setattr(app_module, 'RUNTIME_MODELS_PREFIX', str(runtime_dir / 'carbonsense'))
+    monkeypatch.setattr(app_module, 'BUNDLED_MODELS_PREFIX', str(tmp_path / 'missing' / 'carbonsense'))
+    for name in ('model_registry', 'optimizer', 'demo_data', 'models_loaded'):
+        monkeypatch.setattr(api, name, getattr(api, name))
+    monkeypatch.setattr(api, 'model_registry', None)
+    monkeypatch.setattr(api.potential_refresher, 'request', lambda: None)
+
+    def tracked_artifacts():
+        return {name: os.path.getmtime(os.path.join(ARTIFACT_DIR, name))
+                for name in os.listdir(ARTIFACT_DIR) if name.endswith(('.pkl', '.json'))}
+
+    def train(frame):
+        # Small stand-ins for the real training run
+        with open(os.path.join(ARTIFACT_DIR, 'carbonsense_features.json'), 'r') as f:
+            optimizer.feature_columns = json.load(f)
+        X = np.random.default_rng(0).normal(size=(100, len(optimizer.feature_columns)))
+        optimizer.fuel_predictor = RandomForestRegressor(n_estimators=2, random_state=0).fit(X, X[:, 0])
+        optimizer.emission_predictor = RandomForestRegressor(n_estimators=2, random_state=0).fit(X, X[:, 1])
+        optimizer.scaler = StandardScaler().fit(X)
+
+    tracked = tracked_artifacts()
+    optimizer = api.optimizer = app_module.RealCarbonOptimizer()
+    monkeypatch.setattr(optimizer, 'train_optimization_models', train)
+    assert api.load_demo_data(run_diagnostics=False) and api.models_loaded
+
+    assert tracked_artifacts() == tracked
+    assert ArtifactManager(base_dir=str(runtime_dir)).verify('carbonsense_fuel_model.pkl') == 'verified'
+    assert not [name for name in os.listdir(runtime_dir) if name.endswith('.tmp')]
+
+    # The next start finds the runtime-trained models instead of training again
+    api.optimizer = app_module.RealCarbonOptimizer()
+    assert api.load_active_models()
+    assert api.optimizer.fuel_predictor is optimizer.fuel_predictor
+
+def test_telemetry_ingestion_endpoint(client, monkeypatch):
+    """NDJSON and binary batches land in the store and the summary; invalid batches are rejected whole"""
+    import pandas as pd
+    from aggregates import RunningAggregates
+    from telemetry_codec import encode_binary, NDJSON_CONTENT_TYPE, BINARY_CONTENT_TYPE
+
+    monkeypatch.setattr(api, 'demo_data', None)
+    monkeypatch.setattr(api, 'aggregates', RunningAggregates())
+    monkeypatch.setattr(api, 'models_loaded', False)
+    frame = pd.read_csv(os.path.join(os.path.dirname(__file__), '..', 'data', 'demo_sprayer_telemetry.csv')).head(8)
+
+    ndjson = '\n'.join(json.dumps(record) for record in frame.iloc[:3].to_dict('records'))
+    response = client.post('/api/telemetry', data=ndjson, content_type=NDJSON_CONTENT_TYPE)
+    assert response.status_code == 200 and response.get_json()['ingested'] == 3
+
+    binary = encode_binary({name: frame[name].to_numpy()[3:] for name in frame.columns})
+    response = client.post('/api/telemetry', data=binary, content_type=BINARY_CONTENT_TYPE)
+    assert response.get_json()['total_records'] == 8
+    assert api.demo_data.latest() == frame.iloc[-1].to_dict()
+    summary = client.get('/api/summary').get_json()
+    assert summary['current_performance']['total_fuel_gallons'] == round(frame['fuel_rate_gph'].sum(), 1)
+
+    bad = json.dumps(dict(frame.iloc[0].to_dict(), speed_mph=-4)) + '\n' + json.dumps({'speed_mph': 5})
+    response = client.post('/api/telemetry', data=bad, content_type=NDJSON_CONTENT_TYPE)
+    assert response.status_code == 400
+    assert any('speed_mph' in error for error in response.get_json()['details'])
+    bad_time = json.dumps(dict(frame.iloc[0].to_dict(), timestamp='08/10/2025 09:33'))
+    response = client.post('/api/telemetry', data=bad_time, content_type=NDJSON_CONTENT_TYPE)
+    assert response.status_code == 400 and 'row 0: timestamp' in response.get_json()['details'][0]
+    assert client.post('/api/telemetry', data=b'CSTB\x01', content_type=BINARY_CONTENT_TYPE).status_code == 400
+    assert client.post('/api/telemetry', data=ndjson, content_type='text/csv').status_code == 400
+    assert len(api.demo_data) == 8
+
+def test_minimal_telemetry_record_needs_the_model_inputs(client, monkeypatch):
+    """A record without the optimizer's inputs is rejected; with them, summary and recommendations work"""
+    from aggregates import RunningAggregates
+    from optimization_potential import OptimizationPotential
+    from telemetry_codec import NDJSON_CONTENT_TYPE
+
+    monkeypatch.setattr(api, 'demo_data', None)
+    monkeypatch.setattr(api, 'aggregates', RunningAggregates())
+    monkeypatch.setattr(api, 'optimization_potential', OptimizationPotential())
+    monkeypatch.setattr(api.potential_refresher, 'request', lambda: None)
+
+    minimal = {'equipment_id': 'JD-9', 'speed_mph': 8.5, 'engine_load_pct': 78, 'fuel_rate_gph': 15}
+    response = client.post('/api/telemetry', data=json.dumps(minimal), content_type=NDJSON_CONTENT_TYPE)
+    assert response.status_code == 400
+    assert "missing field 'operation_type'" in response.get_json()['details']
+    assert api.demo_data is None
+
+    record = dict(minimal, implement_width_ft=30, field_acres=160, weather_factor=1.0,
+                  operation_type='cultivator', soil_type='loam', terrain_type='flat')
+    response = client.post('/api/telemetry', data=json.dumps(record), content_type=NDJSON_CONTENT_TYPE)
+    assert response.status_code == 200 and response.get_json()['ingested'] == 1
+
+    api.refresh_optimization_potential()
+    summary = client.get('/api/summary').get_json()
+    assert summary['current_performance']['total_fuel_gallons'] == 15
+    if hasattr(api.optimizer, 'optimize_speed_batch') and api.models_loaded:
+        assert summary['optimization_potential']['records_optimized'] == 1
+        assert summary['optimization_potential']['records_failed'] == 0
+    recommendations = client.get('/api/recommendations')
+    assert recommendations.status_code == 200 and recommendations.get_json()
+
+def test_streams_requested_during_warmup_start_once_ready(monkeypatch):
+    """A dashboard connecting during fast-mode warm-up is subscribed when warm-up finishes"""
+    import app as app_module
+    from warmup import WarmupManager
+
+    warming = WarmupManager(mode='fast')
+    warming.add_stage('models', lambda: None)
+    warming.on_ready(app_module.start_pending_streams)
+    monkeypatch.setattr(app_module, 'warmup', warming)
+
+    socket_client = app_module.socketio.test_client(app)
+    try:
+        socket_client.emit('start_streaming', {'protocol': 'delta'})
+        statuses = [message['args'][0] for message in socket_client.get_received()
+                    if message['name'] == 'streaming_status']
+        assert statuses == [dict(statuses[0], status='warming_up', queued=True)]
+
+        warming.run()
+        statuses = [message['args'][0] for message in socket_client.get_received()
+                    if message['name'] == 'streaming_status']
+        assert [status['status'] for status in statuses] == ['started']
+        assert statuses[0]['equipment_ids']
+    finally:
+        socket_client.disconnect()
+    assert not app_module.pending_streams
+
+def test_soil_prediction_rejects_invalid_top_k(client):
+    """top_k must be a positive integer; it is checked before any prediction runs"""
+    import app as app_module
+    if not app_module.soil_prediction_available:
+        pytest.skip("Soil carbon prediction not available")
+    for top_k in ('five', -1, 0, [3], True, 5.7, '3'):
+        response = client.post('/api/soil-carbon/predict', json={'nitrogen_ppm': 60, 'top_k': top_k})
+        assert response.status_code == 400
+        assert 'top_k' in response.get_json()['error']
+
+def test_grid_optimization_with_fallback_optimizer(client, monkeypatch):
+    """?method=grid falls back to the rule-based optimization when the fallback optimizer is in use"""
+    import app as app_module
+    monkeypatch.setattr(api, 'optimizer', app_module.CarbonOptimizer())
+    response = client.post('/api/optimize?method=grid', json={
+        'speed_mph': 8.5,
+        'engine_load_pct': 78,
+        'fuel_rate_gph': 15,
+        'operation_type': 'tillage'
+    })
+    assert response.status_code == 200
+    assert response.get_json()['optimized_parameters']['speed_mph'] > 0
+
+def test_concurrent_grid_requests_are_batched(client, monkeypatch):
+    """Concurrent ?method=grid requests run as shared batches and match the per-request grid result"""
+    if not hasattr(api.optimizer, 'optimize_speed_batch'):
+        pytest.skip("Real optimizer not available")
+    import threading
+    optimize_batcher = api.optimize_batcher
+    payloads = [{
+        'speed_mph': 5.5 + i * 0.5,
+        'engine_load_pct': 70 + i,
+        'implement_width_ft': 24,
+        'field_acres': 160,
+        'weather_factor': 1.0,
+        'operation_type': 'tillage',
+        'soil_type': 'loam',
+        'terrain_type': 'rolling',
+        'fuel_rate_gph': 15,
+        'fuel_cost_per_hour': 58.52
+    } for i in range(8)]
+    responses = [None] * len(payloads)
+    batches = optimize_batcher.stats()['batches']
+    # A wider window than the default few ms, so slow-starting test threads still meet
+    monkeypatch.setattr(optimize_batcher, 'max_wait', 0.2)
+
+    def post(i):
+        with app.test_client() as thread_client:
+            responses[i] = thread_client.post('/api/optimize?method=grid', json=payloads[i])
+
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(len(payloads))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    for payload, response in zip(payloads, responses):
+        expected = api.optimizer.optimize_speed_grid(payload)
+        assert response.status_code == 200
+        assert response.get_json()['optimized_parameters']['speed_mph'] == expected['optimal_speed']
+        assert response.get_json()['savings']['fuel_reduction_pct'] == expected['fuel_savings_percent']
+    assert optimize_batcher.stats()['batches'] - batches < len(payloads)
+    assert client.get('/api/optimize/stats').get_json()['batching']['items'] >= len(payloads)
+
+def test_identical_concurrent_requests_share_one_optimization(client, monkeypatch):
+    """N identical concurrent optimize requests run the models once and all get that result"""
+    if not hasattr(api.optimizer, 'optimize_speed_batch'):
+        pytest.skip("Real optimizer not available")
+    import time
+    import threading
+    payload = {
+        'speed_mph': 8.5,
+        'engine_load_pct': 78,
+        'implement_width_ft': 30,
+        'field_acres': 160,
+        'weather_factor': 1.05,
+        'operation_type': 'cultivator',
+        'soil_type': 'loam',
+        'terrain_type': 'flat',
+        'fuel_rate_gph': 15,
+        'fuel_cost_per_hour': 58.52
+    }
+    n_requests = 6
+    flight = api.optimize_flight
+    before = flight.stats()
+    fuel_model, emission_model = api.optimizer.fuel_predictor, api.optimizer.emission_predictor
+    evaluations = []
+
+    def counted(model, name):
+        predict = model.predict
+        def wrapper(X):
+            evaluations.append(name)
+            # Hold the computation until every other request has joined it
+            deadline = time.time() + 20
+            while flight.stats()['coalesced'] - before['coalesced'] < n_requests - 1 and time.time() < deadline:
+                time.sleep(0.01)
+            return predict(X)
+        return wrapper
+
+    monkeypatch.setattr(fuel_model, 'predict', counted(fuel_model, 'fuel'))
+    monkeypatch.setattr(emission_model, 'predict', counted(emission_model, 'emission'))
+    responses = [None] * n_requests
+
+    def post(i):
+        # Requests differ only in fields the models ignore
+        with app.test_client() as thread_client:
+            responses[i] = thread_client.post('/api/optimize?method=grid', json=dict(payload, fuel_rate_gph=15 + i))
+
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(n_requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+
+    assert sorted(evaluations) == ['emission', 'fuel']
+    results = [response.get_json()['optimized_parameters']['speed_mph'] for response in responses]
+    assert results == [results[0]] * n_requests
+    after = client.get('/api/optimize/stats').get_json()['singleflight']
+    assert after['executions'] - before['executions'] == 1
+    assert after['coalesced'] - before['coalesced'] == n_requests - 1
+    assert after['in_flight'] == 0
+
 if __name__ == '__main__':
     # Run tests with more detailed output
     pytest.main([__file__, '-v'])
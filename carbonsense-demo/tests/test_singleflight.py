@@ -0,0 +1,67 @@
+"""
+CarbonSense AI - Singleflight Tests
+Tests for sharing identical in-flight computations between concurrent callers
+"""
+
+import os
+import sys
+import time
+import threading
+
+# Add the backend directory to the path
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.insert(0, backend_dir)
+
+from singleflight import SingleFlight, optimization_key
+
+def test_concurrent_callers_share_one_computation_and_its_error():
+    """Callers of an in-flight key wait for it; an error reaches every one of them; nothing is cached"""
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def compute(value):
+        runs.append(value)
+        started.set()
+        release.wait(5)
+        if value < 0:
+            raise ValueError("negative")
+        return {'value': value}
+
+    for value, expected in ((3, {'value': 3}), (-1, ValueError)):
+        started.clear()
+        release.clear()
+        results = []
+
+        def call():
+            try:
+                results.append(flight.do(value, compute, value))
+            except ValueError as e:
+                results.append(type(e))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        assert started.wait(5)
+        followers = [threading.Thread(target=call) for _ in range(4)]
+        for follower in followers:
+            follower.start()
+        deadline = time.time() + 5
+        while flight.stats()['coalesced'] < 4 * len(runs) and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+        assert results == [expected] * 5
+
+    assert runs == [3, -1]
+    assert flight.stats() == {'calls': 10, 'executions': 2, 'coalesced': 8, 'errors': 1, 'in_flight': 0}
+    assert flight.do(3, compute, 3) == {'value': 3} and runs == [3, -1, 3]
+
+def test_optimization_key_ignores_fields_the_models_do_not_read():
+    """Only model inputs count and 75 matches 75.0, unless every field is asked for"""
+    record = {'speed_mph': 7.5, 'engine_load_pct': 75, 'soil_type': 'loam', 'timestamp': '2024-05-01T10:00:00'}
+    same = dict(record, engine_load_pct=75.0, timestamp='2024-05-01T10:00:02', fuel_rate_gph=14.2)
+    assert optimization_key(record, 'speed') == optimization_key(same, 'speed')
+    assert optimization_key(record, 'speed') != optimization_key(dict(record, speed_mph=7.6), 'speed')
+    assert optimization_key(record, 'speed') != optimization_key(record, 'recommendations')
+    assert optimization_key(record, inputs=None) != optimization_key(same, inputs=None)
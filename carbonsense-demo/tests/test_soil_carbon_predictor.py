@@ -0,0 +1,168 @@
+"""
+CarbonSense AI - Soil Carbon Predictor Tests
+Tests for batched soil emission predictions
+"""
+
+import os
+import sys
+import pytest
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+
+# Add the ai_models directory to the path
+ai_models_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai_models'))
+sys.path.insert(0, ai_models_dir)
+
+from soil_carbon_predictor import SoilCarbonPredictor
+from soil_data_generator import SyntheticSoilDataGenerator, iter_shards
+
+@pytest.fixture(scope='module')
+def predictor():
+    """Small in-memory predictor so tests never touch the saved model files"""
+    predictor = SoilCarbonPredictor()
+    df = predictor.generate_synthetic_training_data(n_samples=2000)
+    X = predictor.scaler.fit_transform(df[predictor.feature_names].values)
+    predictor.co2_model = GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=42)
+    predictor.co2_model.fit(X, df['co2_emissions_kg_ha_day'])
+    predictor.n2o_model = RandomForestRegressor(n_estimators=20, max_depth=6, random_state=42)
+    predictor.n2o_model.fit(X, df['n2o_emissions_kg_ha_day'])
+    return predictor
+
+def test_simulate_season_shapes_and_totals(predictor):
+    """Curves cover every day and cumulative totals match the daily sums"""
+    samples = [{'nitrogen_ppm': 40 + i, 'organic_carbon_pct': 2.0 + i / 10} for i in range(5)]
+    weather = {'temperature_c': np.linspace(5, 25, 30), 'moisture_pct': [22] * 30}
+
+    result = predictor.simulate_season(samples, weather=weather, field_area_ha=10)
+
+    assert result['n_days'] == 30
+    assert result['n_samples'] == 5
+    for key in ('co2_kg_ha', 'n2o_kg_ha', 'co2e_kg_ha'):
+        assert len(result['daily'][key]) == 30
+        assert result['seasonal_totals'][key] == pytest.approx(sum(result['daily'][key]), rel=1e-3)
+    assert len(result['per_sample_co2e_kg_ha']) == 5
+    assert result['field_totals_kg']['co2e_kg_ha'] == pytest.approx(result['seasonal_totals']['co2e_kg_ha'] * 10, rel=1e-3)
+
+def test_simulate_season_matches_single_day_prediction(predictor):
+    """Each simulated day equals a predict_emissions call for the same conditions"""
+    sample = {'nitrogen_ppm': 55, 'fertilizer_rate_kg_ha': 140, 'days_since_fertilization': 10}
+    schedule = [{'day': 3, 'rate_kg_ha': 90}]
+
+    result = predictor.simulate_season(sample, fertilization_schedule=schedule,
+                                       weather={'temperature_c': [12, 14, 16, 18, 20]})
+
+    before = predictor.predict_emissions(dict(sample, temperature_c=14, days_since_fertilization=11))
+    after = predictor.predict_emissions(dict(sample, temperature_c=20, fertilizer_rate_kg_ha=90,
+                                             days_since_fertilization=1))
+    assert result['daily']['co2e_kg_ha'][1] == pytest.approx(before['total_co2_equivalent_kg_ha_day'], abs=1e-3)
+    assert result['daily']['co2e_kg_ha'][4] == pytest.approx(after['total_co2_equivalent_kg_ha_day'], abs=1e-3)
+
+def test_simulate_season_rejects_ragged_weather(predictor):
+    """Weather series of different lengths, days missing a variable and empty seasons are refused"""
+    with pytest.raises(ValueError):
+        predictor.simulate_season({}, weather={'temperature_c': [10, 12], 'moisture_pct': [20]})
+    with pytest.raises(ValueError, match="day 1 is missing moisture_pct"):
+        predictor.simulate_season({}, weather=[{'temperature_c': 10, 'moisture_pct': 20}, {'temperature_c': 12}])
+    with pytest.raises(ValueError, match="n_days"):
+        predictor.simulate_season({}, n_days=0)
+
+def test_predict_emissions_from_the_compact_export(predictor, tmp_path, monkeypatch):
+    """In mmap mode the exported forests predict and report the exported feature importances"""
+    import artifact_manager
+    import soil_carbon_predictor
+    from artifact_manager import ArtifactManager
+    from compact_forest import CompactForest
+
+    monkeypatch.setitem(artifact_manager._artifact_managers, str(tmp_path),
+                        ArtifactManager(base_dir=str(tmp_path), model_format='mmap'))
+    monkeypatch.setattr(soil_carbon_predictor, 'ARTIFACT_DIR', str(tmp_path))
+    predictor.save_models(str(tmp_path))
+
+    served = SoilCarbonPredictor()
+    assert served.load_models()
+    assert isinstance(served.co2_model, CompactForest)
+    sample = {'nitrogen_ppm': 70, 'moisture_pct': 38, 'tillage_intensity': 3}
+    result, expected = served.predict_emissions(sample), predictor.predict_emissions(sample)
+    assert result['total_co2_equivalent_kg_ha_day'] == pytest.approx(expected['total_co2_equivalent_kg_ha_day'])
+    for key in ('co2_feature_importance', 'n2o_feature_importance'):
+        assert result[key] == pytest.approx(expected[key])
+
+def test_management_scenarios_ranked_by_reduction(predictor):
+    """Interventions are sorted by predicted CO2e reduction and agree with predict_emissions"""
+    sample = {'nitrogen_ppm': 70, 'tillage_intensity': 3, 'fertilizer_rate_kg_ha': 160,
+              'days_since_fertilization': 5}
+
+    scenarios = predictor.evaluate_management_scenarios(sample, top_k=4)
+
+    assert scenarios['scenarios_evaluated'] == 3 * 5 * 3
+    interventions = scenarios['top_interventions']
+    assert 0 < len(interventions) <= 4
+    reductions = [i['co2e_reduction_kg_ha_day'] for i in interventions]
+    assert reductions == sorted(reductions, reverse=True)
+    assert all(r > 0 and i['changes'] for r, i in zip(reductions, interventions))
+
+    best = interventions[0]
+    check = predictor.predict_emissions(dict(sample, tillage_intensity=best['tillage_intensity'],
+                                             fertilizer_rate_kg_ha=best['fertilizer_rate_kg_ha'],
+                                             days_since_fertilization=best['days_since_fertilization']))
+    assert best['total_co2_equivalent_kg_ha_day'] == pytest.approx(check['total_co2_equivalent_kg_ha_day'], abs=0.05)
+
+def test_recommendations_quote_scenario_numbers(predictor):
+    """Tillage advice carries the model-predicted reduction when scenarios are supplied"""
+    sample = {'nitrogen_ppm': 70, 'tillage_intensity': 3, 'fertilizer_rate_kg_ha': 160}
+    prediction = predictor.predict_emissions(sample)
+    scenarios = predictor.evaluate_management_scenarios(sample)
+
+    recommendations = predictor.get_recommendations(sample, prediction, scenarios)
+
+    by_type = {rec['type']: rec for rec in recommendations}
+    assert by_type['management_scenario']['potential_reduction'].endswith('kg/ha/day)')
+    best_tillage = scenarios['best_single_lever']['tillage_intensity']
+    assert f"{best_tillage['co2e_reduction_pct']:.1f}%" in by_type['tillage_management']['potential_reduction']
+
+def test_generator_is_reproducible_and_leaves_global_rng_alone():
+    """Same seed gives the same data and the global numpy RNG state is not reset"""
+    np.random.seed(7)
+    expected_next = np.random.random()
+    np.random.seed(7)
+
+    first = SyntheticSoilDataGenerator(seed=3).generate(500)
+    second = SyntheticSoilDataGenerator(seed=3).generate(500)
+
+    assert first.equals(second)
+    assert np.random.random() == expected_next
+    assert not first.equals(SyntheticSoilDataGenerator(seed=4).generate(500))
+
+def test_generator_streams_chunks_and_shards(tmp_path):
+    """Chunked streaming and npz shards cover exactly the requested rows"""
+    generator = SyntheticSoilDataGenerator(seed=1, chunk_size=400)
+
+    sizes = [len(chunk) for chunk in generator.iter_chunks(n_samples=1000)]
+    assert sizes == [400, 400, 200]
+
+    paths = generator.write_shards(str(tmp_path), n_samples=1000, fmt='npz')
+    assert len(paths) == 3
+    shards = list(iter_shards(str(tmp_path)))
+    assert sum(len(shard) for shard in shards) == 1000
+    assert shards[1].equals(list(generator.iter_chunks(n_samples=1000))[1])
+
+def test_train_models_from_shards(tmp_path, monkeypatch):
+    """Incremental training grows both ensembles across shards"""
+    SyntheticSoilDataGenerator(seed=5, chunk_size=1500).write_shards(str(tmp_path), n_samples=4500, fmt='npz')
+    predictor = SoilCarbonPredictor()
+    monkeypatch.setattr(predictor, 'save_models', lambda: None)
+    monkeypatch.setattr(predictor, '_new_co2_model', lambda n_estimators=200: GradientBoostingRegressor(
+        n_estimators=n_estimators, max_depth=3, random_state=42))
+    monkeypatch.setattr(predictor, '_new_n2o_model', lambda n_estimators=150: RandomForestRegressor(
+        n_estimators=n_estimators, max_depth=5, random_state=42))
+
+    results = predictor.train_models(retrain=True, shards=str(tmp_path))
+
+    assert results['shards'] == 3
+    assert results['training_rows'] < 4500
+    assert predictor.co2_model.n_estimators == 3 * 67
+    assert predictor.n2o_model.n_estimators == 3 * 50
+    assert results['co2_r2'] > 0.3
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
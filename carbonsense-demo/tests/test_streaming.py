@@ -0,0 +1,286 @@
+"""
+CarbonSense AI - Streaming Tests
+Tests for per-equipment streams, room fan-out, stream suspension, the tick scheduler, backpressure,
+resuming streams and the replay source
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import numpy as np
+from flask import Flask, request
+from flask_socketio import SocketIO
+
+# Add the backend directory to the path
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.insert(0, backend_dir)
+
+from streaming import StreamManager
+from tick_scheduler import TickScheduler
+from payload_protocol import StreamEncoder, ClientChannel, apply_message, flatten, unflatten
+from outbound import OutboundQueues
+from replay_source import ReplaySource
+from telemetry_store import TelemetryStore
+
+def make_stream_app(records, optimizations=None):
+    """Minimal Socket.IO app wired to a StreamManager the test ticks by hand"""
+    app = Flask(__name__)
+    socketio = SocketIO(app)
+    store = TelemetryStore()
+    store.append(records)
+    built = []
+
+    def build_frame(record):
+        built.append(record['equipment_id'])
+        if optimizations:
+            record['optimizations'] = optimizations
+        return record
+
+    manager = StreamManager(socketio, lambda: store, build_frame, autostart=False)
+
+    @socketio.on('start_streaming')
+    def start(data=None):
+        manager.subscribe(request.sid, data and data.get('equipment_ids'))
+
+    @socketio.on('stop_streaming')
+    def stop(data=None):
+        manager.unsubscribe(request.sid, data and data.get('equipment_ids'))
+
+    return app, socketio, manager, store, built
+
+def received(client):
+    return [message['args'][0]['equipment_id'] for message in client.get_received()
+            if message['name'] == 'telemetry_update']
+
+def test_frames_computed_once_per_equipment_and_routed_by_room():
+    """Subscribers of one machine share its frame and never receive another machine's frames"""
+    records = [{'equipment_id': equipment_id, 'speed_mph': 5.0 + i, 'fuel_rate_gph': 10.0}
+               for i in range(3) for equipment_id in ('T1', 'T2', 'T3')]
+    app, socketio, manager, _, built = make_stream_app(records)
+
+    watchers = [socketio.test_client(app) for _ in range(5)]
+    for client in watchers:
+        client.emit('start_streaming', {'equipment_ids': ['T1']})
+    other = socketio.test_client(app)
+    other.emit('start_streaming', {'equipment_ids': ['T2', 'unknown']})
+
+    assert manager.tick() == 2
+    assert sorted(built) == ['T1', 'T2']  # T3 has no subscribers and is never computed
+    assert all(received(client) == ['T1'] for client in watchers)
+    assert received(other) == ['T2']
+    status = manager.status()
+    assert status['streams']['T1']['subscribers'] == 5
+    assert status['frames_computed'] == 2 and status['frames_delivered'] == 6
+
+def test_idle_streams_are_suspended_and_resume_in_place():
+    """Unsubscribed streams stop computing and pick up their replay position on resubscribe"""
+    records = [{'equipment_id': 'T1', 'speed_mph': float(i)} for i in range(4)]
+    app, socketio, manager, store, built = make_stream_app(records)
+    client = socketio.test_client(app)
+
+    client.emit('start_streaming')
+    manager.tick()
+    client.emit('stop_streaming')
+    assert manager.tick() == 0
+    assert manager.status()['streams']['T1']['state'] == 'suspended'
+
+    # Records ingested while suspended join the stream's replay
+    store.append({'equipment_id': 'T9', 'speed_mph': 1.0})
+    client.emit('start_streaming')
+    manager.tick()
+    speeds = [message['args'][0]['speed_mph'] for message in client.get_received()
+              if message['name'] == 'telemetry_update']
+    assert speeds == [0.0, 1.0, 1.0]
+    assert sorted(built) == ['T1', 'T1', 'T9']
+
+def test_scheduler_ticks_each_key_and_drops_overruns():
+    """Keys tick independently on one loop; a still-running tick is never dispatched twice"""
+    scheduler = TickScheduler(interval=0.05, workers=2)
+    counts = {'fast': 0, 'slow': 0}
+    release = threading.Event()
+
+    def fast():
+        counts['fast'] += 1
+
+    def slow():
+        counts['slow'] += 1
+        release.wait(1)
+
+    scheduler.schedule('fast', fast, first_delay=0)
+    scheduler.schedule('slow', slow, first_delay=0)
+    time.sleep(0.5)
+    stats = scheduler.stats()
+    slow_before_release = counts['slow']
+    release.set()
+    scheduler.cancel('fast')
+    after_cancel = counts['fast']
+    time.sleep(0.2)
+    scheduler.stop()
+
+    assert 6 <= after_cancel <= 12
+    assert counts['fast'] - after_cancel <= 1  # only a tick already handed to a worker
+    assert slow_before_release == 1 and stats['overruns'] >= 5
+    assert stats['scheduled'] == 2 and stats['lag_ms']['p50'] < 50
+
+def test_streams_run_on_the_scheduler_until_unsubscribed():
+    """Subscribing schedules the stream with an immediate first frame; the last unsubscribe cancels it"""
+    records = [{'equipment_id': 'T1', 'speed_mph': float(i)} for i in range(4)]
+    app, socketio, manager, _, _ = make_stream_app(records)
+    manager.scheduler = TickScheduler(interval=0.05, workers=1)
+    client = socketio.test_client(app)
+
+    client.emit('start_streaming')
+    time.sleep(0.3)
+    client.emit('stop_streaming')
+    assert 'T1' not in manager.scheduler
+    frames = len(received(client))
+    time.sleep(0.15)
+    manager.scheduler.stop()
+
+    assert 3 <= frames <= 8
+    assert received(client) == []
+
+def test_delta_clients_rebuild_full_frames_from_fewer_bytes():
+    """Snapshot + deltas reproduce every full frame; unchanged recommendations are not resent"""
+    records = [{'equipment_id': 'T1', 'operator_id': 'OP_1', 'speed_mph': 5.0 + i / 3, 'soil_type': 'loam'}
+               for i in range(6)]
+    app, socketio, manager, _, _ = make_stream_app(records, {'optimal_speed_mph': 6.5, 'recommendations': ['Slow down']})
+    full, delta, limited = (socketio.test_client(app) for _ in range(3))
+    full.emit('start_streaming')
+    for client in (delta, limited):
+        manager.subscribe(socketio.server.manager.sid_from_eio_sid(client.eio_sid, '/'), ['T1'], protocol='delta',
+                          max_rate_hz=None if client is delta else 1e-6)
+
+    for _ in range(6):
+        manager.tick()
+    frames = [message['args'][0] for message in full.get_received() if message['name'] == 'telemetry_update']
+    messages = [message['args'][0] for message in delta.get_received() if message['name'] == 'telemetry_delta']
+
+    state = None
+    for frame, message in zip(frames, messages):
+        state = apply_message(state, message)
+        assert dict(unflatten(state['flat']), seq=state['seq']) == unflatten(flatten(frame))
+    assert [message['type'] for message in messages] == ['snapshot'] + ['delta'] * 5
+    fields = messages[0]['fields']
+    assert all({fields[int(index)] for index in message['changes']} == {'speed_mph'} for message in messages[1:])
+    assert sum(map(len, map(json.dumps, messages))) < sum(map(len, map(json.dumps, frames)))
+
+    # A client limited far below the stream rate only got the first frame, as a snapshot
+    limited_messages = [m['args'][0] for m in limited.get_received() if m['name'] == 'telemetry_delta']
+    assert [(m['type'], m['seq']) for m in limited_messages] == [('snapshot', 1)]
+
+def test_rate_limited_channel_coalesces_skipped_deltas():
+    """Skipped frames are merged into the next message, or replaced by a snapshot without coalescing"""
+    encoder = StreamEncoder('T1')
+    now = [0.0]
+    coalescing = ClientChannel(max_rate_hz=0.25, clock=lambda: now[0])
+    dropping = ClientChannel(max_rate_hz=0.25, coalesce=False, clock=lambda: now[0])
+    client_state, sent = {'coalescing': None, 'dropping': None}, []
+
+    for i, frame in enumerate([{'a': 1, 'b': 1}, {'a': 2, 'b': 1}, {'a': 2, 'b': 3}, {'a': 2}, {'a': 4}]):
+        now[0] = i * 2.0
+        message = encoder.encode(frame)
+        for name, channel in (('coalescing', coalescing), ('dropping', dropping)):
+            outgoing = channel.offer(message, encoder)
+            if outgoing is not None:
+                client_state[name] = apply_message(client_state[name], outgoing)
+                sent.append((name, outgoing['type']))
+
+    # Frames 0, 2 and 4 were due (every 4 s); both clients end on the latest frame
+    assert sent == [('coalescing', 'snapshot'), ('dropping', 'snapshot'), ('coalescing', 'delta'),
+                    ('dropping', 'snapshot'), ('coalescing', 'delta'), ('dropping', 'snapshot')]
+    assert client_state['coalescing'] == client_state['dropping'] == {'seq': 5, 'fields': ['a', 'b'], 'flat': {'a': 4}}
+
+def test_slow_clients_get_only_the_latest_frame():
+    """A client behind on its queue is left out of the room emit and holds one merged frame per stream"""
+    records = [{'equipment_id': 'T1', 'speed_mph': float(i), 'fuel_rate_gph': 10.0} for i in range(5)]
+    app, socketio, manager, _, _ = make_stream_app(records)
+    slow = set()
+    manager.outbound = OutboundQueues(socketio, max_queued=3, depth=lambda sid: 5 if sid in slow else 0)
+    fast_full, slow_full, slow_delta = (socketio.test_client(app) for _ in range(3))
+    sids = {client: socketio.server.manager.sid_from_eio_sid(client.eio_sid, '/')
+            for client in (fast_full, slow_full, slow_delta)}
+    fast_full.emit('start_streaming')
+    slow_full.emit('start_streaming')
+    manager.subscribe(sids[slow_delta], protocol='delta')
+
+    manager.tick()
+    slow.update((sids[slow_full], sids[slow_delta]))
+    for _ in range(3):
+        manager.tick()
+    backpressure = manager.status()['backpressure']
+    assert backpressure['held_frames'] == 2 and backpressure['dropped_frames'] == 4
+    assert backpressure['queue_depth']['slow_clients'] == 2
+    slow.clear()
+    manager.tick()
+
+    assert [m['args'][0]['speed_mph'] for m in fast_full.get_received()] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    # The held frame was replaced by newer ones and sent once the client drained its queue
+    assert [m['args'][0]['speed_mph'] for m in slow_full.get_received()] == [0.0, 4.0]
+    # Held deltas are merged, so the client stays in sequence
+    messages = [m['args'][0] for m in slow_delta.get_received()]
+    assert [(m['type'], m['seq']) for m in messages] == [('snapshot', 1), ('delta', 5)]
+    state = apply_message(apply_message(None, messages[0]), messages[1])
+    assert state['flat'] == flatten(records[4])
+    assert manager.status()['backpressure']['held_frames'] == 0
+
+def test_reconnecting_clients_get_only_the_frames_they_missed():
+    """Resuming from a sequence sends the missed frames (or one merged delta); too old or stale epochs get a snapshot"""
+    records = [{'equipment_id': 'T1', 'speed_mph': float(i), 'fuel_rate_gph': 10.0} for i in range(20)]
+    app, socketio, manager, _, _ = make_stream_app(records)
+    manager.replay_frames = 5
+    watcher = socketio.test_client(app)
+    watcher.emit('start_streaming')
+    manager.tick()
+    seen = [m['args'][0]['seq'] for m in watcher.get_received()]
+    watcher.disconnect()
+    for _ in range(3):
+        manager.tick()
+
+    def resume(protocol, last_seq, epoch=manager.epoch):
+        client = socketio.test_client(app)
+        sid = socketio.server.manager.sid_from_eio_sid(client.eio_sid, '/')
+        manager.subscribe(sid, ['T1'], protocol=protocol, resume={'epoch': epoch, 'seq': {'T1': last_seq}})
+        return [(m['name'], m['args'][0]) for m in client.get_received()]
+
+    (name, batch), = resume('full', seen[-1])
+    assert seen == [1] and name == 'telemetry_replay' and batch['type'] == 'replay'
+    assert [frame['seq'] for frame in batch['frames']] == [2, 3, 4]
+    assert [frame['speed_mph'] for frame in batch['frames']] == [1.0, 2.0, 3.0]
+    assert resume('full', 4) == []
+
+    # A delta client gets one delta from its last seq to the current one
+    (name, message), = resume('delta', 2)
+    assert (message['type'], message['base_seq'], message['seq']) == ('delta', 2, 4)
+    assert [message['changes'][index] for index in message['changes']] == [3.0]
+
+    # Older than the buffer, or sequences of a previous server run: start over from a snapshot
+    for _ in range(5):
+        manager.tick()
+    (name, batch), = resume('full', 2)
+    assert batch['type'] == 'snapshot' and [frame['seq'] for frame in batch['frames']] == [9]
+    (name, message), = resume('delta', 8, epoch='previous-run')
+    assert (message['type'], message['seq']) == ('snapshot', 9)
+
+def test_replay_source_adds_block_noise_and_picks_up_appended_rows():
+    """Records match the store plus the live variation, drawn a block at a time; new rows join on wrap-around"""
+    store = TelemetryStore()
+    store.append([{'equipment_id': 'T1', 'speed_mph': float(i), 'soil_type': 'loam'} for i in range(3)])
+    rows = [np.arange(3)]
+    source = ReplaySource(lambda: (store, rows[0]), noise={'speed_mph': 0.5, 'missing_column': 1.0},
+                          block_size=4, seed=0)
+    records = source.records()
+
+    first = [next(records) for _ in range(5)]
+    assert [record['soil_type'] for record in first] == ['loam'] * 5
+    variation = np.array([record['speed_mph'] for record in first]) - np.array([0.0, 1.0, 2.0, 0.0, 1.0])
+    assert np.all(variation != 0) and np.all(np.abs(variation) < 0.5 * 5)
+    assert all(type(record['speed_mph']) is float for record in first)
+    assert source.blocks == 2
+
+    store.append({'equipment_id': 'T1', 'speed_mph': 3.0, 'soil_type': 'clay'})
+    rows[0] = np.arange(4)
+    assert [next(records)['soil_type'] for _ in range(3)] == ['loam', 'clay', 'loam']
+    assert list(ReplaySource(lambda: (None, None)).records()) == []
@@ -0,0 +1,78 @@
+"""
+CarbonSense AI - Telemetry Codec Tests
+Tests for NDJSON and binary columnar payload decoding and bulk validation
+"""
+
+import os
+import sys
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+sys.path.insert(0, backend_dir)
+
+from telemetry_codec import (decode_payload, encode_binary, TelemetryPayloadError,
+                             NDJSON_CONTENT_TYPE, BINARY_CONTENT_TYPE)
+
+@pytest.fixture(scope='module')
+def frame():
+    return pd.read_csv(os.path.join(data_dir, 'demo_planter_telemetry.csv')).head(500)
+
+def test_ndjson_and_binary_decode_to_the_same_columns(frame):
+    """Both payloads decode to the frame's columns, missing values included"""
+    frame = frame.copy()
+    frame['operation_name'] = frame['operation_name'].astype(object)
+    frame.loc[3, 'operation_name'] = None
+    frame.loc[4, 'latitude'] = np.nan
+
+    binary = encode_binary({name: frame[name].to_numpy() for name in frame.columns})
+    ndjson = '\n'.join(json.dumps({k: (None if v != v else v) for k, v in record.items()})
+                       for record in frame.to_dict('records'))
+    for body, content_type in ((binary, BINARY_CONTENT_TYPE), (ndjson.encode(), NDJSON_CONTENT_TYPE + '; charset=utf-8')):
+        columns, n_rows = decode_payload(body, content_type)
+        assert n_rows == len(frame)
+        pd.testing.assert_frame_equal(pd.DataFrame(columns)[list(frame.columns)], frame, check_dtype=False)
+        assert columns['engine_rpm'].dtype.kind == 'i'
+
+def test_validation_reports_rows_and_rejects_malformed_payloads(frame):
+    """Out-of-range, missing and non-numeric values are reported per row"""
+    records = frame.head(3).to_dict('records')
+    records[1]['engine_load_pct'] = 180
+    del records[2]['equipment_id']
+    with pytest.raises(TelemetryPayloadError) as error:
+        decode_payload('\n'.join(map(json.dumps, records)).encode(), NDJSON_CONTENT_TYPE)
+    assert any(message.startswith('row 1: engine_load_pct') for message in error.value.errors)
+    assert "row 2: 'equipment_id' is required" in error.value.errors
+
+    records[1]['engine_load_pct'] = 'high'
+    with pytest.raises(TelemetryPayloadError, match="Non-numeric"):
+        decode_payload('\n'.join(map(json.dumps, records)).encode(), NDJSON_CONTENT_TYPE)
+    with pytest.raises(TelemetryPayloadError, match="line 2"):
+        decode_payload(b'{"speed_mph": 5}\n{"speed_mph": ', NDJSON_CONTENT_TYPE)
+
+    binary = encode_binary({name: frame[name].to_numpy() for name in frame.columns})
+    with pytest.raises(TelemetryPayloadError, match="malformed|Truncated"):
+        decode_payload(binary[:len(binary) // 2], BINARY_CONTENT_TYPE)
+
+    minimal = {'equipment_id': ['JD1'], 'speed_mph': [6.0], 'engine_load_pct': [70.0], 'fuel_rate_gph': [20.0]}
+    with pytest.raises(TelemetryPayloadError) as error:
+        decode_payload(encode_binary(minimal), BINARY_CONTENT_TYPE)
+    # The optimizer's model inputs are required too
+    assert "missing field 'implement_width_ft'" in error.value.errors
+    assert "missing field 'terrain_type'" in error.value.errors
+
+    records = frame.head(3).to_dict('records')
+    records[1]['timestamp'] = '08/10/2025 09:33'
+    with pytest.raises(TelemetryPayloadError) as error:
+        decode_payload('\n'.join(map(json.dumps, records)).encode(), NDJSON_CONTENT_TYPE)
+    assert error.value.errors == ["row 1: timestamp='08/10/2025 09:33' is not an ISO 8601 date/time"]
+
+    columns, _ = decode_payload(encode_binary(dict(minimal, implement_width_ft=[24.0], field_acres=[160.0],
+                                                   weather_factor=[1.0], operation_type=['planter'],
+                                                   soil_type=['loam'], terrain_type=['flat'])),
+                                BINARY_CONTENT_TYPE)
+    assert columns['timestamp'][0] is not None
@@ -0,0 +1,101 @@
+"""
+CarbonSense AI - Telemetry Loader Tests
+Tests for telemetry file discovery, the dtype schema and the columnar cache
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add the backend directory to the path
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+sys.path.insert(0, backend_dir)
+
+from telemetry_loader import (discover_telemetry_files, load_telemetry_frame, load_telemetry_store,
+                              current_cache_path, TELEMETRY_SCHEMA, COMBINED_FILE)
+
+def make_data_dir(tmp_path, rows=200):
+    """Small copies of the demo telemetry files plus a combined file that must be ignored"""
+    source_dir = tmp_path / 'data'
+    source_dir.mkdir()
+    frames = []
+    for operation in ('cultivator', 'planter', 'sprayer'):
+        frame = pd.read_csv(os.path.join(data_dir, f"demo_{operation}_telemetry.csv")).head(rows)
+        frame.to_csv(source_dir / f"demo_{operation}_telemetry.csv", index=False)
+        frames.append(frame)
+    pd.concat(frames).to_csv(source_dir / COMBINED_FILE, index=False)
+    return str(source_dir), pd.concat(frames, ignore_index=True)
+
+def test_loader_applies_schema_and_skips_combined_file(tmp_path):
+    """Per-operation files are merged once with the schema dtypes and the original values"""
+    source_dir, expected = make_data_dir(tmp_path)
+    files = discover_telemetry_files(source_dir)
+    assert [os.path.basename(path) for path in files] == [
+        'demo_cultivator_telemetry.csv', 'demo_planter_telemetry.csv', 'demo_sprayer_telemetry.csv']
+
+    frame = load_telemetry_frame(source_dir, use_cache=False)
+    assert len(frame) == len(expected) == 600
+    for name, dtype in TELEMETRY_SCHEMA.items():
+        assert str(frame[name].dtype) == dtype, name
+    assert (frame['timestamp'] == pd.to_datetime(expected['timestamp'])).all()
+    assert (frame['equipment_id'].astype(str) == expected['equipment_id']).all()
+    np.testing.assert_allclose(frame['fuel_rate_gph'], expected['fuel_rate_gph'], rtol=1e-6)
+    assert (frame['engine_rpm'] == expected['engine_rpm']).all()
+
+def test_cache_is_reused_and_invalidated(tmp_path):
+    """The cache serves later loads, projections included, and is rebuilt when a source changes"""
+    source_dir, _ = make_data_dir(tmp_path)
+    cache_dir = str(tmp_path / 'cache')
+
+    parsed = load_telemetry_frame(source_dir, cache_dir=cache_dir)
+    assert os.path.exists(os.path.join(current_cache_path(cache_dir), 'manifest.json'))
+    cached = load_telemetry_frame(source_dir, cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(cached, parsed)
+
+    projected = load_telemetry_frame(source_dir, columns=['speed_mph', 'operation_type'], cache_dir=cache_dir)
+    assert list(projected.columns) == ['speed_mph', 'operation_type']
+    assert projected['operation_type'].dtype == 'category'
+
+    # Dropping a source file changes the signature, so the cache is rebuilt without it
+    os.remove(os.path.join(source_dir, 'demo_sprayer_telemetry.csv'))
+    assert len(load_telemetry_frame(source_dir, cache_dir=cache_dir)) == 400
+
+def test_store_from_cache_matches_csv_records(tmp_path):
+    """The store serves cached columns and copies them only once it is appended to"""
+    source_dir, expected = make_data_dir(tmp_path, rows=50)
+    cache_dir = str(tmp_path / 'cache')
+    load_telemetry_frame(source_dir, cache_dir=cache_dir)
+
+    store = load_telemetry_store(source_dir, cache_dir=cache_dir)
+    assert len(store) == 150
+    first = store.record(0)
+    assert first['equipment_id'] == expected['equipment_id'][0]
+    assert pd.Timestamp(first['timestamp']) == pd.Timestamp(expected['timestamp'][0])
+    assert first['speed_mph'] == expected['speed_mph'][0]
+
+    store.append([first])
+    assert len(store) == 151
+    assert store.latest() == first
+
+def test_cache_rebuild_keeps_the_version_readers_hold(tmp_path):
+    """A rebuild publishes a new version through CURRENT; stores on the previous one keep working"""
+    source_dir, expected = make_data_dir(tmp_path, rows=50)
+    cache_dir = str(tmp_path / 'cache')
+    load_telemetry_frame(source_dir, cache_dir=cache_dir)
+    first = current_cache_path(cache_dir)
+    store = load_telemetry_store(source_dir, cache_dir=cache_dir)
+
+    for rebuild in range(3):
+        # A changed source invalidates the cache and forces a rebuild
+        expected.head(40 + rebuild).to_csv(os.path.join(source_dir, 'demo_sprayer_telemetry.csv'), index=False)
+        assert len(load_telemetry_frame(source_dir, cache_dir=cache_dir)) == 140 + rebuild
+        if rebuild == 0:
+            # The version replaced last is still on disk for its readers
+            assert os.path.isdir(first) and current_cache_path(cache_dir) != first
+            assert store.record(149)['equipment_id'] == expected['equipment_id'][149]
+
+    versions = [name for name in os.listdir(cache_dir) if os.path.isdir(os.path.join(cache_dir, name))]
+    assert len(versions) == 2 and os.path.basename(current_cache_path(cache_dir)) in versions
+    assert not [name for name in os.listdir(cache_dir) if name.endswith('.tmp')]
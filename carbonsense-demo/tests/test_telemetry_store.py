@@ -0,0 +1,63 @@
+"""
+CarbonSense AI - Telemetry Store Tests
+Tests for the columnar telemetry store and its DataFrame adapters
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add the backend directory to the path
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+sys.path.insert(0, backend_dir)
+
+from telemetry_store import TelemetryStore
+
+def load_frame():
+    return pd.concat([pd.read_csv(os.path.join(data_dir, f"demo_{operation}_telemetry.csv")).head(1500)
+                      for operation in ('cultivator', 'planter', 'sprayer')], ignore_index=True)
+
+def test_store_round_trips_the_frame():
+    """Batches appended in any input shape read back as the original DataFrame"""
+    df = load_frame()
+    store = TelemetryStore(capacity=16)
+    store.append(df.iloc[:1000])
+    store.append(df.iloc[1000:4000].to_dict('records'))
+    store.append({name: df[name].to_numpy()[4000:] for name in df.columns})
+    store.append({})
+
+    # Frames carry parsed timestamps; records keep the ISO strings
+    parsed = df.assign(timestamp=pd.to_datetime(df['timestamp']))
+    assert len(store) == len(df)
+    pd.testing.assert_frame_equal(store.to_frame(), parsed)
+    pd.testing.assert_frame_equal(store.iloc[100:250], parsed.iloc[100:250].reset_index(drop=True))
+    assert store.latest() == df.iloc[-1].to_dict()
+    assert store.iloc[1234].to_dict() == df.iloc[1234].to_dict()
+    assert store.records(10, 12) == df.iloc[10:12].to_dict('records')
+    assert store.memory_usage() < df.memory_usage(deep=True).sum()
+
+def test_columns_are_typed_and_sliced_without_copies():
+    """Categories are integer codes, numbers stay native and row ranges are views"""
+    store = TelemetryStore.from_frame(load_frame())
+
+    codes = store.column('operation_type')
+    assert codes.dtype == np.int32
+    assert store.dictionary('operation_type') == ['cultivator', 'planter', 'sprayer']
+    assert type(store.latest()['engine_rpm']) is int and type(store.latest()['speed_mph']) is float
+
+    view = store.column('fuel_rate_gph', 200, 400)
+    assert len(view) == 200 and np.shares_memory(view, store.column('fuel_rate_gph'))
+    assert list(store.slice(0, 5)) == store.columns
+
+def test_append_handles_missing_and_new_columns():
+    """Missing values, new columns and non-integer values in integer columns are kept"""
+    store = TelemetryStore.from_frame(load_frame().head(3))
+    store.append({'speed_mph': 6.5, 'engine_rpm': 1850.5, 'soil_type': 'peat', 'rain_mm': 2.0})
+
+    latest = store.latest()
+    assert latest['engine_rpm'] == 1850.5 and latest['soil_type'] == 'peat' and latest['rain_mm'] == 2.0
+    assert latest['operation_type'] is None and latest['timestamp'] is None
+    assert np.isnan(store.record(0)['rain_mm'])
+    assert store['engine_rpm'].dtype == np.float64 and store.record(0)['engine_rpm'] == load_frame()['engine_rpm'][0]
@@ -0,0 +1,99 @@
+"""
+CarbonSense AI - Warm-up Tests
+Tests for staged startup and readiness reporting
+"""
+
+import os
+import sys
+import json
+import subprocess
+import threading
+
+# Add the backend directory to the path
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.insert(0, backend_dir)
+ai_models_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai_models'))
+
+from warmup import WarmupManager
+from startup_profiler import StartupProfiler
+
+def test_ready_after_required_stages_before_optional():
+    """Optional stages run after readiness and a failing stage degrades instead of aborting"""
+    manager = WarmupManager(mode='fast')
+    seen = []
+
+    def failing():
+        raise RuntimeError("model file missing")
+
+    manager.add_stage('diagnostics', lambda: seen.append(('diagnostics', manager.is_ready)), required=False)
+    manager.add_stage('models', lambda: seen.append(('models', manager.is_ready)))
+    manager.add_stage('data', failing)
+
+    manager.run()
+
+    assert seen == [('models', False), ('diagnostics', True)]
+    progress = manager.progress()
+    assert progress['ready'] and progress['stages_completed'] == progress['stages_total'] == 3
+    states = {stage['name']: stage['state'] for stage in progress['stages']}
+    assert states == {'diagnostics': 'done', 'models': 'done', 'data': 'failed'}
+    assert progress['time_to_ready_s'] is not None
+
+def test_ready_callbacks_run_once_ready():
+    """Callbacks registered during warm-up run when it becomes ready; later ones run right away"""
+    manager = WarmupManager(mode='fast')
+    calls = []
+    manager.add_stage('models', lambda: calls.append('models'))
+    manager.on_ready(lambda: calls.append('ready'))
+    assert calls == []
+
+    manager.run()
+    manager.on_ready(lambda: calls.append('late'))
+    assert calls == ['models', 'ready', 'late']
+
+def test_background_start_reports_progress():
+    """Background warm-up reports the running stage until it finishes"""
+    manager = WarmupManager(mode='fast')
+    release = threading.Event()
+    manager.add_stage('models', lambda: release.wait(5))
+
+    manager.start(background=True)
+    try:
+        assert not manager.wait_until_ready(0.05)
+        assert manager.progress()['current_stage'] == 'models'
+    finally:
+        release.set()
+    assert manager.wait_until_ready(5)
+    manager.record_first_byte()
+    assert manager.progress()['time_to_first_byte_s'] is not None
+
+def test_startup_profiler_records_imports_and_phases(tmp_path):
+    """Imports inside a warm-up stage are timed, attributed to it and written to the report"""
+    (tmp_path / 'profiled_outer.py').write_text("import profiled_inner\n")
+    (tmp_path / 'profiled_inner.py').write_text("import time\ntime.sleep(0.02)\n")
+    sys.path.insert(0, str(tmp_path))
+    profiler = StartupProfiler(str(tmp_path / 'profile.json')).install()
+    try:
+        manager = WarmupManager(profiler=profiler)
+        manager.add_stage('models', lambda: __import__('profiled_outer'))
+        manager.run()
+    finally:
+        profiler.uninstall()
+        sys.path.remove(str(tmp_path))
+
+    report = json.loads((tmp_path / 'profile.json').read_text())
+    modules = {entry['module']: entry for entry in report['imports']['slowest']}
+    assert modules['profiled_inner']['self_s'] >= 0.02
+    assert modules['profiled_outer']['self_s'] < modules['profiled_outer']['cumulative_s']
+    assert modules['profiled_outer']['phase'] == 'models' and modules['profiled_outer']['top_level']
+    assert [phase['name'] for phase in report['phases']] == ['models']
+    assert 'ready' in report['marks'] and report['warmup']['ready']
+
+def test_model_modules_defer_heavy_imports():
+    """Importing the optimizer and soil modules does not load pandas, scikit-learn or scipy"""
+    code = (
+        "import sys; sys.path.insert(0, %r)\n"
+        "import carbon_optimizer, soil_carbon_predictor, model_registry, optimizer_hotfix\n"
+        "print(sorted(m for m in ('pandas', 'sklearn', 'scipy') if m in sys.modules))"
+    ) % ai_models_dir
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == '[]'